@@ -5,13 +5,29 @@
 
 import os
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 # 環境変数を読み込み
 load_dotenv()
 
 
+def _getenv_bool(name: str, default: bool) -> bool:
+    """真偽値の環境変数を読み込む（true/1/yes/onを真とみなす）"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+
+def _getenv_optional_int(name: str) -> Optional[int]:
+    """整数の環境変数を読み込む（未設定または空の場合はNone）"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return None
+    return int(value)
+
+
 @dataclass
 class OllamaConfig:
     """Ollama関連の設定"""
@@ -19,6 +35,10 @@ class OllamaConfig:
     port: int
     llm_model: str
     embed_model: str
+    embed_concurrency: int
+    embed_target_latency: float
+    embed_max_batch_size: int
+    embed_max_batch_chars: int
 
     @property
     def base_url(self) -> str:
@@ -31,7 +51,30 @@ class QdrantConfig:
     """Qdrant関連の設定"""
     host: str
     port: int
+    grpc_port: int
+    prefer_grpc: bool
+    path: Optional[str]
     collection_name: str
+    upload_batch_size: int
+    upload_parallel: int
+    hnsw_m: int
+    hnsw_ef_construct: int
+    hnsw_ef: Optional[int]
+    hnsw_on_disk: bool
+    on_disk_vectors: bool
+    on_disk_payload: bool
+    default_segment_number: int
+    max_segment_size_kb: Optional[int]
+    memmap_threshold_kb: Optional[int]
+    indexing_threshold_kb: Optional[int]
+    quantization: str
+    quantization_quantile: float
+    quantization_always_ram: bool
+    oversampling: Optional[float]
+    rescore: bool
+    keep_versions: int
+    async_writes: bool
+    max_outstanding_writes: int
 
     @property
     def url(self) -> str:
@@ -47,6 +90,73 @@ class RAGConfig:
     top_k: int
     temperature: float
     max_tokens: int
+    retrieval_mode: str
+    hybrid_prefetch: int
+    mmr_enabled: bool
+    mmr_lambda: float
+    mmr_fetch_k: int
+
+
+@dataclass
+class IngestConfig:
+    """ドキュメント取り込み関連の設定"""
+    batch_size: int
+    max_chunks_in_flight: int
+    workers: int
+    state_dir: str
+    pipelined: bool
+    bulk_load: bool
+    index_timeout: float
+
+
+@dataclass
+class EmbedCacheConfig:
+    """埋め込みキャッシュ関連の設定"""
+    enabled: bool
+    path: str
+    max_mb: int
+    dtype: str
+    query_cache_size: int
+
+
+@dataclass
+class AnswerCacheConfig:
+    """回答キャッシュ関連の設定"""
+    enabled: bool
+    path: str
+    max_mb: float
+    ttl_seconds: int
+
+
+@dataclass
+class DedupConfig:
+    """重複チャンク除去関連の設定"""
+    enabled: bool
+    threshold: float
+    ngram_size: int
+    num_perm: int
+    bands: int
+    max_entries: int
+
+
+@dataclass
+class SparseConfig:
+    """疎ベクトル（文字n-gramのBM25）関連の設定"""
+    enabled: bool
+    ngram_sizes: Tuple[int, ...]
+    k1: float
+    b: float
+    avg_length: Optional[float]
+
+
+@dataclass
+class VectorStoreConfig:
+    """ベクターストアのバックエンド関連の設定"""
+    backend: str
+    numpy_path: str
+    numpy_dtype: str
+    numpy_flush_rows: int
+    numpy_retain_seconds: float
 
 
 @dataclass
@@ -62,6 +172,12 @@ class Config:
         self.ollama = self._load_ollama_config()
         self.qdrant = self._load_qdrant_config()
         self.rag = self._load_rag_config()
+        self.ingest = self._load_ingest_config()
+        self.embed_cache = self._load_embed_cache_config()
+        self.dedup = self._load_dedup_config()
+        self.answer_cache = self._load_answer_cache_config()
+        self.sparse = self._load_sparse_config()
+        self.vector_store = self._load_vector_store_config()
         self.document = self._load_document_config()
 
     def _load_ollama_config(self) -> OllamaConfig:
@@ -70,7 +186,11 @@ class Config:
             host=os.getenv("OLLAMA_HOST", "ollama"),
             port=int(os.getenv("OLLAMA_PORT", "11434")),
             llm_model=os.getenv("OLLAMA_LLM_MODEL", "hf.co/mmnga/tokyotech-llm-Llama-3.1-Swallow-8B-Instruct-v0.1-gguf:Q4_K_M"),
-            embed_model=os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+            embed_model=os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text"),
+            embed_concurrency=int(os.getenv("OLLAMA_EMBED_CONCURRENCY", "1")),
+            embed_target_latency=float(os.getenv("OLLAMA_EMBED_TARGET_LATENCY", "2.0")),
+            embed_max_batch_size=int(os.getenv("OLLAMA_EMBED_MAX_BATCH_SIZE", "128")),
+            embed_max_batch_chars=int(os.getenv("OLLAMA_EMBED_MAX_BATCH_CHARS", "32000"))
         )
 
     def _load_qdrant_config(self) -> QdrantConfig:
@@ -78,7 +198,30 @@ class Config:
         return QdrantConfig(
             host=os.getenv("QDRANT_HOST", "qdrant"),
             port=int(os.getenv("QDRANT_PORT", "6333")),
-            collection_name=os.getenv("QDRANT_COLLECTION_NAME", "documents")
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            prefer_grpc=_getenv_bool("QDRANT_PREFER_GRPC", False),
+            path=os.getenv("QDRANT_PATH") or None,
+            collection_name=os.getenv("QDRANT_COLLECTION_NAME", "documents"),
+            upload_batch_size=int(os.getenv("QDRANT_UPLOAD_BATCH_SIZE", "64")),
+            upload_parallel=int(os.getenv("QDRANT_UPLOAD_PARALLEL", "1")),
+            hnsw_m=int(os.getenv("QDRANT_HNSW_M", "16")),
+            hnsw_ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100")),
+            hnsw_ef=_getenv_optional_int("QDRANT_HNSW_EF"),
+            hnsw_on_disk=_getenv_bool("QDRANT_HNSW_ON_DISK", False),
+            on_disk_vectors=_getenv_bool("QDRANT_ON_DISK_VECTORS", False),
+            on_disk_payload=_getenv_bool("QDRANT_ON_DISK_PAYLOAD", True),
+            default_segment_number=int(os.getenv("QDRANT_DEFAULT_SEGMENT_NUMBER", "0")),
+            max_segment_size_kb=_getenv_optional_int("QDRANT_MAX_SEGMENT_SIZE_KB"),
+            memmap_threshold_kb=_getenv_optional_int("QDRANT_MEMMAP_THRESHOLD_KB"),
+            indexing_threshold_kb=_getenv_optional_int("QDRANT_INDEXING_THRESHOLD_KB"),
+            quantization=os.getenv("QDRANT_QUANTIZATION", "none").strip().lower(),
+            quantization_quantile=float(os.getenv("QDRANT_QUANTIZATION_QUANTILE", "0.99")),
+            quantization_always_ram=_getenv_bool("QDRANT_QUANTIZATION_ALWAYS_RAM", True),
+            oversampling=float(os.getenv("QDRANT_OVERSAMPLING")) if os.getenv("QDRANT_OVERSAMPLING") else None,
+            rescore=_getenv_bool("QDRANT_RESCORE", True),
+            keep_versions=int(os.getenv("QDRANT_KEEP_VERSIONS", "1")),
+            async_writes=_getenv_bool("QDRANT_ASYNC_WRITES", False),
+            max_outstanding_writes=int(os.getenv("QDRANT_MAX_OUTSTANDING_WRITES", "8"))
         )
 
     def _load_rag_config(self) -> RAGConfig:
@@ -88,7 +231,84 @@ class Config:
             chunk_overlap=int(os.getenv("CHUNK_OVERLAP", "150")),
             top_k=int(os.getenv("TOP_K", "4")),
             temperature=float(os.getenv("TEMPERATURE", "0.7")),
-            max_tokens=int(os.getenv("MAX_TOKENS", "2000"))
+            max_tokens=int(os.getenv("MAX_TOKENS", "2000")),
+            retrieval_mode=os.getenv("RETRIEVAL_MODE", "dense").strip().lower(),
+            hybrid_prefetch=int(os.getenv("HYBRID_PREFETCH", "4")),
+            mmr_enabled=_getenv_bool("MMR_ENABLED", False),
+            mmr_lambda=float(os.getenv("MMR_LAMBDA", "0.5")),
+            mmr_fetch_k=int(os.getenv("MMR_FETCH_K", "20"))
+        )
+
+    def _load_ingest_config(self) -> IngestConfig:
+        """取り込み設定の読み込み"""
+        return IngestConfig(
+            batch_size=int(os.getenv("INGEST_BATCH_SIZE", "100")),
+            max_chunks_in_flight=int(os.getenv("INGEST_MAX_CHUNKS_IN_FLIGHT", "1000")),
+            workers=int(os.getenv("INGEST_WORKERS", "1")),
+            state_dir=os.getenv("INGEST_STATE_DIR", ".rag_state"),
+            pipelined=_getenv_bool("INGEST_PIPELINED", True),
+            bulk_load=_getenv_bool("INGEST_BULK_LOAD", False),
+            index_timeout=float(os.getenv("INGEST_INDEX_TIMEOUT", "3600"))
+        )
+
+    def _load_embed_cache_config(self) -> EmbedCacheConfig:
+        """埋め込みキャッシュ設定の読み込み"""
+        return EmbedCacheConfig(
+            enabled=_getenv_bool("EMBED_CACHE_ENABLED", True),
+            path=os.getenv(
+                "EMBED_CACHE_PATH",
+                os.path.join(self.ingest.state_dir, "embedding_cache.sqlite3")
+            ),
+            max_mb=int(os.getenv("EMBED_CACHE_MAX_MB", "2048")),
+            dtype=os.getenv("EMBED_CACHE_DTYPE", "float16"),
+            query_cache_size=int(os.getenv("QUERY_EMBED_CACHE_SIZE", "256"))
+        )
+
+    def _load_answer_cache_config(self) -> AnswerCacheConfig:
+        """回答キャッシュ設定の読み込み"""
+        return AnswerCacheConfig(
+            enabled=_getenv_bool("ANSWER_CACHE_ENABLED", True),
+            path=os.getenv(
+                "ANSWER_CACHE_PATH",
+                os.path.join(self.ingest.state_dir, "answer_cache.sqlite3")
+            ),
+            max_mb=float(os.getenv("ANSWER_CACHE_MAX_MB", "64")),
+            ttl_seconds=int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "604800"))
+        )
+
+    def _load_dedup_config(self) -> DedupConfig:
+        """重複チャンク除去設定の読み込み"""
+        return DedupConfig(
+            enabled=_getenv_bool("DEDUP_ENABLED", False),
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.85")),
+            ngram_size=int(os.getenv("DEDUP_NGRAM_SIZE", "3")),
+            num_perm=int(os.getenv("DEDUP_NUM_PERM", "64")),
+            bands=int(os.getenv("DEDUP_BANDS", "8")),
+            max_entries=int(os.getenv("DEDUP_MAX_ENTRIES", "100000"))
+        )
+
+    def _load_sparse_config(self) -> SparseConfig:
+        """疎ベクトル設定の読み込み"""
+        avg_length = os.getenv("SPARSE_AVG_LENGTH")
+        return SparseConfig(
+            enabled=_getenv_bool("SPARSE_ENABLED", True),
+            ngram_sizes=tuple(int(n) for n in os.getenv("SPARSE_NGRAM_SIZES", "2,3").split(",") if n.strip()),
+            k1=float(os.getenv("SPARSE_BM25_K1", "1.2")),
+            b=float(os.getenv("SPARSE_BM25_B", "0.75")),
+            avg_length=float(avg_length) if avg_length else None
+        )
+
+    def _load_vector_store_config(self) -> VectorStoreConfig:
+        """ベクターストア設定の読み込み"""
+        return VectorStoreConfig(
+            backend=os.getenv("VECTOR_STORE_BACKEND", "qdrant").strip().lower(),
+            numpy_path=os.getenv(
+                "NUMPY_STORE_PATH",
+                os.path.join(self.ingest.state_dir, "numpy_store")
+            ),
+            numpy_dtype=os.getenv("NUMPY_STORE_DTYPE", "float32"),
+            numpy_flush_rows=int(os.getenv("NUMPY_STORE_FLUSH_ROWS", "50000")),
+            numpy_retain_seconds=float(os.getenv("NUMPY_STORE_RETAIN_SECONDS", "600"))
         )
 
     def _load_document_config(self) -> DocumentConfig:
@@ -101,12 +321,51 @@ class Config:
         """設定値のバリデーション"""
         # 基本的な値の検証
         assert self.ollama.port > 0, "OLLAMA_PORTは正の整数である必要があります"
+        assert self.ollama.embed_concurrency > 0, "OLLAMA_EMBED_CONCURRENCYは正の整数である必要があります"
+        assert self.ollama.embed_target_latency > 0, "OLLAMA_EMBED_TARGET_LATENCYは正の数である必要があります"
         assert self.qdrant.port > 0, "QDRANT_PORTは正の整数である必要があります"
+        assert self.qdrant.grpc_port > 0, "QDRANT_GRPC_PORTは正の整数である必要があります"
+        assert self.qdrant.upload_batch_size > 0, "QDRANT_UPLOAD_BATCH_SIZEは正の整数である必要があります"
+        assert self.qdrant.upload_parallel > 0, "QDRANT_UPLOAD_PARALLELは正の整数である必要があります"
+        assert self.qdrant.hnsw_m >= 0, "QDRANT_HNSW_Mは0以上の整数である必要があります"
+        assert self.qdrant.hnsw_ef_construct >= 4, "QDRANT_HNSW_EF_CONSTRUCTは4以上の整数である必要があります"
+        assert self.qdrant.hnsw_ef is None or self.qdrant.hnsw_ef > 0, "QDRANT_HNSW_EFは正の整数である必要があります"
+        assert self.qdrant.default_segment_number >= 0, "QDRANT_DEFAULT_SEGMENT_NUMBERは0以上の整数である必要があります"
+        assert self.qdrant.quantization in ("none", "scalar", "binary"), \
+            "QDRANT_QUANTIZATIONはnone、scalar、binaryのいずれかである必要があります"
+        assert 0.5 <= self.qdrant.quantization_quantile <= 1.0, "QDRANT_QUANTIZATION_QUANTILEは0.5～1.0の範囲である必要があります"
+        assert self.qdrant.oversampling is None or self.qdrant.oversampling >= 1.0, "QDRANT_OVERSAMPLINGは1.0以上である必要があります"
+        assert self.qdrant.keep_versions >= 0, "QDRANT_KEEP_VERSIONSは0以上の整数である必要があります"
+        assert self.qdrant.max_outstanding_writes > 0, "QDRANT_MAX_OUTSTANDING_WRITESは正の整数である必要があります"
         assert self.rag.chunk_size > 0, "CHUNK_SIZEは正の整数である必要があります"
         assert self.rag.chunk_overlap >= 0, "CHUNK_OVERLAPは0以上の整数である必要があります"
         assert self.rag.top_k > 0, "TOP_Kは正の整数である必要があります"
         assert 0.0 <= self.rag.temperature <= 2.0, "TEMPERATUREは0.0～2.0の範囲である必要があります"
         assert self.rag.max_tokens > 0, "MAX_TOKENSは正の整数である必要があります"
+        assert self.rag.retrieval_mode in ("dense", "sparse", "hybrid"), "RETRIEVAL_MODEはdense・sparse・hybridのいずれかである必要があります"
+        assert self.rag.hybrid_prefetch > 0, "HYBRID_PREFETCHは正の整数である必要があります"
+        assert 0.0 <= self.rag.mmr_lambda <= 1.0, "MMR_LAMBDAは0.0～1.0の範囲である必要があります"
+        assert self.rag.mmr_fetch_k > 0, "MMR_FETCH_Kは正の整数である必要があります"
+        assert self.ingest.batch_size > 0, "INGEST_BATCH_SIZEは正の整数である必要があります"
+        assert self.ingest.max_chunks_in_flight > 0, "INGEST_MAX_CHUNKS_IN_FLIGHTは正の整数である必要があります"
+        assert self.ingest.workers > 0, "INGEST_WORKERSは正の整数である必要があります"
+        assert self.ingest.index_timeout >= 0, "INGEST_INDEX_TIMEOUTは0以上である必要があります"
+        assert self.embed_cache.max_mb > 0, "EMBED_CACHE_MAX_MBは正の整数である必要があります"
+        assert self.embed_cache.dtype in ("float16", "float32"), "EMBED_CACHE_DTYPEはfloat16またはfloat32である必要があります"
+        assert self.embed_cache.query_cache_size >= 0, "QUERY_EMBED_CACHE_SIZEは0以上の整数である必要があります"
+        assert 0.0 < self.dedup.threshold <= 1.0, "DEDUP_THRESHOLDは0より大きく1以下である必要があります"
+        assert self.dedup.ngram_size > 0, "DEDUP_NGRAM_SIZEは正の整数である必要があります"
+        assert self.dedup.bands > 0 and self.dedup.num_perm % self.dedup.bands == 0, \
+            "DEDUP_NUM_PERMはDEDUP_BANDSで割り切れる必要があります"
+        assert self.dedup.max_entries > 0, "DEDUP_MAX_ENTRIESは正の整数である必要があります"
+        assert self.answer_cache.max_mb > 0, "ANSWER_CACHE_MAX_MBは正の数である必要があります"
+        assert self.answer_cache.ttl_seconds >= 0, "ANSWER_CACHE_TTL_SECONDSは0以上の整数である必要があります"
+        assert self.sparse.ngram_sizes and all(n > 0 for n in self.sparse.ngram_sizes), "SPARSE_NGRAM_SIZESは正の整数のカンマ区切りである必要があります"
+        assert self.sparse.k1 >= 0 and 0.0 <= self.sparse.b <= 1.0, "SPARSE_BM25_K1は0以上、SPARSE_BM25_Bは0～1の範囲である必要があります"
+        assert self.vector_store.backend in ("qdrant", "numpy"), "VECTOR_STORE_BACKENDはqdrantまたはnumpyである必要があります"
+        assert self.vector_store.numpy_dtype in ("float16", "float32"), "NUMPY_STORE_DTYPEはfloat16またはfloat32である必要があります"
+        assert self.vector_store.numpy_flush_rows > 0, "NUMPY_STORE_FLUSH_ROWSは正の整数である必要があります"
+        assert self.vector_store.numpy_retain_seconds >= 0, "NUMPY_STORE_RETAIN_SECONDSは0以上である必要があります"
 
         return True
 
@@ -118,10 +377,21 @@ Config:
     - Base URL: {self.ollama.base_url}
     - LLM Model: {self.ollama.llm_model}
     - Embed Model: {self.ollama.embed_model}
+    - Embed Concurrency: {self.ollama.embed_concurrency}
 
   Qdrant:
     - URL: {self.qdrant.url}
+    - gRPC: {self.qdrant.prefer_grpc} (port: {self.qdrant.grpc_port})
+    - Local Path: {self.qdrant.path or '(server)'}
     - Collection: {self.qdrant.collection_name}
+    - Upload Batch Size: {self.qdrant.upload_batch_size}
+    - Upload Parallel: {self.qdrant.upload_parallel}
+    - HNSW m / ef_construct / ef: {self.qdrant.hnsw_m} / {self.qdrant.hnsw_ef_construct} / {self.qdrant.hnsw_ef or "default"}
+    - On Disk (vectors / payload / HNSW): {self.qdrant.on_disk_vectors} / {self.qdrant.on_disk_payload} / {self.qdrant.hnsw_on_disk}
+    - Default Segment Number: {self.qdrant.default_segment_number or "auto"}
+    - Keep Versions: {self.qdrant.keep_versions}
+    - Async Writes: {self.qdrant.async_writes} (max outstanding: {self.qdrant.max_outstanding_writes})
+    - Quantization: {self.qdrant.quantization} (oversampling: {self.qdrant.oversampling or "default"}, rescore: {self.qdrant.rescore})
 
   RAG:
     - Chunk Size: {self.rag.chunk_size}
@@ -129,6 +399,50 @@ Config:
     - Top K: {self.rag.top_k}
     - Temperature: {self.rag.temperature}
     - Max Tokens: {self.rag.max_tokens}
+    - Retrieval Mode: {self.rag.retrieval_mode} (hybrid prefetch: x{self.rag.hybrid_prefetch})
+    - MMR: {self.rag.mmr_enabled} (lambda: {self.rag.mmr_lambda}, fetch k: {self.rag.mmr_fetch_k})
+
+  Ingest:
+    - Batch Size: {self.ingest.batch_size}
+    - Max Chunks In Flight: {self.ingest.max_chunks_in_flight}
+    - Workers: {self.ingest.workers}
+    - State Dir: {self.ingest.state_dir}
+    - Pipelined: {self.ingest.pipelined}
+    - Bulk Load: {self.ingest.bulk_load} (index timeout: {self.ingest.index_timeout or "none"}s)
+
+  Embed Cache:
+    - Enabled: {self.embed_cache.enabled}
+    - Path: {self.embed_cache.path}
+    - Max MB: {self.embed_cache.max_mb}
+    - Dtype: {self.embed_cache.dtype}
+    - Query Cache Size: {self.embed_cache.query_cache_size or "disabled"}
+
+  Dedup:
+    - Enabled: {self.dedup.enabled}
+    - Threshold: {self.dedup.threshold}
+    - N-gram Size: {self.dedup.ngram_size}
+    - Permutations: {self.dedup.num_perm}
+    - Bands: {self.dedup.bands}
+    - Max Entries: {self.dedup.max_entries}
+
+  Answer Cache:
+    - Enabled: {self.answer_cache.enabled}
+    - Path: {self.answer_cache.path}
+    - Max MB: {self.answer_cache.max_mb}
+    - TTL: {self.answer_cache.ttl_seconds or "none"}s
+
+  Sparse:
+    - Enabled: {self.sparse.enabled}
+    - N-gram Sizes: {self.sparse.ngram_sizes}
+    - BM25 k1 / b: {self.sparse.k1} / {self.sparse.b}
+    - Avg Length: {self.sparse.avg_length or "auto"}
+
+  Vector Store:
+    - Backend: {self.vector_store.backend}
+    - NumPy Path: {self.vector_store.numpy_path}
+    - NumPy Dtype: {self.vector_store.numpy_dtype}
+    - NumPy Flush Rows: {self.vector_store.numpy_flush_rows}
+    - NumPy Retain Seconds: {self.vector_store.numpy_retain_seconds}
 
   Document:
     - Path: {self.document.documents_path}
@@ -5,13 +5,23 @@
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
 from config import config
 from models.embeddings import create_embeddings
-from vector_store.qdrant_client import QdrantVectorStoreManager
+from models.embedding_cache import CachedEmbeddings
+from models.async_embeddings import ConcurrentOllamaEmbeddings
+from vector_store.qdrant_client import QUANTIZATION_TYPES
+from vector_store.factory import create_vector_store_manager
 from loaders.document_loader import DocumentLoaderManager
 from utils.text_splitter import create_text_splitter
+from utils.dedup import create_deduplicator
+from pipeline.streaming import StreamingIngestPipeline
+from pipeline.manifest import IngestManifest
+from pipeline.checkpoint import IngestCheckpoint
+from pipeline.executor import format_stage_report
+from pipeline.metrics import IngestMetrics, format_metrics_report
 
 
 def main():
@@ -48,72 +58,395 @@ def main():
         action="store_true",
         help="既存のコレクションを削除して再作成"
     )
+    parser.add_argument(
+        "--embed-concurrency",
+        type=int,
+        default=None,
+        help=f"埋め込みリクエストの同時実行数（デフォルト: {config.ollama.embed_concurrency}）"
+    )
+    parser.add_argument(
+        "--no-pipeline",
+        action="store_true",
+        help="埋め込みと保存を並行させずに逐次実行"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="マニフェストと比較し、追加・変更・削除されたファイルだけを反映"
+    )
+    parser.add_argument(
+        "--no-embed-cache",
+        action="store_true",
+        help="埋め込みキャッシュを使用しない"
+    )
+    parser.add_argument(
+        "--dedup",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="重複・類似チャンクを1つのポイントにまとめる"
+             f"（デフォルト: {config.dedup.enabled}）"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help=f"1回の保存で送るチャンク数（デフォルト: {config.ingest.batch_size}）"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help=f"同時に保持するチャンク数の上限（デフォルト: {config.ingest.max_chunks_in_flight}）"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"ドキュメント読み込みの並列ワーカープロセス数（デフォルト: {config.ingest.workers}）"
+    )
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=None,
+        help=f"新規作成するコレクションのHNSWエッジ数（デフォルト: {config.qdrant.hnsw_m}）"
+    )
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        default=None,
+        help=f"新規作成するコレクションのHNSW構築時の探索幅（デフォルト: {config.qdrant.hnsw_ef_construct}）"
+    )
+    parser.add_argument(
+        "--on-disk-vectors",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"ベクトルをディスク（mmap）に置く（デフォルト: {config.qdrant.on_disk_vectors}）"
+    )
+    parser.add_argument(
+        "--on-disk-payload",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"ペイロードをディスクに置く（デフォルト: {config.qdrant.on_disk_payload}）"
+    )
+    parser.add_argument(
+        "--segments",
+        type=int,
+        default=None,
+        help=f"コレクションのセグメント数、0は自動（デフォルト: {config.qdrant.default_segment_number}）"
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=QUANTIZATION_TYPES,
+        default=None,
+        help="新規作成するコレクションのベクトル量子化（scalar: int8、binary: 1bit）"
+             f"（デフォルト: {config.qdrant.quantization}）"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="前回中断した取り込みをチェックポイントから再開"
+    )
+    parser.add_argument(
+        "--bulk-load",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="取り込み中はHNSWインデックスの作成を止め、最後に1回だけ作成する"
+             f"（デフォルト: {config.ingest.bulk_load}）"
+    )
+    parser.add_argument(
+        "--grpc",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"QdrantとgRPCで通信する（デフォルト: {config.qdrant.prefer_grpc}）"
+    )
+    parser.add_argument(
+        "--async-writes",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Qdrantへの保存で反映完了を待たずに次のバッチへ進み、最後にまとめて反映を確認する"
+             f"（デフォルト: {config.qdrant.async_writes}）"
+    )
+    parser.add_argument(
+        "--reindex",
+        action="store_true",
+        help="新しいバージョンのコレクションに構築し、完了後にエイリアスを切り替える（構築中も検索可能）"
+    )
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=None,
+        help=f"--reindex後に残す古いバージョン数（デフォルト: {config.qdrant.keep_versions}）"
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="計測レポート（JSON Lines）の出力先"
+             f"（デフォルト: {config.ingest.state_dir}/reports/<コレクション名>_<日時>.jsonl）"
+    )
 
     args = parser.parse_args()
 
+    if args.resume and args.force:
+        parser.error("--resume と --force は同時に指定できません")
+    if args.reindex and (args.force or args.incremental):
+        parser.error("--reindex は --force・--incremental と同時に指定できません")
+
     print("=" * 60)
     print("ドキュメント取り込み処理を開始します")
     print("=" * 60)
 
+    embeddings = None
+    checkpoint = None
+    metrics = None
+    status = "failed"
     try:
-        # 1. ドキュメント読み込み
-        print("\n[1/5] ドキュメントを読み込んでいます...")
+        # 1. 取り込み対象の確認
+        print("\n[1/5] 取り込み対象を確認しています...")
         loader = DocumentLoaderManager()
         source_path = Path(args.source)
 
-        if source_path.is_file():
-            documents = loader.load_document(str(source_path))
-        elif source_path.is_dir():
-            documents = loader.load_directory(str(source_path))
-        else:
+        if not source_path.exists():
             print(f"エラー: パスが見つかりません: {args.source}")
             sys.exit(1)
 
-        if not documents:
-            print("エラー: 読み込むドキュメントがありません")
-            sys.exit(1)
+        # ファイルは保存処理の進行に合わせて遅延列挙する
+        files = loader.iter_files(str(source_path))
 
-        # 2. テキスト分割
-        print("\n[2/5] テキストを分割しています...")
+        # 2. テキスト分割の準備
+        print("\n[2/5] テキスト分割を準備しています...")
         text_splitter = create_text_splitter(
             chunk_size=args.chunk_size,
             chunk_overlap=args.chunk_overlap
         )
-        split_docs = text_splitter.split_documents(documents)
-
-        if not split_docs:
-            print("エラー: 分割されたドキュメントがありません")
-            sys.exit(1)
 
         # 3. 埋め込みモデル初期化
         print("\n[3/5] 埋め込みモデルを初期化しています...")
-        embeddings = create_embeddings()
+        use_embed_cache = config.embed_cache.enabled and not args.no_embed_cache
+        embed_concurrency = args.embed_concurrency or config.ollama.embed_concurrency
+        embeddings = create_embeddings(use_cache=use_embed_cache, concurrency=embed_concurrency)
         print(f"埋め込みモデル: {config.ollama.embed_model}")
+        print(f"埋め込みリクエストの同時実行数: {embed_concurrency}")
+        if use_embed_cache:
+            print(f"埋め込みキャッシュ: {config.embed_cache.path}")
 
         # 4. Qdrantクライアント初期化
         print("\n[4/5] Qdrantに接続しています...")
-        vector_store_manager = QdrantVectorStoreManager(
+        vector_store_manager = create_vector_store_manager(
             collection_name=args.collection,
             embeddings=embeddings
         )
+        if args.grpc is not None:
+            vector_store_manager.prefer_grpc = args.grpc
         vector_store_manager.initialize()
+        collection_name = vector_store_manager.collection_name
+
+        # 再構築の場合は新しいバージョンのコレクションに書き込む（再開時は構築中のバージョン）
+        if args.reindex:
+            version = (
+                vector_store_manager.resume_reindex() if args.resume
+                else vector_store_manager.begin_reindex()
+            )
+            if version is None:
+                print(f"エラー: '{collection_name}' に再開できる再構築中のバージョンがありません")
+                sys.exit(1)
+            print(f"新しいバージョン '{version}' に構築します（完了まで '{collection_name}' は現在のバージョンを返します）")
 
         # コレクション作成
-        vector_store_manager.create_collection(force=args.force)
+        vector_store_manager.create_collection(
+            force=args.force,
+            hnsw_m=args.hnsw_m,
+            hnsw_ef_construct=args.hnsw_ef_construct,
+            on_disk_vectors=args.on_disk_vectors,
+            on_disk_payload=args.on_disk_payload,
+            default_segment_number=args.segments,
+            quantization=args.quantization
+        )
+        # 書き込みを始める前に回答キャッシュを無効にする（取り込み中の回答も完了時に無効になる）
+        vector_store_manager.bump_content_version()
+
+        # チェックポイントの準備（再開時は前回の進捗を読み込む）
+        checkpoint = IngestCheckpoint.for_collection(vector_store_manager.collection_name)
+        signature = {
+            "source": str(source_path.absolute()),
+            "chunk_size": text_splitter.chunk_size,
+            "chunk_overlap": text_splitter.chunk_overlap
+        }
+        if args.resume:
+            checkpoint.resume(signature)
+            print(f"\nチェックポイントから再開します: {checkpoint.path}")
+            print(f"  保存完了: {len(checkpoint.completed_files)}ファイル")
+            print(f"  最終バッチ: {checkpoint.last_batch}")
+        else:
+            checkpoint.start(signature)
+
+        # 差分取り込みの場合は変更のあったファイルだけを対象にする
+        # 再構築の場合は、既存のマニフェストを全ファイル分で作り直す
+        manifest = None
+        diff = None
+        use_manifest = args.incremental or (
+            args.reindex and IngestManifest.for_collection(collection_name).path.exists()
+        )
+        if use_manifest:
+            manifest = IngestManifest.for_collection(collection_name)
+            if args.force or args.reindex:
+                manifest.clear()
+
+            diff = manifest.diff(files, root=source_path)
+            print(f"\n差分:")
+            print(f"  新規: {len(diff.added)}ファイル")
+            print(f"  変更: {len(diff.changed)}ファイル")
+            print(f"  未変更: {len(diff.unchanged)}ファイル")
+            print(f"  削除: {len(diff.deleted)}ファイル")
+
+            if args.reindex:
+                # 新しいバージョンには古いポイントがないため、全ファイルをそのまま取り込む
+                files = diff.to_ingest
+            else:
+                # 変更・削除されたファイルの古いポイントを削除
+                # 新規ファイルも前回の中断などで残ったポイントがあれば除去する
+                # 再開時は前回の実行で保存したポイントを残す
+                stale_paths = [
+                    str(f) for f in diff.to_ingest
+                    if not checkpoint.has_progress(Path(f).absolute())
+                ] + diff.deleted
+
+                # 削除するポイントに重複としてまとめられていたファイルは、チャンクが失われるため再取り込みする
+                dependents = sorted(vector_store_manager.find_dependent_files(stale_paths))
+                if dependents:
+                    print(f"  重複除去の代表ポイントを失うため再取り込み: {len(dependents)}ファイル")
+
+                if stale_paths:
+                    vector_store_manager.remove_source_files(stale_paths)
+                    vector_store_manager.delete_by_file_paths(stale_paths)
+
+                files = diff.to_ingest + [Path(f) for f in dependents]
+
+        # 5. 読み込み→分割→保存をストリーミング実行
+        print("\n[5/5] ドキュメントを読み込みながらQdrantに保存しています...")
+        report_path = args.report or str(
+            Path(config.ingest.state_dir) / "reports"
+            / f"{vector_store_manager.collection_name}_{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        )
+        metrics = IngestMetrics(report_path=report_path)
+        use_dedup = config.dedup.enabled if args.dedup is None else args.dedup
+        deduplicator = create_deduplicator() if use_dedup else None
+        pipeline = StreamingIngestPipeline(
+            loader=loader,
+            text_splitter=text_splitter,
+            vector_store_manager=vector_store_manager,
+            batch_size=args.batch_size,
+            max_chunks_in_flight=args.max_in_flight,
+            workers=args.workers,
+            pipelined=False if args.no_pipeline else None,
+            checkpoint=checkpoint,
+            metrics=metrics,
+            deduplicator=deduplicator
+        )
+        print(f"バッチサイズ: {pipeline.effective_batch_size}")
+        print(f"読み込みワーカー数: {pipeline.workers}")
+        print(f"埋め込み/保存の並行実行: {'有効' if pipeline.pipelined else '無効'}")
+        print(f"重複チャンクの除去: {'有効' if use_dedup else '無効'}")
+        if args.async_writes is not None:
+            vector_store_manager.async_writes = args.async_writes
+        print(
+            f"非同期書き込み: "
+            f"{f'有効（未反映の上限: {vector_store_manager.max_outstanding_writes}件）' if vector_store_manager.async_writes else '無効'}"
+        )
+
+        bulk_load = config.ingest.bulk_load if args.bulk_load is None else args.bulk_load
+        if bulk_load:
+            vector_store_manager.begin_bulk_load()
+        try:
+            stats = pipeline.run(files)
+        except BaseException:
+            # 失敗・中断時もインデックスの作成を止めたままにしない
+            if bulk_load:
+                vector_store_manager.end_bulk_load(wait=False)
+            raise
+
+        # 非同期書き込みを含め、すべての書き込みが反映されたことを確認してから完了とする
+        with metrics.measure("upsert", items=0, barrier=True):
+            point_count = vector_store_manager.write_barrier()
+
+        index_seconds = None
+        if bulk_load:
+            print("\nHNSWインデックスを作成しています...")
+            try:
+                with metrics.measure("index", items=stats.chunks - stats.duplicates, bulk_load=True):
+                    index_seconds = vector_store_manager.end_bulk_load(
+                        timeout=config.ingest.index_timeout or None
+                    )
+            except TimeoutError as e:
+                print(f"警告: {str(e)}")
+        checkpoint.finish()
+        status = "completed"
+
+        print(f"\n処理完了:")
+        print(f"  成功: {stats.files}ファイル")
+        print(f"  失敗: {len(stats.failed_files)}ファイル")
+        print(f"  ドキュメント数: {stats.documents}")
+        print(f"  チャンク数: {stats.chunks}")
+        if use_dedup:
+            print(f"  重複として埋め込みを省いたチャンク数: {stats.duplicates}"
+                  f"（{stats.duplicates / stats.chunks if stats.chunks else 0:.1%}）")
+            print(f"  保存したチャンク数: {stats.chunks - stats.duplicates}")
+            if deduplicator.evictions:
+                print(f"  重複判定の索引から外したチャンク数: {deduplicator.evictions}"
+                      f"（上限 DEDUP_MAX_ENTRIES={deduplicator.max_entries}）")
+        else:
+            print(f"  保存したチャンク数: {stats.chunks}")
+        print(f"  コレクションのポイント数: {point_count}")
+        if index_seconds is not None:
+            print(f"  インデックス作成時間: {index_seconds:.1f}秒")
+        if args.resume:
+            print(f"  スキップしたファイル数: {stats.skipped_files}")
+            print(f"  スキップしたチャンク数: {stats.skipped_chunks}")
+
+        if stats.failed_files:
+            print(f"\n失敗したファイル:")
+            for f in stats.failed_files:
+                print(f"  - {f}")
+
+        print(f"\nステージ別の計測結果:")
+        print(format_metrics_report(metrics))
+        print(f"計測レポートを保存しました: {report_path}")
+
+        if stats.stages:
+            print(f"\nステージ別の稼働状況:")
+            print(format_stage_report(stats.stages))
+
+        if stats.chunks == 0 and (diff is None or args.reindex) and not args.resume:
+            print("エラー: 保存するチャンクがありません")
+            sys.exit(1)
+
+        if args.reindex:
+            removed = vector_store_manager.finish_reindex(keep_versions=args.keep_versions)
+            print(f"古いバージョンを{len(removed)}件削除しました")
+
+        if manifest is not None:
+            manifest.apply(diff, failed_files=stats.failed_files)
+            manifest.save()
+            print(f"マニフェストを更新しました: {manifest.path}")
 
-        # 5. ドキュメント追加
-        print("\n[5/5] ドキュメントをQdrantに保存しています...")
-        print(f"保存するチャンク数: {len(split_docs)}")
+        vector_store_manager.bump_content_version()
 
-        # バッチで処理（大量データ対応）
-        batch_size = 100
-        total = len(split_docs)
+        base_embeddings = embeddings.embeddings if isinstance(embeddings, CachedEmbeddings) else embeddings
+        if isinstance(base_embeddings, ConcurrentOllamaEmbeddings):
+            request_stats = base_embeddings.stats
+            print(f"\n埋め込みリクエスト:")
+            print(f"  リクエスト数: {request_stats.requests}件（リトライ {request_stats.retries}件）")
+            print(f"  平均レイテンシ: {request_stats.average_latency:.2f}秒")
+            print(f"  最大同時実行数: {request_stats.max_in_flight}")
+            print(f"  最終バッチサイズ: {base_embeddings.sizer.size}")
 
-        for i in range(0, total, batch_size):
-            batch = split_docs[i:i + batch_size]
-            end = min(i + batch_size, total)
-            print(f"  処理中: {i + 1}～{end}/{total}")
-            vector_store_manager.add_documents(batch)
+        if isinstance(embeddings, CachedEmbeddings):
+            cache_stats = embeddings.stats()
+            print(f"\n埋め込みキャッシュ:")
+            print(f"  ヒット: {cache_stats['hits']}件")
+            print(f"  ミス: {cache_stats['misses']}件")
+            print(f"  ヒット率: {cache_stats['hit_rate']:.1%}")
+            print(f"  サイズ: {cache_stats['size_mb']:.1f}MB ({cache_stats['entries']}件)")
 
         # 完了メッセージ
         print("\n" + "=" * 60)
@@ -125,10 +458,14 @@ def main():
         if info:
             print(f"\nコレクション情報:")
             print(f"  名前: {info.get('name')}")
+            if info.get('collection') != info.get('name'):
+                print(f"  参照先: {info.get('collection')}")
             print(f"  ベクトル数: {info.get('vectors_count')}")
             print(f"  ポイント数: {info.get('points_count')}")
+            print(f"  セグメント数: {info.get('segments_count')}")
 
     except KeyboardInterrupt:
+        status = "interrupted"
         print("\n\n処理が中断されました")
         sys.exit(1)
     except Exception as e:
@@ -136,6 +473,16 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        # 失敗・中断した取り込みも、再開用のジャーナルを閉じて計測レポートに集計を残す
+        if checkpoint is not None:
+            checkpoint.close()
+        if metrics is not None:
+            metrics.close(status=status)
+        # 埋め込みリクエストで使い回したクライアントとイベントループを閉じる
+        base_embeddings = embeddings.embeddings if isinstance(embeddings, CachedEmbeddings) else embeddings
+        if isinstance(base_embeddings, ConcurrentOllamaEmbeddings):
+            base_embeddings.close()
 
 
 if __name__ == "__main__":
@@ -3,8 +3,11 @@
 各種形式のドキュメントを読み込む
 """
 
+import multiprocessing
 import os
-from typing import List
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
@@ -62,27 +65,12 @@ class DocumentLoaderManager:
             )
 
         try:
-            # ローダーの初期化と実行
-            if extension == ".txt":
-                # TextLoaderはUTF-8エンコーディングを明示的に指定
-                loader = loader_class(file_path, encoding="utf-8")
-            elif extension == ".json":
-                # JSONLoaderはjq_schemaが必要
-                loader = loader_class(
-                    file_path=file_path,
-                    jq_schema=".",
-                    text_content=False
-                )
-            else:
-                loader = loader_class(file_path)
-
+            loader = self._create_loader(loader_class, file_path, extension)
             documents = loader.load()
 
             # メタデータにファイル情報を追加
             for doc in documents:
-                doc.metadata["file_name"] = path.name
-                doc.metadata["file_extension"] = extension
-                doc.metadata["file_path"] = str(path.absolute())
+                self._add_file_metadata(doc, path, extension)
 
             print(f"読み込み完了: {path.name} ({len(documents)}件)")
             return documents
@@ -90,13 +78,96 @@ class DocumentLoaderManager:
         except Exception as e:
             raise Exception(f"ファイルの読み込みに失敗しました ({path.name}): {str(e)}")
 
-    def load_directory(self, dir_path: str, recursive: bool = True) -> List[Document]:
+    def lazy_load_document(self, file_path: str) -> Iterator[Document]:
+        """
+        単一ファイルを遅延読み込みする
+
+        PDFのページなど、ローダーが返すDocumentを1件ずつ生成するため、
+        ファイル全体をメモリに展開せずに後段の処理へ渡せる。
+
+        Args:
+            file_path: ファイルパス
+
+        Yields:
+            Documentオブジェクト
+
+        Raises:
+            FileNotFoundError: ファイルが存在しない場合
+            ValueError: サポートされていない形式の場合
+            Exception: 読み込みに失敗した場合
+        """
+        path = Path(file_path)
+
+        if not path.exists():
+            raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
+
+        extension = path.suffix.lower()
+        loader_class = self._get_loader(extension)
+
+        if loader_class is None:
+            raise ValueError(
+                f"サポートされていないファイル形式です: {extension}\n"
+                f"サポート形式: {', '.join(self.SUPPORTED_EXTENSIONS.keys())}"
+            )
+
+        try:
+            loader = self._create_loader(loader_class, file_path, extension)
+            for doc in loader.lazy_load():
+                self._add_file_metadata(doc, path, extension)
+                yield doc
+        except Exception as e:
+            raise Exception(f"ファイルの読み込みに失敗しました ({path.name}): {str(e)}")
+
+    def iter_files(self, source_path: str, recursive: bool = True) -> Iterator[Path]:
+        """
+        サポート対象のファイルを遅延列挙する
+
+        ディレクトリを走査しながら1件ずつ返すため、
+        巨大なディレクトリツリーでもファイル一覧をメモリに保持しない。
+
+        Args:
+            source_path: ファイルまたはディレクトリのパス
+            recursive: サブディレクトリも再帰的に走査するか
+
+        Yields:
+            サポート対象ファイルのパス
+
+        Raises:
+            FileNotFoundError: パスが存在しない場合
+        """
+        path = Path(source_path)
+
+        if path.is_file():
+            yield path
+            return
+
+        if not path.is_dir():
+            raise FileNotFoundError(f"パスが見つかりません: {source_path}")
+
+        for root, dir_names, file_names in os.walk(path):
+            # 走査順を安定させる
+            dir_names.sort()
+            if not recursive:
+                dir_names.clear()
+
+            for file_name in sorted(file_names):
+                file_path = Path(root) / file_name
+                if file_path.suffix.lower() in self.SUPPORTED_EXTENSIONS:
+                    yield file_path
+
+    def load_directory(
+        self,
+        dir_path: str,
+        recursive: bool = True,
+        workers: int = 1
+    ) -> List[Document]:
         """
         ディレクトリ内のファイルを一括読み込み
 
         Args:
             dir_path: ディレクトリパス
             recursive: サブディレクトリも再帰的に読み込むか
+            workers: 並列読み込みのワーカープロセス数（1の場合は逐次読み込み）
 
         Returns:
             全Documentオブジェクトのリスト
@@ -112,27 +183,26 @@ class DocumentLoaderManager:
         all_documents = []
         failed_files = []
 
-        # ファイルを検索
-        if recursive:
-            files = [f for f in dir_path_obj.rglob("*") if f.is_file()]
-        else:
-            files = [f for f in dir_path_obj.iterdir() if f.is_file()]
-
-        # サポート対象ファイルのみフィルタ
-        supported_files = [
-            f for f in files
-            if f.suffix.lower() in self.SUPPORTED_EXTENSIONS
-        ]
+        # サポート対象ファイルを検索
+        supported_files = list(self.iter_files(str(dir_path_obj), recursive=recursive))
 
         print(f"\n{len(supported_files)}個のファイルを処理します...\n")
 
-        for file_path in supported_files:
-            try:
-                documents = self.load_document(str(file_path))
+        if workers > 1:
+            for file_path, documents, error in self.iter_load_parallel(supported_files, workers):
+                if error is not None:
+                    print(f"エラー: {file_path.name} - {error}")
+                    failed_files.append(str(file_path))
+                    continue
                 all_documents.extend(documents)
-            except Exception as e:
-                print(f"エラー: {file_path.name} - {str(e)}")
-                failed_files.append(str(file_path))
+        else:
+            for file_path in supported_files:
+                try:
+                    documents = self.load_document(str(file_path))
+                    all_documents.extend(documents)
+                except Exception as e:
+                    print(f"エラー: {file_path.name} - {str(e)}")
+                    failed_files.append(str(file_path))
 
         print(f"\n処理完了:")
         print(f"  成功: {len(supported_files) - len(failed_files)}ファイル")
@@ -146,6 +216,115 @@ class DocumentLoaderManager:
 
         return all_documents
 
+    def iter_load_parallel(
+        self,
+        files: Iterable[Path],
+        workers: int,
+        on_timing: Optional[Callable[[Path, float, float], None]] = None
+    ) -> Iterator[Tuple[Path, List[Document], Optional[str]]]:
+        """
+        複数ファイルをワーカープロセスで並列に読み込む
+
+        PDFやMarkdownの解析はCPUバウンドなため、ファイル単位でプロセスに分散する。
+        ワーカー間の負荷が偏らないよう、サイズの大きいファイルから順に割り当てる。
+        未完了のタスクはworkers * 2件までに制限し、読み込み済みの結果を
+        溜め込まないようにする。
+
+        Args:
+            files: ファイルパスのイテラブル
+            workers: ワーカープロセス数
+            on_timing: 読み込みに成功したファイルごとに
+                (ファイルパス, ワーカーでの実時間, ワーカーでのCPU時間) を受け取るコールバック
+
+        Yields:
+            (ファイルパス, Documentのリスト, エラーメッセージ)のタプル。
+            成功時のエラーメッセージはNone、失敗時のDocumentリストは空
+        """
+        # 大きいファイルから順に処理する（LPTスケジューリング）
+        sized_files = []
+        for file_path in files:
+            file_path = Path(file_path)
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                size = 0
+            sized_files.append((size, file_path))
+        sized_files.sort(key=lambda item: item[0], reverse=True)
+
+        queue = iter([file_path for _, file_path in sized_files])
+        max_pending = max(1, workers) * 2
+
+        # パイプライン取り込みでは埋め込み・アップロードのスレッドが動いている中で呼ばれるため、
+        # 他のスレッドが保持したロックごとプロセスを複製するforkではなくspawnでワーカーを起動する
+        with ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            pending = {}
+
+            def submit_next() -> None:
+                file_path = next(queue, None)
+                if file_path is not None:
+                    pending[executor.submit(_load_document_worker, str(file_path))] = file_path
+
+            for _ in range(max_pending):
+                submit_next()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = pending.pop(future)
+                    try:
+                        documents, wall_seconds, cpu_seconds = future.result()
+                    except Exception as e:
+                        yield file_path, [], str(e)
+                    else:
+                        if on_timing is not None:
+                            on_timing(file_path, wall_seconds, cpu_seconds)
+                        yield file_path, documents, None
+                    submit_next()
+
+    def _create_loader(self, loader_class, file_path: str, extension: str):
+        """
+        拡張子に応じた引数でローダーを初期化
+
+        Args:
+            loader_class: ローダークラス
+            file_path: ファイルパス
+            extension: ファイル拡張子
+
+        Returns:
+            ローダーインスタンス
+        """
+        if extension == ".txt":
+            # TextLoaderはUTF-8エンコーディングを明示的に指定
+            return loader_class(file_path, encoding="utf-8")
+        if extension == ".json":
+            # JSONLoaderはjq_schemaが必要
+            return loader_class(
+                file_path=file_path,
+                jq_schema=".",
+                text_content=False
+            )
+        return loader_class(file_path)
+
+    @staticmethod
+    def _add_file_metadata(doc: Document, path: Path, extension: str) -> None:
+        """
+        Documentのメタデータにファイル情報を追加
+
+        Args:
+            doc: Documentオブジェクト
+            path: ファイルパス
+            extension: ファイル拡張子
+        """
+        absolute = path.absolute()
+        doc.metadata["file_name"] = path.name
+        doc.metadata["file_extension"] = extension
+        doc.metadata["file_path"] = str(absolute)
+        # フォルダ単位の絞り込み検索用に、ルートを除く親ディレクトリを浅い順に記録する
+        doc.metadata["file_dirs"] = [str(parent) for parent in reversed(absolute.parents)][1:]
+
     def _get_loader(self, extension: str):
         """
         ファイル拡張子に対応するローダークラスを取得
@@ -167,3 +346,21 @@ class DocumentLoaderManager:
             拡張子のリスト
         """
         return list(cls.SUPPORTED_EXTENSIONS.keys())
+
+
+def _load_document_worker(file_path: str) -> Tuple[List[Document], float, float]:
+    """
+    ワーカープロセスで単一ファイルを読み込む
+
+    ProcessPoolExecutorから呼び出せるよう、モジュールレベルに定義する。
+
+    Args:
+        file_path: ファイルパス
+
+    Returns:
+        (Documentオブジェクトのリスト, 読み込みの実時間, 読み込みのCPU時間)のタプル
+    """
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    documents = DocumentLoaderManager().load_document(file_path)
+    return documents, time.perf_counter() - start, time.process_time() - cpu_start
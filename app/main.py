@@ -8,12 +8,26 @@ import sys
 
 from config import config
 from models.llm import create_llm
-from models.embeddings import create_embeddings
-from vector_store.qdrant_client import QdrantVectorStoreManager
-from prompts.templates import format_documents, create_prompt_with_context
-
-
-def interactive_mode(collection_name: str = None, top_k: int = None, temperature: float = None):
+from models.embeddings import create_embeddings, is_ollama_available
+from models.embedding_cache import QueryEmbeddingCache
+from models.answer_cache import collection_content_version, create_answer_cache, make_answer_key
+from vector_store.factory import create_vector_store_manager
+from prompts.templates import PROMPT_TEMPLATE_VERSION, format_documents, create_prompt_with_context
+
+
+def interactive_mode(
+    collection_name: str = None,
+    top_k: int = None,
+    temperature: float = None,
+    hnsw_ef: int = None,
+    oversampling: float = None,
+    rescore: bool = None,
+    retrieval_mode: str = None,
+    mmr: bool = None,
+    mmr_lambda: float = None,
+    fetch_k: int = None,
+    answer_cache: bool = None
+):
     """
     対話型モード
 
@@ -21,6 +35,14 @@ def interactive_mode(collection_name: str = None, top_k: int = None, temperature
         collection_name: コレクション名
         top_k: 取得するコンテキスト数
         temperature: LLM温度パラメータ
+        hnsw_ef: 検索時のHNSW探索幅
+        oversampling: 量子化検索で取得する候補数の倍率
+        rescore: 量子化検索の候補を元のベクトルで再スコアリングするか
+        retrieval_mode: 検索方法（dense・sparse・hybrid）
+        mmr: MMRで多様性を考慮して取得するか
+        mmr_lambda: MMRの重み（1に近いほど関連度、0に近いほど多様性を重視）
+        fetch_k: MMRで選ぶ前に取得する候補数
+        answer_cache: 同じ質問・検索条件・コレクションの内容の回答をキャッシュから返すか
     """
     print("=" * 60)
     print("対話型RAGシステム")
@@ -35,10 +57,20 @@ def interactive_mode(collection_name: str = None, top_k: int = None, temperature
         # 初期化
         print("\nシステムを初期化しています...")
 
-        embeddings = create_embeddings()
-        print(f"✓ 埋め込みモデル: {config.ollama.embed_model}")
+        retrieval_mode = retrieval_mode or config.rag.retrieval_mode
+        retrieval_only = not is_ollama_available()
+        if retrieval_only:
+            # Ollamaが停止している場合は、モデルを使わない疎ベクトルのみで検索して回答は生成しない
+            print("警告: Ollamaに接続できないため、疎ベクトルのみで検索します（回答は生成しません）")
+            retrieval_mode = "sparse"
+
+        embeddings = None
+        if retrieval_mode != "sparse":
+            # 対話中に繰り返される質問は埋め込みを再計算しない
+            embeddings = create_embeddings(query_cache=True)
+            print(f"✓ 埋め込みモデル: {config.ollama.embed_model}")
 
-        vector_store_manager = QdrantVectorStoreManager(
+        vector_store_manager = create_vector_store_manager(
             collection_name=collection_name,
             embeddings=embeddings
         )
@@ -51,9 +83,24 @@ def interactive_mode(collection_name: str = None, top_k: int = None, temperature
             sys.exit(1)
 
         print(f"✓ コレクション: {info.get('name')} ({info.get('points_count')}件)")
+        if info.get('collection') != info.get('name'):
+            print(f"✓ 参照先: {info.get('collection')}")
+
+        llm = None
+        if not retrieval_only:
+            llm = create_llm(temperature=temperature)
+            print(f"✓ LLM: {config.ollama.llm_model}")
+        print(f"✓ 検索方法: {retrieval_mode}")
+
+        # MMRは密ベクトルで候補どうしを比べるため、疎ベクトルのみの検索では使わない
+        use_mmr = (config.rag.mmr_enabled if mmr is None else mmr) and retrieval_mode != "sparse"
+        mmr_lambda = config.rag.mmr_lambda if mmr_lambda is None else mmr_lambda
+        if use_mmr:
+            print(f"✓ MMR: lambda={mmr_lambda}, fetch_k={fetch_k or config.rag.mmr_fetch_k}")
 
-        llm = create_llm(temperature=temperature)
-        print(f"✓ LLM: {config.ollama.llm_model}")
+        answers = create_answer_cache(enabled=answer_cache) if llm is not None else None
+        if answers is not None:
+            print(f"✓ 回答キャッシュ: {answers.path}")
 
         k = top_k or config.rag.top_k
         print(f"✓ Top-K: {k}")
@@ -79,37 +126,101 @@ def interactive_mode(collection_name: str = None, top_k: int = None, temperature
                     print("\nシステム情報:")
                     print(f"  LLM: {config.ollama.llm_model}")
                     print(f"  埋め込みモデル: {config.ollama.embed_model}")
+                    if isinstance(embeddings, QueryEmbeddingCache):
+                        stats = embeddings.stats()
+                        print(
+                            f"  クエリ埋め込みキャッシュ: {stats['entries']}/{stats['capacity']}件, "
+                            f"ヒット率 {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+                        )
                     print(f"  コレクション: {info.get('name')}")
                     print(f"  ドキュメント数: {info.get('points_count')}")
                     print(f"  Top-K: {k}")
+                    print(f"  検索方法: {retrieval_mode}")
+                    print(f"  MMR: {f'lambda={mmr_lambda}' if use_mmr else '無効'}")
+                    if answers is not None:
+                        stats = answers.stats()
+                        print(
+                            f"  回答キャッシュ: {stats['entries']}件 ({stats['size_mb']:.1f}MB), "
+                            f"ヒット率 {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+                        )
+                    print(f"  HNSW ef: {hnsw_ef or config.qdrant.hnsw_ef or '既定値'}")
                     print(f"  温度: {temperature or config.rag.temperature}")
                     print()
                     continue
 
                 # RAG推論実行
                 print("\n検索中...")
-                results = vector_store_manager.similarity_search_with_score(
+                search_kwargs = dict(
                     query=question,
-                    k=k
+                    k=k,
+                    hnsw_ef=hnsw_ef,
+                    oversampling=oversampling,
+                    rescore=rescore,
+                    retrieval_mode=retrieval_mode
                 )
+                if use_mmr:
+                    results = vector_store_manager.max_marginal_relevance_search_with_score(
+                        fetch_k=fetch_k,
+                        lambda_mult=mmr_lambda,
+                        **search_kwargs
+                    )
+                else:
+                    results = vector_store_manager.similarity_search_with_score(**search_kwargs)
 
                 if not results:
                     print("関連するドキュメントが見つかりませんでした。\n")
                     continue
 
                 print(f"見つかったドキュメント: {len(results)}件")
-                print("回答を生成中...\n")
 
-                # コンテキスト生成
-                docs_only = [doc for doc, _ in results]
-                context = format_documents(docs_only)
-
-                # プロンプト生成
-                prompt = create_prompt_with_context(context, question)
+                if llm is None:
+                    # 検索のみ（Ollama停止中）
+                    for i, (doc, score) in enumerate(results, 1):
+                        print(f"\n[{i}] {doc.metadata.get('file_name', '不明')} (スコア: {score:.4f})")
+                        print(f"内容: {doc.page_content[:200]}...")
+                    print()
+                    continue
 
-                # LLM推論
-                response = llm.invoke(prompt)
-                answer = response.content if hasattr(response, 'content') else str(response)
+                # 回答キャッシュの確認（取り込みによる更新を反映するため、内容バージョンは質問ごとに取得）
+                answer = None
+                if answers is not None:
+                    cache_key = make_answer_key(
+                        question=question,
+                        collection_name=info.get('name'),
+                        top_k=k,
+                        model=config.ollama.llm_model,
+                        temperature=config.rag.temperature if temperature is None else temperature,
+                        prompt_version=PROMPT_TEMPLATE_VERSION,
+                        retrieval={
+                            "mode": retrieval_mode,
+                            "mmr": [mmr_lambda, fetch_k or config.rag.mmr_fetch_k] if use_mmr else None,
+                            "filter": None,
+                            "hnsw_ef": hnsw_ef or config.qdrant.hnsw_ef,
+                            "oversampling": oversampling or config.qdrant.oversampling,
+                            "rescore": config.qdrant.rescore if rescore is None else rescore
+                        }
+                    )
+                    content_version = collection_content_version(vector_store_manager.get_collection_info())
+                    answer = answers.get(cache_key, info.get('name'), content_version)
+
+                if answer is not None:
+                    print("キャッシュした回答を使用します\n")
+                else:
+                    print("回答を生成中...\n")
+
+                    # コンテキスト生成
+                    docs_only = [doc for doc, _ in results]
+                    context = format_documents(docs_only)
+
+                    # プロンプト生成
+                    prompt = create_prompt_with_context(context, question)
+
+                    # LLM推論
+                    response = llm.invoke(prompt)
+                    answer = response.content if hasattr(response, 'content') else str(response)
+
+                    if answers is not None:
+                        answers.put(cache_key, info.get('name'), content_version, answer)
 
                 # 回答表示
                 print("-" * 60)
@@ -162,6 +273,60 @@ def main():
         default=None,
         help=f"取得するコンテキスト数（デフォルト: {config.rag.top_k}）"
     )
+    parser.add_argument(
+        "--hnsw-ef",
+        type=int,
+        default=None,
+        help="検索時のHNSW探索幅。大きいほど再現率が上がり遅くなる"
+             f"（デフォルト: {config.qdrant.hnsw_ef or 'Qdrantの既定値'}）"
+    )
+    parser.add_argument(
+        "--oversampling",
+        type=float,
+        default=None,
+        help="量子化したコレクションで取得する候補数の倍率"
+             f"（デフォルト: {config.qdrant.oversampling or 'Qdrantの既定値'}）"
+    )
+    parser.add_argument(
+        "--rescore",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"量子化検索の候補を元のベクトルで再スコアリング（デフォルト: {config.qdrant.rescore}）"
+    )
+    parser.add_argument(
+        "--retrieval-mode",
+        type=str,
+        choices=["dense", "sparse", "hybrid"],
+        default=None,
+        help="検索方法。hybridは密ベクトルと疎ベクトル（文字n-gramのBM25）の順位をRRFで統合する"
+             f"（デフォルト: {config.rag.retrieval_mode}）"
+    )
+    parser.add_argument(
+        "--mmr",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="MMRで互いに似たチャンク（重なりのある隣接チャンクなど）を避けて取得する"
+             f"（デフォルト: {config.rag.mmr_enabled}）"
+    )
+    parser.add_argument(
+        "--mmr-lambda",
+        type=float,
+        default=None,
+        help=f"MMRの重み。1に近いほど関連度、0に近いほど多様性を重視（デフォルト: {config.rag.mmr_lambda}）"
+    )
+    parser.add_argument(
+        "--fetch-k",
+        type=int,
+        default=None,
+        help=f"MMRで選ぶ前に取得する候補数（デフォルト: {config.rag.mmr_fetch_k}）"
+    )
+    parser.add_argument(
+        "--answer-cache",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="同じ質問・検索条件・コレクションの内容の回答をキャッシュから返す"
+             f"（デフォルト: {config.answer_cache.enabled}）"
+    )
     parser.add_argument(
         "--temperature",
         type=float,
@@ -175,7 +340,15 @@ def main():
         interactive_mode(
             collection_name=args.collection,
             top_k=args.top_k,
-            temperature=args.temperature
+            temperature=args.temperature,
+            hnsw_ef=args.hnsw_ef,
+            oversampling=args.oversampling,
+            rescore=args.rescore,
+            retrieval_mode=args.retrieval_mode,
+            mmr=args.mmr,
+            mmr_lambda=args.mmr_lambda,
+            fetch_k=args.fetch_k,
+            answer_cache=args.answer_cache
         )
     else:
         print("Local RAG Application")
@@ -0,0 +1,290 @@
+"""
+回答キャッシュモジュール
+LLMの回答をSQLiteに永続化し、同じ条件の質問では生成を省く
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import config
+from models.embedding_cache import normalize_query
+
+
+def collection_content_version(info: Dict[str, Any]) -> str:
+    """
+    コレクションの内容バージョンを取得
+
+    取り込み（ingest.py・scripts/ingest_jsonl_qa.py）がベクターストアに記録したバージョンに、
+    参照先のコレクション名（再構築で切り替わる）・ポイント数・保存先（NumPyバックエンドのマニフェスト）を
+    組み合わせるため、他の方法でコレクションを更新した場合もほとんどの変更を検知できる。
+    バージョンはコレクションと同じ場所に保存されるため、取り込みと検索の作業ディレクトリが異なっても一致する。
+
+    Args:
+        info: get_collection_info()の戻り値
+
+    Returns:
+        内容バージョンの文字列
+    """
+    return "\0".join(
+        str(value) for value in (
+            info.get("content_version", ""),
+            info.get("collection"),
+            info.get("points_count"),
+            info.get("path", "")
+        )
+    )
+
+
+def make_answer_key(
+    question: str,
+    collection_name: str,
+    top_k: int,
+    model: str,
+    temperature: float,
+    prompt_version: str,
+    retrieval: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    回答キャッシュのキーを生成
+
+    Args:
+        question: 質問文（normalize_queryで正規化する）
+        collection_name: コレクション名
+        top_k: 取得するコンテキスト数
+        model: LLMのモデル名
+        temperature: LLMの温度パラメータ
+        prompt_version: プロンプトテンプレートのバージョン
+        retrieval: 取得するコンテキストを変えるその他の検索条件（検索方法・MMR・絞り込み条件など）
+
+    Returns:
+        SHA-256の16進数文字列
+    """
+    payload = json.dumps(
+        {
+            "question": normalize_query(question),
+            "collection": collection_name,
+            "top_k": top_k,
+            "model": model,
+            "temperature": temperature,
+            "prompt_version": prompt_version,
+            "retrieval": retrieval or {}
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    LLMの回答の永続キャッシュ
+
+    キーはmake_answer_keyで生成し、回答を内容バージョンとともに保存する。
+    取得時に内容バージョンが異なる場合（取り込みでコレクションが更新された場合）は、
+    そのコレクションの古いバージョンのエントリをまとめて削除する。
+    ttl_seconds（0の場合は無期限）を過ぎたエントリは返さず、合計サイズが上限を超えると
+    最終アクセスの古いものから削除する（LRU）。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_mb: Optional[float] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        """
+        初期化
+
+        Args:
+            path: SQLiteファイルのパス（Noneの場合は設定から取得）
+            max_mb: キャッシュサイズの上限（MB、Noneの場合は設定から取得）
+            ttl_seconds: エントリの有効期間（秒、0は無期限、Noneの場合は設定から取得）
+        """
+        self.path = Path(path or config.answer_cache.path)
+        self.max_bytes = int((max_mb if max_mb is not None else config.answer_cache.max_mb) * 1024 * 1024)
+        self.ttl_seconds = config.answer_cache.ttl_seconds if ttl_seconds is None else ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                content_version TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers (last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_collection ON answers (collection, content_version)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM answers"
+        ).fetchone()[0]
+
+    def get(self, key: str, collection_name: str, content_version: str) -> Optional[str]:
+        """
+        キャッシュした回答を取得
+
+        Args:
+            key: make_answer_keyで生成したキー
+            collection_name: コレクション名
+            content_version: collection_content_versionで取得した現在の内容バージョン
+
+        Returns:
+            キャッシュした回答（ない場合・期限切れの場合・内容バージョンが異なる場合はNone）
+        """
+        with self._lock:
+            stale = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM answers WHERE collection = ? AND content_version != ?",
+                (collection_name, content_version)
+            ).fetchone()
+            if stale[1]:
+                # コレクションが更新されたため、古い内容に基づく回答をまとめて削除
+                self._conn.execute(
+                    "DELETE FROM answers WHERE collection = ? AND content_version != ?",
+                    (collection_name, content_version)
+                )
+                self._total_bytes -= stale[0]
+                self.evictions += stale[1]
+
+            row = self._conn.execute(
+                "SELECT answer, size, created_at FROM answers WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and time.time() - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._total_bytes -= row[1]
+                self.evictions += 1
+                row = None
+
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._conn.execute(
+                    "UPDATE answers SET last_access = ? WHERE key = ?",
+                    (time.time_ns(), key)
+                )
+            self._conn.commit()
+
+        return None if row is None else row[0]
+
+    def put(
+        self,
+        key: str,
+        collection_name: str,
+        content_version: str,
+        answer: str
+    ) -> None:
+        """
+        回答を保存し、上限を超えた場合は古いものを削除
+
+        Args:
+            key: make_answer_keyで生成したキー
+            collection_name: コレクション名
+            content_version: 回答の生成に使ったコレクションの内容バージョン
+            answer: 回答
+        """
+        size = len(answer.encode("utf-8")) + len(key)
+
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM answers WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, collection, content_version, answer, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, collection_name, content_version, answer, size, time.time(), time.time_ns())
+            )
+            self._conn.commit()
+            self._total_bytes += size - (previous[0] if previous else 0)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """期限切れのエントリを削除し、合計サイズが上限の90%以下になるまで古いエントリを削除（ロック取得済みで呼び出す）"""
+        removed = 0
+        if self.ttl_seconds:
+            removed += self._conn.execute(
+                "DELETE FROM answers WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM answers"
+            ).fetchone()[0]
+
+        target = self.max_bytes * 0.9
+        if self._total_bytes > target:
+            rows = self._conn.execute("SELECT key, size FROM answers ORDER BY last_access").fetchall()
+            keys = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                keys.append((key,))
+                self._total_bytes -= size
+            self._conn.executemany("DELETE FROM answers WHERE key = ?", keys)
+            removed += len(keys)
+
+        self.evictions += removed
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            ヒット数・ミス数・ヒット率・削除数・エントリ数・サイズの辞書
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": self._total_bytes / (1024 * 1024)
+        }
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_answer_cache(enabled: Optional[bool] = None) -> Optional[AnswerCache]:
+    """
+    設定に従って回答キャッシュを作成して返すヘルパー関数
+
+    Args:
+        enabled: 回答キャッシュを使うか（Noneの場合は設定から取得）
+
+    Returns:
+        AnswerCacheインスタンス（無効の場合はNone）
+    """
+    if not (config.answer_cache.enabled if enabled is None else enabled):
+        return None
+    return AnswerCache()
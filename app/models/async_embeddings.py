@@ -0,0 +1,299 @@
+"""
+非同期埋め込みモジュール
+複数の埋め込みリクエストを同時に送り、バッチサイズをレイテンシに応じて調整する
+"""
+
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+from ollama import AsyncClient, Client
+
+from config import config
+
+
+@dataclass
+class EmbeddingRequestStats:
+    """埋め込みリクエストの集計"""
+    requests: int = 0
+    texts: int = 0
+    chars: int = 0
+    retries: int = 0
+    total_latency: float = 0.0
+    max_in_flight: int = 0
+
+    @property
+    def average_latency(self) -> float:
+        """1リクエストあたりの平均レイテンシ（秒）"""
+        return self.total_latency / self.requests if self.requests else 0.0
+
+
+class AdaptiveBatchSizer:
+    """
+    観測したレイテンシに応じてバッチサイズを調整するクラス
+
+    レイテンシが目標を下回る間は加算的にバッチを大きくし、
+    目標を超えたりエラーが発生したりした場合は半分にする（AIMD）。
+    1バッチの合計文字数はmax_charsを超えないように切り詰める。
+    """
+
+    def __init__(
+        self,
+        initial_size: int = 16,
+        min_size: int = 1,
+        max_size: int = 128,
+        target_latency: float = 2.0,
+        max_chars: int = 32000
+    ):
+        """
+        初期化
+
+        Args:
+            initial_size: 初期バッチサイズ
+            min_size: 最小バッチサイズ
+            max_size: 最大バッチサイズ
+            target_latency: 1リクエストあたりの目標レイテンシ（秒）
+            max_chars: 1バッチの最大合計文字数
+        """
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.size = min(max(initial_size, self.min_size), self.max_size)
+        self.target_latency = target_latency
+        self.max_chars = max_chars
+
+    def take(self, texts: List[str], start: int, limit: Optional[int] = None) -> int:
+        """
+        startから始まる次のバッチの件数を決める
+
+        Args:
+            texts: テキストのリスト
+            start: バッチの開始位置
+            limit: 件数の上限（Noneの場合は現在のバッチサイズのみで決める）
+
+        Returns:
+            バッチに含める件数（1以上）
+        """
+        size = self.size if limit is None else min(self.size, limit)
+        count = 0
+        chars = 0
+        for text in texts[start:start + size]:
+            if count > 0 and chars + len(text) > self.max_chars:
+                break
+            count += 1
+            chars += len(text)
+        return max(1, count)
+
+    def record(self, latency: float, batch_size: int) -> None:
+        """
+        リクエスト結果を反映してバッチサイズを更新
+
+        Args:
+            latency: リクエストのレイテンシ（秒）
+            batch_size: リクエストしたバッチの件数
+        """
+        if latency > self.target_latency:
+            self.size = max(self.min_size, self.size // 2)
+        elif batch_size >= self.size and latency < self.target_latency * 0.75:
+            self.size = min(self.max_size, self.size + max(1, self.size // 4))
+
+    def shrink(self) -> None:
+        """エラー発生時にバッチサイズを半分にする"""
+        self.size = max(self.min_size, self.size // 2)
+
+
+class ConcurrentOllamaEmbeddings(Embeddings):
+    """
+    複数のリクエストを同時に送るOllama埋め込みクライアント
+
+    Ollamaサーバー側のOLLAMA_NUM_PARALLELを活かすため、入力を小さなバッチに分け、
+    最大concurrency件のリクエストをasyncioで並行して送る。
+    バッチサイズはAdaptiveBatchSizerが観測したレイテンシに応じて調整し、
+    サーバーが過負荷になるとバッチを小さくする。
+    1回の呼び出しの入力が少ない場合も同時実行数を保てるよう、バッチは入力件数÷concurrencyを上限とする。
+    同期呼び出し（embed_documents）では1つのイベントループとAsyncClientを使い回すため、
+    使い終わったらclose()を呼び出す。
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        target_latency: Optional[float] = None,
+        max_batch_chars: Optional[int] = None,
+        max_batch_size: Optional[int] = None,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5
+    ):
+        """
+        初期化
+
+        Args:
+            model: 埋め込みモデル名（Noneの場合は設定から取得）
+            base_url: OllamaのベースURL（Noneの場合は設定から取得）
+            concurrency: 同時に送るリクエスト数の上限（Noneの場合は設定から取得）
+            target_latency: 1リクエストあたりの目標レイテンシ（秒、Noneの場合は設定から取得）
+            max_batch_chars: 1リクエストの最大合計文字数（Noneの場合は設定から取得）
+            max_batch_size: 1リクエストの最大件数（Noneの場合は設定から取得）
+            max_retries: 1バッチあたりの最大リトライ回数
+            retry_backoff: リトライ間隔の初期値（秒、リトライごとに倍増）
+        """
+        self.model = model or config.ollama.embed_model
+        self.base_url = base_url or config.ollama.base_url
+        self.concurrency = max(1, concurrency or config.ollama.embed_concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.sizer = AdaptiveBatchSizer(
+            max_size=max_batch_size or config.ollama.embed_max_batch_size,
+            target_latency=target_latency or config.ollama.embed_target_latency,
+            max_chars=max_batch_chars or config.ollama.embed_max_batch_chars
+        )
+        self.stats = EmbeddingRequestStats()
+        self._in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[AsyncClient] = None
+        self._loop_lock = threading.Lock()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        複数のテキストを並行リクエストで埋め込みベクトルに変換
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            入力と同じ順序の埋め込みベクトルのリスト
+
+        Raises:
+            Exception: リトライしても埋め込み生成に失敗した場合
+        """
+        if not texts:
+            return []
+
+        if self._loop is not None and asyncio.get_running_loop() is self._loop:
+            # embed_documentsから呼ばれた場合は使い回しているクライアントを使う
+            if self._client is None:
+                self._client = AsyncClient(host=self.base_url)
+            return await self._embed_all(self._client, texts)
+
+        async with AsyncClient(host=self.base_url) as client:
+            return await self._embed_all(client, texts)
+
+    async def _embed_all(self, client: AsyncClient, texts: List[str]) -> List[List[float]]:
+        """入力をバッチに分け、最大concurrency件を並行して埋め込む"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        # バッチサイズが入力件数に近づいても、1つのリクエストで入力全体を送らないようにする
+        limit = math.ceil(len(texts) / self.concurrency)
+        tasks = []
+
+        start = 0
+        while start < len(texts):
+            # 空きができてからバッチサイズを決めることで、直前の観測結果を反映する
+            await semaphore.acquire()
+            count = self.sizer.take(texts, start, limit)
+            tasks.append(asyncio.create_task(
+                self._embed_batch(client, semaphore, texts, start, count, results)
+            ))
+            start += count
+
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            raise Exception(f"ドキュメントの埋め込み生成に失敗しました: {str(e)}")
+
+        return results
+
+    async def _embed_batch(
+        self,
+        client: AsyncClient,
+        semaphore: asyncio.Semaphore,
+        texts: List[str],
+        start: int,
+        count: int,
+        results: List[Optional[List[float]]]
+    ) -> None:
+        """1バッチを埋め込み、結果を所定の位置に書き込む"""
+        try:
+            batch = texts[start:start + count]
+            for attempt in range(self.max_retries + 1):
+                self._in_flight += 1
+                self.stats.max_in_flight = max(self.stats.max_in_flight, self._in_flight)
+                started = time.perf_counter()
+                try:
+                    response = await client.embed(model=self.model, input=batch)
+                except Exception:
+                    if attempt >= self.max_retries:
+                        raise
+                    self.stats.retries += 1
+                    self.sizer.shrink()
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+                    continue
+                finally:
+                    self._in_flight -= 1
+
+                latency = time.perf_counter() - started
+                self.sizer.record(latency, len(batch))
+                self.stats.requests += 1
+                self.stats.texts += len(batch)
+                self.stats.chars += sum(len(t) for t in batch)
+                self.stats.total_latency += latency
+
+                results[start:start + count] = response["embeddings"]
+                return
+        finally:
+            semaphore.release()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        複数のテキストを埋め込みベクトルに変換（同期呼び出し用）
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            埋め込みベクトルのリスト
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(self.aembed_documents(texts))
+
+    def close(self) -> None:
+        """使い回しているAsyncClientとイベントループを閉じる"""
+        with self._loop_lock:
+            if self._loop is None:
+                return
+            if self._client is not None:
+                self._loop.run_until_complete(self._client.close())
+                self._client = None
+            self._loop.close()
+            self._loop = None
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        単一のクエリテキストを埋め込みベクトルに変換
+
+        Args:
+            text: クエリテキスト
+
+        Returns:
+            埋め込みベクトル
+
+        Raises:
+            Exception: 埋め込み生成に失敗した場合
+        """
+        try:
+            return Client(host=self.base_url).embed(model=self.model, input=text)["embeddings"][0]
+        except Exception as e:
+            raise Exception(f"クエリの埋め込み生成に失敗しました: {str(e)}")
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """単一のクエリテキストを非同期で埋め込みベクトルに変換"""
+        return (await self.aembed_documents([text]))[0]
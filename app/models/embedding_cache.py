@@ -0,0 +1,400 @@
+"""
+埋め込みキャッシュモジュール
+埋め込みベクトルをSQLiteに永続化し、同じテキストの再埋め込みを省く
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import config
+
+
+def normalize_text(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化
+
+    Args:
+        text: 入力テキスト
+
+    Returns:
+        NFC正規化し前後の空白を除いたテキスト
+    """
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def normalize_query(text: str) -> str:
+    """
+    クエリ埋め込みキャッシュのキー用にテキストを正規化
+
+    全角・半角の揺れや空白の入れ方だけが異なる質問を同じクエリとみなすため、
+    NFKC正規化して連続する空白を1つにまとめる。
+
+    Args:
+        text: 入力テキスト
+
+    Returns:
+        正規化したテキスト
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(model: str, text: str) -> str:
+    """
+    埋め込みモデル名と正規化テキストからキャッシュキーを生成
+
+    Args:
+        model: 埋め込みモデル名
+        text: 入力テキスト
+
+    Returns:
+        SHA-256の16進数文字列
+    """
+    payload = f"{model}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    コンテンツアドレス方式の埋め込みキャッシュ
+
+    キーは埋め込みモデル名と正規化テキストのハッシュで、ベクトルは
+    float16またはfloat32のバイナリとして保存する。合計サイズが上限を超えると
+    最終アクセスの古いものから削除する（LRU）。
+    """
+
+    SUPPORTED_DTYPES = {"float16": np.float16, "float32": np.float32}
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_mb: Optional[int] = None,
+        dtype: Optional[str] = None
+    ):
+        """
+        初期化
+
+        Args:
+            path: SQLiteファイルのパス（Noneの場合は設定から取得）
+            max_mb: キャッシュサイズの上限（MB、Noneの場合は設定から取得）
+            dtype: 保存時の型 "float16" または "float32"（Noneの場合は設定から取得）
+
+        Raises:
+            ValueError: サポートされていない型が指定された場合
+        """
+        self.path = Path(path or config.embed_cache.path)
+        self.max_bytes = int((max_mb if max_mb is not None else config.embed_cache.max_mb) * 1024 * 1024)
+        self.dtype = dtype or config.embed_cache.dtype
+
+        if self.dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(
+                f"サポートされていない型です: {self.dtype}\n"
+                f"サポート型: {', '.join(self.SUPPORTED_DTYPES.keys())}"
+            )
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dtype TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        複数キーのベクトルを取得
+
+        Args:
+            keys: キャッシュキーのリスト
+
+        Returns:
+            キャッシュに存在したキーとベクトルの辞書
+        """
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    vector = np.frombuffer(blob, dtype=self.SUPPORTED_DTYPES[dtype])
+                    found[key] = vector.astype(np.float32).tolist()
+
+            if found:
+                now = time.time_ns()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        複数のベクトルを保存し、上限を超えた場合は古いものを削除
+
+        Args:
+            items: キャッシュキーとベクトルの辞書
+        """
+        if not items:
+            return
+
+        np_dtype = self.SUPPORTED_DTYPES[self.dtype]
+        now = time.time_ns()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np_dtype).tobytes()
+            rows.append((key, self.dtype, blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._total_bytes += sum(row[3] for row in rows)
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """合計サイズが上限の90%以下になるまで古いエントリを削除（ロック取得済みで呼び出す）"""
+        # 置き換えで発生した誤差を実際の値で補正する
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_access LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+
+            removed = []
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                removed.append((key,))
+                self._total_bytes -= size
+
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", removed)
+            self.evictions += len(removed)
+
+        self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            ヒット数・ミス数・ヒット率・エントリ数・サイズの辞書
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": self._total_bytes / (1024 * 1024)
+        }
+
+    def close(self) -> None:
+        """データベース接続を閉じる"""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    埋め込みキャッシュを挟んだEmbeddingsラッパー
+
+    embed_documentsでキャッシュにないテキストだけを内部の埋め込みモデルに渡す。
+    LangChainのEmbeddingsインターフェースを実装しているため、
+    QdrantVectorStoreにそのまま渡せる。
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model: str):
+        """
+        初期化
+
+        Args:
+            embeddings: 内部の埋め込みモデル
+            cache: EmbeddingCacheインスタンス
+            model: キャッシュキーに使う埋め込みモデル名
+        """
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        複数のテキストを埋め込みベクトルに変換（キャッシュ優先）
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            埋め込みベクトルのリスト
+        """
+        keys = [make_cache_key(self.model, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            cached.update(computed)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        単一のクエリテキストを埋め込みベクトルに変換（キャッシュは使用しない）
+
+        Args:
+            text: クエリテキスト
+
+        Returns:
+            埋め込みベクトル
+        """
+        return self.embeddings.embed_query(text)
+
+    def stats(self) -> dict:
+        """キャッシュの統計情報を取得"""
+        return self.cache.stats()
+
+
+class QueryEmbeddingCache(Embeddings):
+    """
+    クエリ埋め込みのメモリ内LRUキャッシュを挟んだEmbeddingsラッパー
+
+    対話モードのように同じプロセスで質問を繰り返す場合に、同じ（正規化すると一致する）質問の
+    embed_queryで埋め込みモデルを呼ばずにキャッシュしたベクトルを返す。
+    キーは埋め込みモデル名とnormalize_queryで正規化したテキストで、
+    capacity件を超えると最も長く使われていないものから削除する。
+    embed_documentsはキャッシュせずにそのまま内部の埋め込みモデルに渡す。
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str, capacity: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            embeddings: 内部の埋め込みモデル
+            model: キャッシュキーに使う埋め込みモデル名
+            capacity: 保持するクエリ数の上限（Noneの場合は設定から取得）
+        """
+        self.embeddings = embeddings
+        self.model = model
+        self.capacity = config.embed_cache.query_cache_size if capacity is None else capacity
+        self._entries: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        複数のテキストを埋め込みベクトルに変換（キャッシュは使用しない）
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            埋め込みベクトルのリスト
+        """
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        単一のクエリテキストを埋め込みベクトルに変換（キャッシュ優先）
+
+        Args:
+            text: クエリテキスト
+
+        Returns:
+            埋め込みベクトル
+        """
+        key = (self.model, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+            self.misses += 1
+
+        # 正規化したテキストを埋め込むため、最初に来た表記によらず同じベクトルになる
+        vector = self.embeddings.embed_query(key[1])
+        if self.capacity > 0:
+            with self._lock:
+                self._entries[key] = list(vector)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return vector
+
+    def stats(self) -> dict:
+        """
+        キャッシュの統計情報を取得
+
+        Returns:
+            ヒット数・ミス数・ヒット率・エントリ数・上限の辞書
+        """
+        with self._lock:
+            entries = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "capacity": self.capacity
+        }
@@ -3,9 +3,13 @@
 Ollama経由でnomic-embed-textを使用
 """
 
+import urllib.request
 from typing import List, Optional
+from langchain_core.embeddings import Embeddings
 from langchain_ollama import OllamaEmbeddings as LangChainOllamaEmbeddings
 from config import config
+from models.embedding_cache import CachedEmbeddings, EmbeddingCache, QueryEmbeddingCache
+from models.async_embeddings import ConcurrentOllamaEmbeddings
 
 
 class OllamaEmbeddings:
@@ -93,15 +97,57 @@ class OllamaEmbeddings:
         return self._embeddings
 
 
-def create_embeddings(model: Optional[str] = None) -> LangChainOllamaEmbeddings:
+def create_embeddings(
+    model: Optional[str] = None,
+    use_cache: bool = False,
+    concurrency: Optional[int] = None,
+    query_cache: bool = False
+) -> Embeddings:
     """
     埋め込みモデルインスタンスを作成して返すヘルパー関数
 
     Args:
         model: 埋め込みモデル名
+        use_cache: Trueの場合、永続埋め込みキャッシュでラップして返す
+        concurrency: 2以上の場合、同時にリクエストを送るConcurrentOllamaEmbeddingsを使用
+        query_cache: Trueの場合、クエリ埋め込みのメモリ内LRUキャッシュでラップして返す
+            （QUERY_EMBED_CACHE_SIZEが0の場合はラップしない）
 
     Returns:
         初期化済みのOllamaEmbeddingsインスタンス
+        （use_cache=Trueの場合はCachedEmbeddings、query_cache=Trueの場合はQueryEmbeddingCacheインスタンス）
     """
-    embeddings = OllamaEmbeddings(model=model)
-    return embeddings.initialize()
+    if concurrency is not None and concurrency > 1:
+        initialized = ConcurrentOllamaEmbeddings(model=model, concurrency=concurrency)
+        model_name = initialized.model
+    else:
+        embeddings = OllamaEmbeddings(model=model)
+        initialized = embeddings.initialize()
+        model_name = embeddings.model
+
+    if use_cache:
+        initialized = CachedEmbeddings(initialized, EmbeddingCache(), model=model_name)
+
+    if query_cache and config.embed_cache.query_cache_size > 0:
+        initialized = QueryEmbeddingCache(initialized, model=model_name)
+
+    return initialized
+
+
+def is_ollama_available(timeout: float = 2.0) -> bool:
+    """
+    Ollamaサーバーに接続できるかを確認
+
+    埋め込みモデルを作成する前に確認し、停止している場合は疎ベクトルのみの検索に切り替えるために使う。
+
+    Args:
+        timeout: 接続のタイムアウト（秒）
+
+    Returns:
+        接続できた場合True
+    """
+    try:
+        with urllib.request.urlopen(f"{config.ollama.base_url}/api/tags", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
@@ -0,0 +1,133 @@
+"""
+疎ベクトル埋め込みモジュール
+日本語の文字n-gram（2-gram・3-gram）とBM25の重みで疎ベクトルを作成する
+"""
+
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+from langchain_qdrant import SparseEmbeddings, SparseVector
+
+from config import config
+
+# n-gramを作る文字の並び（空白・記号で区切る。漢字・かな・英数字は同じ並びに含める）
+_TOKEN_RUN = re.compile(r"\w+")
+
+
+def char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> List[str]:
+    """
+    テキストを文字n-gramに分割
+
+    NFKC正規化（全角英数字・半角カナの統一）と小文字化の後、空白・記号で区切った
+    文字の並びごとにn-gramを作る。並びがn文字未満の場合はその並び自体を1つの語とするため、
+    「第3条」のような短い語や1文字の漢字も検索できる。
+
+    Args:
+        text: 入力テキスト
+        sizes: n-gramの文字数
+
+    Returns:
+        n-gramのリスト（重複を含む）
+    """
+    normalized = unicodedata.normalize("NFKC", text).lower()
+    grams = []
+    for run in _TOKEN_RUN.findall(normalized):
+        for n in sizes:
+            if len(run) < n:
+                if n == min(sizes):
+                    grams.append(run)
+                continue
+            grams.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return grams
+
+
+def ngram_index(gram: str) -> int:
+    """n-gramを疎ベクトルの次元番号に変換（プロセス・実行間で同じ値になるCRC32）"""
+    return zlib.crc32(gram.encode("utf-8")) & 0x7FFFFFFF
+
+
+def _to_sparse_vector(weights: Dict[int, float]) -> SparseVector:
+    """次元番号から重みへの辞書を疎ベクトルに変換"""
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[float(weights[i]) for i in indices])
+
+
+class JapaneseBM25SparseEmbeddings(SparseEmbeddings):
+    """
+    文字n-gramのBM25による疎ベクトル埋め込み
+
+    ドキュメント側はBM25の語頻度の項 tf×(k1+1) / (tf + k1×(1−b+b×文書長/平均文書長)) を重みとし、
+    IDFはQdrantの疎ベクトルのmodifier=IDFでコレクション全体から計算する。
+    クエリ側は各n-gramの出現回数を重みとするため、内積がBM25のスコアになる。
+    モデルを使わないため、Ollamaが停止していても作成できる。
+    """
+
+    def __init__(
+        self,
+        ngram_sizes: Optional[Sequence[int]] = None,
+        k1: Optional[float] = None,
+        b: Optional[float] = None,
+        avg_length: Optional[float] = None
+    ):
+        """
+        初期化
+
+        Args:
+            ngram_sizes: n-gramの文字数（Noneの場合は設定から取得）
+            k1: BM25の語頻度の飽和パラメータ（Noneの場合は設定から取得）
+            b: BM25の文書長による正規化の強さ（Noneの場合は設定から取得）
+            avg_length: 平均文書長（n-gram数、Noneの場合は設定から取得し、それもNoneならチャンクサイズから推定）
+        """
+        self.ngram_sizes = tuple(ngram_sizes or config.sparse.ngram_sizes)
+        self.k1 = config.sparse.k1 if k1 is None else k1
+        self.b = config.sparse.b if b is None else b
+        # 1文字あたりn-gramの種類数だけ語ができるため、チャンクサイズ×種類数を平均文書長の目安とする
+        self.avg_length = avg_length or config.sparse.avg_length or \
+            float(config.rag.chunk_size * len(self.ngram_sizes))
+
+    def _embed_document(self, text: str) -> SparseVector:
+        """1つのドキュメントをBM25の語頻度の重みの疎ベクトルに変換"""
+        counts = Counter(ngram_index(gram) for gram in char_ngrams(text, self.ngram_sizes))
+        length = sum(counts.values())
+        norm = self.k1 * (1 - self.b + self.b * length / self.avg_length)
+        return _to_sparse_vector({
+            index: tf * (self.k1 + 1) / (tf + norm)
+            for index, tf in counts.items()
+        })
+
+    def embed_documents(self, texts: List[str]) -> List[SparseVector]:
+        """
+        複数のテキストを疎ベクトルに変換
+
+        Args:
+            texts: テキストのリスト
+
+        Returns:
+            疎ベクトルのリスト
+        """
+        return [self._embed_document(text) for text in texts]
+
+    def embed_query(self, text: str) -> SparseVector:
+        """
+        クエリテキストを疎ベクトルに変換
+
+        Args:
+            text: クエリテキスト
+
+        Returns:
+            疎ベクトル
+        """
+        return _to_sparse_vector(Counter(ngram_index(gram) for gram in char_ngrams(text, self.ngram_sizes)))
+
+
+def create_sparse_embeddings() -> JapaneseBM25SparseEmbeddings:
+    """
+    設定に従って疎ベクトル埋め込みを作成して返すヘルパー関数
+
+    Returns:
+        JapaneseBM25SparseEmbeddingsインスタンス
+    """
+    return JapaneseBM25SparseEmbeddings()
@@ -0,0 +1 @@
+"""Pipeline module - ドキュメント取り込みパイプライン"""
@@ -0,0 +1,222 @@
+"""
+取り込みチェックポイントモジュール
+保存済みのバッチとファイルをジャーナルに記録し、中断した取り込みを再開できるようにする
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from config import config
+
+
+class CheckpointMismatchError(Exception):
+    """チェックポイントと再開時の設定が一致しない場合の例外"""
+
+
+class IngestCheckpoint:
+    """
+    取り込みの進捗を記録するチェックポイント
+
+    バッチの保存が完了するたびに、そのバッチに含まれるファイルごとのチャンク数と
+    保存が完了したファイルを追記専用のJSON Linesジャーナルに書き込み、fsyncする。
+    再開時はジャーナルを先頭から再生して状態を復元する。
+    追記のみのため、ファイル数が多くてもバッチごとの書き込み量は一定に保たれる。
+    """
+
+    def __init__(self, path: str):
+        """
+        初期化
+
+        Args:
+            path: ジャーナルファイルのパス
+        """
+        self.path = Path(path)
+        self.signature: Dict = {}
+        self.completed_files: set = set()
+        self.committed_chunks: Dict[str, int] = defaultdict(int)
+        self.last_batch = 0
+        self.finished = False
+        self._produced: Dict[str, int] = defaultdict(int)
+        self._loaded: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @classmethod
+    def for_collection(
+        cls,
+        collection_name: str,
+        state_dir: Optional[str] = None
+    ) -> "IngestCheckpoint":
+        """
+        コレクションに対応するチェックポイントを取得
+
+        Args:
+            collection_name: コレクション名
+            state_dir: 状態ファイルの保存先（Noneの場合は設定から取得）
+
+        Returns:
+            IngestCheckpointインスタンス
+        """
+        base_dir = Path(state_dir or config.ingest.state_dir)
+        return cls(str(base_dir / "checkpoints" / f"{collection_name}.jsonl"))
+
+    @property
+    def exists(self) -> bool:
+        """ジャーナルファイルが存在するか"""
+        return self.path.exists()
+
+    def start(self, signature: Dict) -> None:
+        """
+        新しい取り込みのジャーナルを開始（既存のジャーナルは破棄）
+
+        Args:
+            signature: 取り込み元やチャンク設定など、再開時に一致を確認する値
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.signature = dict(signature)
+        self.completed_files = set()
+        self.committed_chunks = defaultdict(int)
+        self.last_batch = 0
+        self.finished = False
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._append({"type": "start", "signature": self.signature})
+
+    def resume(self, signature: Dict) -> None:
+        """
+        既存のジャーナルを読み込んで取り込みを再開
+
+        Args:
+            signature: 今回の取り込み設定
+
+        Raises:
+            FileNotFoundError: ジャーナルが存在しない場合
+            CheckpointMismatchError: 前回と取り込み設定が異なる場合
+        """
+        if not self.exists:
+            raise FileNotFoundError(f"再開できるチェックポイントがありません: {self.path}")
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 書き込み途中で中断された最終行は無視する
+                    break
+                self._replay(record)
+
+        if self.signature != dict(signature):
+            raise CheckpointMismatchError(
+                "チェックポイントの取り込み設定が今回の指定と一致しません: "
+                f"前回={self.signature} 今回={dict(signature)}"
+            )
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._append({"type": "resume"})
+
+    def _replay(self, record: Dict) -> None:
+        """ジャーナルの1レコードを状態に反映"""
+        record_type = record.get("type")
+        if record_type == "start":
+            self.signature = record["signature"]
+        elif record_type == "batch":
+            self.last_batch = record["batch"]
+            for file_path, count in record.get("chunks", {}).items():
+                self.committed_chunks[file_path] += count
+            self.completed_files.update(record.get("completed", []))
+        elif record_type == "completed":
+            self.completed_files.update(record["files"])
+        elif record_type == "finish":
+            self.finished = True
+
+    def _append(self, record: Dict) -> None:
+        """レコードを追記してディスクに同期"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def is_completed(self, file_path: str) -> bool:
+        """ファイルの保存が完了しているか"""
+        return str(file_path) in self.completed_files
+
+    def has_progress(self, file_path: str) -> bool:
+        """ファイルのチャンクが1件以上保存済みか"""
+        key = str(file_path)
+        return key in self.completed_files or self.committed_chunks.get(key, 0) > 0
+
+    def committed_count(self, file_path: str) -> int:
+        """ファイルの保存済みチャンク数"""
+        return self.committed_chunks.get(str(file_path), 0)
+
+    def record_produced(self, file_path: str) -> None:
+        """チャンクが生成されたことを記録（読み込み側から呼び出す）"""
+        with self._lock:
+            self._produced[str(file_path)] += 1
+
+    def record_loaded(self, file_path: str) -> None:
+        """
+        ファイルの全チャンクが生成されたことを記録（読み込み側から呼び出す）
+
+        生成したチャンクがすでにすべて保存済み（チャンクが0件の場合を含む）であれば、
+        この時点でファイルを完了として記録する。
+        """
+        key = str(file_path)
+        with self._lock:
+            produced = self._produced.pop(key, 0)
+            if self.committed_chunks.get(key, 0) >= produced:
+                self.completed_files.add(key)
+                self._append({"type": "completed", "files": [key]})
+            else:
+                self._loaded[key] = produced
+
+    def record_batch(self, batch_number: int, batch: List[Document]) -> List[str]:
+        """
+        バッチの保存完了を記録
+
+        Args:
+            batch_number: 保存が完了したバッチ番号
+            batch: 保存したチャンクのリスト
+
+        Returns:
+            このバッチで保存が完了したファイルのリスト
+        """
+        counts: Dict[str, int] = defaultdict(int)
+        for doc in batch:
+            counts[str(doc.metadata.get("file_path", ""))] += 1
+
+        with self._lock:
+            completed = []
+            for key, count in counts.items():
+                self.committed_chunks[key] += count
+                expected = self._loaded.get(key)
+                if expected is not None and self.committed_chunks[key] >= expected:
+                    self._loaded.pop(key)
+                    self.completed_files.add(key)
+                    completed.append(key)
+
+            self.last_batch = batch_number
+            self._append({
+                "type": "batch",
+                "batch": batch_number,
+                "chunks": dict(counts),
+                "completed": completed
+            })
+        return completed
+
+    def finish(self) -> None:
+        """取り込みの完了を記録してジャーナルを閉じる"""
+        with self._lock:
+            self.finished = True
+            self._append({"type": "finish"})
+            self.close()
+
+    def close(self) -> None:
+        """ジャーナルファイルを閉じる"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,253 @@
+"""
+パイプライン実行モジュール
+埋め込みと保存をスレッドで並行させ、ステージ間を有界キューでつなぐ
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# ステージ終了を下流に伝える番兵
+_END = object()
+
+
+@dataclass
+class StageStats:
+    """ステージごとの稼働状況"""
+    name: str
+    busy_seconds: float = 0.0
+    idle_seconds: float = 0.0
+    blocked_seconds: float = 0.0
+    batches: int = 0
+    items: int = 0
+
+    @property
+    def total_seconds(self) -> float:
+        """計測した合計時間"""
+        return self.busy_seconds + self.idle_seconds + self.blocked_seconds
+
+    @property
+    def utilization(self) -> float:
+        """処理中だった時間の割合"""
+        total = self.total_seconds
+        return self.busy_seconds / total if total else 0.0
+
+
+class _StageFailed(Exception):
+    """他のステージで例外が発生したことを示す内部例外"""
+
+
+class PipelinedExecutor:
+    """
+    読み込み・埋め込み・保存の3ステージを並行実行するエグゼキューター
+
+    バッチNを保存している間にバッチN+1を埋め込むことで、
+    OllamaとQdrantのどちらかが常に待機している状態を解消する。
+    ステージ間のキューは有界のため、下流が詰まると上流は自動的に待機し、
+    同時に保持するバッチ数は 3 + 2 * queue_size を超えない。
+
+    各ステージについて、処理中（busy）・入力待ち（idle）・
+    出力待ち（blocked）の時間を計測する。
+    """
+
+    STAGES = ("load", "embed", "upsert")
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[Any]], List[List[float]]],
+        upsert_fn: Callable[[List[Any], List[List[float]]], Any],
+        queue_size: int = 1
+    ):
+        """
+        初期化
+
+        Args:
+            embed_fn: バッチを受け取り埋め込みベクトルのリストを返す関数
+            upsert_fn: バッチと埋め込みベクトルを受け取り保存する関数
+            queue_size: ステージ間キューの最大バッチ数
+        """
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.queue_size = max(1, queue_size)
+        self.stats: Dict[str, StageStats] = {name: StageStats(name) for name in self.STAGES}
+        self._error: Optional[BaseException] = None
+        self._failed = threading.Event()
+
+    def run(
+        self,
+        batches: Iterable[List[Any]],
+        on_committed: Optional[Callable[[int, List[Any]], None]] = None
+    ) -> Dict[str, StageStats]:
+        """
+        パイプラインを実行
+
+        Args:
+            batches: バッチのイテラブル（読み込みステージとして別スレッドで消費される）
+            on_committed: バッチの保存完了時に (バッチ番号, バッチ) を受け取るコールバック
+
+        Returns:
+            ステージ名とStageStatsの辞書
+
+        Raises:
+            Exception: いずれかのステージで発生した例外
+        """
+        embed_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        threads = [
+            threading.Thread(
+                target=self._guard,
+                args=(self._load_stage, iter(batches), embed_queue),
+                name="ingest-load",
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._guard,
+                args=(self._embed_stage, embed_queue, upsert_queue),
+                name="ingest-embed",
+                daemon=True
+            )
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._upsert_stage(upsert_queue, on_committed)
+        except _StageFailed:
+            pass
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+        return self.stats
+
+    def _guard(self, stage: Callable, *args) -> None:
+        """ステージを実行し、例外を記録して他のステージを停止させる"""
+        try:
+            stage(*args)
+        except _StageFailed:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _fail(self, error: BaseException) -> None:
+        """最初に発生した例外を記録して全ステージに停止を通知"""
+        if self._error is None:
+            self._error = error
+        self._failed.set()
+
+    def _put(self, target: queue.Queue, item: Any, stats: StageStats) -> None:
+        """キューに空きができるまで待機して追加"""
+        started = time.perf_counter()
+        while True:
+            if self._failed.is_set():
+                raise _StageFailed()
+            try:
+                target.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stats.blocked_seconds += time.perf_counter() - started
+
+    def _get(self, source: queue.Queue, stats: StageStats) -> Any:
+        """キューに要素が届くまで待機して取得"""
+        started = time.perf_counter()
+        while True:
+            if self._failed.is_set():
+                raise _StageFailed()
+            try:
+                item = source.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        stats.idle_seconds += time.perf_counter() - started
+        return item
+
+    def _load_stage(self, batches: Iterator[List[Any]], output: queue.Queue) -> None:
+        """読み込みステージ：バッチを生成して埋め込みキューへ送る"""
+        stats = self.stats["load"]
+        while True:
+            started = time.perf_counter()
+            batch = next(batches, _END)
+            stats.busy_seconds += time.perf_counter() - started
+
+            if batch is _END:
+                self._put(output, _END, stats)
+                return
+
+            stats.batches += 1
+            stats.items += len(batch)
+            self._put(output, batch, stats)
+
+    def _embed_stage(self, source: queue.Queue, output: queue.Queue) -> None:
+        """埋め込みステージ：バッチを埋め込んで保存キューへ送る"""
+        stats = self.stats["embed"]
+        while True:
+            batch = self._get(source, stats)
+            if batch is _END:
+                self._put(output, _END, stats)
+                return
+
+            started = time.perf_counter()
+            vectors = self.embed_fn(batch)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            stats.items += len(batch)
+
+            self._put(output, (batch, vectors), stats)
+
+    def _upsert_stage(
+        self,
+        source: queue.Queue,
+        on_committed: Optional[Callable[[int, List[Any]], None]]
+    ) -> None:
+        """保存ステージ：埋め込み済みバッチをベクターストアへ保存する"""
+        stats = self.stats["upsert"]
+        while True:
+            item = self._get(source, stats)
+            if item is _END:
+                return
+
+            batch, vectors = item
+            started = time.perf_counter()
+            self.upsert_fn(batch, vectors)
+            stats.busy_seconds += time.perf_counter() - started
+            stats.batches += 1
+            stats.items += len(batch)
+
+            if on_committed is not None:
+                on_committed(stats.batches, batch)
+
+
+def format_stage_report(stats: Dict[str, StageStats]) -> str:
+    """
+    ステージごとの稼働状況を表形式の文字列にする
+
+    Args:
+        stats: ステージ名とStageStatsの辞書
+
+    Returns:
+        表形式の文字列
+    """
+    lines = [f"  {'ステージ':<8}{'処理':>10}{'入力待ち':>10}{'出力待ち':>10}{'稼働率':>8}{'件数':>10}"]
+    for stage in stats.values():
+        lines.append(
+            f"  {stage.name:<10}"
+            f"{stage.busy_seconds:>11.2f}s"
+            f"{stage.idle_seconds:>11.2f}s"
+            f"{stage.blocked_seconds:>11.2f}s"
+            f"{stage.utilization:>9.0%}"
+            f"{stage.items:>12}"
+        )
+
+    busiest = max(stats.values(), key=lambda s: s.utilization, default=None)
+    if busiest is not None and busiest.total_seconds > 0:
+        lines.append(f"  ボトルネック: {busiest.name}（稼働率 {busiest.utilization:.0%}）")
+    return "\n".join(lines)
@@ -0,0 +1,206 @@
+"""
+取り込みマニフェストモジュール
+ファイルのパス・サイズ・更新時刻・内容ハッシュを記録し、差分取り込みを実現する
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from config import config
+
+
+@dataclass
+class ManifestEntry:
+    """マニフェストに記録する1ファイル分の情報"""
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+@dataclass
+class ManifestDiff:
+    """前回の取り込みと現在のファイル群の差分"""
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    entries: Dict[str, ManifestEntry] = field(default_factory=dict)
+
+    @property
+    def to_ingest(self) -> List[Path]:
+        """取り込みが必要なファイル（新規＋変更）"""
+        return self.added + self.changed
+
+
+def compute_file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    ファイル内容のSHA-256ハッシュを計算
+
+    Args:
+        file_path: ファイルパス
+        chunk_size: 一度に読み込むバイト数
+
+    Returns:
+        16進数表記のハッシュ値
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(chunk_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    コレクションごとの取り込みマニフェスト
+
+    サイズと更新時刻が前回と同じファイルはハッシュを計算せずに未変更とみなし、
+    どちらかが変わったファイルだけ内容ハッシュで変更を判定する。
+    そのため差分の検出コストは変更のあったファイル量にほぼ比例する。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        初期化
+
+        Args:
+            path: マニフェストファイルのパス
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = {}
+        self._load()
+
+    @classmethod
+    def for_collection(
+        cls,
+        collection_name: str,
+        state_dir: Optional[str] = None
+    ) -> "IngestManifest":
+        """
+        コレクションに対応するマニフェストを取得
+
+        Args:
+            collection_name: コレクション名
+            state_dir: 状態ファイルの保存先（Noneの場合は設定から取得）
+
+        Returns:
+            IngestManifestインスタンス
+        """
+        base_dir = Path(state_dir or config.ingest.state_dir)
+        return cls(str(base_dir / "manifests" / f"{collection_name}.json"))
+
+    def _load(self) -> None:
+        """マニフェストファイルを読み込む"""
+        if not self.path.exists():
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise Exception(f"マニフェストの読み込みに失敗しました ({self.path}): {str(e)}")
+
+        self.entries = {
+            file_path: ManifestEntry(**entry)
+            for file_path, entry in data.get("files", {}).items()
+        }
+
+    def diff(self, files: Iterable[Path], root: Optional[Path] = None) -> ManifestDiff:
+        """
+        現在のファイル群とマニフェストの差分を計算
+
+        Args:
+            files: 現在のファイルパスのイテラブル
+            root: 取り込み元のルート。指定した場合、削除判定はこの配下のエントリに限定する
+
+        Returns:
+            ManifestDiffインスタンス
+        """
+        result = ManifestDiff()
+        seen = set()
+
+        for file_path in files:
+            path = Path(file_path).absolute()
+            key = str(path)
+            seen.add(key)
+
+            stat = path.stat()
+            previous = self.entries.get(key)
+
+            if previous and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+                result.unchanged.append(path)
+                continue
+
+            entry = ManifestEntry(
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256=compute_file_hash(path)
+            )
+            result.entries[key] = entry
+
+            if previous is None:
+                result.added.append(path)
+            elif previous.sha256 == entry.sha256:
+                # 更新時刻だけが変わったファイルは取り込み不要
+                result.unchanged.append(path)
+            else:
+                result.changed.append(path)
+
+        root_prefix = None
+        if root is not None:
+            root_path = Path(root).absolute()
+            root_prefix = str(root_path) if root_path.is_file() else os.path.join(str(root_path), "")
+
+        for key in self.entries:
+            if key in seen:
+                continue
+            if root_prefix is None or key == root_prefix or key.startswith(root_prefix):
+                result.deleted.append(key)
+
+        return result
+
+    def apply(self, diff: ManifestDiff, failed_files: Iterable[str] = ()) -> None:
+        """
+        取り込み結果をマニフェストに反映
+
+        取り込みに失敗したファイルは次回再試行されるようエントリを削除する。
+
+        Args:
+            diff: 取り込み前に計算した差分
+            failed_files: 取り込みに失敗したファイルパスのイテラブル
+        """
+        failed = {str(Path(f).absolute()) for f in failed_files}
+
+        for key, entry in diff.entries.items():
+            if key in failed:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = entry
+
+        for key in diff.deleted:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        self.entries = {}
+
+    def save(self) -> None:
+        """マニフェストファイルを書き出す（一時ファイル経由で置き換える）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.VERSION,
+            "files": {key: asdict(entry) for key, entry in sorted(self.entries.items())}
+        }
+
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
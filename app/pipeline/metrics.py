@@ -0,0 +1,327 @@
+"""
+取り込み計測モジュール
+ステージごとの実時間・CPU時間・処理件数・最大メモリと、ファイル形式ごとのスループットを記録する
+"""
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+# 計測対象のステージ（表示順）
+STAGES = ("load", "split", "dedup", "embed", "upsert")
+
+
+def peak_rss_mb() -> float:
+    """プロセスのピークRSS（MB）を取得（Linuxのru_maxrssはKB単位）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb() -> float:
+    """プロセスの現在のRSS（MB）を取得（/proc/self/statmがない環境ではピークRSS）"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+@dataclass
+class StageMetrics:
+    """ステージの計測結果"""
+    name: str
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    calls: int = 0
+    items: int = 0
+    peak_rss_mb: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        """実時間あたりの処理件数"""
+        return self.items / self.wall_seconds if self.wall_seconds else 0.0
+
+
+@dataclass
+class FileTypeMetrics:
+    """ファイル形式ごとの計測結果"""
+    extension: str
+    files: int = 0
+    bytes: int = 0
+    documents: int = 0
+    chunks: int = 0
+    load_seconds: float = 0.0
+    load_cpu_seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        """読み込み時間あたりのファイル数"""
+        return self.files / self.load_seconds if self.load_seconds else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        """読み込み時間あたりのデータ量（MB）"""
+        return self.bytes / (1024 * 1024) / self.load_seconds if self.load_seconds else 0.0
+
+
+class IngestMetrics:
+    """
+    取り込み処理の計測
+
+    measure() で囲んだ区間の実時間とCPU時間（スレッド単位）をステージに加算する。
+    計測区間が入れ子になった場合、内側の時間は外側から差し引かれるため、
+    例えば分割ステージの時間に読み込み（ジェネレータの遅延評価）の時間は含まれない。
+    各ステージのpeak_rss_mbは、そのステージの区間の開始時と終了時に測ったプロセスの現在のRSSの最大値。
+    プロセス全体の最大値（ru_maxrss）は後のステージにも同じ値が残るため、ステージごとには使わず
+    summary()のpeak_rss_mbにだけ記録する。
+
+    report_pathを指定すると、ファイル・バッチごとのイベントと最終集計を
+    JSON Lines形式で書き出す。
+    """
+
+    def __init__(self, report_path: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            report_path: JSON Lines形式のレポートの出力先（Noneの場合は出力しない）
+        """
+        self.stages: Dict[str, StageMetrics] = {name: StageMetrics(name) for name in STAGES}
+        self.file_types: Dict[str, FileTypeMetrics] = {}
+        self.report_path = Path(report_path) if report_path else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._report = None
+        if self.report_path is not None:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            self._report = open(self.report_path, "w", encoding="utf-8")
+
+    def _frames(self) -> List[List[float]]:
+        """スレッドごとの計測区間のスタック（[子の実時間, 子のCPU時間]）"""
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    @contextmanager
+    def measure(self, stage: str, items: int = 0, **fields) -> Iterator[None]:
+        """
+        区間の実時間とCPU時間をステージに加算する
+
+        Args:
+            stage: ステージ名
+            items: 区間で処理した件数
+            **fields: レポートのイベントに追加する値（Noneの場合はイベントを出力しない）
+        """
+        frames = self._frames()
+        frames.append([0.0, 0.0])
+        rss_start = current_rss_mb()
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            child_wall, child_cpu = frames.pop()
+            if frames:
+                frames[-1][0] += wall
+                frames[-1][1] += cpu
+            rss = max(rss_start, current_rss_mb())
+            self._add(stage, wall - child_wall, cpu - child_cpu, items, rss, fields)
+
+    def _add(self, stage: str, wall: float, cpu: float, items: int, rss: float, fields: Dict) -> None:
+        """ステージに計測値を加算"""
+        with self._lock:
+            metrics = self.stages.setdefault(stage, StageMetrics(stage))
+            metrics.wall_seconds += wall
+            metrics.cpu_seconds += cpu
+            metrics.calls += 1
+            metrics.items += items
+            metrics.peak_rss_mb = max(metrics.peak_rss_mb, rss)
+        if fields:
+            self.write_event({
+                "event": "stage",
+                "stage": stage,
+                "items": items,
+                "wall_seconds": round(wall, 6),
+                "cpu_seconds": round(cpu, 6),
+                "rss_mb": round(rss, 1),
+                **fields
+            })
+
+    def timed_iter(self, stage: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        イテレータの各要素の生成にかかった時間をステージに加算する
+
+        Args:
+            stage: ステージ名
+            iterable: 計測対象のイテラブル
+
+        Yields:
+            元のイテラブルの要素
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.measure(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            self.add_items(stage, 1)
+            yield item
+
+    def add_items(self, stage: str, items: int) -> None:
+        """ステージの処理件数を加算"""
+        with self._lock:
+            self.stages.setdefault(stage, StageMetrics(stage)).items += items
+
+    def record_file(
+        self,
+        file_path: str,
+        documents: int,
+        wall_seconds: float,
+        cpu_seconds: float
+    ) -> None:
+        """
+        ファイル1件の読み込み結果を記録
+
+        Args:
+            file_path: ファイルパス
+            documents: 読み込んだDocument数
+            wall_seconds: 読み込みの実時間
+            cpu_seconds: 読み込みのCPU時間
+        """
+        path = Path(file_path)
+        extension = path.suffix.lower()
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+
+        with self._lock:
+            metrics = self.file_types.setdefault(extension, FileTypeMetrics(extension))
+            metrics.files += 1
+            metrics.bytes += size
+            metrics.documents += documents
+            metrics.load_seconds += wall_seconds
+            metrics.load_cpu_seconds += cpu_seconds
+        self.write_event({
+            "event": "file",
+            "path": str(path),
+            "extension": extension,
+            "bytes": size,
+            "documents": documents,
+            "wall_seconds": round(wall_seconds, 6),
+            "cpu_seconds": round(cpu_seconds, 6)
+        })
+
+    def record_chunk(self, extension: str) -> None:
+        """ファイル形式ごとのチャンク数を加算"""
+        with self._lock:
+            self.file_types.setdefault(extension, FileTypeMetrics(extension)).chunks += 1
+
+    def write_event(self, event: Dict) -> None:
+        """レポートにイベントを1行追記"""
+        if self._report is None:
+            return
+        line = json.dumps({"time": round(time.time(), 3), **event}, ensure_ascii=False)
+        with self._lock:
+            self._report.write(line + "\n")
+
+    def summary(self) -> Dict:
+        """全体の集計を辞書で返す"""
+        return {
+            "wall_seconds": time.perf_counter() - self._started,
+            "cpu_seconds": time.process_time() - self._cpu_started,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {name: asdict(stage) for name, stage in self.stages.items()},
+            "file_types": {ext: asdict(metrics) for ext, metrics in self.file_types.items()}
+        }
+
+    def close(self, status: str = "completed") -> None:
+        """
+        最終集計をレポートに書き出して閉じる
+
+        Args:
+            status: 取り込みの結果（"completed"・"failed"・"interrupted"）
+        """
+        if self._report is None:
+            return
+        summary = self.summary()
+        for stage in summary["stages"].values():
+            self.write_event({"event": "stage_summary", **stage})
+        for file_type in summary["file_types"].values():
+            self.write_event({"event": "file_type_summary", **file_type})
+        self.write_event({
+            "event": "run_summary",
+            "status": status,
+            "wall_seconds": round(summary["wall_seconds"], 3),
+            "cpu_seconds": round(summary["cpu_seconds"], 3),
+            "peak_rss_mb": round(summary["peak_rss_mb"], 1)
+        })
+        self._report.close()
+        self._report = None
+
+
+def format_metrics_report(metrics: IngestMetrics) -> str:
+    """
+    計測結果を表形式の文字列にする
+
+    Args:
+        metrics: IngestMetricsインスタンス
+
+    Returns:
+        ステージ別とファイル形式別の表
+    """
+    summary = metrics.summary()
+    total_stage_wall = sum(stage.wall_seconds for stage in metrics.stages.values())
+
+    lines = [f"  {'ステージ':<8}{'実時間':>9}{'CPU時間':>9}{'割合':>8}{'件数':>9}{'件/秒':>10}{'最大RSS':>11}"]
+    for stage in metrics.stages.values():
+        share = stage.wall_seconds / total_stage_wall if total_stage_wall else 0.0
+        lines.append(
+            f"  {stage.name:<10}"
+            f"{stage.wall_seconds:>10.2f}s"
+            f"{stage.cpu_seconds:>10.2f}s"
+            f"{share:>10.0%}"
+            f"{stage.items:>11}"
+            f"{stage.items_per_second:>12.1f}"
+            f"{stage.peak_rss_mb:>11.0f}MB"
+        )
+
+    if metrics.file_types:
+        lines.append("")
+        lines.append(f"  {'形式':<8}{'ファイル':>8}{'MB':>8}{'文書':>8}{'チャンク':>8}{'読込時間':>8}{'ファイル/秒':>8}{'MB/秒':>8}")
+        for extension in sorted(metrics.file_types):
+            file_type = metrics.file_types[extension]
+            lines.append(
+                f"  {extension:<10}"
+                f"{file_type.files:>12}"
+                f"{file_type.bytes / (1024 * 1024):>10.1f}"
+                f"{file_type.documents:>10}"
+                f"{file_type.chunks:>12}"
+                f"{file_type.load_seconds:>11.2f}s"
+                f"{file_type.files_per_second:>13.1f}"
+                f"{file_type.mb_per_second:>10.2f}"
+            )
+
+    lines.append("")
+    lines.append(
+        f"  合計: 実時間 {summary['wall_seconds']:.2f}s / CPU時間 {summary['cpu_seconds']:.2f}s"
+        f" / ピークRSS {summary['peak_rss_mb']:.0f}MB"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,402 @@
+"""
+ストリーミング取り込みパイプラインモジュール
+読み込み→分割→埋め込み→保存をジェネレータで連結し、メモリ使用量を一定に保つ
+"""
+
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from langchain_core.documents import Document
+
+from config import config
+from pipeline.checkpoint import IngestCheckpoint
+from pipeline.executor import PipelinedExecutor, StageStats
+from pipeline.metrics import IngestMetrics
+from utils.dedup import MinHashDeduplicator
+from vector_store.qdrant_client import SOURCE_FILES_KEY, generate_point_id
+
+T = TypeVar("T")
+
+# 重複と判定したチャンクに付ける、代表チャンクの（ポイントID, ファイルパス）
+# パイプライン内部でのみ使用し、Qdrantには保存しない
+_DUPLICATE_OF_KEY = "_duplicate_of"
+
+
+def iter_batches(items: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """
+    イテラブルを指定サイズのバッチに分けて逐次返す
+
+    Args:
+        items: 要素のイテラブル
+        batch_size: バッチサイズ
+
+    Yields:
+        要素のリスト（最後のバッチはbatch_size未満の場合がある）
+
+    Raises:
+        ValueError: バッチサイズが正の整数でない場合
+    """
+    if batch_size <= 0:
+        raise ValueError("バッチサイズは正の整数である必要があります")
+
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+@dataclass
+class IngestStats:
+    """取り込み処理の集計結果"""
+    files: int = 0
+    documents: int = 0
+    chunks: int = 0
+    batches: int = 0
+    failed_files: List[str] = field(default_factory=list)
+    skipped_files: int = 0
+    skipped_chunks: int = 0
+    duplicates: int = 0
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+
+
+class StreamingIngestPipeline:
+    """
+    読み込み→分割→埋め込み→保存を逐次実行するパイプライン
+
+    ファイルは1件ずつ遅延読み込みされ、分割済みチャンクはバッチに
+    まとまった時点でベクターストアへ送られる。同時に保持するチャンク数は
+    max_chunks_in_flight を上限とするため、コーパスの大きさに関係なく
+    ピークメモリはほぼ一定になる。
+
+    pipelined=Trueの場合は埋め込みと保存を別スレッドで並行させ、
+    バッチNの保存中にバッチN+1を埋め込む（PipelinedExecutor）。
+
+    checkpointを渡した場合は、保存済みのバッチとファイルを記録する。
+    保存が完了したファイルは読み込みを省略し、途中まで保存したファイルは
+    保存済みのチャンク（chunk_indexが保存済み件数未満のもの）を埋め込まずに読み飛ばす。
+    ベクターストアが書き込みをメモリ上に溜める場合（NumPyバックエンド）は、
+    書き出されるまでバッチを記録せず、中断後の再開で未保存のチャンクを読み飛ばさないようにする。
+
+    読み込み・分割・埋め込み・保存の各ステージの時間と件数はmetrics（IngestMetrics）に記録される。
+
+    deduplicatorを渡した場合は、分割後のチャンクのうち既出のチャンクと同一・類似のものを
+    埋め込まずに代表チャンクへまとめ、代表ポイントのmetadata.source_filesに取得元ファイルを追記する。
+    重複チャンクもバッチには含めて流すため、チェックポイントでは保存済みとして数えられる。
+    """
+
+    def __init__(
+        self,
+        loader,
+        text_splitter,
+        vector_store_manager,
+        batch_size: Optional[int] = None,
+        max_chunks_in_flight: Optional[int] = None,
+        workers: Optional[int] = None,
+        pipelined: Optional[bool] = None,
+        checkpoint: Optional[IngestCheckpoint] = None,
+        metrics: Optional[IngestMetrics] = None,
+        deduplicator: Optional[MinHashDeduplicator] = None
+    ):
+        """
+        初期化
+
+        Args:
+            loader: DocumentLoaderManagerインスタンス
+            text_splitter: JapaneseTextSplitterインスタンス
+            vector_store_manager: QdrantVectorStoreManagerインスタンス
+            batch_size: 1回の保存で送るチャンク数（Noneの場合は設定から取得）
+            max_chunks_in_flight: 同時に保持するチャンク数の上限（Noneの場合は設定から取得）
+            workers: 読み込みのワーカープロセス数（Noneの場合は設定から取得）
+            pipelined: 埋め込みと保存を並行実行するか（Noneの場合は設定から取得）
+            checkpoint: 進捗を記録するチェックポイント（Noneの場合は記録しない）
+            metrics: 計測結果の記録先（Noneの場合はレポートを出力しないIngestMetricsを使用）
+            deduplicator: 重複チャンクの検出器（Noneの場合は重複除去を行わない）
+        """
+        self.loader = loader
+        self.text_splitter = text_splitter
+        self.vector_store_manager = vector_store_manager
+        self.batch_size = batch_size or config.ingest.batch_size
+        self.max_chunks_in_flight = max_chunks_in_flight or config.ingest.max_chunks_in_flight
+        self.workers = workers or config.ingest.workers
+        self.pipelined = config.ingest.pipelined if pipelined is None else pipelined
+        self.checkpoint = checkpoint
+        self.metrics = metrics or IngestMetrics()
+        self.deduplicator = deduplicator
+        self._source_files: Dict[str, List[str]] = {}
+        self.stats = IngestStats()
+        self._batch_offset = 0
+        self._resumed_chunks: Dict[str, int] = {}
+        self._unrecorded_batches: List[Tuple[int, List[Document]]] = []
+
+    @property
+    def effective_batch_size(self) -> int:
+        """同時保持数の上限を考慮した実際のバッチサイズ"""
+        if self.pipelined:
+            # 処理中の3バッチと各キューの最低1バッチが上限に収まるようにする
+            return max(1, min(self.batch_size, self.max_chunks_in_flight // 5))
+        return max(1, min(self.batch_size, self.max_chunks_in_flight))
+
+    @property
+    def queue_size(self) -> int:
+        """ステージ間キューに保持できるバッチ数"""
+        slots = self.max_chunks_in_flight // self.effective_batch_size
+        return max(1, (slots - 3) // 2)
+
+    def iter_documents(self, files: Iterable[Path]) -> Iterator[Document]:
+        """
+        ファイルを1件ずつ遅延読み込みする
+
+        読み込みに失敗したファイルはstats.failed_filesに記録して処理を継続する。
+        workersが2以上の場合はワーカープロセスで並列に読み込む。
+
+        Args:
+            files: ファイルパスのイテラブル
+
+        Yields:
+            Documentオブジェクト
+        """
+        files = self._skip_completed(files)
+        if self.workers > 1:
+            yield from self._iter_documents_parallel(files)
+            return
+
+        load_metrics = self.metrics.stages["load"]
+        for file_path in files:
+            count = 0
+            wall_start, cpu_start = load_metrics.wall_seconds, load_metrics.cpu_seconds
+            try:
+                documents = self.loader.lazy_load_document(str(file_path))
+                for doc in self.metrics.timed_iter("load", documents):
+                    count += 1
+                    self.stats.documents += 1
+                    yield doc
+            except Exception as e:
+                print(f"エラー: {Path(file_path).name} - {str(e)}")
+                self.stats.failed_files.append(str(file_path))
+                continue
+
+            # 読み込みは1スレッドで行うため、ステージの増分がこのファイルの読み込み時間になる
+            self.metrics.record_file(
+                str(file_path),
+                documents=count,
+                wall_seconds=load_metrics.wall_seconds - wall_start,
+                cpu_seconds=load_metrics.cpu_seconds - cpu_start
+            )
+            self.stats.files += 1
+            self._on_loaded(file_path)
+            print(f"読み込み完了: {Path(file_path).name} ({count}件)")
+
+    def _iter_documents_parallel(self, files: Iterable[Path]) -> Iterator[Document]:
+        """
+        ワーカープロセスで並列に読み込んだDocumentを返す
+
+        loadステージにはワーカーの完了待ち時間を、ファイル形式ごとの読み込み時間には
+        ワーカープロセス内で計測した解析時間を記録する。
+
+        Args:
+            files: ファイルパスのイテラブル
+
+        Yields:
+            Documentオブジェクト
+        """
+        timings: Dict[Path, tuple] = {}
+
+        def on_timing(file_path: Path, wall_seconds: float, cpu_seconds: float) -> None:
+            timings[file_path] = (wall_seconds, cpu_seconds)
+
+        results = self.loader.iter_load_parallel(files, self.workers, on_timing=on_timing)
+        while True:
+            with self.metrics.measure("load"):
+                result = next(results, None)
+            if result is None:
+                break
+
+            file_path, documents, error = result
+            if error is not None:
+                print(f"エラー: {file_path.name} - {error}")
+                self.stats.failed_files.append(str(file_path))
+                continue
+
+            self.stats.files += 1
+            self.metrics.record_file(str(file_path), len(documents), *timings.pop(file_path))
+            self.metrics.add_items("load", len(documents))
+            for doc in documents:
+                self.stats.documents += 1
+                yield doc
+            self._on_loaded(file_path)
+
+    def _skip_completed(self, files: Iterable[Path]) -> Iterator[Path]:
+        """
+        チェックポイントで保存完了と記録されたファイルを除外する
+
+        Args:
+            files: ファイルパスのイテラブル
+
+        Yields:
+            未完了のファイルパス
+        """
+        for file_path in files:
+            if self.checkpoint is not None and self.checkpoint.is_completed(Path(file_path).absolute()):
+                self.stats.skipped_files += 1
+                continue
+            yield file_path
+
+    def _on_loaded(self, file_path: Path) -> None:
+        """ファイルの全チャンクを生成し終えた時点の処理"""
+        if self.checkpoint is not None:
+            self.checkpoint.record_loaded(Path(file_path).absolute())
+
+    def iter_chunks(self, files: Iterable[Path]) -> Iterator[Document]:
+        """
+        ファイルを読み込み、分割済みチャンクを逐次返す
+
+        Args:
+            files: ファイルパスのイテラブル
+
+        Yields:
+            分割されたDocumentオブジェクト
+        """
+        chunks = self.text_splitter.iter_split_documents(self.iter_documents(files))
+        for chunk in self.metrics.timed_iter("split", chunks):
+            self.metrics.record_chunk(chunk.metadata.get("file_extension", ""))
+            if self.checkpoint is not None:
+                file_path = chunk.metadata.get("file_path", "")
+                self.checkpoint.record_produced(file_path)
+                if chunk.metadata.get("chunk_index", 0) < self._resumed_chunks.get(file_path, 0):
+                    # 前回の実行で保存済みのチャンクは埋め込まない
+                    self.stats.skipped_chunks += 1
+                    continue
+            if self.deduplicator is not None:
+                self._mark_duplicate(chunk)
+            self.stats.chunks += 1
+            yield chunk
+
+    def _mark_duplicate(self, chunk: Document) -> None:
+        """
+        既出のチャンクと重複しているか判定し、チャンクのmetadataに結果を付与する
+
+        Args:
+            chunk: 分割済みのDocumentオブジェクト
+        """
+        file_path = chunk.metadata.get("file_path") or chunk.metadata.get("source") or ""
+        with self.metrics.measure("dedup"):
+            representative = self.deduplicator.find_or_add(
+                chunk.page_content,
+                (generate_point_id(chunk), file_path)
+            )
+        self.metrics.add_items("dedup", 1)
+
+        if representative is None:
+            chunk.metadata[SOURCE_FILES_KEY] = [file_path]
+        else:
+            chunk.metadata[_DUPLICATE_OF_KEY] = representative
+            self.stats.duplicates += 1
+
+    def run(self, files: Iterable[Path]) -> IngestStats:
+        """
+        パイプラインを実行
+
+        Args:
+            files: 取り込むファイルパスのイテラブル
+
+        Returns:
+            取り込み結果の集計
+        """
+        self.stats = IngestStats()
+        if self.checkpoint is not None:
+            # 実行開始時点の保存済み件数を基準に読み飛ばす
+            self._batch_offset = self.checkpoint.last_batch
+            self._resumed_chunks = dict(self.checkpoint.committed_chunks)
+        batches = iter_batches(self.iter_chunks(files), self.effective_batch_size)
+
+        if self.pipelined:
+            executor = PipelinedExecutor(
+                embed_fn=self._embed_batch,
+                upsert_fn=self._upsert_batch,
+                queue_size=self.queue_size
+            )
+            self.stats.stages = executor.run(batches, on_committed=self._on_committed)
+            self._record_pending_batches(flush=True)
+            return self.stats
+
+        for batch in batches:
+            vectors = self._embed_batch(batch)
+            self._upsert_batch(batch, vectors)
+            self._on_committed(self.stats.batches + 1, batch)
+
+        self._record_pending_batches(flush=True)
+        return self.stats
+
+    @staticmethod
+    def _unique_chunks(batch: List[Document]) -> List[Document]:
+        """バッチのうち重複と判定されていないチャンク"""
+        return [doc for doc in batch if _DUPLICATE_OF_KEY not in doc.metadata]
+
+    def _embed_batch(self, batch: List[Document]) -> List[List[float]]:
+        """バッチのチャンク（重複を除く）を埋め込む"""
+        unique = self._unique_chunks(batch)
+        if not unique:
+            return []
+        embeddings = self.vector_store_manager.embeddings
+        with self.metrics.measure("embed", items=len(unique), batch_size=len(unique)):
+            return embeddings.embed_documents([doc.page_content for doc in unique])
+
+    def _upsert_batch(self, batch: List[Document], vectors: List[List[float]]) -> None:
+        """埋め込み済みのバッチ（重複を除く）を保存する"""
+        unique = self._unique_chunks(batch)
+        if not unique:
+            return
+        with self.metrics.measure("upsert", items=len(unique), batch_size=len(unique)):
+            self.vector_store_manager.upsert_embedded(unique, vectors)
+
+    def _on_committed(self, batch_number: int, batch: List[Document]) -> None:
+        """バッチの保存完了時の処理"""
+        self.stats.batches = batch_number
+        self._update_source_files(batch)
+        if self.checkpoint is not None:
+            self._unrecorded_batches.append((self._batch_offset + batch_number, batch))
+            self._record_pending_batches()
+        print(f"  バッチ{batch_number}: {len(batch)}チャンクを保存しました")
+
+    def _record_pending_batches(self, flush: bool = False) -> None:
+        """
+        ベクターストアに書き出し済みのバッチをチェックポイントに記録する
+
+        Args:
+            flush: Trueの場合は溜めた書き込みを書き出してから記録する
+        """
+        if not self._unrecorded_batches:
+            return
+        if self.vector_store_manager.pending_writes:
+            if not flush:
+                return
+            self.vector_store_manager.write_barrier()
+        for batch_number, batch in self._unrecorded_batches:
+            self.checkpoint.record_batch(batch_number, batch)
+        self._unrecorded_batches.clear()
+
+    def _update_source_files(self, batch: List[Document]) -> None:
+        """
+        バッチ内の重複チャンクの取得元ファイルを代表ポイントに追記する
+
+        代表チャンクは重複チャンクより前のバッチ（または同じバッチ）に含まれるため、
+        このバッチの保存完了時点で代表ポイントは保存済みになっている。
+
+        Args:
+            batch: 保存が完了したバッチ
+        """
+        updates = {}
+        for doc in batch:
+            representative = doc.metadata.get(_DUPLICATE_OF_KEY)
+            if representative is None:
+                continue
+            point_id, representative_file = representative
+            sources = self._source_files.setdefault(point_id, [representative_file])
+            file_path = doc.metadata.get("file_path") or doc.metadata.get("source") or ""
+            if file_path not in sources:
+                sources.append(file_path)
+                updates[point_id] = sources
+
+        if updates:
+            self.vector_store_manager.set_source_files(updates)
@@ -3,6 +3,8 @@
 RAG用の日本語プロンプトテンプレート
 """
 
+import hashlib
+
 from langchain.prompts import PromptTemplate
 
 
@@ -23,6 +25,10 @@ RAG_PROMPT_TEMPLATE = """あなたは親切で正確な日本語アシスタン
 
 回答:"""
 
+# プロンプトテンプレートのバージョン（回答キャッシュのキーに使う）
+# テンプレートの内容から求めるため、テンプレートを変更するとキャッシュした回答は使われなくなる
+PROMPT_TEMPLATE_VERSION = hashlib.sha256(RAG_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:12]
+
 
 def create_rag_prompt() -> PromptTemplate:
     """
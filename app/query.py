@@ -8,9 +8,11 @@ import sys
 
 from config import config
 from models.llm import create_llm
-from models.embeddings import create_embeddings
-from vector_store.qdrant_client import QdrantVectorStoreManager
-from prompts.templates import format_documents, create_prompt_with_context
+from models.embeddings import create_embeddings, is_ollama_available
+from models.answer_cache import collection_content_version, create_answer_cache, make_answer_key
+from vector_store.factory import create_vector_store_manager
+from vector_store.filters import create_metadata_filter
+from prompts.templates import PROMPT_TEMPLATE_VERSION, format_documents, create_prompt_with_context
 
 
 def main():
@@ -36,12 +38,99 @@ def main():
         default=None,
         help=f"取得するコンテキスト数（デフォルト: {config.rag.top_k}）"
     )
+    parser.add_argument(
+        "--grpc",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"QdrantとgRPCで通信する（デフォルト: {config.qdrant.prefer_grpc}）"
+    )
+    parser.add_argument(
+        "--hnsw-ef",
+        type=int,
+        default=None,
+        help="検索時のHNSW探索幅。大きいほど再現率が上がり遅くなる"
+             f"（デフォルト: {config.qdrant.hnsw_ef or 'Qdrantの既定値'}）"
+    )
+    parser.add_argument(
+        "--oversampling",
+        type=float,
+        default=None,
+        help="量子化したコレクションで取得する候補数の倍率"
+             f"（デフォルト: {config.qdrant.oversampling or 'Qdrantの既定値'}）"
+    )
+    parser.add_argument(
+        "--rescore",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help=f"量子化検索の候補を元のベクトルで再スコアリング（デフォルト: {config.qdrant.rescore}）"
+    )
+    parser.add_argument(
+        "--retrieval-mode",
+        type=str,
+        choices=["dense", "sparse", "hybrid"],
+        default=None,
+        help="検索方法。hybridは密ベクトルと疎ベクトル（文字n-gramのBM25）の順位をRRFで統合する"
+             f"（デフォルト: {config.rag.retrieval_mode}）"
+    )
+    parser.add_argument(
+        "--mmr",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="MMRで互いに似たチャンク（重なりのある隣接チャンクなど）を避けて取得する"
+             f"（デフォルト: {config.rag.mmr_enabled}）"
+    )
+    parser.add_argument(
+        "--mmr-lambda",
+        type=float,
+        default=None,
+        help=f"MMRの重み。1に近いほど関連度、0に近いほど多様性を重視（デフォルト: {config.rag.mmr_lambda}）"
+    )
+    parser.add_argument(
+        "--fetch-k",
+        type=int,
+        default=None,
+        help=f"MMRで選ぶ前に取得する候補数（デフォルト: {config.rag.mmr_fetch_k}）"
+    )
     parser.add_argument(
         "--temperature",
         type=float,
         default=None,
         help=f"LLM温度パラメータ（デフォルト: {config.rag.temperature}）"
     )
+    parser.add_argument(
+        "--file-extension",
+        type=str,
+        nargs="+",
+        default=None,
+        help="検索対象を指定した拡張子のファイルに絞り込む（例: pdf md）"
+    )
+    parser.add_argument(
+        "--file-name",
+        type=str,
+        nargs="+",
+        default=None,
+        help="検索対象を指定したファイル名に絞り込む"
+    )
+    parser.add_argument(
+        "--path-prefix",
+        type=str,
+        default=None,
+        help="検索対象を指定したフォルダ配下のファイルに絞り込む"
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        nargs="+",
+        default=None,
+        help="検索対象をingest_jsonl_qa.pyで取り込んだ元ファイル名に絞り込む"
+    )
+    parser.add_argument(
+        "--answer-cache",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="同じ質問・検索条件・コレクションの内容の回答をキャッシュから返す"
+             f"（デフォルト: {config.answer_cache.enabled}）"
+    )
     parser.add_argument(
         "--show-context",
         action="store_true",
@@ -57,14 +146,22 @@ def main():
     try:
         # 1. 埋め込みモデル初期化
         print("\n[1/5] 埋め込みモデルを初期化しています...")
-        embeddings = create_embeddings()
+        retrieval_mode = args.retrieval_mode or config.rag.retrieval_mode
+        retrieval_only = not is_ollama_available()
+        if retrieval_only:
+            # Ollamaが停止している場合は、モデルを使わない疎ベクトルのみで検索して回答は生成しない
+            print("警告: Ollamaに接続できないため、疎ベクトルのみで検索します（回答は生成しません）")
+            retrieval_mode = "sparse"
+        embeddings = None if retrieval_mode == "sparse" else create_embeddings()
 
         # 2. Qdrantクライアント初期化
         print("[2/5] Qdrantに接続しています...")
-        vector_store_manager = QdrantVectorStoreManager(
+        vector_store_manager = create_vector_store_manager(
             collection_name=args.collection,
             embeddings=embeddings
         )
+        if args.grpc is not None:
+            vector_store_manager.prefer_grpc = args.grpc
         vector_store_manager.initialize()
 
         # コレクションの存在確認
@@ -75,16 +172,39 @@ def main():
             sys.exit(1)
 
         print(f"コレクション: {info.get('name')} ({info.get('points_count')}件)")
+        if info.get('collection') != info.get('name'):
+            print(f"参照先: {info.get('collection')}")
 
         # 3. 類似度検索
         print(f"[3/5] 類似ドキュメントを検索しています...")
         print(f"質問: {args.question}")
 
         top_k = args.top_k or config.rag.top_k
-        results = vector_store_manager.similarity_search_with_score(
+        search_filter = create_metadata_filter(
+            file_name=args.file_name,
+            file_extension=args.file_extension,
+            path_prefix=args.path_prefix,
+            source=args.source
+        )
+        search_kwargs = dict(
             query=args.question,
-            k=top_k
+            k=top_k,
+            hnsw_ef=args.hnsw_ef,
+            oversampling=args.oversampling,
+            rescore=args.rescore,
+            filter=search_filter,
+            retrieval_mode=retrieval_mode
         )
+        # MMRは密ベクトルで候補どうしを比べるため、疎ベクトルのみの検索では使わない
+        use_mmr = config.rag.mmr_enabled if args.mmr is None else args.mmr
+        if use_mmr and retrieval_mode != "sparse":
+            results = vector_store_manager.max_marginal_relevance_search_with_score(
+                fetch_k=args.fetch_k,
+                lambda_mult=args.mmr_lambda,
+                **search_kwargs
+            )
+        else:
+            results = vector_store_manager.similarity_search_with_score(**search_kwargs)
 
         if not results:
             print("\n関連するドキュメントが見つかりませんでした")
@@ -93,7 +213,7 @@ def main():
         print(f"見つかったドキュメント: {len(results)}件")
 
         # コンテキスト表示
-        if args.show_context:
+        if args.show_context or retrieval_only:
             print("\n" + "-" * 60)
             print("取得したコンテキスト:")
             print("-" * 60)
@@ -103,24 +223,59 @@ def main():
                 print(f"内容: {doc.page_content[:200]}...")
             print("-" * 60)
 
-        # 4. LLM初期化
-        print("\n[4/5] LLMを初期化しています...")
-        llm = create_llm(temperature=args.temperature)
-        print(f"モデル: {config.ollama.llm_model}")
+        if retrieval_only:
+            sys.exit(0)
+
+        # 回答キャッシュの確認（同じ質問・検索条件・コレクションの内容なら生成を省く）
+        answer = None
+        answer_cache = create_answer_cache(enabled=args.answer_cache)
+        if answer_cache is not None:
+            cache_key = make_answer_key(
+                question=args.question,
+                collection_name=info.get('name'),
+                top_k=top_k,
+                model=config.ollama.llm_model,
+                temperature=config.rag.temperature if args.temperature is None else args.temperature,
+                prompt_version=PROMPT_TEMPLATE_VERSION,
+                retrieval={
+                    "mode": retrieval_mode,
+                    "mmr": [
+                        config.rag.mmr_lambda if args.mmr_lambda is None else args.mmr_lambda,
+                        args.fetch_k or config.rag.mmr_fetch_k
+                    ] if use_mmr and retrieval_mode != "sparse" else None,
+                    "filter": search_filter.model_dump_json() if search_filter else None,
+                    "hnsw_ef": args.hnsw_ef or config.qdrant.hnsw_ef,
+                    "oversampling": args.oversampling or config.qdrant.oversampling,
+                    "rescore": config.qdrant.rescore if args.rescore is None else args.rescore
+                }
+            )
+            content_version = collection_content_version(info)
+            answer = answer_cache.get(cache_key, info.get('name'), content_version)
+
+        if answer is not None:
+            print("\n[4/5] キャッシュした回答を使用します（LLMの呼び出しを省略）")
+        else:
+            # 4. LLM初期化
+            print("\n[4/5] LLMを初期化しています...")
+            llm = create_llm(temperature=args.temperature)
+            print(f"モデル: {config.ollama.llm_model}")
+
+            # 5. プロンプト生成と推論
+            print("[5/5] 回答を生成しています...")
 
-        # 5. プロンプト生成と推論
-        print("[5/5] 回答を生成しています...")
+            # ドキュメントをコンテキストに変換
+            docs_only = [doc for doc, _ in results]
+            context = format_documents(docs_only)
 
-        # ドキュメントをコンテキストに変換
-        docs_only = [doc for doc, _ in results]
-        context = format_documents(docs_only)
+            # プロンプト生成
+            prompt = create_prompt_with_context(context, args.question)
 
-        # プロンプト生成
-        prompt = create_prompt_with_context(context, args.question)
+            # LLM推論
+            response = llm.invoke(prompt)
+            answer = response.content if hasattr(response, 'content') else str(response)
 
-        # LLM推論
-        response = llm.invoke(prompt)
-        answer = response.content if hasattr(response, 'content') else str(response)
+            if answer_cache is not None:
+                answer_cache.put(cache_key, info.get('name'), content_version, answer)
 
         # 結果表示
         print("\n" + "=" * 60)
@@ -0,0 +1,215 @@
+"""
+重複チャンク検出モジュール
+文字n-gramのMinHashとLSHで、完全一致および類似したチャンクを検出する
+"""
+
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config import config
+
+# n-gramのハッシュに使う乗数（64bitで桁あふれさせて混ぜる）
+_NGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+# 数字の並び（正規化後のテキストに対して使う）
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_for_dedup(text: str) -> str:
+    """
+    重複判定用にテキストを正規化（NFKC・空白除去）
+
+    全角・半角の揺れや改行位置の違いだけのチャンクを同一とみなすため。
+
+    Args:
+        text: テキスト
+
+    Returns:
+        正規化したテキスト
+    """
+    return "".join(unicodedata.normalize("NFKC", text).split())
+
+
+def number_key(text: str) -> int:
+    """
+    テキストに含まれる数字の並びのハッシュ値を返す
+
+    金額や日付だけが異なるチャンクを重複とみなさないよう、重複判定で一致を必須にする。
+
+    Args:
+        text: normalize_for_dedupで正規化したテキスト
+
+    Returns:
+        数字の並びを順に連結したもののCRC32
+    """
+    return zlib.crc32(" ".join(_DIGITS.findall(text)).encode("ascii"))
+
+
+class MinHashDeduplicator:
+    """
+    MinHash/LSHによる重複チャンクの検出
+
+    日本語は単語境界が空白で区切られないため、文字n-gram（デフォルト3文字）の集合の
+    Jaccard類似度で重複を判定する。シグネチャをbands個のバンドに分けてハッシュ表に登録し、
+    いずれかのバンドが一致した候補についてシグネチャの一致率（推定Jaccard類似度）が
+    threshold以上であり、かつ含まれる数字の並びが一致すれば重複とみなす
+    （金額・日付・型番などだけが異なるチャンクはまとめない）。
+
+    登録済みのチャンクごとにシグネチャ（num_perm × 4バイト）とバンド数分の
+    ハッシュ表エントリを保持する。登録数がmax_entriesに達すると最も古いチャンクから
+    索引を外すため、メモリ使用量はコーパスの大きさによらず一定になる
+    （外したチャンクと重複するチャンクは新しい代表として登録される）。
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        ngram_size: Optional[int] = None,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        seed: int = 1
+    ):
+        """
+        初期化
+
+        Args:
+            threshold: 重複とみなす推定Jaccard類似度（Noneの場合は設定から取得）
+            ngram_size: 文字n-gramの長さ（Noneの場合は設定から取得）
+            num_perm: MinHashのハッシュ関数の数（Noneの場合は設定から取得）
+            bands: LSHのバンド数（Noneの場合は設定から取得）
+            max_entries: 索引に保持するチャンク数の上限（Noneの場合は設定から取得）
+            seed: ハッシュ関数の乱数シード
+
+        Raises:
+            ValueError: num_permがbandsで割り切れない場合、max_entriesが正でない場合
+        """
+        self.threshold = threshold or config.dedup.threshold
+        self.ngram_size = ngram_size or config.dedup.ngram_size
+        self.num_perm = num_perm or config.dedup.num_perm
+        self.bands = bands or config.dedup.bands
+        self.max_entries = config.dedup.max_entries if max_entries is None else max_entries
+        if self.num_perm % self.bands != 0:
+            raise ValueError("num_permはbandsで割り切れる必要があります")
+        if self.max_entries <= 0:
+            raise ValueError("max_entriesは正の整数である必要があります")
+        self.rows = self.num_perm // self.bands
+
+        rng = np.random.default_rng(seed)
+        # multiply-shift方式のハッシュ関数（aは奇数）
+        self._a = rng.integers(1, 2 ** 63, size=self.num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=self.num_perm, dtype=np.uint64)
+
+        self._signatures = np.empty((min(1024, self.max_entries), self.num_perm), dtype=np.uint32)
+        self._values: List[Any] = []
+        self._number_keys: List[int] = []
+        self._tables: List[Dict[bytes, int]] = [{} for _ in range(self.bands)]
+        # 次に登録するチャンクの通し番号（上限を超えたら古い位置を再利用する）
+        self._added = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """索引に保持しているチャンク数"""
+        return len(self._values)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """シグネチャをバンドごとのハッシュ表のキーに分ける"""
+        return [
+            signature[i * self.rows:(i + 1) * self.rows].tobytes()
+            for i in range(self.bands)
+        ]
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """文字n-gramのハッシュ値の配列を返す"""
+        codes = np.frombuffer(normalize_for_dedup(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        if len(codes) == 0:
+            return np.zeros(1, dtype=np.uint64)
+        n = min(self.ngram_size, len(codes))
+        hashes = np.zeros(len(codes) - n + 1, dtype=np.uint64)
+        for offset in range(n):
+            hashes = hashes * _NGRAM_MULTIPLIER + codes[offset:len(codes) - n + 1 + offset]
+        return np.unique(hashes)
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        テキストのMinHashシグネチャを計算
+
+        Args:
+            text: テキスト
+
+        Returns:
+            num_perm個の最小ハッシュ値（uint32）
+        """
+        shingles = self._shingles(text)
+        with np.errstate(over="ignore"):
+            hashed = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def find_or_add(self, text: str, value: Any) -> Optional[Any]:
+        """
+        重複を検索し、見つからなければ登録する
+
+        Args:
+            text: チャンクのテキスト
+            value: 登録時に保持する値（代表チャンクの識別子など）
+
+        Returns:
+            重複が見つかった場合は代表チャンクの値、見つからなかった場合はNone
+        """
+        signature = self.signature(text)
+        numbers = number_key(normalize_for_dedup(text))
+        band_keys = self._band_keys(signature)
+
+        candidates = {
+            table[key] for table, key in zip(self._tables, band_keys) if key in table
+        }
+        if candidates:
+            indices = np.fromiter(candidates, dtype=np.int64)
+            similarity = (self._signatures[indices] == signature).mean(axis=1)
+            for best in np.argsort(-similarity, kind="stable"):
+                if similarity[best] < self.threshold:
+                    break
+                if self._number_keys[indices[best]] == numbers:
+                    return self._values[indices[best]]
+
+        index = self._added % self.max_entries
+        self._added += 1
+        if index < len(self._values):
+            # 上限に達したため、最も古いチャンクを索引から外してその位置を再利用する
+            for table, key in zip(self._tables, self._band_keys(self._signatures[index])):
+                if table.get(key) == index:
+                    del table[key]
+            self._values[index] = value
+            self._number_keys[index] = numbers
+            self.evictions += 1
+        else:
+            if index == len(self._signatures):
+                grown = np.empty(
+                    (min(len(self._signatures) * 2, self.max_entries), self.num_perm),
+                    dtype=np.uint32
+                )
+                grown[:index] = self._signatures
+                self._signatures = grown
+            self._values.append(value)
+            self._number_keys.append(numbers)
+        self._signatures[index] = signature
+        for table, key in zip(self._tables, band_keys):
+            table[key] = index
+        return None
+
+
+def create_deduplicator(threshold: Optional[float] = None) -> MinHashDeduplicator:
+    """
+    重複検出器インスタンスを作成して返すヘルパー関数
+
+    Args:
+        threshold: 重複とみなす推定Jaccard類似度
+
+    Returns:
+        MinHashDeduplicatorインスタンス
+    """
+    return MinHashDeduplicator(threshold=threshold)
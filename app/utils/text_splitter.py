@@ -3,7 +3,7 @@
 日本語に最適化されたテキスト分割
 """
 
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from config import config
@@ -62,12 +62,60 @@ class JapaneseTextSplitter:
             return []
 
         try:
-            split_docs = self._splitter.split_documents(documents)
+            split_docs = list(self._assign_chunk_indices(self._splitter.split_documents(documents)))
             print(f"ドキュメント分割完了: {len(documents)}件 → {len(split_docs)}チャンク")
             return split_docs
         except Exception as e:
             raise Exception(f"ドキュメントの分割に失敗しました: {str(e)}")
 
+    def iter_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        ドキュメントを1件ずつ分割してチャンクを逐次返す
+
+        入力のイテレータは必要になった時点で消費されるため、
+        ストリーミング取り込みで全ドキュメントを保持せずに分割できる。
+
+        Args:
+            documents: Documentオブジェクトのイテラブル
+
+        Yields:
+            分割されたDocumentオブジェクト
+        """
+        def split_each() -> Iterator[Document]:
+            for document in documents:
+                try:
+                    split_docs = self._splitter.split_documents([document])
+                except Exception as e:
+                    raise Exception(f"ドキュメントの分割に失敗しました: {str(e)}")
+                yield from split_docs
+
+        yield from self._assign_chunk_indices(split_each())
+
+    @staticmethod
+    def _assign_chunk_indices(chunks: Iterable[Document]) -> Iterator[Document]:
+        """
+        チャンクにソース内での連番（metadata.chunk_index）を付与
+
+        ソースはfile_path、なければsourceで識別する。同じソースのチャンクは
+        連続して渡される前提で、ソースが切り替わった時点で連番を0に戻す。
+
+        Args:
+            chunks: 分割済みDocumentのイテラブル
+
+        Yields:
+            chunk_indexを付与したDocumentオブジェクト
+        """
+        current_source = None
+        index = 0
+        for chunk in chunks:
+            source = chunk.metadata.get("file_path") or chunk.metadata.get("source")
+            if source != current_source:
+                current_source = source
+                index = 0
+            chunk.metadata["chunk_index"] = index
+            index += 1
+            yield chunk
+
     def split_text(self, text: str) -> List[str]:
         """
         単一テキストを分割
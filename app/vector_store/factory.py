@@ -0,0 +1,42 @@
+"""
+ベクターストア作成モジュール
+設定に応じてQdrantまたはNumPyのベクターストアマネージャーを作成する
+"""
+
+from typing import Optional, Union
+
+from config import config
+from vector_store.numpy_store import NumpyVectorStoreManager
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+VECTOR_STORE_BACKENDS = ("qdrant", "numpy")
+
+
+def create_vector_store_manager(
+    collection_name: Optional[str] = None,
+    embeddings=None,
+    backend: Optional[str] = None
+) -> Union[QdrantVectorStoreManager, NumpyVectorStoreManager]:
+    """
+    ベクターストアマネージャーを作成して返すヘルパー関数
+
+    どちらのマネージャーも同じメソッド（initialize・add_documents・similarity_search_with_score・
+    delete_by_file_pathsなど）を持つため、呼び出し側はバックエンドを意識せずに使える。
+
+    Args:
+        collection_name: コレクション名（Noneの場合は設定から取得）
+        embeddings: 埋め込みモデルインスタンス
+        backend: "qdrant" または "numpy"（Noneの場合は設定から取得）
+
+    Returns:
+        初期化前のベクターストアマネージャー
+
+    Raises:
+        ValueError: サポートされていないバックエンドが指定された場合
+    """
+    backend = backend or config.vector_store.backend
+    if backend == "numpy":
+        return NumpyVectorStoreManager(collection_name=collection_name, embeddings=embeddings)
+    if backend == "qdrant":
+        return QdrantVectorStoreManager(collection_name=collection_name, embeddings=embeddings)
+    raise ValueError(f"サポートされていないバックエンドです: {backend}")
@@ -0,0 +1,163 @@
+"""
+検索フィルタモジュール
+メタデータによる絞り込み条件とペイロードインデックスの定義
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+from langchain_qdrant import QdrantVectorStore as LangChainQdrantVectorStore
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchValue,
+    PayloadSchemaType,
+    Range
+)
+
+# コレクション作成時にインデックスを作成するメタデータのフィールド
+# file_*はドキュメントローダー、source・line_numberはingest_jsonl_qa.pyが付与する
+PAYLOAD_INDEXES = {
+    "file_name": PayloadSchemaType.KEYWORD,
+    "file_extension": PayloadSchemaType.KEYWORD,
+    "file_path": PayloadSchemaType.KEYWORD,
+    "file_dirs": PayloadSchemaType.KEYWORD,
+    "source": PayloadSchemaType.KEYWORD,
+    "line_number": PayloadSchemaType.INTEGER,
+    "source_files": PayloadSchemaType.KEYWORD
+}
+
+
+def metadata_key(field: str) -> str:
+    """メタデータのフィールド名からペイロードのキーを作成"""
+    return f"{LangChainQdrantVectorStore.METADATA_KEY}.{field}"
+
+
+def _match(field: str, value: Union[str, int, List]) -> FieldCondition:
+    """値が1つならMatchValue、リストならMatchAnyの条件を作成"""
+    if isinstance(value, (list, tuple, set)):
+        return FieldCondition(key=metadata_key(field), match=MatchAny(any=list(value)))
+    return FieldCondition(key=metadata_key(field), match=MatchValue(value=value))
+
+
+def _normalize_extension(extension: str) -> str:
+    """拡張子を".pdf"形式（小文字、先頭にドット）にそろえる"""
+    extension = extension.strip().lower()
+    return extension if extension.startswith(".") else f".{extension}"
+
+
+def create_metadata_filter(
+    file_name: Optional[Union[str, List[str]]] = None,
+    file_extension: Optional[Union[str, List[str]]] = None,
+    path_prefix: Optional[str] = None,
+    source: Optional[Union[str, List[str]]] = None,
+    line_number: Optional[Union[int, Tuple[Optional[int], Optional[int]]]] = None
+) -> Optional[Filter]:
+    """
+    メタデータによる絞り込み条件を作成するヘルパー関数
+
+    指定した条件はすべて満たす必要がある（AND）。リストを渡した条件はいずれかに一致すればよい（OR）。
+    各フィールドにはコレクション作成時にペイロードインデックスを作成するため、
+    Qdrantサーバーではインデックスを使って絞り込みながら検索する。
+
+    Args:
+        file_name: ファイル名（例: "manual.pdf"）
+        file_extension: 拡張子（例: ".pdf"、"pdf"）
+        path_prefix: フォルダのパス。配下のファイル（またはそのパスのファイル自体）に絞り込む。
+            ディレクトリ単位で比較するため、"/docs/a"は"/docs/abc"配下には一致しない
+        source: ingest_jsonl_qa.pyで取り込んだ元ファイル名
+        line_number: 行番号、または(最小, 最大)の範囲（端を含む、Noneは上限・下限なし）
+
+    Returns:
+        Filterオブジェクト（条件がない場合はNone）
+    """
+    conditions = []
+
+    if file_name:
+        conditions.append(_match("file_name", file_name))
+
+    if file_extension:
+        if isinstance(file_extension, str):
+            conditions.append(_match("file_extension", _normalize_extension(file_extension)))
+        else:
+            conditions.append(_match("file_extension", [_normalize_extension(e) for e in file_extension]))
+
+    if path_prefix:
+        path = str(Path(path_prefix).absolute())
+        conditions.append(Filter(should=[_match("file_dirs", path), _match("file_path", path)]))
+
+    if source:
+        conditions.append(_match("source", source))
+
+    if line_number is not None:
+        if isinstance(line_number, tuple):
+            low, high = line_number
+            conditions.append(FieldCondition(key=metadata_key("line_number"), range=Range(gte=low, lte=high)))
+        else:
+            conditions.append(_match("line_number", line_number))
+
+    if not conditions:
+        return None
+    return Filter(must=conditions)
+
+
+def _match_condition(condition: FieldCondition, metadata: dict) -> bool:
+    """1つのFieldConditionをメタデータに対して評価（配列の値はいずれかの要素が一致すればよい）"""
+    prefix = f"{LangChainQdrantVectorStore.METADATA_KEY}."
+    if not condition.key.startswith(prefix):
+        raise ValueError(f"メタデータ以外のキーでは絞り込めません: {condition.key}")
+    value = metadata.get(condition.key[len(prefix):])
+    values = value if isinstance(value, list) else [value]
+
+    if isinstance(condition.match, MatchValue):
+        return condition.match.value in values
+    if isinstance(condition.match, MatchAny):
+        return any(v in values for v in condition.match.any)
+    if condition.range is not None:
+        bounds = condition.range
+        return any(
+            isinstance(v, (int, float))
+            and (bounds.gte is None or v >= bounds.gte)
+            and (bounds.lte is None or v <= bounds.lte)
+            and (bounds.gt is None or v > bounds.gt)
+            and (bounds.lt is None or v < bounds.lt)
+            for v in values
+        )
+    raise ValueError(f"サポートされていない絞り込み条件です: {condition}")
+
+
+def match_filter(filter: Filter, metadata: dict) -> bool:
+    """
+    絞り込み条件をメタデータに対して評価するヘルパー関数
+
+    Qdrantを使わないバックエンドのための評価で、create_metadata_filterが作成する条件
+    （must・should・must_not、MatchValue・MatchAny・Range、入れ子のFilter）に対応する。
+
+    Args:
+        filter: 絞り込み条件
+        metadata: ドキュメントのメタデータ
+
+    Returns:
+        条件を満たす場合True
+
+    Raises:
+        ValueError: サポートされていない条件が含まれる場合
+    """
+    def evaluate(condition) -> bool:
+        if isinstance(condition, Filter):
+            return match_filter(condition, metadata)
+        if isinstance(condition, FieldCondition):
+            return _match_condition(condition, metadata)
+        raise ValueError(f"サポートされていない絞り込み条件です: {condition}")
+
+    def as_list(conditions) -> list:
+        if conditions is None:
+            return []
+        return conditions if isinstance(conditions, list) else [conditions]
+
+    if not all(evaluate(c) for c in as_list(filter.must)):
+        return False
+    should = as_list(filter.should)
+    if should and not any(evaluate(c) for c in should):
+        return False
+    return not any(evaluate(c) for c in as_list(filter.must_not))
@@ -0,0 +1,64 @@
+"""
+MMR（Maximal Marginal Relevance）モジュール
+検索で多めに取得した候補から、クエリとの関連度と候補どうしの重複のバランスを取った上位k件を選ぶ
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from config import config
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """各行をL2正規化（ゼロベクトルはそのまま）"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    k: Optional[int] = None,
+    lambda_mult: Optional[float] = None
+) -> List[int]:
+    """
+    MMRで候補から多様な上位k件を選ぶ
+
+    各ステップで λ×sim(クエリ, 候補) − (1−λ)×max sim(候補, 選択済み) が最大の候補を選ぶ。
+    候補どうしのコサイン類似度は最初に1回の行列積で求め、選択済みとの最大類似度は
+    選んだ候補の列との要素ごとの最大値で更新するため、1ステップはO(候補数)のベクトル演算になる。
+
+    Args:
+        query_vector: クエリの埋め込みベクトル
+        candidate_vectors: 候補の埋め込みベクトル（関連度の高い順）
+        k: 選ぶ件数（Noneの場合は設定から取得）
+        lambda_mult: 1に近いほど関連度、0に近いほど多様性を重視（Noneの場合は設定から取得）
+
+    Returns:
+        選んだ候補のインデックスのリスト（選んだ順）
+    """
+    k = k or config.rag.top_k
+    lambda_mult = config.rag.mmr_lambda if lambda_mult is None else lambda_mult
+    if len(candidate_vectors) == 0:
+        return []
+
+    candidates = _normalize_rows(np.asarray(candidate_vectors, dtype=np.float32))
+    query = _normalize_rows(np.asarray(query_vector, dtype=np.float32))
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+
+    k = min(k, len(candidates))
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        available[index] = False
+        np.maximum(max_similarity, similarity[index], out=max_similarity)
+    return selected
@@ -0,0 +1,1188 @@
+"""
+NumPyベクターストアモジュール
+小〜中規模のコレクション向けに、ベクトルをメモリマップした.npyファイルに置き、
+プロセス内で厳密な類似度検索を行う
+"""
+
+import json
+import mmap
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client.models import Filter
+
+from config import config
+from vector_store.filters import match_filter
+from vector_store.mmr import maximal_marginal_relevance
+from vector_store.qdrant_client import (
+    CONTENT_PAYLOAD_KEY,
+    METADATA_PAYLOAD_KEY,
+    SOURCE_FILES_KEY,
+    generate_point_id
+)
+
+# 現在のマニフェストのファイル名を記録するファイル
+CURRENT_FILE = "CURRENT"
+# 取り込みが記録した内容バージョン（回答キャッシュの無効化に使う）を保存するファイル
+CONTENT_VERSION_FILE = "CONTENT_VERSION"
+# 参照されなくなったセグメントに置く、参照されなくなった時刻を記録するファイル
+RETIRED_FILE = "RETIRED"
+# 検索時に一度にfloat32へ変換して内積を計算する行数
+SEARCH_BLOCK_ROWS = 8192
+# プロセス内に保持する絞り込み条件ごとの行マスクの数
+FILTER_CACHE_SIZE = 32
+# 削除済みの行がこの割合を超えたら、すべてのセグメントを1つにまとめ直す
+COMPACT_DELETED_RATIO = 0.2
+# 末尾のセグメントの合計行数が直前のセグメントの1/MERGE_FACTOR以上になったらまとめる
+MERGE_FACTOR = 2
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """各行をL2正規化（長さ0のベクトルはそのまま）"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class _Segment:
+    """
+    読み取り専用で開いたセグメント
+
+    ベクトル・行の開始位置・ペイロードをメモリマップしたまま保持するため、
+    書き込み側がセグメントのファイルを削除しても、開いている間は読み続けられる。
+    """
+
+    def __init__(self, directory: Path):
+        """
+        初期化
+
+        Args:
+            directory: セグメントのディレクトリ
+        """
+        self.name = directory.name
+        self.vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        self.ids = np.load(directory / "ids.npy")
+        self.offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+        with open(directory / "payloads.jsonl", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.payloads = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        """行数"""
+        return len(self.ids)
+
+    def payload(self, row: int) -> bytes:
+        """指定した行のペイロード（JSONの1行）"""
+        return self.payloads[int(self.offsets[row]):int(self.offsets[row + 1])]
+
+
+class NumpyVectorStoreManager:
+    """
+    NumPyによるプロセス内ベクターストア
+
+    QdrantVectorStoreManagerと同じメソッドで保存・検索・削除できる。
+    コレクションごとのディレクトリに、書き出した単位ごとのセグメント（s000001, s000002, ...）と、
+    その時点のセグメントの一覧・削除済みの行を記録したマニフェスト（m000001.json, ...）を保存する。
+    各セグメントは次のファイルからなり、一度書き出したら書き換えない。
+
+    - vectors.npy: L2正規化したベクトル（float32またはfloat16）
+    - ids.npy: 各行のポイントID
+    - payloads.jsonl / offsets.npy: 各行のペイロード（本文とメタデータ）と、その開始位置
+
+    検索は各セグメントのvectors.npyをメモリマップしたまま、クエリとの内積（コサイン類似度）を
+    行列積で計算し、argpartitionで上位k件を選ぶ。ペイロードは上位k件の分だけ読み込む。
+    ファイルは読み取り専用で開くため、複数のワーカープロセスで同じページキャッシュを共有できる。
+
+    書き込みはメモリ上に溜め、flush_rows件に達した時点またはwrite_barrier()で新しいセグメントとして
+    追加し、新しいマニフェストを書き出してからCURRENTを切り替える。上書き・削除した行と
+    ペイロードを更新した元の行は削除済みとして記録し（更新した行は新しいセグメントに追加する）、
+    既存のセグメントは書き換えない。末尾のセグメントが直前のセグメントと同程度の大きさになると
+    まとめて1つにし（各行が書き直される回数は行数の対数程度）、削除済みの行が
+    COMPACT_DELETED_RATIOを超えるとすべてのセグメントをまとめ直す。
+
+    検索側は検索のたびにCURRENTを確認して新しいマニフェストを開く。参照されなくなったセグメントは
+    retain_seconds秒が経過してから削除するため、他のプロセスは切り替え前に読み込んだ
+    マニフェストのまま検索を続けられる。書き込むプロセスは同時に1つまでとする。
+    """
+
+    SUPPORTED_DTYPES = {"float16": np.float16, "float32": np.float32}
+
+    def __init__(
+        self,
+        collection_name: Optional[str] = None,
+        embeddings=None,
+        path: Optional[str] = None,
+        dtype: Optional[str] = None
+    ):
+        """
+        初期化
+
+        Args:
+            collection_name: コレクション名（Noneの場合は設定から取得）
+            embeddings: 埋め込みモデルインスタンス
+            path: 保存先のディレクトリ（Noneの場合は設定から取得）
+            dtype: ベクトルの保存型 "float16" または "float32"（Noneの場合は設定から取得）
+
+        Raises:
+            ValueError: サポートされていない型が指定された場合
+        """
+        self.collection_name = collection_name or config.qdrant.collection_name
+        self.embeddings = embeddings
+        self.dtype = dtype or config.vector_store.numpy_dtype
+        if self.dtype not in self.SUPPORTED_DTYPES:
+            raise ValueError(f"サポートされていない型です: {self.dtype}")
+        self.path = Path(path or config.vector_store.numpy_path) / self.collection_name
+        self.flush_rows = config.vector_store.numpy_flush_rows
+        self.retain_seconds = config.vector_store.numpy_retain_seconds
+        self.vector_size = 768  # nomic-embed-textの次元数
+        # QdrantVectorStoreManagerと共通の属性（ingest.pyが参照する。NumPyバックエンドでは使わない）
+        self.prefer_grpc = False
+        self.async_writes = False
+        self.max_outstanding_writes = config.qdrant.max_outstanding_writes
+        self._initialized = False
+        self._version: Optional[str] = None
+        self._segments: List[_Segment] = []
+        self._open_segments: Dict[str, _Segment] = {}
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._ids: Optional[np.ndarray] = None
+        self._deleted = np.zeros(0, dtype=bool)
+        self._next_segment = 1
+        self._id_rows: Optional[Dict[str, int]] = None
+        self._filter_masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pending: "OrderedDict[str, Tuple[np.ndarray, dict]]" = OrderedDict()
+
+    def initialize(self) -> "NumpyVectorStoreManager":
+        """
+        保存先を開く
+
+        Returns:
+            自身のインスタンス
+        """
+        self._initialized = True
+        self._refresh()
+        return self
+
+    def _require_initialized(self) -> None:
+        """初期化済みであることを確認"""
+        if not self._initialized:
+            raise ValueError("NumPyベクターストアが初期化されていません。")
+
+    def _current_version(self) -> Optional[str]:
+        """CURRENTに記録されたマニフェストのファイル名"""
+        try:
+            return (self.path / CURRENT_FILE).read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _read_manifest(self, version: str) -> dict:
+        """マニフェストを読み込む（以前の形式の単一バージョンのディレクトリは1つのセグメントとみなす）"""
+        if (self.path / version).is_dir():
+            return {"segments": [version], "deleted": None, "next_segment": 1}
+        return json.loads((self.path / version).read_text(encoding="utf-8"))
+
+    def _segment(self, name: str) -> _Segment:
+        """セグメントを開く（開いているものは使い回す）"""
+        segment = self._open_segments.get(name)
+        if segment is None:
+            segment = _Segment(self.path / name)
+            self._open_segments[name] = segment
+        return segment
+
+    def _refresh(self) -> None:
+        """CURRENTが切り替わっていれば新しいマニフェストを開く"""
+        for attempt in range(3):
+            version = self._current_version()
+            if version == self._version:
+                return
+            try:
+                self._load(version)
+                return
+            except FileNotFoundError:
+                # 読み込み中に書き込み側が次のマニフェストに切り替えて古いものを削除した場合は読み直す
+                if attempt == 2:
+                    raise
+
+    def _load(self, version: Optional[str]) -> None:
+        """マニフェストのセグメントと削除済みの行を読み込む"""
+        if version is None:
+            segments, deleted_rows, next_segment = [], None, 1
+        else:
+            manifest = self._read_manifest(version)
+            segments = [self._segment(name) for name in manifest["segments"]]
+            deleted_rows = np.load(self.path / manifest["deleted"]) if manifest.get("deleted") else None
+            next_segment = manifest.get("next_segment", 1)
+
+        self._version = version
+        self._segments = segments
+        self._open_segments = {segment.name: segment for segment in segments}
+        self._starts = np.cumsum([0] + [len(segment) for segment in segments]).astype(np.int64)
+        self._ids = np.concatenate([segment.ids for segment in segments]) if segments else None
+        self._deleted = np.zeros(self._rows, dtype=bool)
+        if deleted_rows is not None:
+            self._deleted[deleted_rows] = True
+        self._next_segment = next_segment
+        self._id_rows = None
+        self._filter_masks.clear()
+
+    @property
+    def _rows(self) -> int:
+        """書き出し済みの行数（削除済みの行を含む）"""
+        return int(self._starts[-1])
+
+    @property
+    def _count(self) -> int:
+        """保存済み（書き出し済み）の件数"""
+        return self._rows - int(self._deleted.sum())
+
+    @property
+    def _dim(self) -> int:
+        """ベクトルの次元数"""
+        return self._segments[0].vectors.shape[1] if self._segments else self.vector_size
+
+    def _locate(self, row: int) -> Tuple[_Segment, int]:
+        """全体の行番号からセグメントとセグメント内の行番号を求める"""
+        index = int(np.searchsorted(self._starts, row, side="right")) - 1
+        return self._segments[index], row - int(self._starts[index])
+
+    def _read_payloads(self, rows: Iterable[int]) -> Iterator[dict]:
+        """指定した行のペイロードを読み込む"""
+        for row in rows:
+            segment, local = self._locate(int(row))
+            yield json.loads(segment.payload(local))
+
+    def _iter_payloads(self) -> Iterator[dict]:
+        """すべての行（削除済みの行を含む）のペイロードを先頭から順に読み込む"""
+        for segment in self._segments:
+            for row in range(len(segment)):
+                yield json.loads(segment.payload(row))
+
+    def _row_vectors(self, rows: Iterable[int]) -> np.ndarray:
+        """指定した行のベクトル（保存型のまま）"""
+        rows = list(rows)
+        vectors = np.empty((len(rows), self._dim), dtype=self.SUPPORTED_DTYPES[self.dtype])
+        for i, row in enumerate(rows):
+            segment, local = self._locate(int(row))
+            vectors[i] = segment.vectors[local]
+        return vectors
+
+    def _row_of(self, point_id: str) -> Optional[int]:
+        """ポイントIDの行番号（書き出し済みで削除されていないもののみ）"""
+        if self._id_rows is None:
+            ids = self._ids if self._ids is not None else []
+            self._id_rows = {
+                value.decode("utf-8"): row
+                for row, value in enumerate(ids)
+                if not self._deleted[row]
+            }
+        return self._id_rows.get(point_id)
+
+    def create_collection(self, force: bool = False, **index_settings) -> bool:
+        """
+        コレクションを作成
+
+        Args:
+            force: 既存のコレクションを削除して再作成する場合True
+            **index_settings: HNSW・量子化などQdrant用の設定（厳密な検索のため使わない）
+
+        Returns:
+            作成成功の場合True（既に存在する場合もTrue）
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 作成に失敗した場合
+        """
+        self._require_initialized()
+
+        try:
+            if force and self.path.exists():
+                self.delete_collection()
+
+            if self._current_version() is not None:
+                print(f"コレクション '{self.collection_name}' は既に存在します。")
+                return True
+
+            self._commit([], np.zeros(0, dtype=bool))
+            print(f"コレクション '{self.collection_name}' を作成しました。")
+            return True
+        except Exception as e:
+            raise Exception(f"コレクションの作成に失敗しました: {str(e)}")
+
+    def _write_segment(
+        self,
+        vector_blocks: Iterable[np.ndarray],
+        rows: int,
+        ids: np.ndarray,
+        payload_lines: Iterable[bytes]
+    ) -> str:
+        """新しいセグメントを書き出してディレクトリ名を返す（ベクトルはブロックごとに書き込む）"""
+        name = f"s{self._next_segment:06d}"
+        self._next_segment += 1
+        segment_dir = self.path / name
+        segment_dir.mkdir(parents=True, exist_ok=True)
+
+        vectors = np.lib.format.open_memmap(
+            segment_dir / "vectors.npy",
+            mode="w+",
+            dtype=self.SUPPORTED_DTYPES[self.dtype],
+            shape=(rows, self._dim)
+        )
+        position = 0
+        for block in vector_blocks:
+            vectors[position:position + len(block)] = block
+            position += len(block)
+        vectors.flush()
+        del vectors
+
+        np.save(segment_dir / "ids.npy", ids)
+        offsets = [0]
+        with open(segment_dir / "payloads.jsonl", "wb") as f:
+            for line in payload_lines:
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(segment_dir / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+        return name
+
+    def _commit(self, segments: List[str], deleted: np.ndarray) -> None:
+        """セグメントの一覧と削除済みの行をマニフェストに書き出してCURRENTを切り替える"""
+        previous = self._current_version()
+        number = int(previous[1:7]) + 1 if previous else 1
+        version = f"m{number:06d}.json"
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        deleted_file = None
+        deleted_rows = np.flatnonzero(deleted)
+        if len(deleted_rows):
+            deleted_file = f"m{number:06d}.deleted.npy"
+            np.save(self.path / deleted_file, deleted_rows)
+
+        manifest = {"segments": segments, "deleted": deleted_file, "next_segment": self._next_segment}
+        tmp_path = self.path / f"{version}.tmp"
+        tmp_path.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp_path, self.path / version)
+
+        tmp_path = self.path / f"{CURRENT_FILE}.tmp"
+        tmp_path.write_text(version, encoding="utf-8")
+        os.replace(tmp_path, self.path / CURRENT_FILE)
+
+        self._refresh()
+        self._collect_garbage()
+
+    def _collect_garbage(self) -> None:
+        """
+        現在のマニフェストから参照されなくなったファイルを削除
+
+        セグメントは参照されなくなった時刻をRETIREDに記録し、retain_seconds秒が経過してから削除する
+        （切り替え前のマニフェストを読み込んだ他のプロセスが、まだ開いていないセグメントを開けるようにする）。
+        古いマニフェストは読み込み時に見つからなければ読み直すため、すぐに削除する。
+        """
+        manifest = self._read_manifest(self._version)
+        referenced = {self._version, manifest.get("deleted"), *manifest["segments"]}
+        now = time.time()
+        for entry in self.path.iterdir():
+            if (
+                entry.name in referenced
+                or entry.name in (CURRENT_FILE, CONTENT_VERSION_FILE)
+                or entry.name.endswith(".tmp")
+            ):
+                continue
+            if not entry.is_dir():
+                entry.unlink(missing_ok=True)
+                continue
+            marker = entry / RETIRED_FILE
+            if not marker.exists():
+                marker.write_text(str(now), encoding="utf-8")
+            if now - float(marker.read_text(encoding="utf-8")) >= self.retain_seconds:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def _apply(
+        self,
+        drop_rows: Optional[np.ndarray] = None,
+        payload_updates: Optional[Dict[int, dict]] = None
+    ) -> None:
+        """
+        溜めた書き込み・行の削除・ペイロードの更新を新しいマニフェストとして書き出す
+
+        溜めた書き込みと、ペイロードを更新した行（ベクトルはコピー）を新しいセグメントとして追加し、
+        上書き・削除・更新した元の行は削除済みとして記録する。既存のセグメントは書き換えない。
+        ポイントIDから行番号への対応は、書き出し前のものを変更のあった行の分だけ更新して引き継ぐ。
+        """
+        self._refresh()
+        deleted = self._deleted.copy()
+        if drop_rows is not None and len(drop_rows):
+            deleted[drop_rows] = True
+        for point_id in self._pending:
+            row = self._row_of(point_id)
+            if row is not None:
+                deleted[row] = True
+        payload_updates = payload_updates or {}
+        # 溜めた書き込みで上書きした行は、そちらの内容を優先する
+        update_rows = [row for row in sorted(payload_updates) if not deleted[row]]
+        deleted[update_rows] = True
+
+        id_rows = self._id_rows
+        if id_rows is not None:
+            for row in np.flatnonzero(deleted & ~self._deleted):
+                point_id = self._ids[row].decode("utf-8")
+                if id_rows.get(point_id) == row:
+                    del id_rows[point_id]
+
+        new_vectors = [vector for vector, _ in self._pending.values()]
+        if not self._segments and new_vectors:
+            self.vector_size = len(new_vectors[0])
+        rows = len(update_rows) + len(new_vectors)
+
+        segments = [segment.name for segment in self._segments]
+        sizes = [len(segment) for segment in self._segments]
+        if rows:
+            dtype = self.SUPPORTED_DTYPES[self.dtype]
+
+            def vector_blocks() -> Iterator[np.ndarray]:
+                if update_rows:
+                    yield self._row_vectors(update_rows)
+                if new_vectors:
+                    yield _normalize(np.asarray(new_vectors, dtype=np.float32)).astype(dtype)
+
+            def payload_lines() -> Iterator[bytes]:
+                for row in update_rows:
+                    yield self._encode_payload(payload_updates[row])
+                for _, payload in self._pending.values():
+                    yield self._encode_payload(payload)
+
+            new_ids = np.asarray([point_id.encode("utf-8") for point_id in self._pending], dtype="S")
+            ids = np.concatenate([self._ids[update_rows], new_ids]) if update_rows else new_ids
+            segments.append(self._write_segment(vector_blocks(), rows, ids, payload_lines()))
+            sizes.append(rows)
+            if id_rows is not None:
+                self._map_rows(id_rows, self._rows, ids)
+            deleted = np.concatenate([deleted, np.zeros(rows, dtype=bool)])
+
+        segments, deleted, moved = self._merge(segments, sizes, deleted)
+        if id_rows is not None and moved is not None:
+            self._map_rows(id_rows, *moved)
+        self._commit(segments, deleted)
+        self._id_rows = id_rows
+        self._pending.clear()
+
+    @staticmethod
+    def _map_rows(id_rows: Dict[str, int], start: int, ids: np.ndarray) -> None:
+        """start行目から並ぶポイントIDの行番号を対応に記録"""
+        for row, value in enumerate(ids, start):
+            id_rows[value.decode("utf-8")] = row
+
+    def _merge(
+        self,
+        segments: List[str],
+        sizes: List[int],
+        deleted: np.ndarray
+    ) -> Tuple[List[str], np.ndarray, Optional[Tuple[int, np.ndarray]]]:
+        """
+        末尾のセグメントをまとめる
+
+        末尾から、直前のセグメントの行数がそれまでの合計のMERGE_FACTOR倍以下である間さかのぼり、
+        その範囲を削除済みの行を除いて1つのセグメントに書き直す。セグメントの行数が
+        先頭から等比的に小さくなるため、セグメント数と各行が書き直される回数は行数の対数程度になる。
+        削除済みの行がCOMPACT_DELETED_RATIOを超えた場合はすべてのセグメントをまとめる。
+
+        Returns:
+            (セグメントの一覧, 削除済みの行, 書き直した行の開始位置とポイントID（書き直していない場合はNone）)
+        """
+        if not segments:
+            return segments, deleted, None
+
+        compact = deleted.sum() > COMPACT_DELETED_RATIO * len(deleted)
+        start = len(segments) - 1
+        if compact:
+            start = 0
+        else:
+            tail = sizes[-1]
+            while start > 0 and sizes[start - 1] <= MERGE_FACTOR * tail:
+                start -= 1
+                tail += sizes[start]
+        if len(segments) - start < 2 and not compact:
+            return segments, deleted, None
+
+        base = sum(sizes[:start])
+        merged = [self._segment(name) for name in segments[start:]]
+        keeps = []
+        offset = base
+        for segment in merged:
+            keeps.append(np.flatnonzero(~deleted[offset:offset + len(segment)]))
+            offset += len(segment)
+        rows = sum(len(keep) for keep in keeps)
+
+        segments = segments[:start]
+        deleted = deleted[:base]
+        if rows == 0:
+            return segments, deleted, None
+
+        def vector_blocks() -> Iterator[np.ndarray]:
+            for segment, keep in zip(merged, keeps):
+                for i in range(0, len(keep), SEARCH_BLOCK_ROWS):
+                    yield segment.vectors[keep[i:i + SEARCH_BLOCK_ROWS]]
+
+        def payload_lines() -> Iterator[bytes]:
+            for segment, keep in zip(merged, keeps):
+                for row in keep:
+                    yield segment.payload(row)
+
+        ids = np.concatenate([segment.ids[keep] for segment, keep in zip(merged, keeps)])
+        segments.append(self._write_segment(vector_blocks(), rows, ids, payload_lines()))
+        return segments, np.concatenate([deleted, np.zeros(rows, dtype=bool)]), (base, ids)
+
+    @staticmethod
+    def _encode_payload(payload: dict) -> bytes:
+        """ペイロードをpayloads.jsonlの1行に変換"""
+        return (json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    def add_documents(
+        self,
+        documents: List[Document],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        ドキュメントを埋め込んで保存
+
+        upsert_embeddedと同じく書き込みはメモリ上に溜め、flush_rows件に達した時点またはwrite_barrier()で書き出す。
+
+        Args:
+            documents: 追加するドキュメントのリスト
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
+
+        Returns:
+            追加されたドキュメントのIDリスト
+
+        Raises:
+            ValueError: 埋め込みモデルが設定されていない場合
+            Exception: ドキュメント追加に失敗した場合
+        """
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        try:
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+            ids = self.upsert_embedded(documents, vectors, ids=ids)
+            print(f"{len(documents)}件のドキュメントを追加しました。")
+            return ids
+        except Exception as e:
+            raise Exception(f"ドキュメントの追加に失敗しました: {str(e)}")
+
+    def upsert_embedded(
+        self,
+        documents: List[Document],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None,
+        wait: Optional[bool] = None
+    ) -> List[str]:
+        """
+        埋め込み済みのドキュメントを保存
+
+        書き込みはメモリ上に溜め、flush_rows件に達した時点で新しいセグメントとして書き出す。
+        同じIDのポイントは上書きされる。
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            vectors: 各ドキュメントの埋め込みベクトル
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
+            wait: Trueの場合は溜めた書き込みをすぐに書き出す
+
+        Returns:
+            保存したポイントのIDリスト
+
+        Raises:
+            ValueError: 初期化されていない場合、または件数が一致しない場合
+            Exception: 保存に失敗した場合
+        """
+        self._require_initialized()
+
+        if len(documents) != len(vectors):
+            raise ValueError("ドキュメント数とベクトル数が一致しません")
+
+        if ids is None:
+            ids = [generate_point_id(doc) for doc in documents]
+
+        try:
+            for point_id, doc, vector in zip(ids, documents, vectors):
+                self._pending.pop(str(point_id), None)
+                self._pending[str(point_id)] = (
+                    np.asarray(vector, dtype=np.float32),
+                    {CONTENT_PAYLOAD_KEY: doc.page_content, METADATA_PAYLOAD_KEY: doc.metadata}
+                )
+            if wait or len(self._pending) >= self.flush_rows:
+                self._apply()
+            return ids
+        except Exception as e:
+            raise Exception(f"ドキュメントの保存に失敗しました: {str(e)}")
+
+    def upload_embedded(
+        self,
+        documents: List[Document],
+        vectors: Iterable[List[float]],
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None
+    ) -> List[str]:
+        """
+        埋め込み済みのドキュメントを一括で保存
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            vectors: 各ドキュメントの埋め込みベクトル（イテラブル）
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
+            batch_size: 1回に処理するポイント数（Noneの場合は設定から取得）
+            parallel: 使わない（QdrantVectorStoreManagerとの互換のため）
+
+        Returns:
+            保存したポイントのIDリスト
+        """
+        if ids is None:
+            ids = [generate_point_id(doc) for doc in documents]
+
+        batch_size = batch_size or config.qdrant.upload_batch_size
+        vector_iter = iter(vectors)
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i:i + batch_size]
+            self.upsert_embedded(batch, [next(vector_iter) for _ in batch], ids=ids[i:i + batch_size])
+        self.write_barrier()
+        return ids
+
+    def bulk_add_documents(
+        self,
+        documents: List[Document],
+        embed_batch_size: int = 64,
+        parallel: Optional[int] = None
+    ) -> List[str]:
+        """
+        ドキュメントを埋め込みながら一括で保存
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            embed_batch_size: 1回の埋め込みリクエストで送るテキスト数
+            parallel: 使わない（QdrantVectorStoreManagerとの互換のため）
+
+        Returns:
+            保存したポイントのIDリスト
+
+        Raises:
+            ValueError: 埋め込みモデルが設定されていない場合
+        """
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        def iter_vectors() -> Iterator[List[float]]:
+            for i in range(0, len(documents), embed_batch_size):
+                texts = [doc.page_content for doc in documents[i:i + embed_batch_size]]
+                yield from self.embeddings.embed_documents(texts)
+
+        return self.upload_embedded(documents, iter_vectors(), batch_size=embed_batch_size)
+
+    def write_barrier(self) -> int:
+        """
+        溜めた書き込みを書き出す
+
+        Returns:
+            コレクションのポイント数
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 書き出しに失敗した場合
+        """
+        self._require_initialized()
+
+        try:
+            if self._pending:
+                self._apply()
+            self._refresh()
+            return self._count
+        except Exception as e:
+            raise Exception(f"書き込みの反映の確認に失敗しました: {str(e)}")
+
+
+    def _filter_mask(self, filter: Filter) -> np.ndarray:
+        """絞り込み条件を満たす行のマスク（条件ごとにキャッシュする）"""
+        key = filter.model_dump_json()
+        mask = self._filter_masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (
+                    match_filter(filter, payload.get(METADATA_PAYLOAD_KEY) or {})
+                    for payload in self._iter_payloads()
+                ),
+                dtype=bool,
+                count=self._rows
+            )
+            self._filter_masks[key] = mask
+            if len(self._filter_masks) > FILTER_CACHE_SIZE:
+                self._filter_masks.popitem(last=False)
+        else:
+            self._filter_masks.move_to_end(key)
+        return mask
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        k: int,
+        filter: Optional[Filter] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        ベクトルで厳密な上位k件を検索
+
+        Args:
+            vector: クエリの埋め込みベクトル
+            k: 取得する件数
+            filter: メタデータによる絞り込み条件
+
+        Returns:
+            (ドキュメント, コサイン類似度)のタプルのリスト（スコアの降順）
+        """
+        top, scores = self._top_rows(vector, k, filter)
+        return self._row_documents(top, scores)
+
+    def _top_rows(
+        self,
+        vector: List[float],
+        k: int,
+        filter: Optional[Filter] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """クエリとのコサイン類似度が高い上位k行の行番号（スコアの降順）と全行のスコアを返す"""
+        self._require_initialized()
+        if self._pending:
+            self._apply()
+        self._refresh()
+
+        count = self._count
+        if count == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        scores = np.empty(self._rows, dtype=np.float32)
+        for segment, offset in zip(self._segments, self._starts):
+            for start in range(0, len(segment), SEARCH_BLOCK_ROWS):
+                block = segment.vectors[start:start + SEARCH_BLOCK_ROWS]
+                scores[offset + start:offset + start + len(block)] = block.astype(np.float32, copy=False) @ query
+
+        mask = ~self._deleted
+        if filter is not None:
+            mask &= self._filter_mask(filter)
+        scores[~mask] = -np.inf
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), scores
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")], scores
+
+    def _row_documents(self, top: np.ndarray, scores: np.ndarray) -> List[Tuple[Document, float]]:
+        """行番号から(ドキュメント, スコア)のタプルのリストを作成"""
+        if len(top) == 0:
+            return []
+        results = []
+        for row, payload in zip(top, self._read_payloads(top)):
+            metadata = dict(payload.get(METADATA_PAYLOAD_KEY) or {})
+            metadata["_id"] = self._ids[row].decode("utf-8")
+            metadata["_collection_name"] = self.collection_name
+            document = Document(page_content=payload.get(CONTENT_PAYLOAD_KEY) or "", metadata=metadata)
+            results.append((document, float(scores[row])))
+        return results
+
+    def similarity_search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> List[Document]:
+        """
+        類似度検索を実行
+
+        Args:
+            query: 検索クエリ
+            k: 取得する件数（Noneの場合は設定から取得）
+            hnsw_ef: 使わない（厳密な検索のため）
+            oversampling: 使わない（厳密な検索のため）
+            rescore: 使わない（厳密な検索のため）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"hybrid"（密ベクトルのみで検索）のいずれか
+
+        Returns:
+            類似ドキュメントのリスト
+
+        Raises:
+            ValueError: クエリが空の場合、または検索方法がsparseの場合
+            Exception: 検索に失敗した場合
+        """
+        return [
+            doc for doc, _ in
+            self.similarity_search_with_score(query, k=k, filter=filter, retrieval_mode=retrieval_mode)
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        スコア付きで類似度検索を実行
+
+        Args:
+            query: 検索クエリ
+            k: 取得する件数（Noneの場合は設定から取得）
+            hnsw_ef: 使わない（厳密な検索のため）
+            oversampling: 使わない（厳密な検索のため）
+            rescore: 使わない（厳密な検索のため）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"hybrid"（密ベクトルのみで検索）のいずれか
+
+        Returns:
+            (ドキュメント, スコア)のタプルのリスト
+
+        Raises:
+            ValueError: クエリが空の場合、埋め込みモデルが設定されていない場合、または検索方法がsparseの場合
+            Exception: 検索に失敗した場合
+        """
+        if not query or query.strip() == "":
+            raise ValueError("検索クエリが空です")
+
+        # 疎ベクトルは保存しないため、hybridは密ベクトルのみの検索になる
+        if (retrieval_mode or config.rag.retrieval_mode) == "sparse":
+            raise ValueError("NumPyバックエンドは疎ベクトルを持たないためsparse検索できません。")
+
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        try:
+            vector = self.embeddings.embed_query(query)
+            return self.search_by_vector(vector, k or config.rag.top_k, filter=filter)
+        except Exception as e:
+            raise Exception(f"類似度検索に失敗しました: {str(e)}")
+
+    def max_marginal_relevance_search_with_score(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        MMRで多様性を考慮した上位k件をスコア付きで取得
+
+        コサイン類似度の上位fetch_k件を候補とし、maximal_marginal_relevanceでk件を選ぶ。
+
+        Args:
+            query: 検索クエリ
+            k: 取得する件数（Noneの場合は設定から取得）
+            fetch_k: MMRの候補数（Noneの場合は設定から取得）
+            lambda_mult: 1に近いほど関連度、0に近いほど多様性を重視（Noneの場合は設定から取得）
+            hnsw_ef: 使わない（厳密な検索のため）
+            oversampling: 使わない（厳密な検索のため）
+            rescore: 使わない（厳密な検索のため）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"hybrid"（密ベクトルのみで検索）のいずれか
+
+        Returns:
+            (ドキュメント, コサイン類似度)のタプルのリスト（選んだ順）
+
+        Raises:
+            ValueError: クエリが空の場合、埋め込みモデルが設定されていない場合、または検索方法がsparseの場合
+            Exception: 検索に失敗した場合
+        """
+        if not query or query.strip() == "":
+            raise ValueError("検索クエリが空です")
+
+        if (retrieval_mode or config.rag.retrieval_mode) == "sparse":
+            raise ValueError("NumPyバックエンドは疎ベクトルを持たないためsparse検索できません。")
+
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        k = k or config.rag.top_k
+        try:
+            vector = self.embeddings.embed_query(query)
+            top, scores = self._top_rows(vector, max(fetch_k or config.rag.mmr_fetch_k, k), filter)
+            if len(top) == 0:
+                return []
+            # 行番号の昇順に読むとメモリマップの読み込みが連続する
+            order = np.argsort(top)
+            candidates = np.empty((len(top), self._dim), dtype=np.float32)
+            candidates[order] = self._row_vectors(top[order])
+            selected = maximal_marginal_relevance(vector, candidates, k, lambda_mult)
+            return self._row_documents(top[selected], scores)
+        except Exception as e:
+            raise Exception(f"MMR検索に失敗しました: {str(e)}")
+
+    def _rows_matching(self, key: str, values: Set[str]) -> Iterator[Tuple[int, dict]]:
+        """metadataのkeyがvaluesのいずれかに一致する（配列の場合はいずれかの要素が一致する）行を列挙"""
+        for row, payload in enumerate(self._iter_payloads()):
+            if self._deleted[row]:
+                continue
+            metadata = payload.get(METADATA_PAYLOAD_KEY) or {}
+            value = metadata.get(key)
+            if any(v in values for v in (value if isinstance(value, list) else [value])):
+                yield row, metadata
+
+    def delete_by_file_paths(self, file_paths: List[str], batch_size: int = 100) -> bool:
+        """
+        指定したファイルから作成されたポイントを削除
+
+        Args:
+            file_paths: 削除対象のファイルパスのリスト
+            batch_size: 使わない（QdrantVectorStoreManagerとの互換のため）
+
+        Returns:
+            削除成功の場合True
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 削除に失敗した場合
+        """
+        self._require_initialized()
+
+        try:
+            self.write_barrier()
+            rows = [row for row, _ in self._rows_matching("file_path", set(file_paths))]
+            if rows:
+                self._apply(drop_rows=np.asarray(rows, dtype=np.int64))
+            return True
+        except Exception as e:
+            raise Exception(f"ポイントの削除に失敗しました: {str(e)}")
+
+    def set_source_files(self, source_files: Dict[str, List[str]]) -> bool:
+        """
+        ポイントのmetadata.source_filesを更新
+
+        Args:
+            source_files: ポイントIDから取得元ファイルパスのリストへの辞書
+
+        Returns:
+            更新成功の場合True
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 更新に失敗した場合
+        """
+        self._require_initialized()
+
+        if not source_files:
+            return True
+
+        try:
+            self.write_barrier()
+            rows = {}
+            for point_id, files in source_files.items():
+                row = self._row_of(str(point_id))
+                if row is not None:
+                    rows[row] = list(files)
+            updates = {}
+            for row, payload in zip(sorted(rows), self._read_payloads(sorted(rows))):
+                metadata = dict(payload.get(METADATA_PAYLOAD_KEY) or {})
+                metadata[SOURCE_FILES_KEY] = rows[row]
+                updates[row] = {**payload, METADATA_PAYLOAD_KEY: metadata}
+            if updates:
+                self._apply(payload_updates=updates)
+            return True
+        except Exception as e:
+            raise Exception(f"取得元ファイルの更新に失敗しました: {str(e)}")
+
+    def find_dependent_files(self, file_paths: List[str]) -> Set[str]:
+        """
+        指定したファイルのポイントに重複としてまとめられている他のファイルを取得
+
+        Args:
+            file_paths: ファイルパスのリスト
+
+        Returns:
+            指定したファイル以外の取得元ファイルパスの集合
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 取得に失敗した場合
+        """
+        self._require_initialized()
+
+        if not file_paths:
+            return set()
+
+        try:
+            self.write_barrier()
+            dependents = set()
+            for _, metadata in self._rows_matching("file_path", set(file_paths)):
+                dependents.update(metadata.get(SOURCE_FILES_KEY) or [])
+            return dependents - set(file_paths)
+        except Exception as e:
+            raise Exception(f"取得元ファイルの検索に失敗しました: {str(e)}")
+
+    def remove_source_files(self, file_paths: List[str]) -> int:
+        """
+        他のファイルのポイントのmetadata.source_filesから指定したファイルを取り除く
+
+        Args:
+            file_paths: 取り除くファイルパスのリスト
+
+        Returns:
+            更新したポイント数
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 更新に失敗した場合
+        """
+        self._require_initialized()
+
+        if not file_paths:
+            return 0
+
+        removed = set(file_paths)
+        try:
+            self.write_barrier()
+            updates = {}
+            for row, metadata in self._rows_matching(SOURCE_FILES_KEY, removed):
+                if metadata.get("file_path") in removed:
+                    continue
+                updates[self._ids[row].decode("utf-8")] = [
+                    f for f in metadata.get(SOURCE_FILES_KEY) or [] if f not in removed
+                ]
+            self.set_source_files(updates)
+            return len(updates)
+        except Exception as e:
+            raise Exception(f"取得元ファイルの更新に失敗しました: {str(e)}")
+
+    def delete_collection(self) -> bool:
+        """
+        コレクションを削除
+
+        Returns:
+            削除成功の場合True
+
+        Raises:
+            ValueError: 初期化されていない場合
+            Exception: 削除に失敗した場合
+        """
+        self._require_initialized()
+
+        try:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._pending.clear()
+            self._open_segments.clear()
+            self._refresh()
+            print(f"コレクション '{self.collection_name}' を削除しました。")
+            return True
+        except Exception as e:
+            raise Exception(f"コレクションの削除に失敗しました: {str(e)}")
+
+    def begin_bulk_load(self) -> int:
+        """一括取り込みモードを開始（インデックスを持たないため何もしない）"""
+        return 0
+
+    def end_bulk_load(
+        self,
+        wait: bool = True,
+        timeout: Optional[float] = None,
+        poll_interval: float = 1.0
+    ) -> float:
+        """一括取り込みモードを終了（溜めた書き込みを書き出す）"""
+        self.write_barrier()
+        return 0.0
+
+    def wait_for_indexing(self, timeout: Optional[float] = None, poll_interval: float = 1.0) -> float:
+        """インデックスの作成を待つ（インデックスを持たないため待たない）"""
+        return 0.0
+
+    @property
+    def is_local(self) -> bool:
+        """プロセス内で動作するか（常にTrue）"""
+        return True
+
+    @property
+    def pending_writes(self) -> int:
+        """メモリ上に溜めたまま書き出していない（プロセスが終了すると失われる）書き込みの件数"""
+        return len(self._pending)
+
+    def get_alias_target(self, alias: Optional[str] = None) -> Optional[str]:
+        """エイリアスの参照先（エイリアスに対応しないためNone）"""
+        return None
+
+    def begin_reindex(self) -> str:
+        """無停止での再構築（NumPyバックエンドでは未対応）"""
+        raise ValueError("NumPyバックエンドは無停止での再構築（--reindex）に対応していません。--forceで再作成してください")
+
+    def resume_reindex(self) -> Optional[str]:
+        """無停止での再構築の再開（NumPyバックエンドでは未対応）"""
+        return self.begin_reindex()
+
+    def finish_reindex(self, keep_versions: Optional[int] = None) -> List[str]:
+        """無停止での再構築の完了（NumPyバックエンドでは未対応）"""
+        return self.begin_reindex()
+
+    def get_content_version(self) -> str:
+        """
+        取り込みが記録したコレクションの内容バージョンを取得
+
+        Returns:
+            内容バージョン（記録されていない場合は空文字列）
+        """
+        try:
+            return (self.path / CONTENT_VERSION_FILE).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return ""
+
+    def bump_content_version(self) -> str:
+        """
+        コレクションの内容バージョンを更新
+
+        取り込みでコレクションに書き込む前と完了後に呼び出し、それまでにキャッシュした回答を無効にする。
+        バージョンはコレクションのディレクトリに保存する。
+
+        Returns:
+            新しい内容バージョン
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        version = uuid.uuid4().hex
+        tmp_path = self.path / f"{CONTENT_VERSION_FILE}.tmp"
+        tmp_path.write_text(version, encoding="utf-8")
+        os.replace(tmp_path, self.path / CONTENT_VERSION_FILE)
+        return version
+
+    def get_collection_info(self) -> dict:
+        """
+        コレクション情報を取得
+
+        Returns:
+            コレクション情報の辞書（コレクションが存在しない場合は空の辞書）
+
+        Raises:
+            ValueError: 初期化されていない場合
+        """
+        self._require_initialized()
+
+        self._refresh()
+        if self._version is None:
+            return {}
+        count = self._count
+        return {
+            "name": self.collection_name,
+            "collection": self.collection_name,
+            "vectors_count": count,
+            "points_count": count,
+            "segments_count": len(self._segments),
+            "status": "green",
+            "path": str(self.path / self._version),
+            "dtype": self.dtype,
+            "content_version": self.get_content_version()
+        }
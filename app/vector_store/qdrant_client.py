@@ -3,12 +3,104 @@ Qdrantクライアントモジュール
 ベクターデータベースとの連携を担当
 """
 
-from typing import List, Optional
+import hashlib
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from langchain_qdrant import QdrantVectorStore as LangChainQdrantVectorStore
 from langchain_core.documents import Document
 from qdrant_client import QdrantClient as QdrantClientBase
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.local.qdrant_local import QdrantLocal
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    CollectionStatus,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    Fusion,
+    FusionQuery,
+    HnswConfigDiff,
+    MatchAny,
+    Modifier,
+    OptimizersConfigDiff,
+    OptimizersStatusOneOf,
+    PointStruct,
+    Prefetch,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    SetPayload,
+    SetPayloadOperation,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams
+)
 from config import config
+from models.sparse_embeddings import create_sparse_embeddings
+from vector_store.filters import PAYLOAD_INDEXES, metadata_key
+from vector_store.mmr import maximal_marginal_relevance
+
+# LangChainのQdrantVectorStoreと互換のペイロードキー
+CONTENT_PAYLOAD_KEY = LangChainQdrantVectorStore.CONTENT_KEY
+METADATA_PAYLOAD_KEY = LangChainQdrantVectorStore.METADATA_KEY
+
+# 重複除去で1つにまとめたチャンクの取得元ファイル一覧（metadata内のキー）
+SOURCE_FILES_KEY = "source_files"
+
+# 密ベクトルと並べて保存する疎ベクトル（文字n-gramのBM25）の名前
+SPARSE_VECTOR_NAME = "text-sparse"
+
+# 検索方法（密ベクトル・疎ベクトル・両者の順位をRRFで統合）
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+
+# コレクション作成時に指定できる量子化の種類
+QUANTIZATION_TYPES = ("none", "scalar", "binary")
+
+# Qdrantのindexing_thresholdの既定値（KB）
+DEFAULT_INDEXING_THRESHOLD_KB = 20000
+
+# 再構築で作成するバージョン付きコレクション名の区切り（<エイリアス名>__v<作成日時>）
+VERSION_SEPARATOR = "__v"
+
+# エイリアスへの移行で同名のコレクションを削除した後、エイリアスの作成を試みる回数
+ALIAS_SWITCH_RETRIES = 3
+
+# ポイントIDを決定的に生成するための名前空間
+POINT_ID_NAMESPACE = uuid.UUID("6f1c2b8e-4d3a-5e7f-9a0b-1c2d3e4f5a6b")
+
+# コレクションごとの内容バージョン（回答キャッシュの無効化に使う）を記録するコレクション
+CONTENT_VERSION_COLLECTION = "local_rag_content_versions"
+
+
+def generate_point_id(document: Document) -> str:
+    """
+    ドキュメントから決定的なポイントIDを生成
+
+    ソース（file_pathまたはsource）、チャンク番号、本文のハッシュから
+    UUIDv5を生成する。同じチャンクを再度保存すると既存のポイントが上書きされるため、
+    取り込みの再実行やバッチのリトライで重複が発生しない。
+
+    Args:
+        document: Documentオブジェクト
+
+    Returns:
+        UUID文字列
+    """
+    metadata = document.metadata
+    source = metadata.get("file_path") or metadata.get("source") or ""
+    chunk_index = metadata.get("chunk_index", "")
+    content_hash = hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}\n{chunk_index}\n{content_hash}"))
 
 
 class QdrantVectorStoreManager:
@@ -27,16 +119,41 @@ class QdrantVectorStoreManager:
             embeddings: 埋め込みモデルインスタンス
         """
         self.collection_name = collection_name or config.qdrant.collection_name
+        self.alias: Optional[str] = None  # 再構築中は切り替え先のエイリアス名
         self.url = config.qdrant.url
+        self.grpc_port = config.qdrant.grpc_port
+        self.prefer_grpc = config.qdrant.prefer_grpc
+        self.path = config.qdrant.path  # 設定した場合はサーバーに接続せずプロセス内で動かす
         self.embeddings = embeddings
+        self.sparse_embeddings = create_sparse_embeddings()
         self._client: Optional[QdrantClientBase] = None
         self._vector_store: Optional[LangChainQdrantVectorStore] = None
+        self._bulk_load_threshold: Optional[int] = None
+        self._sparse_collections: Dict[str, bool] = {}  # コレクション名ごとの疎ベクトルの有無
+        # (collection_name, エイリアスを解決したコレクション名)。_target_collection()で使用
+        self._alias_target: Optional[Tuple[str, str]] = None
+        # wait=Falseで送った未反映の書き込みの管理（upsert_embedded・write_barrierで使用）
+        self.async_writes = config.qdrant.async_writes
+        self.max_outstanding_writes = config.qdrant.max_outstanding_writes
+        self._outstanding_writes = 0
+        self._last_points: List[PointStruct] = []
         self.vector_size = 768  # nomic-embed-textの次元数
+        self.hnsw_ef = config.qdrant.hnsw_ef
+        self.quantization = config.qdrant.quantization
+        self.oversampling = config.qdrant.oversampling
+        self.rescore = config.qdrant.rescore
 
     def initialize(self) -> QdrantClientBase:
         """
         Qdrantクライアントを初期化
 
+        prefer_grpcが有効な場合は、ポイントの保存・検索などをgRPC（grpc_port）で送信する。
+        ベクトルをJSONではなくProtocol Buffersで送るため、シリアライズの負荷と転送量が小さい。
+
+        pathを設定した場合は、Qdrantサーバーに接続せずプロセス内のローカルモードで動かす
+        （":memory:"はメモリ上のみ、それ以外はディレクトリに保存）。
+        ディレクトリは同時に1プロセスからしか開けない。
+
         Returns:
             QdrantClientインスタンス
 
@@ -44,35 +161,80 @@ class QdrantVectorStoreManager:
             Exception: 初期化に失敗した場合
         """
         try:
-            self._client = QdrantClientBase(
-                url=self.url,
-                timeout=60
-            )
+            if self.path == ":memory:":
+                self._client = QdrantClientBase(location=":memory:")
+            elif self.path:
+                self._client = QdrantClientBase(path=self.path)
+            else:
+                self._client = QdrantClientBase(
+                    url=self.url,
+                    grpc_port=self.grpc_port,
+                    prefer_grpc=self.prefer_grpc,
+                    timeout=60
+                )
             return self._client
         except Exception as e:
             raise Exception(f"Qdrantクライアントの初期化に失敗しました: {str(e)}")
 
-    def create_collection(self, force: bool = False) -> bool:
+    def create_collection(
+        self,
+        force: bool = False,
+        hnsw_m: Optional[int] = None,
+        hnsw_ef_construct: Optional[int] = None,
+        on_disk_vectors: Optional[bool] = None,
+        on_disk_payload: Optional[bool] = None,
+        default_segment_number: Optional[int] = None,
+        quantization: Optional[str] = None
+    ) -> bool:
         """
         コレクションを作成
 
+        絞り込み検索に使うメタデータのペイロードインデックスも作成する（既存のコレクションには不足分を追加する）。
+        HNSWインデックス、ディスク配置、セグメント構成、量子化は作成時にのみ反映される。
+        既存のコレクションに適用するにはforce=Trueで再作成する。
+        量子化を有効にした場合、on_disk_vectorsを指定しなければ元のベクトルをディスクに置き、
+        量子化したベクトルだけをRAMに保持する。
+        config.sparse.enabledが有効な場合は、密ベクトルと並べて疎ベクトル（SPARSE_VECTOR_NAME）を保存する。
+        疎ベクトルのIDFはQdrantがコレクション全体から計算する（modifier=IDF）。
+
         Args:
             force: Trueの場合、既存コレクションを削除して再作成
+            hnsw_m: HNSWグラフの各ノードのエッジ数（Noneの場合は設定から取得）
+            hnsw_ef_construct: インデックス構築時の探索幅（Noneの場合は設定から取得）
+            on_disk_vectors: ベクトルをディスク（mmap）に置くか（Noneの場合は設定から取得）
+            on_disk_payload: ペイロードをディスクに置くか（Noneの場合は設定から取得）
+            default_segment_number: セグメント数の目安、0は自動（Noneの場合は設定から取得）
+            quantization: "none"・"scalar"（int8）・"binary"のいずれか（Noneの場合は設定から取得）
 
         Returns:
             作成成功の場合True
 
         Raises:
-            ValueError: クライアントが初期化されていない場合
+            ValueError: クライアントが初期化されていない場合、または量子化の種類が不正な場合
             Exception: コレクション作成に失敗した場合
         """
         if self._client is None:
             raise ValueError("Qdrantクライアントが初期化されていません。initialize()を先に呼び出してください。")
 
+        alias_target = self.get_alias_target()
+        self._alias_target = (self.collection_name, alias_target or self.collection_name)
+        if force and alias_target is not None:
+            raise ValueError(
+                f"'{self.collection_name}' はエイリアスのため削除して再作成できません。"
+                "begin_reindex()で新しいバージョンを構築してください。"
+            )
+
+        quantization = quantization or self.quantization
+        quantization_config = self._quantization_config(quantization)
+        if on_disk_vectors is None:
+            on_disk_vectors = config.qdrant.on_disk_vectors or quantization_config is not None
+
         try:
             # 既存コレクションの確認
             collections = self._client.get_collections().collections
-            collection_exists = any(c.name == self.collection_name for c in collections)
+            collection_exists = alias_target is not None or any(
+                c.name == self.collection_name for c in collections
+            )
 
             if collection_exists:
                 if force:
@@ -80,22 +242,98 @@ class QdrantVectorStoreManager:
                     self._client.delete_collection(self.collection_name)
                 else:
                     print(f"コレクション '{self.collection_name}' は既に存在します。")
+                    self.create_payload_indexes()
                     return True
 
             # コレクションを作成
+            qdrant_config = config.qdrant
+            segment_number = (
+                qdrant_config.default_segment_number
+                if default_segment_number is None else default_segment_number
+            )
             self._client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=VectorParams(
                     size=self.vector_size,
-                    distance=Distance.COSINE
+                    distance=Distance.COSINE,
+                    on_disk=on_disk_vectors
+                ),
+                hnsw_config=HnswConfigDiff(
+                    m=qdrant_config.hnsw_m if hnsw_m is None else hnsw_m,
+                    ef_construct=hnsw_ef_construct or qdrant_config.hnsw_ef_construct,
+                    on_disk=qdrant_config.hnsw_on_disk
+                ),
+                optimizers_config=OptimizersConfigDiff(
+                    default_segment_number=segment_number or None,
+                    max_segment_size=qdrant_config.max_segment_size_kb,
+                    memmap_threshold=qdrant_config.memmap_threshold_kb,
+                    indexing_threshold=qdrant_config.indexing_threshold_kb
+                ),
+                on_disk_payload=qdrant_config.on_disk_payload if on_disk_payload is None else on_disk_payload,
+                quantization_config=quantization_config,
+                sparse_vectors_config=(
+                    {SPARSE_VECTOR_NAME: SparseVectorParams(modifier=Modifier.IDF)}
+                    if config.sparse.enabled else None
                 )
             )
+            self.quantization = quantization
+            self._sparse_collections.pop(self.collection_name, None)
+            self.create_payload_indexes()
             print(f"コレクション '{self.collection_name}' を作成しました。")
             return True
 
         except Exception as e:
             raise Exception(f"コレクションの作成に失敗しました: {str(e)}")
 
+    def create_payload_indexes(self) -> bool:
+        """
+        絞り込み検索に使うメタデータのペイロードインデックスを作成
+
+        既に存在するインデックスはそのまま残る。ローカルモードではインデックスは作成されない。
+
+        Returns:
+            作成成功の場合True
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: インデックス作成に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            collection_name = self._target_collection()
+            for field, schema in PAYLOAD_INDEXES.items():
+                self._client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=metadata_key(field),
+                    field_schema=schema,
+                    wait=True
+                )
+            return True
+        except Exception as e:
+            raise Exception(f"ペイロードインデックスの作成に失敗しました: {str(e)}")
+
+    def _quantization_config(self, quantization: str):
+        """量子化の種類からコレクション作成用の設定を作成（"none"の場合はNone）"""
+        if quantization not in QUANTIZATION_TYPES:
+            raise ValueError(
+                f"量子化の種類が不正です: {quantization}（{', '.join(QUANTIZATION_TYPES)}のいずれか）"
+            )
+
+        always_ram = config.qdrant.quantization_always_ram
+        if quantization == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=config.qdrant.quantization_quantile,
+                    always_ram=always_ram
+                )
+            )
+        if quantization == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=always_ram))
+        return None
+
     def get_vector_store(self) -> LangChainQdrantVectorStore:
         """
         LangChain用のQdrantVectorStoreインスタンスを取得
@@ -121,12 +359,21 @@ class QdrantVectorStoreManager:
 
         return self._vector_store
 
-    def add_documents(self, documents: List[Document]) -> List[str]:
+    def add_documents(
+        self,
+        documents: List[Document],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
         """
         ドキュメントをベクターストアに追加
 
+        IDを指定しない場合はgenerate_point_idで決定的に生成するため、
+        同じドキュメントを繰り返し追加しても既存のポイントが上書きされる。
+        コレクションが疎ベクトルを持つ場合は、疎ベクトルも一緒に保存する。
+
         Args:
             documents: 追加するドキュメントのリスト
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
 
         Returns:
             追加されたドキュメントのIDリスト
@@ -136,16 +383,246 @@ class QdrantVectorStoreManager:
         """
         try:
             vector_store = self.get_vector_store()
-            ids = vector_store.add_documents(documents)
+            if ids is None:
+                ids = [generate_point_id(doc) for doc in documents]
+            if self.has_sparse_vectors():
+                vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+                ids = self.upsert_embedded(documents, vectors, ids=ids, wait=True)
+            else:
+                ids = vector_store.add_documents(documents, ids=ids)
             print(f"{len(documents)}件のドキュメントを追加しました。")
             return ids
         except Exception as e:
             raise Exception(f"ドキュメントの追加に失敗しました: {str(e)}")
 
+    def upsert_embedded(
+        self,
+        documents: List[Document],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None,
+        wait: Optional[bool] = None
+    ) -> List[str]:
+        """
+        埋め込み済みのドキュメントをベクターストアに保存
+
+        埋め込みと保存を別々のステージで実行するためのメソッド。
+        ペイロードはLangChainのQdrantVectorStoreと同じ形式で保存するため、
+        similarity_searchなどの検索系メソッドからそのまま取得できる。
+
+        async_writesが有効な場合はwait=Falseで送信し、QdrantがWALに記録した時点で次に進む。
+        未反映の書き込みがmax_outstanding_writes件に達するごとにwait=Trueで送信して
+        それまでの書き込みの反映を待つ（Qdrantは書き込みを順に反映するため）。
+        すべての書き込みの反映はwrite_barrier()で確認する。
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            vectors: 各ドキュメントの埋め込みベクトル
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
+            wait: Qdrantでの反映完了を待つか（Noneの場合はasync_writesに従う）
+
+        Returns:
+            保存したポイントのIDリスト
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合、または件数が一致しない場合
+            Exception: 保存に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        if len(documents) != len(vectors):
+            raise ValueError("ドキュメント数とベクトル数が一致しません")
+
+        if ids is None:
+            ids = [generate_point_id(doc) for doc in documents]
+
+        if wait is None:
+            wait = not self.async_writes or self._outstanding_writes + 1 >= self.max_outstanding_writes
+
+        try:
+            points = list(self._iter_points(documents, vectors, ids))
+            self._client.upsert(
+                collection_name=self.collection_name,
+                points=points,
+                wait=wait
+            )
+            self._outstanding_writes = 0 if wait else self._outstanding_writes + 1
+            self._last_points = points
+            return ids
+        except Exception as e:
+            raise Exception(f"ドキュメントの保存に失敗しました: {str(e)}")
+
+    def _flush_writes(self) -> None:
+        """wait=Falseで送った書き込みがすべて反映されるまで待つ"""
+        if self._outstanding_writes == 0:
+            return
+        # 最後のバッチを同じIDで送り直す（内容は同じため結果は変わらない）
+        self._client.upsert(
+            collection_name=self.collection_name,
+            points=self._last_points,
+            wait=True
+        )
+        self._outstanding_writes = 0
+
+    def write_barrier(self) -> int:
+        """
+        これまでの書き込みがすべて反映されたことを確認
+
+        未反映の書き込みの完了を待ってから、コレクションのステータスと、最後に保存したバッチの
+        ポイントがすべて存在することを確認する。Qdrantは書き込みを順に反映するため、
+        最後のバッチが存在すればそれまでの書き込みも反映されている（リトライや同じチャンクで
+        同じIDを保存し直した場合も、保存回数ではなくIDで確認するため誤検知しない）。
+
+        Returns:
+            コレクションのポイント数
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 確認に失敗した場合、またはポイントが不足している場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            self._flush_writes()
+            collection_name = self._target_collection()
+            info = self._client.get_collection(collection_name)
+            if info.status == CollectionStatus.RED:
+                raise Exception(f"コレクションのステータスが異常です: {info.status}")
+            last_ids = list({str(point.id) for point in self._last_points})
+            found = self._client.retrieve(
+                collection_name=collection_name,
+                ids=last_ids,
+                with_payload=False,
+                with_vectors=False
+            ) if last_ids else []
+            count = self._client.count(collection_name=collection_name, exact=True).count
+        except Exception as e:
+            raise Exception(f"書き込みの反映の確認に失敗しました: {str(e)}")
+
+        if len(found) < len(last_ids):
+            raise Exception(
+                f"書き込みの反映の確認に失敗しました: 最後に保存したポイントが見つかりません"
+                f"（保存 {len(last_ids)}件 / 存在 {len(found)}件）"
+            )
+        return count
+
+    def _iter_points(
+        self,
+        documents: Iterable[Document],
+        vectors: Iterable[List[float]],
+        ids: Iterable[str]
+    ) -> Iterator[PointStruct]:
+        """
+        ドキュメントとベクトルからLangChain互換のペイロードを持つポイントを逐次生成
+
+        コレクションが疎ベクトルを持つ場合は、本文から作成した疎ベクトルを名前付きベクトルとして加える。
+        """
+        sparse = self.has_sparse_vectors()
+        for point_id, doc, vector in zip(ids, documents, vectors):
+            if sparse:
+                vector = {"": vector, SPARSE_VECTOR_NAME: self._embed_sparse(doc.page_content, query=False)}
+            yield PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={
+                    CONTENT_PAYLOAD_KEY: doc.page_content,
+                    METADATA_PAYLOAD_KEY: doc.metadata
+                }
+            )
+
+    def upload_embedded(
+        self,
+        documents: List[Document],
+        vectors: Iterable[List[float]],
+        ids: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None
+    ) -> List[str]:
+        """
+        埋め込み済みのドキュメントをqdrant-clientの一括アップロードで保存
+
+        LangChainのadd_documentsを経由せず、upload_pointsでbatch_size件ずつ送信する。
+        parallelが2以上の場合はqdrant-clientのワーカープロセスで並列に送信する
+        （ローカルモードでは並列化されない）。ポイントは逐次生成するため、
+        vectorsにジェネレータを渡せば全件のベクトルを保持せずに送信できる。
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            vectors: 各ドキュメントの埋め込みベクトル（イテラブル）
+            ids: ポイントIDのリスト（Noneの場合はドキュメントから生成）
+            batch_size: 1リクエストで送るポイント数（Noneの場合は設定から取得）
+            parallel: 並列ワーカー数（Noneの場合は設定から取得）
+
+        Returns:
+            保存したポイントのIDリスト
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 保存に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        if ids is None:
+            ids = [generate_point_id(doc) for doc in documents]
+
+        try:
+            self._client.upload_points(
+                collection_name=self.collection_name,
+                points=self._iter_points(documents, vectors, ids),
+                batch_size=batch_size or config.qdrant.upload_batch_size,
+                parallel=parallel or config.qdrant.upload_parallel,
+                max_retries=3,
+                wait=True
+            )
+            return ids
+        except Exception as e:
+            raise Exception(f"ドキュメントの一括保存に失敗しました: {str(e)}")
+
+    def bulk_add_documents(
+        self,
+        documents: List[Document],
+        embed_batch_size: int = 64,
+        parallel: Optional[int] = None
+    ) -> List[str]:
+        """
+        ドキュメントを埋め込みながら一括アップロードで保存
+
+        ベクトルはアップロード側が要求した分だけembed_batch_size件ずつ埋め込むため、
+        parallelが2以上の場合は埋め込み（メインプロセス）と送信（ワーカープロセス）が重なる。
+
+        Args:
+            documents: 保存するドキュメントのリスト
+            embed_batch_size: 1回の埋め込みリクエストで送るテキスト数
+            parallel: 並列ワーカー数（Noneの場合は設定から取得）
+
+        Returns:
+            保存したポイントのIDリスト
+
+        Raises:
+            ValueError: 埋め込みモデルが設定されていない場合
+            Exception: 保存に失敗した場合
+        """
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        def iter_vectors() -> Iterator[List[float]]:
+            for i in range(0, len(documents), embed_batch_size):
+                texts = [doc.page_content for doc in documents[i:i + embed_batch_size]]
+                yield from self.embeddings.embed_documents(texts)
+
+        return self.upload_embedded(documents, iter_vectors(), parallel=parallel)
+
     def similarity_search(
         self,
         query: str,
-        k: Optional[int] = None
+        k: Optional[int] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
     ) -> List[Document]:
         """
         類似度検索を実行
@@ -153,22 +630,40 @@ class QdrantVectorStoreManager:
         Args:
             query: 検索クエリ
             k: 取得する件数（Noneの場合は設定から取得）
+            hnsw_ef: 検索時のHNSW探索幅。大きいほど再現率が上がり遅くなる
+                （Noneの場合はself.hnsw_ef、それもNoneならQdrantの既定値）
+            oversampling: 量子化ベクトルでk×oversampling件の候補を取得する倍率
+                （Noneの場合はself.oversampling）
+            rescore: 候補を元のベクトルで再スコアリングするか（Noneの場合はself.rescore）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"sparse"・"hybrid"のいずれか（Noneの場合は設定から取得）
 
         Returns:
             類似ドキュメントのリスト
 
         Raises:
-            ValueError: クエリが空の場合
+            ValueError: クエリが空の場合、または検索方法が不正な場合
             Exception: 検索に失敗した場合
         """
         if not query or query.strip() == "":
             raise ValueError("検索クエリが空です")
 
         k = k or config.rag.top_k
+        retrieval_mode = self._retrieval_mode(retrieval_mode)
 
         try:
+            if retrieval_mode != "dense":
+                points = self._query_points(
+                    query, k, filter, self._search_params(hnsw_ef, oversampling, rescore), retrieval_mode
+                )
+                return [doc for doc, _ in self._point_documents(points)]
             vector_store = self.get_vector_store()
-            results = vector_store.similarity_search(query, k=k)
+            results = vector_store.similarity_search(
+                query,
+                k=k,
+                filter=filter,
+                search_params=self._search_params(hnsw_ef, oversampling, rescore)
+            )
             return results
         except Exception as e:
             raise Exception(f"類似度検索に失敗しました: {str(e)}")
@@ -176,7 +671,12 @@ class QdrantVectorStoreManager:
     def similarity_search_with_score(
         self,
         query: str,
-        k: Optional[int] = None
+        k: Optional[int] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
     ) -> List[tuple[Document, float]]:
         """
         スコア付きで類似度検索を実行
@@ -184,26 +684,450 @@ class QdrantVectorStoreManager:
         Args:
             query: 検索クエリ
             k: 取得する件数（Noneの場合は設定から取得）
+            hnsw_ef: 検索時のHNSW探索幅。大きいほど再現率が上がり遅くなる
+                （Noneの場合はself.hnsw_ef、それもNoneならQdrantの既定値）
+            oversampling: 量子化ベクトルでk×oversampling件の候補を取得する倍率
+                （Noneの場合はself.oversampling）
+            rescore: 候補を元のベクトルで再スコアリングするか（Noneの場合はself.rescore）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"sparse"・"hybrid"のいずれか（Noneの場合は設定から取得）
 
         Returns:
-            (ドキュメント, スコア)のタプルのリスト
+            (ドキュメント, スコア)のタプルのリスト。
+            hybridの場合のスコアはRRFの値（順位のみに基づくため、コサイン類似度とは尺度が異なる）
 
         Raises:
-            ValueError: クエリが空の場合
+            ValueError: クエリが空の場合、または検索方法が不正な場合
             Exception: 検索に失敗した場合
         """
         if not query or query.strip() == "":
             raise ValueError("検索クエリが空です")
 
         k = k or config.rag.top_k
+        retrieval_mode = self._retrieval_mode(retrieval_mode)
 
         try:
+            if retrieval_mode != "dense":
+                points = self._query_points(
+                    query, k, filter, self._search_params(hnsw_ef, oversampling, rescore), retrieval_mode
+                )
+                return self._point_documents(points)
             vector_store = self.get_vector_store()
-            results = vector_store.similarity_search_with_score(query, k=k)
+            results = vector_store.similarity_search_with_score(
+                query,
+                k=k,
+                filter=filter,
+                search_params=self._search_params(hnsw_ef, oversampling, rescore)
+            )
             return results
         except Exception as e:
             raise Exception(f"類似度検索に失敗しました: {str(e)}")
 
+    def max_marginal_relevance_search_with_score(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        filter: Optional[Filter] = None,
+        retrieval_mode: Optional[str] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        MMRで多様性を考慮した上位k件をスコア付きで取得
+
+        retrieval_modeの検索でfetch_k件の候補を密ベクトル付きで取得し、maximal_marginal_relevanceでk件を選ぶ。
+        重なりのある隣接チャンクのような、互いに似た候補が上位を占めるのを避けるために使う。
+        関連度は候補の密ベクトルとクエリのコサイン類似度で計算するため、疎ベクトルのみ（sparse）では使えない。
+
+        Args:
+            query: 検索クエリ
+            k: 取得する件数（Noneの場合は設定から取得）
+            fetch_k: MMRの候補数（Noneの場合は設定から取得）
+            lambda_mult: 1に近いほど関連度、0に近いほど多様性を重視（Noneの場合は設定から取得）
+            hnsw_ef: 検索時のHNSW探索幅（Noneの場合はself.hnsw_ef）
+            oversampling: 量子化ベクトルで候補を取得する倍率（Noneの場合はself.oversampling）
+            rescore: 候補を元のベクトルで再スコアリングするか（Noneの場合はself.rescore）
+            filter: メタデータによる絞り込み条件（create_metadata_filterで作成）
+            retrieval_mode: "dense"・"hybrid"のいずれか（Noneの場合は設定から取得）
+
+        Returns:
+            (ドキュメント, スコア)のタプルのリスト（選んだ順、スコアは候補の検索時のもの）
+
+        Raises:
+            ValueError: クエリが空の場合、埋め込みモデルが設定されていない場合、または検索方法がsparseの場合
+            Exception: 検索に失敗した場合
+        """
+        if not query or query.strip() == "":
+            raise ValueError("検索クエリが空です")
+
+        if self.embeddings is None:
+            raise ValueError("埋め込みモデルが設定されていません。")
+
+        k = k or config.rag.top_k
+        retrieval_mode = self._retrieval_mode(retrieval_mode)
+        if retrieval_mode == "sparse":
+            raise ValueError("MMRは密ベクトルで候補どうしの類似度を計算するため、sparse検索では使えません。")
+
+        try:
+            query_vector = self.embeddings.embed_query(query)
+            points = self._query_points(
+                query,
+                max(fetch_k or config.rag.mmr_fetch_k, k),
+                filter,
+                self._search_params(hnsw_ef, oversampling, rescore),
+                retrieval_mode,
+                query_vector=query_vector,
+                with_vectors=True
+            )
+            vectors = [
+                point.vector[""] if isinstance(point.vector, dict) else point.vector
+                for point in points
+            ]
+            selected = maximal_marginal_relevance(query_vector, vectors, k, lambda_mult)
+            return self._point_documents([points[i] for i in selected])
+        except Exception as e:
+            raise Exception(f"MMR検索に失敗しました: {str(e)}")
+
+    def has_sparse_vectors(self) -> bool:
+        """
+        コレクションが疎ベクトル（SPARSE_VECTOR_NAME）を持つか
+
+        結果はコレクション名ごとにキャッシュする（create_collection・delete_collectionで破棄）。
+        エイリアスの参照先も_target_collection()でキャッシュするため、2回目以降はサーバーに問い合わせない。
+        コレクションが存在しない場合はFalseを返す。
+
+        Returns:
+            疎ベクトルを持つ場合True
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        collection_name = self._target_collection()
+        if collection_name not in self._sparse_collections:
+            try:
+                sparse_vectors = self._client.get_collection(collection_name).config.params.sparse_vectors
+            except Exception:
+                return False
+            self._sparse_collections[collection_name] = SPARSE_VECTOR_NAME in (sparse_vectors or {})
+        return self._sparse_collections[collection_name]
+
+    def _embed_sparse(self, text: str, query: bool) -> SparseVector:
+        """テキストを疎ベクトルに変換（LangChainのSparseVectorをqdrant-clientの型に詰め替える）"""
+        if query:
+            vector = self.sparse_embeddings.embed_query(text)
+        else:
+            vector = self.sparse_embeddings.embed_documents([text])[0]
+        return SparseVector(indices=vector.indices, values=vector.values)
+
+    def _retrieval_mode(self, retrieval_mode: Optional[str]) -> str:
+        """
+        実際に使う検索方法を決定
+
+        疎ベクトルを持たないコレクション（この機能より前に作成したもの）では、
+        hybridは密ベクトルのみの検索になる。sparseはエラーになる。
+        """
+        retrieval_mode = retrieval_mode or config.rag.retrieval_mode
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"検索方法が不正です: {retrieval_mode}（{', '.join(RETRIEVAL_MODES)}のいずれか）")
+        if retrieval_mode == "dense" or self.has_sparse_vectors():
+            return retrieval_mode
+        if retrieval_mode == "sparse":
+            raise ValueError(
+                f"コレクション '{self.collection_name}' は疎ベクトルを持たないためsparse検索できません。"
+                "SPARSE_ENABLED=trueでコレクションを作成し直してください。"
+            )
+        return "dense"
+
+    def _query_points(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Filter],
+        search_params: Optional[SearchParams],
+        retrieval_mode: str,
+        query_vector: Optional[List[float]] = None,
+        with_vectors: bool = False
+    ) -> List[ScoredPoint]:
+        """
+        検索方法に応じてquery_pointsで検索
+
+        hybridの場合は、密ベクトル・疎ベクトルでそれぞれk×hybrid_prefetch件の候補を取得し、
+        Qdrant側で順位をReciprocal Rank Fusion（RRF）で統合して上位k件を返す。
+        sparseの場合は埋め込みモデルを使わないため、Ollamaが停止していても検索できる。
+        with_vectorsがTrueの場合は、各ポイントの密ベクトルも取得する（MMRで使用）。
+        """
+        if retrieval_mode != "sparse":
+            if query_vector is None:
+                if self.embeddings is None:
+                    raise ValueError("埋め込みモデルが設定されていません。")
+                query_vector = self.embeddings.embed_query(query)
+        dense_name = "" if self.has_sparse_vectors() else None
+        vectors = ([""] if dense_name is not None else True) if with_vectors else False
+
+        if retrieval_mode == "dense":
+            response = self._client.query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                using=dense_name,
+                query_filter=filter,
+                search_params=search_params,
+                limit=k,
+                with_payload=True,
+                with_vectors=vectors
+            )
+        elif retrieval_mode == "sparse":
+            response = self._client.query_points(
+                collection_name=self.collection_name,
+                query=self._embed_sparse(query, query=True),
+                using=SPARSE_VECTOR_NAME,
+                query_filter=filter,
+                limit=k,
+                with_payload=True,
+                with_vectors=vectors
+            )
+        else:
+            prefetch_limit = k * config.rag.hybrid_prefetch
+            response = self._client.query_points(
+                collection_name=self.collection_name,
+                prefetch=[
+                    Prefetch(
+                        query=query_vector,
+                        using=dense_name,
+                        filter=filter,
+                        params=search_params,
+                        limit=prefetch_limit
+                    ),
+                    Prefetch(
+                        query=self._embed_sparse(query, query=True),
+                        using=SPARSE_VECTOR_NAME,
+                        filter=filter,
+                        limit=prefetch_limit
+                    )
+                ],
+                query=FusionQuery(fusion=Fusion.RRF),
+                limit=k,
+                with_payload=True,
+                with_vectors=vectors
+            )
+        return response.points
+
+    def _point_documents(self, points: Iterable[ScoredPoint]) -> List[tuple[Document, float]]:
+        """検索結果のポイントをLangChainと同じ形式の(ドキュメント, スコア)のタプルのリストに変換"""
+        return [
+            (
+                LangChainQdrantVectorStore._document_from_point(
+                    point, self.collection_name, CONTENT_PAYLOAD_KEY, METADATA_PAYLOAD_KEY
+                ),
+                point.score
+            )
+            for point in points
+        ]
+
+    def _search_params(
+        self,
+        hnsw_ef: Optional[int] = None,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None
+    ) -> Optional[SearchParams]:
+        """
+        検索リクエストに付与するSearchParamsを作成（指定がなければNone）
+
+        量子化パラメータは、量子化したコレクションを検索する場合か
+        oversampling・rescoreを明示した場合にだけ付与する。
+        """
+        hnsw_ef = hnsw_ef or self.hnsw_ef
+        quantization = None
+        if self.quantization != "none" or oversampling is not None or rescore is not None:
+            quantization = QuantizationSearchParams(
+                rescore=self.rescore if rescore is None else rescore,
+                oversampling=oversampling or self.oversampling
+            )
+
+        if hnsw_ef is None and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+    def delete_by_file_paths(self, file_paths: List[str], batch_size: int = 100) -> bool:
+        """
+        指定したファイルから作成されたポイントを削除
+
+        ドキュメントローダーが付与するmetadata.file_pathで絞り込んで削除する。
+
+        Args:
+            file_paths: 削除対象のファイルパスのリスト
+            batch_size: 1回の削除リクエストで指定するパス数
+
+        Returns:
+            削除成功の場合True
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 削除に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            for i in range(0, len(file_paths), batch_size):
+                batch = file_paths[i:i + batch_size]
+                self._client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=FilterSelector(
+                        filter=Filter(
+                            must=[
+                                FieldCondition(
+                                    key=metadata_key("file_path"),
+                                    match=MatchAny(any=batch)
+                                )
+                            ]
+                        )
+                    )
+                )
+            return True
+        except Exception as e:
+            raise Exception(f"ポイントの削除に失敗しました: {str(e)}")
+
+    def set_source_files(self, source_files: Dict[str, List[str]]) -> bool:
+        """
+        ポイントのmetadata.source_filesを更新
+
+        重複除去で1つにまとめたチャンクの代表ポイントに、取得元ファイルの一覧を記録する。
+        ネストしたキーの部分更新はローカルモードで使えないため、
+        現在のmetadataを取得してsource_filesを差し替えたものを書き戻す。
+
+        Args:
+            source_files: ポイントIDから取得元ファイルパスのリストへの辞書
+
+        Returns:
+            更新成功の場合True
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 更新に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        if not source_files:
+            return True
+
+        try:
+            # 代表ポイントの書き込みが未反映だとmetadataを取得できないため、先に反映を待つ
+            self._flush_writes()
+            records = self._client.retrieve(
+                collection_name=self.collection_name,
+                ids=list(source_files),
+                with_payload=[METADATA_PAYLOAD_KEY],
+                with_vectors=False
+            )
+            operations = []
+            for record in records:
+                metadata = dict((record.payload or {}).get(METADATA_PAYLOAD_KEY) or {})
+                metadata[SOURCE_FILES_KEY] = list(source_files[str(record.id)])
+                operations.append(SetPayloadOperation(
+                    set_payload=SetPayload(payload={METADATA_PAYLOAD_KEY: metadata}, points=[record.id])
+                ))
+            if operations:
+                self._client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=operations
+                )
+            return True
+        except Exception as e:
+            raise Exception(f"取得元ファイルの更新に失敗しました: {str(e)}")
+
+    def _scroll_source_files(self, file_paths: List[str], key: str) -> Iterator:
+        """指定したキーがfile_pathsのいずれかに一致するポイントを、metadataとともに列挙する"""
+        offset = None
+        while True:
+            records, offset = self._client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(
+                    must=[FieldCondition(key=key, match=MatchAny(any=file_paths))]
+                ),
+                limit=256,
+                offset=offset,
+                with_payload=[METADATA_PAYLOAD_KEY],
+                with_vectors=False
+            )
+            for record in records:
+                yield record.id, (record.payload or {}).get(METADATA_PAYLOAD_KEY) or {}
+            if offset is None:
+                break
+
+    def find_dependent_files(self, file_paths: List[str]) -> Set[str]:
+        """
+        指定したファイルのポイントに重複としてまとめられている他のファイルを取得
+
+        それらのファイルのチャンクは指定したファイルのポイントにしか存在しないため、
+        指定したファイルのポイントを削除する場合は再取り込みが必要になる。
+
+        Args:
+            file_paths: ファイルパスのリスト
+
+        Returns:
+            指定したファイル以外の取得元ファイルパスの集合
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 取得に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        if not file_paths:
+            return set()
+
+        try:
+            dependents = set()
+            for _, metadata in self._scroll_source_files(file_paths, f"{METADATA_PAYLOAD_KEY}.file_path"):
+                dependents.update(metadata.get(SOURCE_FILES_KEY) or [])
+            return dependents - set(file_paths)
+        except Exception as e:
+            raise Exception(f"取得元ファイルの検索に失敗しました: {str(e)}")
+
+    def remove_source_files(self, file_paths: List[str]) -> int:
+        """
+        他のファイルのポイントのmetadata.source_filesから指定したファイルを取り除く
+
+        Args:
+            file_paths: 取り除くファイルパスのリスト
+
+        Returns:
+            更新したポイント数
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 更新に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        if not file_paths:
+            return 0
+
+        removed = set(file_paths)
+        try:
+            updates = {}
+            for point_id, metadata in self._scroll_source_files(
+                file_paths, f"{METADATA_PAYLOAD_KEY}.{SOURCE_FILES_KEY}"
+            ):
+                if metadata.get("file_path") in removed:
+                    continue
+                updates[str(point_id)] = [
+                    f for f in metadata.get(SOURCE_FILES_KEY) or [] if f not in removed
+                ]
+            self.set_source_files(updates)
+            return len(updates)
+        except Exception as e:
+            raise Exception(f"取得元ファイルの更新に失敗しました: {str(e)}")
+
     def delete_collection(self) -> bool:
         """
         コレクションを削除
@@ -220,11 +1144,462 @@ class QdrantVectorStoreManager:
 
         try:
             self._client.delete_collection(self.collection_name)
+            self._sparse_collections.pop(self.collection_name, None)
+            self._alias_target = None
             print(f"コレクション '{self.collection_name}' を削除しました。")
             return True
         except Exception as e:
             raise Exception(f"コレクションの削除に失敗しました: {str(e)}")
 
+    def begin_bulk_load(self) -> int:
+        """
+        一括取り込みモードを開始（HNSWインデックスの作成を止める）
+
+        indexing_thresholdを0にして、取り込み中にオプティマイザがHNSWセグメントを
+        作り直さないようにする。取り込み後はend_bulk_load()で元に戻す。
+
+        Returns:
+            end_bulk_load()で戻すindexing_threshold（KB）
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 設定の変更に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            collection_name = self._target_collection()
+            info = self._client.get_collection(collection_name)
+            threshold = info.config.optimizer_config.indexing_threshold
+            # 前回の一括取り込みが中断して0のまま残っている場合は設定値に戻す
+            if not threshold:
+                threshold = config.qdrant.indexing_threshold_kb or DEFAULT_INDEXING_THRESHOLD_KB
+
+            self._client.update_collection(
+                collection_name=collection_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+            )
+            self._bulk_load_threshold = threshold
+            print(f"一括取り込みモード: HNSWインデックスの作成を停止しました（取り込み後に {threshold}KB に戻します）")
+            return threshold
+        except Exception as e:
+            raise Exception(f"一括取り込みモードの開始に失敗しました: {str(e)}")
+
+    def end_bulk_load(
+        self,
+        wait: bool = True,
+        timeout: Optional[float] = None,
+        poll_interval: float = 1.0
+    ) -> float:
+        """
+        一括取り込みモードを終了し、HNSWインデックスの作成完了を待つ
+
+        Args:
+            wait: インデックスの作成完了を待つか（取り込み失敗時の後始末ではFalse）
+            timeout: 待機する最大秒数（Noneの場合は無制限）
+            poll_interval: コレクション情報を確認する間隔（秒）
+
+        Returns:
+            インデックスの作成完了までにかかった秒数（wait=Falseの場合は0.0）
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            TimeoutError: timeout秒以内にインデックスの作成が完了しなかった場合
+            Exception: 設定の変更に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        threshold = (
+            self._bulk_load_threshold or config.qdrant.indexing_threshold_kb or DEFAULT_INDEXING_THRESHOLD_KB
+        )
+        try:
+            self._client.update_collection(
+                collection_name=self._target_collection(),
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold)
+            )
+            self._bulk_load_threshold = None
+        except Exception as e:
+            raise Exception(f"一括取り込みモードの終了に失敗しました: {str(e)}")
+
+        if not wait:
+            return 0.0
+        return self.wait_for_indexing(timeout=timeout, poll_interval=poll_interval)
+
+    def wait_for_indexing(self, timeout: Optional[float] = None, poll_interval: float = 1.0) -> float:
+        """
+        オプティマイザがインデックスの作成を終えるまで待つ
+
+        indexing_thresholdはセグメントごとに適用されるため、小さいセグメントはHNSWインデックスが作成されず、
+        indexed_vectors_countがポイント数に追いつかないことがある。そのため完了の判定には
+        ステータスがgreen（実行中の最適化なし）でオプティマイザにエラーがないことだけを使い、
+        indexed_vectors_countは進捗の表示にだけ使う。設定の変更直後に最適化が始まる前の
+        greenを完了と誤認しないよう、2回続けてgreenになった時点で完了とする。
+        ローカルモードはインデックスを作成しないため待機しない。
+
+        Args:
+            timeout: 待機する最大秒数（Noneの場合は無制限）
+            poll_interval: コレクション情報を確認する間隔（秒）
+
+        Returns:
+            待機した秒数
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            TimeoutError: timeout秒以内にインデックスの作成が完了しなかった場合
+            Exception: オプティマイザがエラーを報告した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        start = time.perf_counter()
+        if self.is_local:
+            return 0.0
+
+        collection_name = self._target_collection()
+        green_polls = 0
+        progress = None
+        while True:
+            info = self._client.get_collection(collection_name)
+            points = info.points_count or 0
+            indexed = info.indexed_vectors_count or 0
+            optimizer_status = getattr(info, "optimizer_status", OptimizersStatusOneOf.OK)
+            elapsed = time.perf_counter() - start
+
+            if optimizer_status != OptimizersStatusOneOf.OK:
+                raise Exception(f"インデックスの作成に失敗しました: {optimizer_status}")
+            if (indexed, points, info.status) != progress:
+                progress = (indexed, points, info.status)
+                print(f"  インデックス作成状況: {indexed}/{points}件（ステータス: {info.status}）")
+
+            green_polls = green_polls + 1 if info.status == CollectionStatus.GREEN else 0
+            if green_polls >= 2:
+                return elapsed
+            if timeout is not None and elapsed >= timeout:
+                raise TimeoutError(
+                    f"インデックスの作成が{timeout:.0f}秒以内に完了しませんでした"
+                    f"（{indexed}/{points}件、ステータス: {info.status}）"
+                )
+            time.sleep(poll_interval)
+
+    @property
+    def is_local(self) -> bool:
+        """ローカルモード（:memory:またはファイル）のQdrantに接続しているか"""
+        return isinstance(getattr(self._client, "_client", None), QdrantLocal)
+
+    @property
+    def pending_writes(self) -> int:
+        """書き出していない書き込みの件数（Qdrantは受け付けた書き込みをWALに記録するため常に0）"""
+        return 0
+
+    def get_alias_target(self, alias: Optional[str] = None) -> Optional[str]:
+        """
+        エイリアスが指しているコレクション名を取得
+
+        Args:
+            alias: エイリアス名（Noneの場合はself.collection_name）
+
+        Returns:
+            コレクション名（エイリアスが存在しない場合はNone）
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 取得に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        alias = alias or self.collection_name
+        try:
+            for description in self._client.get_aliases().aliases:
+                if description.alias_name == alias:
+                    return description.collection_name
+            return None
+        except Exception as e:
+            raise Exception(f"エイリアスの取得に失敗しました: {str(e)}")
+
+    def _target_collection(self) -> str:
+        """
+        書き込み・設定変更の対象となる実際のコレクション名
+
+        エイリアスの参照先はcollection_nameごとに1回だけ問い合わせてキャッシュする
+        （create_collection・delete_collection・switch_aliasで破棄し、get_collection_infoで更新する）。
+        """
+        if self._alias_target is None or self._alias_target[0] != self.collection_name:
+            self._alias_target = (self.collection_name, self.get_alias_target() or self.collection_name)
+        return self._alias_target[1]
+
+    def list_versions(self, alias: Optional[str] = None) -> List[str]:
+        """
+        再構築で作成したバージョン付きコレクションを古い順に取得
+
+        Args:
+            alias: エイリアス名（Noneの場合は再構築中のエイリアス、またはself.collection_name）
+
+        Returns:
+            コレクション名のリスト
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 取得に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        prefix = f"{alias or self.alias or self.collection_name}{VERSION_SEPARATOR}"
+        try:
+            collections = self._client.get_collections().collections
+            return sorted(c.name for c in collections if c.name.startswith(prefix))
+        except Exception as e:
+            raise Exception(f"コレクション一覧の取得に失敗しました: {str(e)}")
+
+    def begin_reindex(self) -> str:
+        """
+        新しいバージョンのコレクションへの再構築を開始
+
+        以降の書き込みは新しいバージョン（<エイリアス名>__v<作成日時>）に対して行い、
+        検索はfinish_reindex()でエイリアスを切り替えるまで現在のバージョンから返される。
+        コレクションの作成はcreate_collection()で行う。
+
+        Returns:
+            新しいバージョンのコレクション名
+
+        Raises:
+            ValueError: 既に再構築中の場合
+        """
+        if self.alias is not None:
+            raise ValueError(f"既に '{self.collection_name}' を再構築中です。")
+
+        self.alias = self.collection_name
+        self.collection_name = (
+            f"{self.alias}{VERSION_SEPARATOR}{datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]}"
+        )
+        self._vector_store = None
+        return self.collection_name
+
+    def resume_reindex(self) -> Optional[str]:
+        """
+        中断した再構築を再開
+
+        エイリアスが指しているバージョンより新しいバージョンのうち、最新のものに書き込む。
+
+        Returns:
+            再開するバージョンのコレクション名（再開できるバージョンがない場合はNone）
+
+        Raises:
+            ValueError: 既に再構築中の場合、またはクライアントが初期化されていない場合
+        """
+        if self.alias is not None:
+            raise ValueError(f"既に '{self.collection_name}' を再構築中です。")
+
+        current = self.get_alias_target()
+        pending = [v for v in self.list_versions() if current is None or v > current]
+        if not pending:
+            return None
+
+        self.alias = self.collection_name
+        self.collection_name = pending[-1]
+        self._vector_store = None
+        return self.collection_name
+
+    def finish_reindex(self, keep_versions: Optional[int] = None) -> List[str]:
+        """
+        再構築したバージョンにエイリアスを切り替え、古いバージョンを削除
+
+        Args:
+            keep_versions: 切り替え後も残す1つ前以前のバージョン数（Noneの場合は設定から取得）
+
+        Returns:
+            削除したコレクション名のリスト
+
+        Raises:
+            ValueError: 再構築が開始されていない場合
+            Exception: 切り替えまたは削除に失敗した場合
+        """
+        if self.alias is None:
+            raise ValueError("再構築が開始されていません。begin_reindex()を先に呼び出してください。")
+
+        version = self.collection_name
+        self.collection_name = self.alias
+        self.alias = None
+        self._vector_store = None
+
+        self.switch_alias(version)
+        return self.delete_old_versions(keep_versions)
+
+    def switch_alias(self, collection_name: str) -> bool:
+        """
+        エイリアス（self.collection_name）の参照先を切り替え
+
+        切り替え先のコレクションが存在し、ステータスが異常でないことを確認してから切り替える。
+        既にエイリアスがある場合は、古いエイリアスの削除と新しいエイリアスの作成を1回のリクエストで行うため、
+        エイリアス経由の検索が失敗する時間は発生しない。
+
+        エイリアス導入前に同名のコレクションがある場合は、Qdrantではコレクションと同名のエイリアスを
+        作成できないため、そのコレクションを削除した直後にエイリアスを作成する。この2つのリクエストの間は
+        その名前で検索できない。エイリアスの作成に失敗した場合はリトライし、それでも失敗した場合は
+        元のコレクションは削除済みのため、切り替え先のコレクション名を含むエラーを送出する。
+
+        Args:
+            collection_name: 新しい参照先のコレクション名
+
+        Returns:
+            切り替え成功の場合True
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 切り替えに失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        alias = self.collection_name
+        try:
+            info = self._client.get_collection(collection_name)
+            if info.status == CollectionStatus.RED:
+                raise Exception(f"切り替え先のコレクション '{collection_name}' のステータスが異常です: {info.status}")
+
+            operations = []
+            migrate = False
+            if self.get_alias_target(alias) is not None:
+                operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+            else:
+                migrate = self._client.collection_exists(alias)
+            operations.append(CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection_name, alias_name=alias)
+            ))
+        except Exception as e:
+            raise Exception(f"エイリアスの切り替えに失敗しました: {str(e)}")
+
+        try:
+            if migrate:
+                print(f"エイリアスに移行するため、既存のコレクション '{alias}' を削除します...")
+                self._client.delete_collection(alias)
+            self._alias_target = None
+            for attempt in range(ALIAS_SWITCH_RETRIES):
+                try:
+                    self._client.update_collection_aliases(change_aliases_operations=operations)
+                    break
+                except Exception:
+                    if not migrate or attempt == ALIAS_SWITCH_RETRIES - 1:
+                        raise
+                    time.sleep(1.0)
+            print(f"エイリアス '{alias}' の参照先を '{collection_name}' に切り替えました。")
+            return True
+        except Exception as e:
+            if migrate:
+                raise Exception(
+                    f"エイリアスの切り替えに失敗しました: {str(e)}"
+                    f"（既存のコレクション '{alias}' は削除済みです。データは '{collection_name}' に残っています）"
+                )
+            raise Exception(f"エイリアスの切り替えに失敗しました: {str(e)}")
+
+    def delete_old_versions(self, keep_versions: Optional[int] = None) -> List[str]:
+        """
+        エイリアスが指しているバージョンより古いバージョンを削除
+
+        直前のkeep_versions個はロールバック用に残す。
+        エイリアスより新しいバージョン（再構築中のもの）は削除しない。
+
+        Args:
+            keep_versions: 残す古いバージョン数（Noneの場合は設定から取得）
+
+        Returns:
+            削除したコレクション名のリスト
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 削除に失敗した場合
+        """
+        if keep_versions is None:
+            keep_versions = config.qdrant.keep_versions
+
+        current = self.get_alias_target()
+        if current is None:
+            return []
+
+        older = [v for v in self.list_versions() if v < current]
+        stale = older[:max(len(older) - keep_versions, 0)]
+        try:
+            for version in stale:
+                self._client.delete_collection(version)
+                print(f"古いバージョン '{version}' を削除しました。")
+            return stale
+        except Exception as e:
+            raise Exception(f"古いバージョンの削除に失敗しました: {str(e)}")
+
+    def _content_version_id(self) -> str:
+        """内容バージョンを記録するポイントのID（再構築中はエイリアス名から生成）"""
+        return str(uuid.uuid5(POINT_ID_NAMESPACE, f"content_version\n{self.alias or self.collection_name}"))
+
+    def get_content_version(self) -> str:
+        """
+        取り込みが記録したコレクションの内容バージョンを取得
+
+        Returns:
+            内容バージョン（記録されていない場合は空文字列）
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 取得に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            if not self._client.collection_exists(CONTENT_VERSION_COLLECTION):
+                return ""
+            points = self._client.retrieve(
+                CONTENT_VERSION_COLLECTION,
+                ids=[self._content_version_id()],
+                with_payload=True,
+                with_vectors=False
+            )
+            return points[0].payload.get("version", "") if points else ""
+        except Exception as e:
+            raise Exception(f"内容バージョンの取得に失敗しました: {str(e)}")
+
+    def bump_content_version(self) -> str:
+        """
+        コレクションの内容バージョンを更新
+
+        取り込みでコレクションに書き込む前と完了後に呼び出し、それまでにキャッシュした回答を無効にする。
+        バージョンはQdrantのCONTENT_VERSION_COLLECTIONに記録するため、取り込みと検索を
+        別の作業ディレクトリやコンテナで実行しても同じ値を参照する。
+
+        Returns:
+            新しい内容バージョン
+
+        Raises:
+            ValueError: クライアントが初期化されていない場合
+            Exception: 更新に失敗した場合
+        """
+        if self._client is None:
+            raise ValueError("Qdrantクライアントが初期化されていません。")
+
+        try:
+            if not self._client.collection_exists(CONTENT_VERSION_COLLECTION):
+                self._client.create_collection(
+                    CONTENT_VERSION_COLLECTION,
+                    vectors_config=VectorParams(size=1, distance=Distance.DOT)
+                )
+            version = uuid.uuid4().hex
+            self._client.upsert(
+                CONTENT_VERSION_COLLECTION,
+                points=[
+                    PointStruct(
+                        id=self._content_version_id(),
+                        vector=[0.0],
+                        payload={"collection": self.alias or self.collection_name, "version": version}
+                    )
+                ],
+                wait=True
+            )
+            return version
+        except Exception as e:
+            raise Exception(f"内容バージョンの更新に失敗しました: {str(e)}")
+
     def get_collection_info(self) -> dict:
         """
         コレクション情報を取得
@@ -239,12 +1614,18 @@ class QdrantVectorStoreManager:
             raise ValueError("Qdrantクライアントが初期化されていません。")
 
         try:
-            info = self._client.get_collection(self.collection_name)
+            # 再構築による切り替えを反映するため、エイリアスの参照先を毎回問い合わせてキャッシュを更新する
+            collection_name = self.get_alias_target() or self.collection_name
+            self._alias_target = (self.collection_name, collection_name)
+            info = self._client.get_collection(collection_name)
             return {
                 "name": self.collection_name,
+                "collection": collection_name,
                 "vectors_count": info.vectors_count,
                 "points_count": info.points_count,
-                "status": info.status
+                "segments_count": info.segments_count,
+                "status": info.status,
+                "content_version": self.get_content_version()
             }
         except Exception as e:
             print(f"コレクション情報の取得に失敗しました: {str(e)}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+ベンチマーク結果の比較
+
+ingest_benchmark.py が出力した2つのJSONを読み込み、主要な指標の差を表示する。
+
+使い方:
+    python benchmarks/compare.py baseline.json candidate.json
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# (キー, 表示名, 値が大きいほど良いか)
+METRICS = [
+    ("files_per_sec", "files/sec", True),
+    ("docs_per_sec", "docs/sec", True),
+    ("chunks_per_sec", "chunks/sec", True),
+    ("wall_seconds", "wall (s)", False),
+    ("cpu_seconds", "cpu (s)", False),
+    ("peak_rss_mb", "peak RSS (MB)", False),
+    ("peak_rss_children_mb", "peak RSS children (MB)", False)
+]
+
+
+def compare(baseline: dict, candidate: dict) -> str:
+    """
+    2つの結果を比較した表を作成
+
+    Args:
+        baseline: 基準となる結果
+        candidate: 比較対象の結果
+
+    Returns:
+        比較表の文字列
+    """
+    lines = [f"{'指標':<24}{'基準':>12}{'比較対象':>12}{'変化':>10}"]
+    rows = [(key, label, better_high, "results") for key, label, better_high in METRICS]
+    stage_names = sorted(set(baseline.get("stage_metrics", {})) | set(candidate.get("stage_metrics", {})))
+    rows += [(name, f"{name} wall (s)", False, "stage_metrics") for name in stage_names]
+
+    for key, label, better_high, section in rows:
+        if section == "stage_metrics":
+            before = baseline.get("stage_metrics", {}).get(key, {}).get("wall_seconds")
+            after = candidate.get("stage_metrics", {}).get(key, {}).get("wall_seconds")
+        else:
+            before = baseline["results"].get(key)
+            after = candidate["results"].get(key)
+
+        if before is None or after is None:
+            lines.append(f"{label:<24}{str(before):>12}{str(after):>12}{'-':>10}")
+            continue
+
+        change = (after - before) / before * 100 if before else 0.0
+        improved = change > 0 if better_high else change < 0
+        mark = "+" if improved else ("-" if change else " ")
+        lines.append(f"{label:<24}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%{mark}")
+
+    if baseline.get("params") != candidate.get("params"):
+        differences = [
+            f"  {key}: {baseline['params'].get(key)} -> {candidate['params'].get(key)}"
+            for key in sorted(set(baseline.get("params", {})) | set(candidate.get("params", {})))
+            if baseline.get("params", {}).get(key) != candidate.get("params", {}).get(key)
+        ]
+        lines.append("\nパラメータの差分:")
+        lines.extend(differences)
+
+    return "\n".join(lines)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="ベンチマーク結果を比較します")
+    parser.add_argument("baseline", type=str, help="基準となる結果JSON")
+    parser.add_argument("candidate", type=str, help="比較対象の結果JSON")
+    args = parser.parse_args()
+
+    try:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        candidate = json.loads(Path(args.candidate).read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"エラー: 結果ファイルの読み込みに失敗しました: {str(e)}")
+        sys.exit(1)
+
+    print(compare(baseline, candidate))
+
+
+if __name__ == "__main__":
+    main()
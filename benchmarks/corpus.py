@@ -0,0 +1,204 @@
+"""
+合成コーパス生成モジュール
+ベンチマーク用に、サポート対象の各形式（.txt/.md/.csv/.json/.pdf）で日本語文書を生成する
+"""
+
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+SUPPORTED_FORMATS = ["txt", "md", "csv", "json", "pdf"]
+
+_SUBJECTS = [
+    "地方自治体", "中小企業", "研究チーム", "開発部門", "物流センター", "医療機関",
+    "教育委員会", "データ基盤", "検索システム", "運用担当者", "利用者", "新しい制度"
+]
+_TOPICS = [
+    "業務の効率化", "個人情報の保護", "災害時の対応", "電力の安定供給", "人材の育成",
+    "品質の向上", "コストの削減", "文書の電子化", "脆弱性への対策", "需要の予測"
+]
+_PREDICATES = [
+    "について検討を進めている", "を最優先の課題として掲げた", "に関する報告書を公表した",
+    "の実現に向けて予算を確保した", "の進捗を四半期ごとに評価している", "を段階的に導入する方針だ",
+    "に取り組むための体制を整備した", "の効果を検証する実証実験を開始した"
+]
+_CONNECTIVES = ["また、", "一方で、", "さらに、", "そのため、", "具体的には、", ""]
+
+
+def random_sentence(rng: random.Random) -> str:
+    """ランダムな日本語の文を1つ生成"""
+    return (
+        f"{rng.choice(_CONNECTIVES)}{rng.choice(_SUBJECTS)}は"
+        f"{rng.choice(_TOPICS)}{rng.choice(_PREDICATES)}。"
+    )
+
+
+def random_paragraph(rng: random.Random, sentences: int) -> str:
+    """ランダムな日本語の段落を生成"""
+    return "".join(random_sentence(rng) for _ in range(sentences))
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """
+    日本語テキストを含む最小構成のPDFを生成
+
+    CIDフォント（Identity-H）で文字コードをUnicodeのコードポイントとし、
+    ToUnicode CMapを付けることでPyPDFLoaderがテキストを抽出できるようにする。
+    フォント本体は埋め込まないため表示用ではない。
+
+    Args:
+        pages: ページごとのテキスト（改行で行を分ける）
+
+    Returns:
+        PDFのバイト列
+    """
+    codes = sorted({ord(c) for page in pages for c in page if c != "\n" and ord(c) <= 0xFFFF})
+    ranges = []
+    for code in codes:
+        # 範囲は下位バイトの境界をまたがないようにする（CMapの仕様）
+        if ranges and code == ranges[-1][1] + 1 and code >> 8 == ranges[-1][0] >> 8:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+
+    cmap_lines = [
+        "/CIDInit /ProcSet findresource begin", "12 dict begin", "begincmap",
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+        "/CMapName /Adobe-Identity-UCS def", "/CMapType 2 def",
+        "1 begincodespacerange", "<0000> <FFFF>", "endcodespacerange"
+    ]
+    for i in range(0, len(ranges), 100):
+        block = ranges[i:i + 100]
+        cmap_lines.append(f"{len(block)} beginbfrange")
+        cmap_lines.extend(f"<{start:04X}> <{end:04X}> <{start:04X}>" for start, end in block)
+        cmap_lines.append("endbfrange")
+    cmap_lines += ["endcmap", "CMapName currentdict /CMap defineresource pop", "end", "end"]
+    cmap = "\n".join(cmap_lines).encode("ascii")
+
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def stream(data: bytes) -> bytes:
+        return b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+
+    catalog_id = add(b"")
+    pages_id = add(b"")
+    to_unicode_id = add(stream(cmap))
+    descendant_id = add(
+        b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /KozMinPr6N-Regular "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> >>"
+    )
+    font_id = add(
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /KozMinPr6N-Regular /Encoding /Identity-H "
+        b"/DescendantFonts [%d 0 R] /ToUnicode %d 0 R >>" % (descendant_id, to_unicode_id)
+    )
+
+    page_ids = []
+    for text in pages:
+        operations = []
+        y = 800
+        for line in text.split("\n"):
+            encoded = line.encode("utf-16-be").hex().upper()
+            operations.append(f"BT /F1 10 Tf 40 {y} Td <{encoded}> Tj ET")
+            y -= 14
+        content_id = add(stream("\n".join(operations).encode("ascii")))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_offset
+    )
+    return bytes(output)
+
+
+def _write_document(path: Path, fmt: str, rng: random.Random, paragraphs: int) -> None:
+    """1つの文書を指定形式で書き出す"""
+    texts = [random_paragraph(rng, rng.randint(3, 8)) for _ in range(paragraphs)]
+
+    if fmt == "txt":
+        path.write_text("\n\n".join(texts), encoding="utf-8")
+    elif fmt == "md":
+        sections = [f"## 第{i + 1}節\n\n{text}" for i, text in enumerate(texts)]
+        path.write_text(f"# {path.stem}\n\n" + "\n\n".join(sections), encoding="utf-8")
+    elif fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "title", "body"])
+            for i, text in enumerate(texts):
+                writer.writerow([i, f"{path.stem}-{i}", text])
+    elif fmt == "json":
+        records = [{"id": i, "title": f"{path.stem}-{i}", "body": text} for i, text in enumerate(texts)]
+        path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    elif fmt == "pdf":
+        # 1段落を1ページとし、40文字ごとに改行する
+        pages = ["\n".join(text[i:i + 40] for i in range(0, len(text), 40)) for text in texts]
+        path.write_bytes(build_pdf(pages))
+    else:
+        raise ValueError(f"サポートされていない形式です: {fmt}")
+
+
+def generate_corpus(
+    output_dir: str,
+    num_docs: int,
+    formats: List[str] = None,
+    paragraphs: int = 10,
+    seed: int = 0
+) -> Dict:
+    """
+    合成コーパスを生成
+
+    形式は指定した順に均等に割り当てる。同じseedであれば同じ内容を生成する。
+
+    Args:
+        output_dir: 出力先ディレクトリ
+        num_docs: 生成する文書数
+        formats: 生成する形式のリスト（Noneの場合は全形式）
+        paragraphs: 1文書あたりの段落数
+        seed: 乱数シード
+
+    Returns:
+        生成結果（files, bytes, by_format）
+    """
+    formats = formats or SUPPORTED_FORMATS
+    for fmt in formats:
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"サポートされていない形式です: {fmt}")
+
+    rng = random.Random(seed)
+    root = Path(output_dir)
+    root.mkdir(parents=True, exist_ok=True)
+
+    by_format: Dict[str, int] = {fmt: 0 for fmt in formats}
+    total_bytes = 0
+    for i in range(num_docs):
+        fmt = formats[i % len(formats)]
+        # 1ディレクトリのファイル数が偏らないようにサブディレクトリに分ける
+        sub_dir = root / f"{i // 1000:04d}"
+        sub_dir.mkdir(exist_ok=True)
+        path = sub_dir / f"doc{i:06d}.{fmt}"
+        _write_document(path, fmt, rng, paragraphs)
+        by_format[fmt] += 1
+        total_bytes += path.stat().st_size
+
+    return {"files": num_docs, "bytes": total_bytes, "by_format": by_format}
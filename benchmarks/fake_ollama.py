@@ -0,0 +1,134 @@
+"""
+Ollama埋め込みAPIのスタブサーバー
+ベンチマーク用に /api/embed（と旧形式の /api/embeddings）へ決定的なベクトルを返す
+"""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import numpy as np
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """
+    テキストから決定的な単位ベクトルを生成
+
+    Args:
+        text: テキスト
+        dim: 次元数
+
+    Returns:
+        埋め込みベクトル
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.tolist()
+
+
+class FakeOllamaServer:
+    """
+    ローカルで動作するOllama埋め込みAPIのスタブ
+
+    応答までの待ち時間を latency（1リクエストあたり）と per_text_latency（1テキストあたり）
+    で指定でき、実際のOllamaに近い負荷特性を再現できる。
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        latency: float = 0.0,
+        per_text_latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        初期化
+
+        Args:
+            dim: 返すベクトルの次元数
+            latency: 1リクエストあたりの待ち時間（秒）
+            per_text_latency: 1テキストあたりの待ち時間（秒）
+            host: 待ち受けアドレス
+            port: 待ち受けポート（0の場合は空きポートを使用）
+        """
+        self.dim = dim
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.requests = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._create_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        """待ち受けアドレス"""
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        """待ち受けポート"""
+        return self._server.server_address[1]
+
+    def _create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path == "/api/embed":
+                    inputs = request.get("input", [])
+                    texts = [inputs] if isinstance(inputs, str) else list(inputs)
+                    body = {"model": request.get("model"), "embeddings": server.embed(texts)}
+                elif self.path == "/api/embeddings":
+                    body = {"embedding": server.embed([request.get("prompt", "")])[0]}
+                else:
+                    self.send_error(404)
+                    return
+
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """テキストを埋め込み、リクエスト数を記録する"""
+        with self._lock:
+            self.requests += 1
+            self.texts += len(texts)
+        wait = self.latency + self.per_text_latency * len(texts)
+        if wait > 0:
+            time.sleep(wait)
+        return [fake_embedding(text, self.dim) for text in texts]
+
+    def start(self) -> "FakeOllamaServer":
+        """バックグラウンドスレッドでサーバーを起動"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """サーバーを停止"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
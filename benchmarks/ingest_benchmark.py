@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+取り込みスループットのベンチマーク
+
+合成コーパスを生成し、実際の 読み込み→JapaneseTextSplitter→埋め込み→保存 の経路を
+ローカルのOllamaスタブとプロセス内のQdrant（:memory:）に対して実行する。
+結果（docs/sec、chunks/sec、ピークRSS、ステージ別・ファイル形式別の時間）をJSONで出力する。
+
+使い方:
+    python benchmarks/ingest_benchmark.py --docs 500 --output result.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+from qdrant_client import QdrantClient
+
+from config import config
+from corpus import SUPPORTED_FORMATS, generate_corpus
+from fake_ollama import FakeOllamaServer
+from loaders.document_loader import DocumentLoaderManager
+from models.async_embeddings import ConcurrentOllamaEmbeddings
+from models.embeddings import create_embeddings
+from pipeline.streaming import StreamingIngestPipeline
+from utils.dedup import create_deduplicator
+from utils.text_splitter import create_text_splitter
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+
+def _peak_rss_mb(who: int) -> float:
+    """ピークRSS（MB）を取得（Linuxのru_maxrssはKB単位）"""
+    peak = resource.getrusage(who).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    ベンチマークを1回実行
+
+    Args:
+        args: コマンドライン引数
+
+    Returns:
+        結果の辞書
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_dir = args.corpus_dir or os.path.join(tmp_dir, "corpus")
+        if args.corpus_dir and Path(corpus_dir).exists():
+            corpus = {"files": None, "bytes": None, "by_format": None, "reused": True}
+        else:
+            generation_start = time.perf_counter()
+            corpus = generate_corpus(
+                corpus_dir,
+                num_docs=args.docs,
+                formats=args.formats,
+                paragraphs=args.paragraphs,
+                seed=args.seed
+            )
+            corpus["generation_seconds"] = round(time.perf_counter() - generation_start, 3)
+
+        with FakeOllamaServer(
+            dim=args.dim,
+            latency=args.embed_latency,
+            per_text_latency=args.embed_per_text_latency
+        ) as server:
+            # 埋め込みクライアントの接続先をスタブに向ける
+            config.ollama.host = server.host
+            config.ollama.port = server.port
+
+            embeddings = create_embeddings(use_cache=False, concurrency=args.embed_concurrency)
+            manager = QdrantVectorStoreManager(collection_name="benchmark", embeddings=embeddings)
+            manager.vector_size = args.dim
+            manager._client = QdrantClient(location=":memory:")
+            manager.create_collection(force=True)
+
+            loader = DocumentLoaderManager()
+            pipeline = StreamingIngestPipeline(
+                loader=loader,
+                text_splitter=create_text_splitter(
+                    chunk_size=args.chunk_size,
+                    chunk_overlap=args.chunk_overlap
+                ),
+                vector_store_manager=manager,
+                batch_size=args.batch_size,
+                max_chunks_in_flight=args.max_in_flight,
+                workers=args.workers,
+                pipelined=not args.no_pipeline,
+                deduplicator=create_deduplicator() if args.dedup else None
+            )
+
+            start = time.perf_counter()
+            cpu_start = time.process_time()
+            stats = pipeline.run(loader.iter_files(corpus_dir))
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+
+            points = manager._client.count(manager.collection_name, exact=True).count
+            if isinstance(embeddings, ConcurrentOllamaEmbeddings):
+                embeddings.close()
+
+        return {
+            "params": {
+                "docs": args.docs,
+                "formats": args.formats,
+                "paragraphs": args.paragraphs,
+                "seed": args.seed,
+                "chunk_size": pipeline.text_splitter.chunk_size,
+                "chunk_overlap": pipeline.text_splitter.chunk_overlap,
+                "batch_size": pipeline.effective_batch_size,
+                "max_chunks_in_flight": pipeline.max_chunks_in_flight,
+                "workers": pipeline.workers,
+                "pipelined": pipeline.pipelined,
+                "dedup": args.dedup,
+                "embed_concurrency": args.embed_concurrency,
+                "embed_latency": args.embed_latency,
+                "embed_per_text_latency": args.embed_per_text_latency,
+                "dim": args.dim
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count()
+            },
+            "corpus": corpus,
+            "results": {
+                "files": stats.files,
+                "failed_files": len(stats.failed_files),
+                "documents": stats.documents,
+                "chunks": stats.chunks,
+                "duplicates": stats.duplicates,
+                "points": points,
+                "batches": stats.batches,
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(cpu, 3),
+                "files_per_sec": round(stats.files / wall, 2) if wall else None,
+                "docs_per_sec": round(stats.documents / wall, 2) if wall else None,
+                "chunks_per_sec": round(stats.chunks / wall, 2) if wall else None,
+                "peak_rss_mb": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+                # ワーカープロセスを使った場合のみ、子プロセスのうち最大のピークRSS
+                "peak_rss_children_mb": (
+                    round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1) if pipeline.workers > 1 else None
+                )
+            },
+            "stages": {
+                name: {
+                    "busy_seconds": round(stage.busy_seconds, 3),
+                    "idle_seconds": round(stage.idle_seconds, 3),
+                    "blocked_seconds": round(stage.blocked_seconds, 3),
+                    "batches": stage.batches,
+                    "items": stage.items,
+                    "utilization": round(stage.utilization, 3)
+                }
+                for name, stage in stats.stages.items()
+            },
+            "stage_metrics": {
+                name: {
+                    "wall_seconds": round(stage.wall_seconds, 3),
+                    "cpu_seconds": round(stage.cpu_seconds, 3),
+                    "items": stage.items,
+                    "items_per_sec": round(stage.items_per_second, 2),
+                    "peak_rss_mb": round(stage.peak_rss_mb, 1)
+                }
+                for name, stage in pipeline.metrics.stages.items()
+            },
+            "file_types": {
+                extension: {
+                    "files": file_type.files,
+                    "bytes": file_type.bytes,
+                    "documents": file_type.documents,
+                    "chunks": file_type.chunks,
+                    "load_seconds": round(file_type.load_seconds, 3),
+                    "files_per_sec": round(file_type.files_per_second, 2),
+                    "mb_per_sec": round(file_type.mb_per_second, 3)
+                }
+                for extension, file_type in pipeline.metrics.file_types.items()
+            },
+            "embedding_server": {"requests": server.requests, "texts": server.texts}
+        }
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="取り込みスループットのベンチマークを実行します")
+    parser.add_argument("--docs", type=int, default=200, help="生成する文書数（デフォルト: 200）")
+    parser.add_argument(
+        "--formats",
+        type=lambda value: value.split(","),
+        default=list(SUPPORTED_FORMATS),
+        help=f"生成する形式のカンマ区切り（デフォルト: {','.join(SUPPORTED_FORMATS)}）"
+    )
+    parser.add_argument("--paragraphs", type=int, default=10, help="1文書あたりの段落数（デフォルト: 10）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument(
+        "--corpus-dir",
+        type=str,
+        default=None,
+        help="コーパスの生成先。既に存在する場合は生成せずに再利用（デフォルト: 一時ディレクトリ）"
+    )
+    parser.add_argument("--chunk-size", type=int, default=None, help="チャンクサイズ")
+    parser.add_argument("--chunk-overlap", type=int, default=None, help="チャンクオーバーラップ")
+    parser.add_argument("--batch-size", type=int, default=None, help="1回の保存で送るチャンク数")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="同時に保持するチャンク数の上限")
+    parser.add_argument("--workers", type=int, default=None, help="読み込みのワーカープロセス数")
+    parser.add_argument("--embed-concurrency", type=int, default=1, help="埋め込みリクエストの同時実行数")
+    parser.add_argument("--no-pipeline", action="store_true", help="埋め込みと保存を逐次実行")
+    parser.add_argument("--dedup", action="store_true", help="重複チャンクの除去を有効にする")
+    parser.add_argument("--dim", type=int, default=768, help="埋め込みベクトルの次元数（デフォルト: 768）")
+    parser.add_argument(
+        "--embed-latency",
+        type=float,
+        default=0.0,
+        help="スタブの1リクエストあたりの待ち時間（秒）"
+    )
+    parser.add_argument(
+        "--embed-per-text-latency",
+        type=float,
+        default=0.0,
+        help="スタブの1テキストあたりの待ち時間（秒）"
+    )
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（デフォルト: 標準出力）")
+    args = parser.parse_args()
+
+    # パイプラインの進捗表示はベンチマーク結果と混ざらないよう標準エラーに送る
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        result = run_benchmark(args)
+    finally:
+        sys.stdout = stdout
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
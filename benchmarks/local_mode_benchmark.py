@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Qdrantのローカルモード（プロセス内）とサーバーの起動時間・メモリ・検索レイテンシのベンチマーク
+
+埋め込み済みの合成チャンクを保存したコレクションに対して、次の接続先ごとに計測する。
+
+- path: QDRANT_PATH にディレクトリを指定した場合（ファイルに保存するローカルモード）
+- memory: QDRANT_PATH=:memory: の場合（保存しないローカルモード）
+- server: --url で指定したQdrantサーバー（コンテナ）
+
+計測は接続先ごとに新しいプロセスで行う（ingest.py・query.py を起動した直後と同じ状態）。
+
+- load_seconds: コレクションを作成してチャンクを保存する時間（path・serverのみ、計測の前に実行）
+- startup_seconds: クライアントを作成して最初の応答（ポイント数の取得）が返るまでの時間。
+  pathでは保存済みのポイントをすべて読み込む時間、memoryではチャンクを保存する時間を含む
+- rss_mb: 起動によるプロセスのRSSの増加量（ローカルモードではQdrantのデータを含む。
+  serverではQdrantのメモリはコンテナ側のため含まない）
+- search_ms_p50 / search_ms_p95: similarity_search_with_score の1クエリずつのレイテンシ
+
+使い方:
+    # ローカルモードのみ計測
+    python benchmarks/local_mode_benchmark.py --points 20000
+
+    # Qdrantサーバー（コンテナ）とも比較
+    python benchmarks/local_mode_benchmark.py --points 20000 --url http://localhost:6333
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+import numpy as np
+
+from pipeline.metrics import current_rss_mb
+from upload_benchmark import PrecomputedEmbeddings, _make_chunks
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+COLLECTION_NAME = "local_mode_benchmark"
+
+
+def _manager(embeddings, dim: int, path: Optional[str], url: Optional[str]) -> QdrantVectorStoreManager:
+    """接続先を指定して初期化したマネージャーを作成"""
+    manager = QdrantVectorStoreManager(collection_name=COLLECTION_NAME, embeddings=embeddings)
+    manager.vector_size = dim
+    manager.path = path
+    if url:
+        manager.url = url
+    manager.initialize()
+    return manager
+
+
+def build(args, path: Optional[str] = None, url: Optional[str] = None) -> float:
+    """計測対象のコレクションを作成して合成チャンクを保存し、かかった時間を返す"""
+    documents, vectors = _make_chunks(args.points, args.dim, args.seed)
+    start = time.perf_counter()
+    manager = _manager(None, args.dim, path, url)
+    manager.create_collection(force=True)
+    manager.upload_embedded(documents, vectors, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    manager.client.close()
+    return elapsed
+
+
+def measure(args, queries: Dict[str, List[float]], path: Optional[str] = None, url: Optional[str] = None) -> Dict:
+    """
+    新しいプロセスで接続先を開き、起動時間・メモリ増加量・検索レイテンシを計測
+
+    :memory: の場合は開いた後にチャンクを保存するまでを起動時間とする。
+    """
+    if path == ":memory:":
+        documents, vectors = _make_chunks(args.points, args.dim, args.seed)
+    rss_before = current_rss_mb()
+
+    start = time.perf_counter()
+    manager = _manager(PrecomputedEmbeddings(queries, args.dim), args.dim, path, url)
+    if path == ":memory:":
+        manager.create_collection()
+        manager.upload_embedded(documents, vectors, batch_size=args.batch_size)
+    points = manager.client.count(COLLECTION_NAME, exact=True).count
+    startup_seconds = time.perf_counter() - start
+    rss_mb = current_rss_mb() - rss_before
+
+    latencies = []
+    for query in queries:
+        query_start = time.perf_counter()
+        manager.similarity_search_with_score(query, k=args.k)
+        latencies.append((time.perf_counter() - query_start) * 1000)
+    latencies.sort()
+    manager.client.close()
+
+    return {
+        "points": points,
+        "startup_seconds": round(startup_seconds, 3),
+        "rss_mb": round(rss_mb, 1),
+        "search_ms_p50": round(latencies[len(latencies) // 2], 2),
+        "search_ms_p95": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2)
+    }
+
+
+def _redirect_stdout():
+    """子プロセスの進捗表示を標準エラーに送る"""
+    sys.stdout = sys.stderr
+
+
+def _measure_in_subprocess(args, queries, path=None, url=None) -> Dict:
+    """起動時間とメモリを他の計測の影響なしに測るため、spawnした子プロセスで計測"""
+    with multiprocessing.get_context("spawn").Pool(1, initializer=_redirect_stdout) as pool:
+        return pool.apply(measure, (args, queries), {"path": path, "url": url})
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="Qdrantのローカルモードとサーバーの起動時間・メモリ・検索レイテンシを比較します")
+    parser.add_argument("--points", type=int, default=20000, help="保存するポイント数（デフォルト: 20000）")
+    parser.add_argument("--queries", type=int, default=200, help="検索するクエリ数（デフォルト: 200）")
+    parser.add_argument("--dim", type=int, default=768, help="ベクトルの次元数（デフォルト: 768）")
+    parser.add_argument("--batch-size", type=int, default=256, help="1リクエストで送るポイント数（デフォルト: 256）")
+    parser.add_argument("--k", type=int, default=4, help="検索の取得件数（デフォルト: 4）")
+    parser.add_argument("--url", type=str, default=None, help="比較するQdrantサーバーのURL（デフォルト: ローカルモードのみ）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（デフォルト: 標準出力）")
+    args = parser.parse_args()
+
+    documents, vectors = _make_chunks(args.points, args.dim, args.seed)
+    rng = np.random.default_rng(args.seed)
+    queries = {
+        documents[i].page_content: vectors[i]
+        for i in rng.integers(0, len(documents), size=args.queries)
+    }
+    del documents, vectors
+
+    # 進捗表示はベンチマーク結果と混ざらないよう標準エラーに送る
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        results = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            load_seconds = build(args, path=tmp_dir)
+            results["path"] = {
+                "load_seconds": round(load_seconds, 3),
+                **_measure_in_subprocess(args, queries, path=tmp_dir)
+            }
+        results["memory"] = _measure_in_subprocess(args, queries, path=":memory:")
+        if args.url:
+            load_seconds = build(args, url=args.url)
+            results["server"] = {
+                "load_seconds": round(load_seconds, 3),
+                **_measure_in_subprocess(args, queries, url=args.url)
+            }
+            _manager(None, args.dim, None, args.url).delete_collection()
+    finally:
+        sys.stdout = stdout
+
+    output = json.dumps({
+        "params": {
+            "points": args.points,
+            "queries": args.queries,
+            "dim": args.dim,
+            "k": args.k,
+            "target": args.url or "local"
+        },
+        "results": results
+    }, ensure_ascii=False, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+ベクトル量子化の再現率・レイテンシ・メモリのベンチマーク
+
+クラスタ構造を持つ合成ベクトル（正規化済み）に対して、量子化なし・scalar（int8）・binaryの
+各設定とoversampling・rescoreの組み合わせで検索し、厳密な近傍（総当たりのコサイン類似度）に
+対するrecall@kを計測する。
+
+- --url を指定した場合: QdrantVectorStoreManager.create_collection(quantization=...)で
+  コレクションを作成し、Qdrantサーバーの検索レイテンシ（p50/p95）と再現率を計測する。
+- 指定しない場合: プロセス内のQdrant（:memory:）は量子化を実装していないため、
+  Qdrantと同じ方式（分位点でクリップしたint8、符号による1bit）の量子化をNumPyで再現し、
+  再現率だけを計測する（レイテンシは出力しない）。
+
+メモリは1ポイントあたりのベクトルのバイト数からの推定値で、HNSWグラフとペイロードは含まない。
+量子化ありの場合は、量子化ベクトルをRAMに、元のベクトルをディスクに置く構成を想定する。
+
+使い方:
+    # NumPyによるシミュレーション
+    python benchmarks/quantization_benchmark.py --points 20000
+
+    # Qdrantサーバーに対して計測
+    python benchmarks/quantization_benchmark.py --points 100000 --url http://localhost:6333
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+
+from vector_store.qdrant_client import QdrantVectorStoreManager, QUANTIZATION_TYPES
+
+
+def make_dataset(
+    count: int,
+    num_queries: int,
+    dim: int,
+    clusters: int,
+    seed: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """クラスタ構造を持つ正規化済みベクトルと、その近傍に置いたクエリを生成"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centroids[labels] + rng.standard_normal((count, dim)).astype(np.float32) / math.sqrt(dim)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    anchors = vectors[rng.integers(0, count, size=num_queries)]
+    queries = anchors + 0.3 * rng.standard_normal((num_queries, dim)).astype(np.float32) / math.sqrt(dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """総当たりのコサイン類似度で各クエリの上位k件のインデックスを求める"""
+    return _top_k(queries @ vectors.T, k)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """スコア行列の各行から上位k件のインデックスをスコアの降順で返す"""
+    k = min(k, scores.shape[1])
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def quantized_scores(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    quantization: str,
+    quantile: float = 0.99
+) -> np.ndarray:
+    """Qdrantと同じ方式で量子化したベクトル同士の近似スコアを計算"""
+    if quantization == "scalar":
+        # 外れ値を除いた範囲を256段階に量子化する（クエリも同じ範囲で量子化される）
+        tail = (1.0 - quantile) / 2
+        low, high = np.quantile(vectors, [tail, 1.0 - tail])
+        step = (high - low) / 255
+
+        def dequantize(x):
+            codes = np.round((np.clip(x, low, high) - low) / step)
+            return (codes * step + low).astype(np.float32)
+
+        return dequantize(queries) @ dequantize(vectors).T
+
+    if quantization == "binary":
+        # 符号だけを残すため、一致するビット数（ハミング距離の逆順）で順位が決まる
+        return np.sign(queries) @ np.sign(vectors).T
+
+    return queries @ vectors.T
+
+
+def simulate_search(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int,
+    quantization: str,
+    oversampling: float,
+    rescore: bool,
+    quantile: float = 0.99
+) -> np.ndarray:
+    """量子化ベクトルでk×oversampling件の候補を取り、必要なら元のベクトルで再スコアリングする"""
+    approx = quantized_scores(vectors, queries, quantization, quantile)
+    if quantization == "none":
+        return _top_k(approx, k)
+
+    limit = max(k, int(math.ceil(k * oversampling)))
+    candidates = _top_k(approx, limit)
+    if not rescore:
+        return candidates[:, :k]
+
+    exact = np.einsum("qd,qcd->qc", queries, vectors[candidates])
+    order = _top_k(exact, k)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def recall_at_k(predicted: np.ndarray, truth: np.ndarray) -> float:
+    """各クエリのrecall@kの平均"""
+    k = truth.shape[1]
+    hits = sum(len(set(p[:k]) & set(t)) for p, t in zip(predicted.tolist(), truth.tolist()))
+    return hits / (k * len(truth))
+
+
+def estimate_memory_mb(count: int, dim: int, quantization: str, on_disk_vectors: bool) -> Dict[str, float]:
+    """ベクトルの保存に必要なRAM・ディスクの推定値（MB）"""
+    original = count * dim * 4
+    if quantization == "scalar":
+        quantized = count * (dim + 4)  # int8 + ポイントごとの補正値
+    elif quantization == "binary":
+        quantized = count * int(math.ceil(dim / 64)) * 8
+    else:
+        quantized = 0
+
+    ram = quantized + (0 if on_disk_vectors else original)
+    disk = original if on_disk_vectors else 0
+    return {
+        "vector_ram_mb": round(ram / (1024 * 1024), 1),
+        "vector_disk_mb": round(disk / (1024 * 1024), 1)
+    }
+
+
+def _settings(quantization: str, oversampling: List[float]) -> List[Tuple[Optional[float], Optional[bool]]]:
+    """量子化の種類ごとに計測する(oversampling, rescore)の組み合わせ"""
+    if quantization == "none":
+        return [(None, None)]
+    return [(1.0, False)] + [(factor, True) for factor in oversampling]
+
+
+def _wait_for_indexing(manager: QdrantVectorStoreManager, timeout: float = 600.0):
+    """オプティマイザがインデックスと量子化を作り終えるまで待つ"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if str(manager.client.get_collection(manager.collection_name).status).endswith("green"):
+            return
+        time.sleep(1.0)
+
+
+def run_server(
+    url: str,
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    args
+) -> List[Dict]:
+    """Qdrantサーバーにコレクションを作成して検索を計測"""
+    results = []
+    documents = [Document(page_content=str(i), metadata={}) for i in range(len(vectors))]
+    for quantization in args.quantization:
+        manager = QdrantVectorStoreManager(collection_name=f"quantization_benchmark_{quantization}")
+        manager.vector_size = vectors.shape[1]
+        manager._client = QdrantClient(url=url, timeout=120)
+        manager.create_collection(force=True, quantization=quantization)
+        manager.upload_embedded(documents, iter(vectors.tolist()), ids=list(range(len(vectors))))
+        _wait_for_indexing(manager)
+
+        for oversampling, rescore in _settings(quantization, args.oversampling):
+            search_params = manager._search_params(args.hnsw_ef, oversampling, rescore)
+            latencies = []
+            predicted = []
+            for query in queries.tolist():
+                start = time.perf_counter()
+                points = manager.client.query_points(
+                    collection_name=manager.collection_name,
+                    query=query,
+                    limit=args.k,
+                    search_params=search_params,
+                    with_payload=False
+                ).points
+                latencies.append((time.perf_counter() - start) * 1000)
+                predicted.append([int(p.id) for p in points] + [-1] * (args.k - len(points)))
+
+            latencies.sort()
+            results.append({
+                "quantization": quantization,
+                "oversampling": oversampling,
+                "rescore": rescore,
+                "recall_at_k": round(recall_at_k(np.array(predicted), truth), 4),
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 2),
+                "latency_ms_p95": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+                **estimate_memory_mb(len(vectors), vectors.shape[1], quantization, quantization != "none")
+            })
+        manager.delete_collection()
+    return results
+
+
+def run_simulation(vectors: np.ndarray, queries: np.ndarray, truth: np.ndarray, args) -> List[Dict]:
+    """NumPyで量子化検索を再現して再現率を計測"""
+    results = []
+    for quantization in args.quantization:
+        for oversampling, rescore in _settings(quantization, args.oversampling):
+            predicted = simulate_search(
+                vectors, queries, args.k, quantization,
+                oversampling or 1.0, bool(rescore), args.quantile
+            )
+            results.append({
+                "quantization": quantization,
+                "oversampling": oversampling,
+                "rescore": rescore,
+                "recall_at_k": round(recall_at_k(predicted, truth), 4),
+                **estimate_memory_mb(len(vectors), vectors.shape[1], quantization, quantization != "none")
+            })
+    return results
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="ベクトル量子化の再現率・レイテンシ・メモリを計測します")
+    parser.add_argument("--points", type=int, default=20000, help="ポイント数（デフォルト: 20000）")
+    parser.add_argument("--queries", type=int, default=200, help="クエリ数（デフォルト: 200）")
+    parser.add_argument("--dim", type=int, default=768, help="ベクトルの次元数（デフォルト: 768）")
+    parser.add_argument("--clusters", type=int, default=200, help="合成データのクラスタ数（デフォルト: 200）")
+    parser.add_argument("--k", type=int, default=10, help="取得件数（デフォルト: 10）")
+    parser.add_argument(
+        "--quantization",
+        type=lambda value: value.split(","),
+        default=list(QUANTIZATION_TYPES),
+        help="計測する量子化の種類（カンマ区切り、デフォルト: none,scalar,binary）"
+    )
+    parser.add_argument(
+        "--oversampling",
+        type=lambda value: [float(v) for v in value.split(",")],
+        default=[2.0, 4.0, 8.0],
+        help="再スコアリングありで計測するoversampling（カンマ区切り、デフォルト: 2,4,8）"
+    )
+    parser.add_argument("--quantile", type=float, default=0.99, help="scalar量子化の分位点（シミュレーションのみ、デフォルト: 0.99）")
+    parser.add_argument("--hnsw-ef", type=int, default=None, help="検索時のHNSW探索幅（サーバー接続時のみ）")
+    parser.add_argument("--url", type=str, default=None, help="QdrantサーバーのURL（デフォルト: NumPyによるシミュレーション）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（デフォルト: 標準出力）")
+    args = parser.parse_args()
+
+    vectors, queries = make_dataset(args.points, args.queries, args.dim, args.clusters, args.seed)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    if args.url:
+        # 進捗表示はベンチマーク結果と混ざらないよう標準エラーに送る
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            results = run_server(args.url, vectors, queries, truth, args)
+        finally:
+            sys.stdout = stdout
+    else:
+        results = run_simulation(vectors, queries, truth, args)
+
+    output = json.dumps({
+        "params": {
+            "points": args.points,
+            "queries": args.queries,
+            "dim": args.dim,
+            "clusters": args.clusters,
+            "k": args.k,
+            "target": args.url or "simulation"
+        },
+        "results": results
+    }, ensure_ascii=False, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
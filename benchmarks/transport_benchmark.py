@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+QdrantのREST（HTTP/JSON）とgRPCの通信方式のベンチマーク
+
+埋め込み済みの合成チャンクを、通信方式ごとに新しいコレクションへ
+QdrantVectorStoreManager.upsert_embedded で保存し、続けて同じクエリで検索して比較する。
+
+- upsert: バッチごとのupsertのpoints/secとバッチあたりのレイテンシ（p50/p95）
+- search: 1クエリずつのsimilarity_search_with_scoreのクエリ/secとレイテンシ（p50/p95）
+- encode: ポイントをJSON・Protocol Buffersに変換する時間とサイズ（サーバー不要）
+
+プロセス内のQdrant（:memory:）は通信を行わないため、upsert・searchの計測には --url でサーバーを指定する。
+指定しない場合はencodeだけを計測する。
+
+使い方:
+    # シリアライズのみ計測
+    python benchmarks/transport_benchmark.py --points 10000
+
+    # Qdrantサーバーに対して計測（docker-composeは6333: REST、6334: gRPCを公開）
+    python benchmarks/transport_benchmark.py --points 100000 --url http://localhost:6333 --grpc-port 6334
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client import QdrantClient
+from qdrant_client.conversions.conversion import RestToGrpc
+from qdrant_client.models import PointStruct
+
+from upload_benchmark import PrecomputedEmbeddings, _make_chunks
+from vector_store.qdrant_client import QdrantVectorStoreManager, generate_point_id
+
+TRANSPORTS = ("rest", "grpc")
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    """レイテンシ（ミリ秒）のp50/p95"""
+    latencies = sorted(latencies)
+    return {
+        "latency_ms_p50": round(latencies[len(latencies) // 2], 2),
+        "latency_ms_p95": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)], 2)
+    }
+
+
+def measure_encoding(documents: List[Document], vectors: List[List[float]], batch_size: int) -> Dict[str, Dict]:
+    """ポイントをREST（JSON）とgRPC（Protocol Buffers）のリクエスト本文に変換する時間とサイズ"""
+    points = [
+        PointStruct(
+            id=generate_point_id(doc),
+            vector=vector,
+            payload={"page_content": doc.page_content, "metadata": doc.metadata}
+        )
+        for doc, vector in zip(documents, vectors)
+    ]
+    results = {}
+    for transport in TRANSPORTS:
+        total_bytes = 0
+        start = time.perf_counter()
+        for i in range(0, len(points), batch_size):
+            batch = points[i:i + batch_size]
+            if transport == "rest":
+                total_bytes += len(json.dumps({"points": [p.model_dump(mode="json") for p in batch]}))
+            else:
+                total_bytes += sum(len(RestToGrpc.convert_point_struct(p).SerializeToString()) for p in batch)
+        elapsed = time.perf_counter() - start
+        results[transport] = {
+            "seconds": round(elapsed, 3),
+            "bytes_per_point": round(total_bytes / len(points), 1)
+        }
+    return results
+
+
+def _run(manager: QdrantVectorStoreManager, documents, vectors, queries: List[str], args) -> Dict:
+    """1つの通信方式で保存・検索を計測"""
+    manager.create_collection(force=True)
+
+    upsert_latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(documents), args.batch_size):
+        batch_start = time.perf_counter()
+        manager.upsert_embedded(documents[i:i + args.batch_size], vectors[i:i + args.batch_size])
+        upsert_latencies.append((time.perf_counter() - batch_start) * 1000)
+    upsert_seconds = time.perf_counter() - start
+
+    search_latencies = []
+    start = time.perf_counter()
+    for query in queries:
+        query_start = time.perf_counter()
+        manager.similarity_search_with_score(query, k=args.k)
+        search_latencies.append((time.perf_counter() - query_start) * 1000)
+    search_seconds = time.perf_counter() - start
+
+    return {
+        "upsert": {
+            "seconds": round(upsert_seconds, 3),
+            "points_per_sec": round(len(documents) / upsert_seconds, 1) if upsert_seconds else None,
+            **_percentiles(upsert_latencies)
+        },
+        "search": {
+            "seconds": round(search_seconds, 3),
+            "queries_per_sec": round(len(queries) / search_seconds, 1) if search_seconds else None,
+            **_percentiles(search_latencies)
+        }
+    }
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="QdrantのRESTとgRPCの保存・検索性能を比較します")
+    parser.add_argument("--points", type=int, default=10000, help="保存するポイント数（デフォルト: 10000）")
+    parser.add_argument("--queries", type=int, default=500, help="検索するクエリ数（デフォルト: 500）")
+    parser.add_argument("--dim", type=int, default=768, help="ベクトルの次元数（デフォルト: 768）")
+    parser.add_argument("--batch-size", type=int, default=64, help="1リクエストで送るポイント数（デフォルト: 64）")
+    parser.add_argument("--k", type=int, default=4, help="検索の取得件数（デフォルト: 4）")
+    parser.add_argument("--url", type=str, default=None, help="QdrantサーバーのURL（デフォルト: シリアライズのみ計測）")
+    parser.add_argument("--grpc-port", type=int, default=6334, help="QdrantサーバーのgRPCポート（デフォルト: 6334）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（デフォルト: 標準出力）")
+    args = parser.parse_args()
+
+    documents, vectors = _make_chunks(args.points, args.dim, args.seed)
+    rng = np.random.default_rng(args.seed)
+    queries = [documents[i].page_content for i in rng.integers(0, len(documents), size=args.queries)]
+
+    results = {"encode": measure_encoding(documents, vectors, args.batch_size)}
+
+    if args.url:
+        embeddings = PrecomputedEmbeddings(
+            {doc.page_content: vector for doc, vector in zip(documents, vectors)},
+            args.dim
+        )
+        # 進捗表示はベンチマーク結果と混ざらないよう標準エラーに送る
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            for transport in TRANSPORTS:
+                manager = QdrantVectorStoreManager(collection_name=f"transport_benchmark_{transport}", embeddings=embeddings)
+                manager.vector_size = args.dim
+                manager._client = QdrantClient(
+                    url=args.url,
+                    grpc_port=args.grpc_port,
+                    prefer_grpc=transport == "grpc",
+                    timeout=60
+                )
+                results[transport] = _run(manager, documents, vectors, queries, args)
+                manager.delete_collection()
+        finally:
+            sys.stdout = stdout
+
+        for stage in ("upsert", "search"):
+            rest_seconds = results["rest"][stage]["seconds"]
+            grpc_seconds = results["grpc"][stage]["seconds"]
+            results["grpc"][stage]["speedup_vs_rest"] = round(rest_seconds / grpc_seconds, 2) if grpc_seconds else None
+
+    output = json.dumps({
+        "params": {
+            "points": args.points,
+            "queries": args.queries,
+            "dim": args.dim,
+            "batch_size": args.batch_size,
+            "k": args.k,
+            "target": args.url or "encode-only"
+        },
+        "results": results
+    }, ensure_ascii=False, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
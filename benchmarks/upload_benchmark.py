@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Qdrantへの保存経路のベンチマーク
+
+埋め込み済みの合成チャンクを、次の経路でそれぞれ新しいコレクションに保存して比較する。
+
+- langchain: QdrantVectorStoreManager.add_documents（LangChainのQdrantVectorStore経由）
+- upsert: QdrantVectorStoreManager.upsert_embedded（バッチごとのupsert）
+- upload: QdrantVectorStoreManager.upload_embedded（qdrant-clientのupload_points）
+- upload_parallelN: upload_embeddedをN個のワーカープロセスで並列実行（サーバー接続時のみ）
+
+埋め込みは事前に計算したベクトルを返すだけのため、保存経路のオーバーヘッドだけを計測できる。
+
+使い方:
+    # プロセス内のQdrant（:memory:）で計測
+    python benchmarks/upload_benchmark.py --points 20000
+
+    # Qdrantサーバーに対して計測（並列アップロードを含む）
+    python benchmarks/upload_benchmark.py --points 100000 --url http://localhost:6333 --parallel 4
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+# プロジェクトルートをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+
+from corpus import random_paragraph
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """事前に計算したベクトルをテキストから引いて返す埋め込み"""
+
+    def __init__(self, vectors: Dict[str, List[float]], dim: int):
+        self.vectors = vectors
+        self.dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # QdrantVectorStoreの初期化時の次元確認（"dummy_text"）にも応答する
+        return [self.vectors.get(text) or [0.0] * self.dim for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.vectors.get(text, [0.0] * self.dim)
+
+
+def _make_chunks(count: int, dim: int, seed: int):
+    """合成チャンクと埋め込みベクトルを生成"""
+    rng = random.Random(seed)
+    documents = [
+        Document(
+            page_content=f"{i}: {random_paragraph(rng, 4)}",
+            metadata={
+                "file_path": f"/documents/doc{i // 20:06d}.txt",
+                "file_name": f"doc{i // 20:06d}.txt",
+                "file_extension": ".txt",
+                "chunk_index": i % 20
+            }
+        )
+        for i in range(count)
+    ]
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return documents, vectors.tolist()
+
+
+def _run(manager: QdrantVectorStoreManager, method: str, parallel: int, documents, vectors, args) -> Dict:
+    """1つの経路で保存して計測"""
+    manager.create_collection(force=True)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    if method == "langchain":
+        for i in range(0, len(documents), args.batch_size):
+            manager.add_documents(documents[i:i + args.batch_size])
+    elif method == "upsert":
+        for i in range(0, len(documents), args.batch_size):
+            manager.upsert_embedded(documents[i:i + args.batch_size], vectors[i:i + args.batch_size])
+    else:
+        manager.upload_embedded(documents, vectors, batch_size=args.batch_size, parallel=parallel)
+
+    elapsed = time.perf_counter() - start
+    peak_mb = None
+    if args.trace_memory:
+        peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    stored = manager.client.count(manager.collection_name, exact=True).count
+    return {
+        "seconds": round(elapsed, 3),
+        "points_per_sec": round(len(documents) / elapsed, 1) if elapsed else None,
+        "points": stored,
+        "python_alloc_peak_mb": round(peak_mb, 1) if peak_mb is not None else None
+    }
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="Qdrantへの保存経路のベンチマークを実行します")
+    parser.add_argument("--points", type=int, default=10000, help="保存するポイント数（デフォルト: 10000）")
+    parser.add_argument("--dim", type=int, default=768, help="ベクトルの次元数（デフォルト: 768）")
+    parser.add_argument("--batch-size", type=int, default=64, help="1リクエストで送るポイント数（デフォルト: 64）")
+    parser.add_argument("--parallel", type=int, default=4, help="並列アップロードのワーカー数（デフォルト: 4）")
+    parser.add_argument("--url", type=str, default=None, help="QdrantサーバーのURL（デフォルト: プロセス内の:memory:）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード（デフォルト: 0）")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="tracemallocでPythonのメモリ割り当てのピークを計測（計測中は処理が遅くなる）"
+    )
+    parser.add_argument("--output", type=str, default=None, help="結果JSONの出力先（デフォルト: 標準出力）")
+    args = parser.parse_args()
+
+    documents, vectors = _make_chunks(args.points, args.dim, args.seed)
+    embeddings = PrecomputedEmbeddings(
+        {doc.page_content: vector for doc, vector in zip(documents, vectors)},
+        args.dim
+    )
+
+    manager = QdrantVectorStoreManager(collection_name="upload_benchmark", embeddings=embeddings)
+    manager.vector_size = args.dim
+    manager._client = QdrantClient(url=args.url, timeout=60) if args.url else QdrantClient(location=":memory:")
+
+    # (結果の名前, 経路, 並列ワーカー数)
+    methods = [("langchain", "langchain", 1), ("upsert", "upsert", 1), ("upload", "upload", 1)]
+    if args.url and args.parallel > 1:
+        # ローカルモードのupload_pointsは並列化されないため、サーバー接続時のみ計測する
+        methods.append((f"upload_parallel{args.parallel}", "upload", args.parallel))
+
+    # 進捗表示はベンチマーク結果と混ざらないよう標準エラーに送る
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        results = {
+            name: _run(manager, method, parallel, documents, vectors, args)
+            for name, method, parallel in methods
+        }
+        manager.delete_collection()
+    finally:
+        sys.stdout = stdout
+
+    baseline = results["langchain"]["seconds"]
+    for result in results.values():
+        result["speedup_vs_langchain"] = round(baseline / result["seconds"], 2) if result["seconds"] else None
+
+    output = json.dumps({
+        "params": {
+            "points": args.points,
+            "dim": args.dim,
+            "batch_size": args.batch_size,
+            "parallel": args.parallel,
+            "target": args.url or ":memory:"
+        },
+        "results": results
+    }, ensure_ascii=False, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"結果を保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
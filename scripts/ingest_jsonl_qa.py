@@ -11,7 +11,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
 
 from langchain_core.documents import Document
+from config import config
 from models.embeddings import create_embeddings
+from models.embedding_cache import CachedEmbeddings
 from vector_store.qdrant_client import QdrantVectorStoreManager
 from utils.text_splitter import create_text_splitter
 
@@ -102,7 +104,7 @@ def main():
 
     # 3. 埋め込みモデルの初期化
     print("\n[3] 埋め込みモデルを初期化中...")
-    embeddings = create_embeddings()
+    embeddings = create_embeddings(use_cache=config.embed_cache.enabled)
 
     # 4. Qdrantクライアントの初期化
     print("\n[4] Qdrantクライアントを初期化中...")
@@ -112,26 +114,33 @@ def main():
     )
     vector_store_manager.initialize()
 
-    # 5. コレクションの作成（既存の場合は削除して再作成）
+    # 5. 新しいバージョンのコレクションを作成（切り替えまでは現在のバージョンで検索できる）
     print("\n[5] コレクションを作成中...")
-    vector_store_manager.create_collection(force=True)
+    version = vector_store_manager.begin_reindex()
+    print(f"  新しいバージョン: {version}")
+    vector_store_manager.create_collection()
 
-    # 6. ドキュメントの追加
+    # 6. ドキュメントの追加（埋め込みながら一括アップロード）
     print("\n[6] ドキュメントをベクターストアに追加中...")
-    batch_size = 50
-    total_added = 0
+    ids = vector_store_manager.bulk_add_documents(split_docs, embed_batch_size=50)
+    print(f"  {len(ids)}件のドキュメントを追加しました")
 
-    for i in range(0, len(split_docs), batch_size):
-        batch = split_docs[i:i + batch_size]
-        ids = vector_store_manager.add_documents(batch)
-        total_added += len(ids)
-        print(f"  進捗: {total_added}/{len(split_docs)}")
+    # エイリアスを新しいバージョンに切り替えて古いバージョンを削除
+    removed = vector_store_manager.finish_reindex()
+    print(f"  古いバージョンを{len(removed)}件削除しました")
+    # このコレクションについてキャッシュした回答を無効にする
+    vector_store_manager.bump_content_version()
+
+    if isinstance(embeddings, CachedEmbeddings):
+        cache_stats = embeddings.stats()
+        print(f"\n埋め込みキャッシュ: ヒット {cache_stats['hits']}件 / ミス {cache_stats['misses']}件"
+              f"（ヒット率 {cache_stats['hit_rate']:.1%}）")
 
     # 7. 登録結果の確認
     print("\n[7] 登録結果を確認中...")
     info = vector_store_manager.get_collection_info()
     print(f"\nコレクション情報:")
-    print(f"  - 名前: {info['name']}")
+    print(f"  - 名前: {info['name']}（{info['collection']}）")
     print(f"  - ポイント数: {info['points_count']}")
     print(f"  - ステータス: {info['status']}")
 
@@ -9,13 +9,14 @@ from pathlib import Path
 # プロジェクトルートをPythonパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
 
+from config import config
 from models.embeddings import create_embeddings
 from models.llm import create_llm
-from vector_store.qdrant_client import QdrantVectorStoreManager
+from vector_store.factory import create_vector_store_manager
 from prompts.templates import format_documents, create_prompt_with_context
 
 
-def query_rag(query: str, collection_name: str = "takaichi_sanae_qa", top_k: int = 5):
+def query_rag(query: str, collection_name: str = "takaichi_sanae_qa", top_k: int = 5, mmr: bool = None):
     """
     RAGシステムにクエリを実行
 
@@ -23,7 +24,9 @@ def query_rag(query: str, collection_name: str = "takaichi_sanae_qa", top_k: int
         query: 検索クエリ
         collection_name: コレクション名
         top_k: 取得する類似ドキュメント数
+        mmr: MMRで多様性を考慮して取得するか（Noneの場合は設定から取得）
     """
+    use_mmr = config.rag.mmr_enabled if mmr is None else mmr
     print(f"\n=== RAG推論実行 ===")
     print(f"コレクション: {collection_name}")
     print(f"質問: {query}")
@@ -35,16 +38,19 @@ def query_rag(query: str, collection_name: str = "takaichi_sanae_qa", top_k: int
 
     # 2. Qdrantクライアントの初期化
     print("[2] Qdrantクライアントを初期化中...")
-    vector_store_manager = QdrantVectorStoreManager(
+    vector_store_manager = create_vector_store_manager(
         collection_name=collection_name,
         embeddings=embeddings
     )
     vector_store_manager.initialize()
 
     # 3. 類似度検索
-    print(f"[3] 類似ドキュメントを検索中（top_{top_k}）...")
+    print(f"[3] 類似ドキュメントを検索中（top_{top_k}{'、MMR' if use_mmr else ''}）...")
     try:
-        results = vector_store_manager.similarity_search_with_score(query, k=top_k)
+        if use_mmr:
+            results = vector_store_manager.max_marginal_relevance_search_with_score(query, k=top_k)
+        else:
+            results = vector_store_manager.similarity_search_with_score(query, k=top_k)
     except Exception as e:
         print(f"エラー: {e}")
         return
@@ -92,7 +98,7 @@ def query_rag(query: str, collection_name: str = "takaichi_sanae_qa", top_k: int
         print(f"      回答: {answer_text}")
 
 
-def interactive_mode(collection_name: str = "takaichi_sanae_qa"):
+def interactive_mode(collection_name: str = "takaichi_sanae_qa", mmr: bool = None):
     """対話モード"""
     print("\n=== RAG対話モード ===")
     print("質問を入力してください（終了: quit, exit）\n")
@@ -108,7 +114,7 @@ def interactive_mode(collection_name: str = "takaichi_sanae_qa"):
                 print("\n👋 終了します")
                 break
 
-            query_rag(query, collection_name)
+            query_rag(query, collection_name, mmr=mmr)
 
         except KeyboardInterrupt:
             print("\n\n👋 終了します")
@@ -119,25 +125,29 @@ def interactive_mode(collection_name: str = "takaichi_sanae_qa"):
 
 def main():
     """メイン処理"""
+    # --mmrはどの位置でも指定できる（MMR_LAMBDA・MMR_FETCH_Kは環境変数で調整）
+    mmr = True if "--mmr" in sys.argv else None
+    argv = [arg for arg in sys.argv if arg != "--mmr"]
+
     # 引数チェック
-    if len(sys.argv) < 2:
+    if len(argv) < 2:
         print("使用法:")
-        print("  単発質問: python query_rag.py <query> [collection_name] [top_k]")
-        print("  対話モード: python query_rag.py -i [collection_name]")
+        print("  単発質問: python query_rag.py <query> [collection_name] [top_k] [--mmr]")
+        print("  対話モード: python query_rag.py -i [collection_name] [--mmr]")
         sys.exit(1)
 
     # 対話モード
-    if sys.argv[1] == "-i":
-        collection_name = sys.argv[2] if len(sys.argv) > 2 else "takaichi_sanae_qa"
-        interactive_mode(collection_name)
+    if argv[1] == "-i":
+        collection_name = argv[2] if len(argv) > 2 else "takaichi_sanae_qa"
+        interactive_mode(collection_name, mmr=mmr)
         return
 
     # 単発質問モード
-    query = sys.argv[1]
-    collection_name = sys.argv[2] if len(sys.argv) > 2 else "takaichi_sanae_qa"
-    top_k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    query = argv[1]
+    collection_name = argv[2] if len(argv) > 2 else "takaichi_sanae_qa"
+    top_k = int(argv[3]) if len(argv) > 3 else 5
 
-    query_rag(query, collection_name, top_k)
+    query_rag(query, collection_name, top_k, mmr=mmr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""
+回答キャッシュモジュールのテスト
+"""
+
+import pytest
+from unittest.mock import patch
+from models.answer_cache import (
+    AnswerCache,
+    collection_content_version,
+    make_answer_key
+)
+from vector_store.numpy_store import NumpyVectorStoreManager
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """一時ディレクトリに回答キャッシュを作成"""
+    answer_cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), max_mb=1, ttl_seconds=0)
+    yield answer_cache
+    answer_cache.close()
+
+
+def _key(question="東京タワーの高さは？", **overrides):
+    params = dict(
+        question=question,
+        collection_name="documents",
+        top_k=4,
+        model="swallow",
+        temperature=0.7,
+        prompt_version="v1"
+    )
+    params.update(overrides)
+    return make_answer_key(**params)
+
+
+class TestMakeAnswerKey:
+    """make_answer_key関数のテスト"""
+
+    def test_normalized_question(self):
+        """全角・半角と空白の違いだけの質問は同じキーになることを確認"""
+        assert _key("東京タワーの高さは？") == _key("  東京タワーの高さは? ")
+
+    @pytest.mark.parametrize("override", [
+        {"collection_name": "other"},
+        {"top_k": 5},
+        {"model": "other-model"},
+        {"temperature": 0.0},
+        {"prompt_version": "v2"},
+        {"retrieval": {"mode": "dense"}}
+    ])
+    def test_settings_change_key(self, override):
+        """コレクション・top_k・モデル・温度・テンプレート・検索条件が異なると別のキーになることを確認"""
+        assert _key(**override) != _key()
+
+
+class TestContentVersion:
+    """内容バージョンのテスト"""
+
+    def test_bump_changes_version(self, tmp_path):
+        """取り込みで内容バージョンを更新すると、同じ保存先を開いた別のインスタンスでも値が変わることを確認"""
+        writer = NumpyVectorStoreManager(collection_name="documents", path=str(tmp_path)).initialize()
+        reader = NumpyVectorStoreManager(collection_name="documents", path=str(tmp_path)).initialize()
+        writer.create_collection()
+        before = collection_content_version(reader.get_collection_info())
+
+        writer.bump_content_version()
+
+        assert collection_content_version(reader.get_collection_info()) != before
+
+    def test_collection_state_changes_version(self):
+        """内容バージョン・参照先のコレクション・ポイント数が変わると値が変わることを確認"""
+        info = {"name": "documents", "collection": "documents__v1", "points_count": 10, "content_version": "a"}
+        version = collection_content_version(info)
+
+        assert collection_content_version({**info, "content_version": "b"}) != version
+        assert collection_content_version({**info, "collection": "documents__v2"}) != version
+        assert collection_content_version({**info, "points_count": 11}) != version
+
+
+class TestAnswerCache:
+    """AnswerCacheクラスのテスト"""
+
+    def test_put_and_get(self, cache):
+        """保存した回答を取得できることを確認"""
+        cache.put(_key(), "documents", "c1", "333メートルです。")
+
+        assert cache.get(_key(), "documents", "c1") == "333メートルです。"
+        assert cache.get(_key("富士山の標高は？"), "documents", "c1") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_persisted(self, cache, tmp_path):
+        """別のインスタンス（別プロセス相当）から取得できることを確認"""
+        cache.put(_key(), "documents", "c1", "333メートルです。")
+
+        reopened = AnswerCache(path=str(tmp_path / "answers.sqlite3"), max_mb=1, ttl_seconds=0)
+
+        assert reopened.get(_key(), "documents", "c1") == "333メートルです。"
+        reopened.close()
+
+    def test_content_version_change_invalidates_collection(self, cache):
+        """内容バージョンが変わるとそのコレクションの古い回答がすべて削除されることを確認"""
+        cache.put(_key(), "documents", "c1", "古い回答")
+        cache.put(_key("別の質問"), "documents", "c1", "古い回答2")
+        cache.put(_key(collection_name="other"), "other", "c1", "他のコレクション")
+
+        assert cache.get(_key(), "documents", "c2") is None
+        assert cache.stats()["entries"] == 1
+        assert cache.get(_key(collection_name="other"), "other", "c1") == "他のコレクション"
+
+    def test_ttl_expiry(self, tmp_path):
+        """有効期間を過ぎた回答は返さないことを確認"""
+        cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), max_mb=1, ttl_seconds=60)
+        with patch("models.answer_cache.time.time", return_value=1000.0):
+            cache.put(_key(), "documents", "c1", "回答")
+        with patch("models.answer_cache.time.time", return_value=1059.0):
+            assert cache.get(_key(), "documents", "c1") == "回答"
+        with patch("models.answer_cache.time.time", return_value=1061.0):
+            assert cache.get(_key(), "documents", "c1") is None
+        assert cache.stats()["entries"] == 0
+        cache.close()
+
+    def test_size_eviction(self, tmp_path):
+        """合計サイズが上限を超えると最終アクセスの古い回答から削除されることを確認"""
+        cache = AnswerCache(path=str(tmp_path / "answers.sqlite3"), max_mb=0.01, ttl_seconds=0)
+        answer = "あ" * 1000  # 約3KB
+        cache.put(_key("質問1"), "documents", "c1", answer)
+        cache.put(_key("質問2"), "documents", "c1", answer)
+        cache.get(_key("質問1"), "documents", "c1")  # 質問1を最近使ったものにする
+        cache.put(_key("質問3"), "documents", "c1", answer)
+        cache.put(_key("質問4"), "documents", "c1", answer)
+
+        assert cache.get(_key("質問2"), "documents", "c1") is None
+        assert cache.get(_key("質問4"), "documents", "c1") == answer
+        assert cache.stats()["size_mb"] <= 0.01
+        cache.close()
@@ -0,0 +1,175 @@
+"""
+非同期埋め込みモジュールのテスト
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from models.async_embeddings import AdaptiveBatchSizer, ConcurrentOllamaEmbeddings
+
+
+class FakeAsyncClient:
+    """同時実行数を記録するOllama AsyncClientの代替"""
+
+    in_flight = 0
+    max_in_flight = 0
+    batch_sizes = []
+    fail_times = 0
+    instances = 0
+    closed = 0
+
+    def __init__(self, host=None):
+        self.host = host
+        FakeAsyncClient.instances += 1
+
+    async def close(self):
+        FakeAsyncClient.closed += 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def embed(self, model, input):
+        cls = FakeAsyncClient
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if cls.fail_times > 0:
+                cls.fail_times -= 1
+                raise ConnectionError("server busy")
+            cls.batch_sizes.append(len(input))
+            return {"embeddings": [[float(len(text))] for text in input]}
+        finally:
+            cls.in_flight -= 1
+
+
+@pytest.fixture
+def fake_client():
+    """FakeAsyncClientの状態を初期化してパッチする"""
+    FakeAsyncClient.in_flight = 0
+    FakeAsyncClient.max_in_flight = 0
+    FakeAsyncClient.batch_sizes = []
+    FakeAsyncClient.fail_times = 0
+    FakeAsyncClient.instances = 0
+    FakeAsyncClient.closed = 0
+    with patch('models.async_embeddings.AsyncClient', FakeAsyncClient):
+        yield FakeAsyncClient
+
+
+class TestAdaptiveBatchSizer:
+    """AdaptiveBatchSizerクラスのテスト"""
+
+    def test_grows_when_fast(self):
+        """レイテンシが目標より小さい間はバッチサイズが増えることを確認"""
+        sizer = AdaptiveBatchSizer(initial_size=8, max_size=64, target_latency=1.0)
+
+        for _ in range(20):
+            sizer.record(0.1, sizer.size)
+
+        assert sizer.size == 64
+
+    def test_shrinks_when_slow(self):
+        """レイテンシが目標を超えるとバッチサイズが半分になることを確認"""
+        sizer = AdaptiveBatchSizer(initial_size=32, target_latency=1.0)
+
+        sizer.record(3.0, 32)
+
+        assert sizer.size == 16
+
+    def test_respects_char_limit(self):
+        """合計文字数の上限でバッチが切られることを確認"""
+        sizer = AdaptiveBatchSizer(initial_size=10, max_chars=25)
+        texts = ["a" * 10] * 10
+
+        assert sizer.take(texts, 0) == 2
+        assert sizer.take(["a" * 100], 0) == 1
+
+    def test_respects_limit(self):
+        """件数の上限を指定するとバッチサイズより小さく切られることを確認"""
+        sizer = AdaptiveBatchSizer(initial_size=64)
+
+        assert sizer.take(["a"] * 100, 0, limit=25) == 25
+
+
+class TestConcurrentOllamaEmbeddings:
+    """ConcurrentOllamaEmbeddingsクラスのテスト"""
+
+    def test_results_keep_input_order(self, fake_client):
+        """並行リクエストでも入力順に結果が返ることを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=4, max_batch_size=3)
+        texts = ["a" * (i + 1) for i in range(20)]
+
+        vectors = embeddings.embed_documents(texts)
+
+        assert vectors == [[float(i + 1)] for i in range(20)]
+        assert embeddings.stats.texts == 20
+
+    def test_concurrency_limit(self, fake_client):
+        """同時リクエスト数が上限を超えないことを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=3, max_batch_size=2)
+
+        embeddings.embed_documents(["テキスト"] * 40)
+
+        assert 1 < fake_client.max_in_flight <= 3
+        assert max(fake_client.batch_sizes) <= 2
+
+    def test_large_batch_size_keeps_concurrency(self, fake_client):
+        """バッチサイズが入力件数以上に育っても、入力を分けて並行リクエストすることを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=4, max_batch_size=128)
+        embeddings.sizer.size = 128
+
+        embeddings.embed_documents(["テキスト"] * 100)
+
+        assert fake_client.batch_sizes == [25, 25, 25, 25]
+        assert fake_client.max_in_flight == 4
+
+    def test_reuses_client_and_closes(self, fake_client):
+        """同期呼び出しを繰り返してもクライアントを使い回し、close()で閉じることを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=2)
+
+        for _ in range(3):
+            embeddings.embed_documents(["a", "bb", "ccc"])
+        embeddings.close()
+
+        assert fake_client.instances == 1
+        assert fake_client.closed == 1
+
+    def test_async_call_closes_client(self, fake_client):
+        """非同期で直接呼び出した場合は呼び出しごとにクライアントを閉じることを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=2)
+
+        vectors = asyncio.run(embeddings.aembed_documents(["a", "bb"]))
+
+        assert vectors == [[1.0], [2.0]]
+        assert fake_client.closed == fake_client.instances == 1
+
+    def test_retry_shrinks_batch(self, fake_client):
+        """失敗時にリトライし、バッチサイズを縮小することを確認"""
+        fake_client.fail_times = 1
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=1, retry_backoff=0.01)
+        initial_size = embeddings.sizer.size
+
+        vectors = embeddings.embed_documents(["a", "bb"])
+
+        assert vectors == [[1.0], [2.0]]
+        assert embeddings.stats.retries == 1
+        assert embeddings.sizer.size <= initial_size
+
+    def test_raises_after_max_retries(self, fake_client):
+        """リトライ上限を超えると例外になることを確認"""
+        fake_client.fail_times = 10
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x", concurrency=1, max_retries=1, retry_backoff=0.01)
+
+        with pytest.raises(Exception) as exc_info:
+            embeddings.embed_documents(["a"])
+
+        assert "ドキュメントの埋め込み生成に失敗しました" in str(exc_info.value)
+
+    def test_empty_input(self, fake_client):
+        """空リストでは空リストが返ることを確認"""
+        embeddings = ConcurrentOllamaEmbeddings(model="m", base_url="http://x")
+
+        assert embeddings.embed_documents([]) == []
@@ -0,0 +1,109 @@
+"""
+ベンチマーク用ユーティリティのテスト
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+import pytest
+from corpus import build_pdf, generate_corpus
+from fake_ollama import FakeOllamaServer, fake_embedding
+from quantization_benchmark import estimate_memory_mb, exact_top_k, make_dataset, recall_at_k, simulate_search
+from transport_benchmark import measure_encoding
+from upload_benchmark import _make_chunks
+from loaders.document_loader import DocumentLoaderManager
+from models.async_embeddings import ConcurrentOllamaEmbeddings
+
+
+class TestCorpus:
+    """合成コーパス生成のテスト"""
+
+    def test_generate_corpus_is_deterministic(self, tmp_path):
+        """同じシードで同じ内容が生成されることを確認"""
+        first = generate_corpus(str(tmp_path / "a"), num_docs=4, formats=["txt", "csv"], seed=1)
+        second = generate_corpus(str(tmp_path / "b"), num_docs=4, formats=["txt", "csv"], seed=1)
+
+        assert first == second
+        assert first["by_format"] == {"txt": 2, "csv": 2}
+        assert (tmp_path / "a" / "0000" / "doc000000.txt").read_text(encoding="utf-8") == \
+            (tmp_path / "b" / "0000" / "doc000000.txt").read_text(encoding="utf-8")
+
+    def test_generated_files_are_loadable(self, tmp_path):
+        """生成したファイルが実際のローダーで読み込めることを確認"""
+        generate_corpus(str(tmp_path), num_docs=4, formats=["txt", "csv", "json", "pdf"], paragraphs=3)
+
+        loader = DocumentLoaderManager()
+        for file_path in loader.iter_files(str(tmp_path)):
+            documents = loader.load_document(str(file_path))
+            assert documents
+            assert all(doc.page_content for doc in documents)
+
+    def test_build_pdf_extracts_japanese(self, tmp_path):
+        """生成したPDFから日本語テキストが抽出できることを確認"""
+        path = tmp_path / "sample.pdf"
+        path.write_bytes(build_pdf(["日本語の本文です。", "二ページ目"]))
+
+        documents = DocumentLoaderManager().load_document(str(path))
+
+        assert [doc.page_content for doc in documents] == ["日本語の本文です。", "二ページ目"]
+
+    def test_unsupported_format(self, tmp_path):
+        """サポート外の形式を指定した場合のテスト"""
+        with pytest.raises(ValueError):
+            generate_corpus(str(tmp_path), num_docs=1, formats=["docx"])
+
+
+class TestFakeOllamaServer:
+    """Ollamaスタブサーバーのテスト"""
+
+    def test_embed_via_ollama_client(self):
+        """Ollamaクライアントから決定的なベクトルが返ることを確認"""
+        with FakeOllamaServer(dim=8) as server:
+            embeddings = ConcurrentOllamaEmbeddings(
+                model="test-model",
+                base_url=f"http://{server.host}:{server.port}",
+                concurrency=2,
+                max_batch_size=2
+            )
+            vectors = embeddings.embed_documents(["a", "b", "c"])
+
+        for vector, text in zip(vectors, ["a", "b", "c"]):
+            assert vector == pytest.approx(fake_embedding(text, 8))
+        assert server.texts == 3
+        assert server.requests >= 2
+
+
+class TestQuantizationBenchmark:
+    """量子化ベンチマークのシミュレーションのテスト"""
+
+    def test_rescoring_recovers_recall(self):
+        """oversamplingして再スコアリングすると再現率が上がることを確認"""
+        vectors, queries = make_dataset(2000, 20, 64, clusters=20, seed=0)
+        truth = exact_top_k(vectors, queries, 5)
+
+        exact = recall_at_k(simulate_search(vectors, queries, 5, "none", 1.0, False), truth)
+        plain = recall_at_k(simulate_search(vectors, queries, 5, "binary", 1.0, False), truth)
+        rescored = recall_at_k(simulate_search(vectors, queries, 5, "binary", 8.0, True), truth)
+
+        assert exact == 1.0
+        assert plain < rescored <= 1.0
+
+    def test_memory_estimate(self):
+        """量子化ベクトルだけがRAMに残る推定になることを確認"""
+        assert estimate_memory_mb(1024 * 1024, 768, "none", False) == {"vector_ram_mb": 3072.0, "vector_disk_mb": 0.0}
+        assert estimate_memory_mb(1024 * 1024, 768, "binary", True) == {"vector_ram_mb": 96.0, "vector_disk_mb": 3072.0}
+
+
+class TestTransportBenchmark:
+    """通信方式ベンチマークのテスト"""
+
+    def test_grpc_encoding_is_smaller(self):
+        """Protocol BuffersのほうがJSONより1ポイントあたりのサイズが小さいことを確認"""
+        documents, vectors = _make_chunks(20, 64, seed=0)
+
+        results = measure_encoding(documents, vectors, batch_size=8)
+
+        assert set(results) == {"rest", "grpc"}
+        assert results["grpc"]["bytes_per_point"] < results["rest"]["bytes_per_point"]
@@ -0,0 +1,230 @@
+"""
+取り込みチェックポイントのテスト
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from loaders.document_loader import DocumentLoaderManager
+from utils.text_splitter import create_text_splitter
+from pipeline.checkpoint import IngestCheckpoint, CheckpointMismatchError
+from pipeline.streaming import StreamingIngestPipeline
+from vector_store.numpy_store import NumpyVectorStoreManager
+
+
+SIGNATURE = {"source": "/data", "chunk_size": 100, "chunk_overlap": 10}
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    """複数のテキストファイルを含むディレクトリを作成"""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for i in range(4):
+        (corpus / f"doc{i}.txt").write_text(f"これは文書{i}の本文です。" * 80, encoding="utf-8")
+    return corpus
+
+
+def _chunk(file_path, index):
+    return Document(page_content=f"{file_path}-{index}", metadata={"file_path": file_path, "chunk_index": index})
+
+
+class TestIngestCheckpoint:
+    """IngestCheckpointクラスのテスト"""
+
+    def test_for_collection_path(self, tmp_path):
+        """コレクションごとのジャーナルパスを確認"""
+        checkpoint = IngestCheckpoint.for_collection("docs", state_dir=str(tmp_path))
+
+        assert checkpoint.path == tmp_path / "checkpoints" / "docs.jsonl"
+
+    def test_resume_restores_progress(self, tmp_path):
+        """保存済みのバッチとファイルがジャーナルから復元されることを確認"""
+        path = str(tmp_path / "cp.jsonl")
+        checkpoint = IngestCheckpoint(path)
+        checkpoint.start(SIGNATURE)
+        for i in range(3):
+            checkpoint.record_produced("/a.txt")
+        checkpoint.record_loaded("/a.txt")
+        checkpoint.record_produced("/b.txt")
+        checkpoint.record_batch(1, [_chunk("/a.txt", 0), _chunk("/a.txt", 1)])
+        checkpoint.record_batch(2, [_chunk("/a.txt", 2), _chunk("/b.txt", 0)])
+        checkpoint.close()
+
+        restored = IngestCheckpoint(path)
+        restored.resume(SIGNATURE)
+
+        assert restored.last_batch == 2
+        assert restored.is_completed("/a.txt")
+        assert not restored.is_completed("/b.txt")
+        assert restored.committed_count("/b.txt") == 1
+        assert restored.has_progress("/b.txt")
+        assert not restored.finished
+        restored.close()
+
+    def test_file_completed_when_commit_precedes_load_end(self, tmp_path):
+        """最後のバッチ保存後に読み込み完了が通知された場合も完了になることを確認"""
+        checkpoint = IngestCheckpoint(str(tmp_path / "cp.jsonl"))
+        checkpoint.start(SIGNATURE)
+        checkpoint.record_produced("/a.txt")
+        checkpoint.record_batch(1, [_chunk("/a.txt", 0)])
+
+        assert not checkpoint.is_completed("/a.txt")
+        checkpoint.record_loaded("/a.txt")
+        assert checkpoint.is_completed("/a.txt")
+        checkpoint.close()
+
+    def test_truncated_last_line_is_ignored(self, tmp_path):
+        """書き込み途中の最終行があっても再開できることを確認"""
+        path = tmp_path / "cp.jsonl"
+        checkpoint = IngestCheckpoint(str(path))
+        checkpoint.start(SIGNATURE)
+        checkpoint.record_batch(1, [_chunk("/a.txt", 0)])
+        checkpoint.close()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"type": "batch", "batch": 2, "chu')
+
+        restored = IngestCheckpoint(str(path))
+        restored.resume(SIGNATURE)
+
+        assert restored.last_batch == 1
+        restored.close()
+
+    def test_resume_without_journal(self, tmp_path):
+        """ジャーナルがない場合のテスト"""
+        with pytest.raises(FileNotFoundError):
+            IngestCheckpoint(str(tmp_path / "missing.jsonl")).resume(SIGNATURE)
+
+    def test_resume_with_different_settings(self, tmp_path):
+        """取り込み設定が異なる場合は再開できないことを確認"""
+        path = str(tmp_path / "cp.jsonl")
+        checkpoint = IngestCheckpoint(path)
+        checkpoint.start(SIGNATURE)
+        checkpoint.close()
+
+        with pytest.raises(CheckpointMismatchError):
+            IngestCheckpoint(path).resume({**SIGNATURE, "chunk_size": 200})
+
+
+class TestResumePipeline:
+    """チェックポイントを使った取り込み再開のテスト"""
+
+    def _create_pipeline(self, manager, checkpoint):
+        return StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=100, chunk_overlap=10),
+            vector_store_manager=manager,
+            batch_size=7,
+            pipelined=False,
+            checkpoint=checkpoint
+        )
+
+    def _stored_keys(self, manager):
+        return [
+            (doc.metadata["file_path"], doc.metadata["chunk_index"])
+            for call in manager.upsert_embedded.call_args_list
+            for doc in call.args[0]
+        ]
+
+    def test_resume_continues_without_duplicates(self, tmp_path, corpus_dir):
+        """中断後の再開で、保存済みのチャンクを再送せずに残りを保存することを確認"""
+        loader = DocumentLoaderManager()
+
+        # 中断なしの場合に保存されるチャンク
+        full_manager = MagicMock(pending_writes=0)
+        full = self._create_pipeline(full_manager, IngestCheckpoint(str(tmp_path / "full.jsonl")))
+        full.checkpoint.start(SIGNATURE)
+        full.run(loader.iter_files(str(corpus_dir)))
+        expected = self._stored_keys(full_manager)
+
+        # 4バッチ目の保存で中断
+        path = str(tmp_path / "cp.jsonl")
+        first_manager = MagicMock(pending_writes=0)
+        first_manager.upsert_embedded.side_effect = [None, None, None, RuntimeError("Qdrant停止")]
+        checkpoint = IngestCheckpoint(path)
+        checkpoint.start(SIGNATURE)
+        with pytest.raises(RuntimeError):
+            self._create_pipeline(first_manager, checkpoint).run(loader.iter_files(str(corpus_dir)))
+        checkpoint.close()
+        committed = self._stored_keys(first_manager)[:21]
+
+        # 再開
+        second_manager = MagicMock(pending_writes=0)
+        resumed = IngestCheckpoint(path)
+        resumed.resume(SIGNATURE)
+        pipeline = self._create_pipeline(second_manager, resumed)
+        stats = pipeline.run(loader.iter_files(str(corpus_dir)))
+        resumed.finish()
+
+        assert resumed.last_batch > 3
+        assert stats.skipped_files + stats.files == 4
+        assert stats.skipped_files >= 1
+        assert committed + self._stored_keys(second_manager) == expected
+        assert len(resumed.completed_files) == 4
+
+    def test_resume_with_numpy_store_keeps_unflushed_batches(self, tmp_path, corpus_dir):
+        """NumPyバックエンドで書き出し前のバッチは記録されず、中断後の再開で保存し直されることを確認"""
+        loader = DocumentLoaderManager()
+        full_manager = MagicMock(pending_writes=0)
+        self._create_pipeline(full_manager, None).run(loader.iter_files(str(corpus_dir)))
+        expected = len(self._stored_keys(full_manager))
+
+        def numpy_store():
+            store = NumpyVectorStoreManager(
+                collection_name="docs",
+                embeddings=DeterministicFakeEmbedding(size=32),
+                path=str(tmp_path / "numpy_store")
+            ).initialize()
+            store.flush_rows = 10
+            return store
+
+        # 2バッチ目で書き出し、3バッチ目はメモリ上に残ったまま4バッチ目の保存で中断
+        first_store = numpy_store()
+        first_store.create_collection()
+        upsert = first_store.upsert_embedded
+        calls = []
+
+        def crash_on_fourth(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 4:
+                raise RuntimeError("プロセス停止")
+            return upsert(*args, **kwargs)
+
+        first_store.upsert_embedded = crash_on_fourth
+        path = str(tmp_path / "cp.jsonl")
+        checkpoint = IngestCheckpoint(path)
+        checkpoint.start(SIGNATURE)
+        with pytest.raises(RuntimeError):
+            self._create_pipeline(first_store, checkpoint).run(loader.iter_files(str(corpus_dir)))
+        checkpoint.close()
+
+        resumed = IngestCheckpoint(path)
+        resumed.resume(SIGNATURE)
+        assert resumed.last_batch == 2
+
+        second_store = numpy_store()
+        self._create_pipeline(second_store, resumed).run(loader.iter_files(str(corpus_dir)))
+        resumed.finish()
+
+        assert second_store.pending_writes == 0
+        assert numpy_store().get_collection_info()["points_count"] == expected
+
+    def test_resume_after_finish_skips_everything(self, tmp_path, corpus_dir):
+        """完了済みの取り込みを再開すると何も保存しないことを確認"""
+        loader = DocumentLoaderManager()
+        path = str(tmp_path / "cp.jsonl")
+        checkpoint = IngestCheckpoint(path)
+        checkpoint.start(SIGNATURE)
+        self._create_pipeline(MagicMock(pending_writes=0), checkpoint).run(loader.iter_files(str(corpus_dir)))
+        checkpoint.finish()
+
+        manager = MagicMock(pending_writes=0)
+        resumed = IngestCheckpoint(path)
+        resumed.resume(SIGNATURE)
+        stats = self._create_pipeline(manager, resumed).run(loader.iter_files(str(corpus_dir)))
+        resumed.close()
+
+        assert resumed.finished
+        assert stats.skipped_files == 4
+        assert manager.upsert_embedded.call_count == 0
@@ -0,0 +1,170 @@
+"""
+重複チャンク検出モジュールのテスト
+"""
+
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from loaders.document_loader import DocumentLoaderManager
+from utils.dedup import MinHashDeduplicator, create_deduplicator, normalize_for_dedup
+from utils.text_splitter import create_text_splitter
+from pipeline.streaming import StreamingIngestPipeline
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+
+MANUAL = (
+    "本マニュアルでは、検索システムの運用手順について説明します。"
+    "障害が発生した場合は、まず監視画面でアラートの内容を確認してください。"
+    "次に、影響範囲を特定し、必要に応じて関係部署へ連絡します。"
+    "復旧作業の完了後は、原因と対策を報告書にまとめて提出します。"
+)
+
+
+class TestMinHashDeduplicator:
+    """MinHashDeduplicatorクラスのテスト"""
+
+    def test_normalize_for_dedup(self):
+        """全角・半角の揺れと空白の違いが正規化されることを確認"""
+        assert normalize_for_dedup("ＡＢＣ １２３\n です") == "ABC123です"
+
+    def test_exact_duplicate(self):
+        """完全一致のチャンクが重複と判定されることを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+
+        assert deduplicator.find_or_add(MANUAL, "a") is None
+        assert deduplicator.find_or_add(MANUAL, "b") == "a"
+        assert len(deduplicator) == 1
+
+    def test_near_duplicate(self):
+        """改行位置や数文字の違いだけのチャンクが重複と判定されることを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+        revised = MANUAL.replace("。", "。\n").replace("報告書", "報告書類")
+
+        deduplicator.find_or_add(MANUAL, "v1")
+
+        assert deduplicator.find_or_add(revised, "v2") == "v1"
+
+    def test_different_text_is_not_duplicate(self):
+        """内容の異なるチャンクが重複と判定されないことを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+        other = "東京タワーは1958年に完成した総合電波塔で、高さは333メートルです。" * 3
+
+        deduplicator.find_or_add(MANUAL, "manual")
+
+        assert deduplicator.find_or_add(other, "tower") is None
+        assert len(deduplicator) == 2
+
+    def test_signature_capacity_grows(self):
+        """登録数が初期容量を超えても動作することを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.9, ngram_size=3, num_perm=16, bands=4)
+
+        for i in range(1500):
+            deduplicator.find_or_add(f"文書番号{i:05d}の固有の本文{i * 7919}です", i)
+
+        assert len(deduplicator) > 1024
+        assert deduplicator.find_or_add("文書番号01234の固有の本文9772046です", -1) == 1234
+
+    def test_different_numbers_are_not_duplicate(self):
+        """数字だけが異なるチャンクは重複と判定されないことを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+        notice = MANUAL + "提出期限は2024年4月1日、手数料は3000円です。"
+
+        deduplicator.find_or_add(notice, "2024")
+
+        assert deduplicator.find_or_add(notice.replace("2024", "2025"), "2025") is None
+        assert deduplicator.find_or_add(notice.replace("。", "。\n"), "copy") == "2024"
+
+    def test_max_entries_bounds_index(self):
+        """上限を超えると古いチャンクから索引を外し、保持数が一定になることを確認"""
+        deduplicator = MinHashDeduplicator(threshold=0.9, ngram_size=3, num_perm=16, bands=4, max_entries=100)
+
+        for i in range(300):
+            deduplicator.find_or_add(f"文書番号{i:05d}の固有の本文{i * 7919}です", i)
+
+        assert len(deduplicator) == 100
+        assert deduplicator.evictions == 200
+        assert len(deduplicator._signatures) == 100
+        assert all(len(table) <= 100 for table in deduplicator._tables)
+        # 新しいチャンクは検出でき、索引から外したチャンクは新しい代表として登録される
+        assert deduplicator.find_or_add("文書番号00299の固有の本文2367781です", -1) == 299
+        assert deduplicator.find_or_add("文書番号00000の固有の本文0です", -1) is None
+
+    def test_invalid_bands(self):
+        """num_permがbandsで割り切れない場合のテスト"""
+        with pytest.raises(ValueError):
+            MinHashDeduplicator(num_perm=64, bands=7)
+
+    def test_create_deduplicator(self, mock_config):
+        """create_deduplicator関数のテスト"""
+        deduplicator = create_deduplicator()
+
+        assert isinstance(deduplicator, MinHashDeduplicator)
+        assert deduplicator.num_perm % deduplicator.bands == 0
+
+
+class TestDedupPipeline:
+    """重複除去を有効にしたパイプラインのテスト"""
+
+    @pytest.fixture
+    def manager(self):
+        """インメモリのQdrantに接続したマネージャーを返す"""
+        vector_store_manager = QdrantVectorStoreManager(
+            collection_name="dedup_test",
+            embeddings=DeterministicFakeEmbedding(size=768)
+        )
+        vector_store_manager._client = QdrantClient(location=":memory:")
+        vector_store_manager.create_collection()
+        return vector_store_manager
+
+    def test_revised_copies_collapse_into_one_point(self, tmp_path, manager):
+        """改訂版のコピーが1つのポイントにまとまり、取得元がすべて記録されることを確認"""
+        (tmp_path / "manual_v1.txt").write_text(MANUAL, encoding="utf-8")
+        (tmp_path / "manual_v2.txt").write_text(MANUAL.replace("報告書", "報告書類"), encoding="utf-8")
+        (tmp_path / "other.txt").write_text("東京タワーは1958年に完成した総合電波塔です。", encoding="utf-8")
+
+        pipeline = StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=500, chunk_overlap=0),
+            vector_store_manager=manager,
+            batch_size=1,
+            pipelined=True,
+            deduplicator=MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+        )
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(tmp_path)))
+
+        records, _ = manager.client.scroll(manager.collection_name, limit=10)
+        assert stats.chunks == 3
+        assert stats.duplicates == 1
+        assert len(records) == 2
+
+        sources = {
+            record.payload["metadata"]["file_name"]: record.payload["metadata"]["source_files"]
+            for record in records
+        }
+        assert sorted(Path(f).name for f in sources["manual_v1.txt"]) == ["manual_v1.txt", "manual_v2.txt"]
+        assert [Path(f).name for f in sources["other.txt"]] == ["other.txt"]
+
+    def test_duplicates_are_not_embedded(self, tmp_path):
+        """重複チャンクが埋め込み・保存に送られないことを確認"""
+        for i in range(3):
+            (tmp_path / f"copy{i}.txt").write_text(MANUAL, encoding="utf-8")
+
+        manager = MagicMock()
+        manager.embeddings.embed_documents.side_effect = lambda texts: [[0.0] * 3 for _ in texts]
+        pipeline = StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=500, chunk_overlap=0),
+            vector_store_manager=manager,
+            batch_size=10,
+            pipelined=False,
+            deduplicator=MinHashDeduplicator(threshold=0.85, ngram_size=3, num_perm=64, bands=8)
+        )
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(tmp_path)))
+
+        embedded = [text for call in manager.embeddings.embed_documents.call_args_list for text in call.args[0]]
+        assert stats.duplicates == 2
+        assert len(embedded) == 1
+        (updates,), _ = manager.set_source_files.call_args
+        assert len(list(updates.values())[0]) == 3
@@ -172,3 +172,84 @@ class TestDocumentLoaderManager:
         finally:
             # 元に戻す
             loader.SUPPORTED_EXTENSIONS[".txt"] = original_loader
+
+    def test_iter_files_is_lazy_and_filtered(self, tmp_path):
+        """ファイル列挙が遅延評価され、サポート対象のみ返すことを確認"""
+        (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+        (tmp_path / "b.docx").write_text("b")
+        sub_dir = tmp_path / "sub"
+        sub_dir.mkdir()
+        (sub_dir / "c.md").write_text("# c", encoding="utf-8")
+
+        loader = DocumentLoaderManager()
+        files = loader.iter_files(str(tmp_path))
+
+        assert not isinstance(files, list)
+        assert sorted(f.name for f in files) == ["a.txt", "c.md"]
+        assert [f.name for f in loader.iter_files(str(tmp_path), recursive=False)] == ["a.txt"]
+
+    def test_lazy_load_document_adds_metadata(self, sample_txt_path):
+        """遅延読み込みでもメタデータが付与されることを確認"""
+        loader = DocumentLoaderManager()
+        documents = list(loader.lazy_load_document(sample_txt_path))
+
+        assert len(documents) > 0
+        assert documents[0].metadata["file_name"] == "sample.txt"
+        assert documents[0].metadata["file_extension"] == ".txt"
+        assert documents[0].metadata["file_path"].endswith("sample.txt")
+
+    def test_file_dirs_metadata(self, tmp_path):
+        """親ディレクトリが浅い順に記録されることを確認"""
+        path = tmp_path / "a" / "b" / "doc.txt"
+        path.parent.mkdir(parents=True)
+        path.write_text("本文です。", encoding="utf-8")
+
+        documents = DocumentLoaderManager().load_document(str(path))
+
+        file_dirs = documents[0].metadata["file_dirs"]
+        assert file_dirs[-2:] == [str(tmp_path / "a"), str(tmp_path / "a" / "b")]
+        assert "/" not in file_dirs
+
+    def test_load_directory_parallel(self, tmp_path):
+        """並列読み込みの結果が逐次読み込みと一致することを確認"""
+        for i in range(4):
+            (tmp_path / f"doc{i}.txt").write_text(f"文書{i}の本文です。", encoding="utf-8")
+
+        loader = DocumentLoaderManager()
+        serial = loader.load_directory(str(tmp_path))
+        parallel = loader.load_directory(str(tmp_path), workers=2)
+
+        assert sorted(d.page_content for d in parallel) == sorted(d.page_content for d in serial)
+        for doc in parallel:
+            assert doc.metadata["file_extension"] == ".txt"
+            assert doc.metadata["file_name"].startswith("doc")
+            assert doc.metadata["file_path"].endswith(doc.metadata["file_name"])
+
+    def test_iter_load_parallel_largest_first(self, tmp_path):
+        """サイズの大きいファイルから順に処理されることを確認"""
+        small = tmp_path / "small.txt"
+        small.write_text("小", encoding="utf-8")
+        large = tmp_path / "large.txt"
+        large.write_text("大" * 1000, encoding="utf-8")
+        medium = tmp_path / "medium.txt"
+        medium.write_text("中" * 100, encoding="utf-8")
+
+        loader = DocumentLoaderManager()
+        results = list(loader.iter_load_parallel([small, large, medium], workers=1))
+
+        assert [path.name for path, _, _ in results] == ["large.txt", "medium.txt", "small.txt"]
+
+    def test_iter_load_parallel_reports_failures(self, tmp_path):
+        """並列読み込みでも失敗したファイルが報告されることを確認"""
+        good = tmp_path / "good.txt"
+        good.write_text("正常なファイル", encoding="utf-8")
+        broken = tmp_path / "broken.txt"
+        broken.write_bytes(b"\xff\xfe\x80\x81")
+
+        loader = DocumentLoaderManager()
+        results = {path.name: (docs, error) for path, docs, error in loader.iter_load_parallel([good, broken], workers=2)}
+
+        assert results["good.txt"][1] is None
+        assert len(results["good.txt"][0]) == 1
+        assert results["broken.txt"][0] == []
+        assert "ファイルの読み込みに失敗しました" in results["broken.txt"][1]
@@ -0,0 +1,212 @@
+"""
+埋め込みキャッシュモジュールのテスト
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from models.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    QueryEmbeddingCache,
+    make_cache_key,
+    normalize_query,
+    normalize_text
+)
+from models.embeddings import create_embeddings
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """一時ディレクトリにキャッシュを作成"""
+    embedding_cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), max_mb=10, dtype="float32")
+    yield embedding_cache
+    embedding_cache.close()
+
+
+def _fake_inner(dim=4):
+    """テキスト長からベクトルを作る埋め込みモデルのモック"""
+    inner = MagicMock()
+    inner.embed_documents.side_effect = lambda texts: [[float(len(t))] * dim for t in texts]
+    return inner
+
+
+class TestCacheKey:
+    """キャッシュキー生成のテスト"""
+
+    def test_normalized_text_shares_key(self):
+        """正規化後に同じテキストは同じキーになることを確認"""
+        assert normalize_text("  ｶﾞｲﾄﾞ\n") == normalize_text("ｶﾞｲﾄﾞ")
+        assert make_cache_key("m", " テキスト ") == make_cache_key("m", "テキスト")
+
+    def test_model_is_part_of_key(self):
+        """モデル名が違えば別のキーになることを確認"""
+        assert make_cache_key("model-a", "テキスト") != make_cache_key("model-b", "テキスト")
+
+
+class TestEmbeddingCache:
+    """EmbeddingCacheクラスのテスト"""
+
+    def test_put_and_get(self, cache):
+        """保存したベクトルを取得できることを確認"""
+        cache.put_many({"k1": [0.1, 0.2, 0.3]})
+
+        found = cache.get_many(["k1", "k2"])
+
+        assert found["k1"] == pytest.approx([0.1, 0.2, 0.3])
+        assert "k2" not in found
+        assert cache.hits == 1
+        assert cache.misses == 1
+
+    def test_persistence(self, tmp_path):
+        """再オープン後もキャッシュが残っていることを確認"""
+        path = str(tmp_path / "cache.sqlite3")
+        first = EmbeddingCache(path=path, max_mb=10)
+        first.put_many({"k1": [0.5, 0.25]})
+        first.close()
+
+        second = EmbeddingCache(path=path, max_mb=10)
+        assert second.get_many(["k1"])["k1"] == pytest.approx([0.5, 0.25], abs=1e-3)
+        second.close()
+
+    def test_float16_is_compact(self, tmp_path):
+        """float16ではfloat32の半分のサイズで保存されることを確認"""
+        half = EmbeddingCache(path=str(tmp_path / "f16.sqlite3"), max_mb=10, dtype="float16")
+        full = EmbeddingCache(path=str(tmp_path / "f32.sqlite3"), max_mb=10, dtype="float32")
+        vector = [0.1] * 768
+
+        half.put_many({"k": vector})
+        full.put_many({"k": vector})
+
+        assert half.stats()["size_mb"] * 2 == pytest.approx(full.stats()["size_mb"])
+        assert half.get_many(["k"])["k"] == pytest.approx(vector, abs=1e-3)
+        half.close()
+        full.close()
+
+    def test_lru_eviction(self, tmp_path):
+        """上限を超えると最終アクセスの古いエントリから削除されることを確認"""
+        # 768次元のfloat32は3072バイト。上限を約10エントリ分に設定
+        cache = EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), max_mb=30720 / (1024 * 1024), dtype="float32")
+        vector = [0.1] * 768
+
+        cache.put_many({f"k{i}": vector for i in range(5)})
+        cache.get_many(["k0"])  # k0を最近使ったものにする
+        cache.put_many({f"k{i}": vector for i in range(5, 12)})
+
+        stats = cache.stats()
+        assert stats["evictions"] > 0
+        assert stats["size_mb"] * 1024 * 1024 <= 30720
+        assert "k0" in cache.get_many(["k0"])
+        assert "k1" not in cache.get_many(["k1"])
+        cache.close()
+
+    def test_invalid_dtype(self, tmp_path):
+        """サポート外の型でエラーになることを確認"""
+        with pytest.raises(ValueError):
+            EmbeddingCache(path=str(tmp_path / "cache.sqlite3"), dtype="int8")
+
+
+class TestCachedEmbeddings:
+    """CachedEmbeddingsクラスのテスト"""
+
+    def test_only_misses_are_embedded(self, cache):
+        """キャッシュにないテキストだけが埋め込まれることを確認"""
+        inner = _fake_inner()
+        embeddings = CachedEmbeddings(inner, cache, model="test-model")
+
+        first = embeddings.embed_documents(["あ", "いい"])
+        second = embeddings.embed_documents(["いい", "ううう", "ううう"])
+
+        assert first == [[1.0] * 4, [2.0] * 4]
+        assert second == [[2.0] * 4, [3.0] * 4, [3.0] * 4]
+        assert inner.embed_documents.call_args_list[1].args[0] == ["ううう"]
+        assert embeddings.stats()["hits"] == 1
+
+    def test_embed_query_passthrough(self, cache):
+        """クエリの埋め込みは内部モデルに委譲されることを確認"""
+        inner = MagicMock()
+        inner.embed_query.return_value = [0.1, 0.2]
+        embeddings = CachedEmbeddings(inner, cache, model="test-model")
+
+        assert embeddings.embed_query("質問") == [0.1, 0.2]
+        inner.embed_query.assert_called_once_with("質問")
+
+
+class TestQueryEmbeddingCache:
+    """QueryEmbeddingCacheクラスのテスト"""
+
+    def _inner(self):
+        inner = MagicMock()
+        inner.embed_query.side_effect = lambda text: [float(len(text)), 1.0]
+        return inner
+
+    def test_normalize_query(self):
+        """全角・半角と空白の違いが吸収されることを確認"""
+        assert normalize_query("  東京タワーの\n高さは？　ＲＡＧ  ") == "東京タワーの 高さは? RAG"
+
+    def test_repeated_query_skips_embedding(self):
+        """正規化すると同じ質問は埋め込みモデルを呼ばずに返すことを確認"""
+        inner = self._inner()
+        embeddings = QueryEmbeddingCache(inner, model="test-model", capacity=8)
+
+        first = embeddings.embed_query("東京タワーの高さは？")
+        second = embeddings.embed_query(" 東京タワーの高さは? ")
+
+        assert first == second
+        inner.embed_query.assert_called_once_with("東京タワーの高さは?")
+        assert embeddings.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1, "capacity": 8}
+
+    def test_least_recently_used_is_evicted(self):
+        """上限を超えると最も長く使われていない質問から削除されることを確認"""
+        inner = self._inner()
+        embeddings = QueryEmbeddingCache(inner, model="test-model", capacity=2)
+
+        embeddings.embed_query("a")
+        embeddings.embed_query("b")
+        embeddings.embed_query("a")  # aを最近使ったものにする
+        embeddings.embed_query("c")  # bが削除される
+        embeddings.embed_query("a")
+        embeddings.embed_query("b")
+
+        assert [call.args[0] for call in inner.embed_query.call_args_list] == ["a", "b", "c", "b"]
+        assert embeddings.stats()["entries"] == 2
+
+    def test_documents_are_not_cached(self):
+        """embed_documentsはキャッシュせずに内部の埋め込みモデルに渡すことを確認"""
+        inner = _fake_inner()
+        embeddings = QueryEmbeddingCache(inner, model="test-model", capacity=8)
+
+        embeddings.embed_documents(["a", "a"])
+
+        inner.embed_documents.assert_called_once_with(["a", "a"])
+        assert embeddings.stats()["entries"] == 0
+
+
+class TestCreateEmbeddingsWithCache:
+    """create_embeddingsのキャッシュ指定のテスト"""
+
+    @patch('models.embeddings.EmbeddingCache')
+    @patch('models.embeddings.OllamaEmbeddings')
+    def test_create_embeddings_with_cache(self, mock_ollama_embeddings, mock_cache):
+        """use_cache=TrueでCachedEmbeddingsが返されることを確認"""
+        mock_instance = MagicMock()
+        mock_instance.model = "nomic-embed-text"
+        mock_ollama_embeddings.return_value = mock_instance
+
+        result = create_embeddings(use_cache=True)
+
+        assert isinstance(result, CachedEmbeddings)
+        assert result.embeddings == mock_instance.initialize.return_value
+        assert result.model == "nomic-embed-text"
+
+    @patch('models.embeddings.OllamaEmbeddings')
+    def test_create_embeddings_with_query_cache(self, mock_ollama_embeddings):
+        """query_cache=TrueでQueryEmbeddingCacheが返されることを確認"""
+        mock_instance = MagicMock()
+        mock_instance.model = "nomic-embed-text"
+        mock_ollama_embeddings.return_value = mock_instance
+
+        result = create_embeddings(query_cache=True)
+
+        assert isinstance(result, QueryEmbeddingCache)
+        assert result.embeddings == mock_instance.initialize.return_value
+        assert result.model == "nomic-embed-text"
@@ -4,7 +4,7 @@
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from models.embeddings import OllamaEmbeddings, create_embeddings
+from models.embeddings import OllamaEmbeddings, create_embeddings, is_ollama_available
 
 
 class TestOllamaEmbeddings:
@@ -181,3 +181,22 @@ class TestCreateEmbeddings:
 
         assert result == mock_initialized
         mock_ollama_embeddings.assert_called_once_with(model="custom-model")
+
+
+class TestIsOllamaAvailable:
+    """is_ollama_available関数のテスト"""
+
+    @patch('models.embeddings.urllib.request.urlopen')
+    def test_available(self, mock_urlopen):
+        """Ollamaが応答した場合はTrueを返すことを確認"""
+        mock_urlopen.return_value.__enter__.return_value.status = 200
+
+        assert is_ollama_available() is True
+        assert mock_urlopen.call_args.args[0].endswith("/api/tags")
+
+    @patch('models.embeddings.urllib.request.urlopen')
+    def test_unavailable(self, mock_urlopen):
+        """接続できない場合はFalseを返すことを確認"""
+        mock_urlopen.side_effect = OSError("Connection refused")
+
+        assert is_ollama_available() is False
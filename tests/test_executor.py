@@ -0,0 +1,122 @@
+"""
+パイプライン実行モジュールのテスト
+"""
+
+import threading
+import time
+import pytest
+from pipeline.executor import PipelinedExecutor, format_stage_report
+
+
+def _batches(count, size=2):
+    return ([f"b{i}-{j}" for j in range(size)] for i in range(count))
+
+
+class TestPipelinedExecutor:
+    """PipelinedExecutorクラスのテスト"""
+
+    def test_all_batches_committed_in_order(self):
+        """全バッチが生成順に保存されることを確認"""
+        committed = []
+        executor = PipelinedExecutor(
+            embed_fn=lambda batch: [[float(len(item))] for item in batch],
+            upsert_fn=lambda batch, vectors: committed.append((batch, vectors))
+        )
+
+        stats = executor.run(_batches(5))
+
+        assert [batch[0] for batch, _ in committed] == [f"b{i}-0" for i in range(5)]
+        assert committed[0][1] == [[4.0], [4.0]]
+        assert stats["embed"].batches == 5
+        assert stats["upsert"].items == 10
+
+    def test_embed_overlaps_upsert(self):
+        """保存中に次のバッチの埋め込みが進むことを確認"""
+        events = []
+        lock = threading.Lock()
+
+        def embed(batch):
+            with lock:
+                events.append(("embed_start", batch[0]))
+            time.sleep(0.05)
+            return [[0.0] for _ in batch]
+
+        def upsert(batch, vectors):
+            with lock:
+                events.append(("upsert_start", batch[0]))
+            time.sleep(0.05)
+
+        PipelinedExecutor(embed_fn=embed, upsert_fn=upsert).run(_batches(3))
+
+        # 1件目の保存開始より前、もしくは保存中に2件目の埋め込みが始まっている
+        upsert_first = events.index(("upsert_start", "b0-0"))
+        embed_second = events.index(("embed_start", "b1-0"))
+        assert embed_second <= upsert_first + 1
+
+    def test_queue_is_bounded(self):
+        """下流が遅くても上流が先行しすぎないことを確認"""
+        produced = []
+        upsert_started = threading.Event()
+        release = threading.Event()
+
+        def source():
+            for i in range(20):
+                produced.append(i)
+                yield [i]
+
+        def upsert(batch, vectors):
+            upsert_started.set()
+            release.wait(timeout=5)
+
+        executor = PipelinedExecutor(
+            embed_fn=lambda batch: [[0.0]],
+            upsert_fn=upsert,
+            queue_size=1
+        )
+        runner = threading.Thread(target=executor.run, args=(source(),))
+        runner.start()
+        upsert_started.wait(timeout=5)
+        time.sleep(0.2)
+
+        # 処理中3 + キュー2 + 次の生成分1 を超えない
+        assert len(produced) <= 6
+        release.set()
+        runner.join(timeout=5)
+        assert len(produced) == 20
+
+    def test_error_in_stage_is_raised(self):
+        """ステージで発生した例外が呼び出し元に伝わることを確認"""
+        def embed(batch):
+            if batch[0] == "b2-0":
+                raise RuntimeError("Ollama停止")
+            return [[0.0] for _ in batch]
+
+        executor = PipelinedExecutor(embed_fn=embed, upsert_fn=lambda batch, vectors: None)
+
+        with pytest.raises(RuntimeError, match="Ollama停止"):
+            executor.run(_batches(10))
+
+    def test_on_committed_callback(self):
+        """保存完了ごとにコールバックが呼ばれることを確認"""
+        numbers = []
+        executor = PipelinedExecutor(
+            embed_fn=lambda batch: [[0.0] for _ in batch],
+            upsert_fn=lambda batch, vectors: None
+        )
+
+        executor.run(_batches(3), on_committed=lambda number, batch: numbers.append(number))
+
+        assert numbers == [1, 2, 3]
+
+    def test_format_stage_report(self):
+        """稼働状況の表にボトルネックが含まれることを確認"""
+        executor = PipelinedExecutor(
+            embed_fn=lambda batch: (time.sleep(0.02), [[0.0] for _ in batch])[1],
+            upsert_fn=lambda batch, vectors: None
+        )
+        stats = executor.run(_batches(3))
+
+        report = format_stage_report(stats)
+
+        assert "embed" in report
+        assert "ボトルネック" in report
@@ -0,0 +1,132 @@
+"""
+検索フィルタモジュールのテスト
+※インメモリのQdrantクライアントを使用するため、外部サービスは不要です
+"""
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from loaders.document_loader import DocumentLoaderManager
+from vector_store.filters import create_metadata_filter, match_filter
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """フォルダ・形式の異なるドキュメントを保存したマネージャーを返す"""
+    for relative, text in [
+        ("manuals/setup.txt", "セットアップ手順を説明します。"),
+        ("manuals/usage.csv", "項目,説明\n検索,セットアップ後に実行します"),
+        ("manuals_old/setup.txt", "古いセットアップ手順を説明します。"),
+        ("notes/memo.txt", "セットアップに関するメモです。")
+    ]:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    loader = DocumentLoaderManager()
+    documents = [doc for path in loader.iter_files(str(tmp_path)) for doc in loader.load_document(str(path))]
+    documents.append(Document(
+        page_content="質問: セットアップは？\n回答: 手順書を参照してください。",
+        metadata={"source": "qa.jsonl", "line_number": 12}
+    ))
+
+    vector_store_manager = QdrantVectorStoreManager(
+        collection_name="test_filters",
+        embeddings=DeterministicFakeEmbedding(size=768)
+    )
+    vector_store_manager._client = QdrantClient(location=":memory:")
+    vector_store_manager.create_collection()
+    vector_store_manager.add_documents(documents)
+    return vector_store_manager
+
+
+class TestCreateMetadataFilter:
+    """create_metadata_filter関数のテスト"""
+
+    def test_no_conditions(self):
+        """条件がない場合はNoneを返すことを確認"""
+        assert create_metadata_filter() is None
+
+    def test_extension_is_normalized(self):
+        """拡張子の表記ゆれがそろえられることを確認"""
+        search_filter = create_metadata_filter(file_extension=["PDF", ".md"])
+
+        assert search_filter.must[0].key == "metadata.file_extension"
+        assert search_filter.must[0].match.any == [".pdf", ".md"]
+
+    def test_line_number_range(self):
+        """行番号の範囲指定がRange条件になることを確認"""
+        search_filter = create_metadata_filter(line_number=(10, None))
+
+        assert search_filter.must[0].range.gte == 10
+        assert search_filter.must[0].range.lte is None
+
+
+class TestMatchFilter:
+    """match_filter関数のテスト"""
+
+    def test_matches_like_qdrant(self):
+        """配列の要素・入れ子のshould・範囲の条件を評価できることを確認"""
+        metadata = {
+            "file_path": "/docs/manuals/setup.pdf",
+            "file_dirs": ["/docs", "/docs/manuals"],
+            "file_extension": ".pdf",
+            "line_number": 12
+        }
+
+        assert match_filter(create_metadata_filter(path_prefix="/docs", file_extension="PDF"), metadata)
+        assert match_filter(create_metadata_filter(path_prefix="/docs/manuals/setup.pdf"), metadata)
+        assert match_filter(create_metadata_filter(line_number=(10, 20)), metadata)
+        assert not match_filter(create_metadata_filter(path_prefix="/docs/man"), metadata)
+        assert not match_filter(create_metadata_filter(file_extension=["md", "txt"]), metadata)
+
+
+class TestFilteredSearch:
+    """絞り込み検索のテスト"""
+
+    def _file_paths(self, results):
+        return {doc.metadata["file_path"] for doc in results}
+
+    def test_filter_by_extension(self, manager):
+        """拡張子で絞り込めることを確認"""
+        results = manager.similarity_search(
+            "セットアップ", k=10, filter=create_metadata_filter(file_extension="csv")
+        )
+
+        assert results
+        assert {doc.metadata["file_extension"] for doc in results} == {".csv"}
+
+    def test_filter_by_path_prefix(self, manager, tmp_path):
+        """フォルダ単位で絞り込み、名前が前方一致するだけの別フォルダは含まないことを確認"""
+        results = manager.similarity_search(
+            "セットアップ", k=10, filter=create_metadata_filter(path_prefix=str(tmp_path / "manuals"))
+        )
+
+        assert self._file_paths(results) == {
+            str(tmp_path / "manuals" / "setup.txt"),
+            str(tmp_path / "manuals" / "usage.csv")
+        }
+
+    def test_filter_combines_conditions(self, manager, tmp_path):
+        """複数の条件がANDで組み合わされることを確認"""
+        results = manager.similarity_search_with_score(
+            "セットアップ",
+            k=10,
+            filter=create_metadata_filter(file_name="setup.txt", path_prefix=str(tmp_path / "manuals_old"))
+        )
+
+        assert self._file_paths([doc for doc, _ in results]) == {str(tmp_path / "manuals_old" / "setup.txt")}
+
+    def test_filter_by_source_and_line_number(self, manager):
+        """ingest_jsonl_qa.pyのsource・line_numberで絞り込めることを確認"""
+        results = manager.similarity_search(
+            "セットアップ", k=10, filter=create_metadata_filter(source="qa.jsonl", line_number=(10, 20))
+        )
+        missing = manager.similarity_search(
+            "セットアップ", k=10, filter=create_metadata_filter(source="qa.jsonl", line_number=3)
+        )
+
+        assert [doc.metadata["line_number"] for doc in results] == [12]
+        assert missing == []
@@ -0,0 +1,108 @@
+"""
+取り込みマニフェストモジュールのテスト
+"""
+
+import os
+import pytest
+from pipeline.manifest import IngestManifest, compute_file_hash
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """取り込み元ディレクトリを作成"""
+    source = tmp_path / "docs"
+    source.mkdir()
+    (source / "a.txt").write_text("ファイルA", encoding="utf-8")
+    (source / "b.txt").write_text("ファイルB", encoding="utf-8")
+    return source
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """空のマニフェストを作成"""
+    return IngestManifest(str(tmp_path / "state" / "manifest.json"))
+
+
+def _files(source_dir):
+    return sorted(source_dir.glob("*.txt"))
+
+
+class TestIngestManifest:
+    """IngestManifestクラスのテスト"""
+
+    def test_first_run_marks_all_added(self, manifest, source_dir):
+        """初回は全ファイルが新規として扱われることを確認"""
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert [p.name for p in diff.added] == ["a.txt", "b.txt"]
+        assert diff.changed == []
+        assert diff.deleted == []
+
+    def test_unchanged_files_are_skipped(self, manifest, source_dir):
+        """取り込み済みで変更のないファイルがスキップされることを確認"""
+        manifest.apply(manifest.diff(_files(source_dir), root=source_dir))
+
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert diff.to_ingest == []
+        assert len(diff.unchanged) == 2
+
+    def test_changed_content_is_detected(self, manifest, source_dir):
+        """内容が変わったファイルが変更として検出されることを確認"""
+        manifest.apply(manifest.diff(_files(source_dir), root=source_dir))
+        (source_dir / "a.txt").write_text("ファイルAを更新しました", encoding="utf-8")
+
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert [p.name for p in diff.changed] == ["a.txt"]
+        assert [p.name for p in diff.unchanged] == ["b.txt"]
+
+    def test_touched_file_with_same_content_is_unchanged(self, manifest, source_dir):
+        """更新時刻だけ変わったファイルは取り込み対象にならないことを確認"""
+        manifest.apply(manifest.diff(_files(source_dir), root=source_dir))
+        target = source_dir / "a.txt"
+        stat = target.stat()
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert diff.to_ingest == []
+        assert str(target.absolute()) in diff.entries
+
+    def test_deleted_files_within_root(self, manifest, source_dir, tmp_path):
+        """削除されたファイルはルート配下のものだけ検出されることを確認"""
+        other = tmp_path / "other"
+        other.mkdir()
+        (other / "c.txt").write_text("別ディレクトリ", encoding="utf-8")
+        manifest.apply(manifest.diff(_files(source_dir) + [other / "c.txt"]))
+
+        (source_dir / "b.txt").unlink()
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert diff.deleted == [str((source_dir / "b.txt").absolute())]
+
+    def test_failed_files_are_retried(self, manifest, source_dir):
+        """取り込みに失敗したファイルは次回も取り込み対象になることを確認"""
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+        manifest.apply(diff, failed_files=[str(source_dir / "a.txt")])
+
+        diff = manifest.diff(_files(source_dir), root=source_dir)
+
+        assert [p.name for p in diff.added] == ["a.txt"]
+
+    def test_save_and_reload(self, manifest, source_dir):
+        """保存したマニフェストを再読み込みできることを確認"""
+        manifest.apply(manifest.diff(_files(source_dir), root=source_dir))
+        manifest.save()
+
+        reloaded = IngestManifest(str(manifest.path))
+        key = str((source_dir / "a.txt").absolute())
+
+        assert reloaded.entries[key].sha256 == compute_file_hash(source_dir / "a.txt")
+        assert reloaded.diff(_files(source_dir), root=source_dir).to_ingest == []
+
+    def test_for_collection_path(self, tmp_path):
+        """コレクションごとにマニフェストのパスが分かれることを確認"""
+        manifest = IngestManifest.for_collection("docs", state_dir=str(tmp_path))
+
+        assert manifest.path == tmp_path / "manifests" / "docs.json"
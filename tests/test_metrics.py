@@ -0,0 +1,157 @@
+"""
+取り込み計測モジュールのテスト
+"""
+
+import json
+import time
+from unittest.mock import MagicMock
+from loaders.document_loader import DocumentLoaderManager
+from utils.text_splitter import create_text_splitter
+from pipeline.metrics import STAGES, IngestMetrics, format_metrics_report
+from pipeline.streaming import StreamingIngestPipeline
+
+
+class TestIngestMetrics:
+    """IngestMetricsクラスのテスト"""
+
+    def test_measure_accumulates(self):
+        """区間の時間と件数がステージに加算されることを確認"""
+        metrics = IngestMetrics()
+
+        for _ in range(2):
+            with metrics.measure("embed", items=5):
+                time.sleep(0.01)
+
+        stage = metrics.stages["embed"]
+        assert stage.calls == 2
+        assert stage.items == 10
+        assert stage.wall_seconds >= 0.02
+        assert stage.peak_rss_mb > 0
+
+    def test_nested_measure_is_exclusive(self):
+        """入れ子の区間の時間が外側から差し引かれることを確認"""
+        metrics = IngestMetrics()
+
+        with metrics.measure("split"):
+            with metrics.measure("load"):
+                time.sleep(0.05)
+
+        assert metrics.stages["load"].wall_seconds >= 0.05
+        assert metrics.stages["split"].wall_seconds < 0.02
+
+    def test_timed_iter_counts_items(self):
+        """イテレータの要素数と生成時間が記録されることを確認"""
+        metrics = IngestMetrics()
+
+        def slow_source():
+            for i in range(3):
+                time.sleep(0.01)
+                yield i
+
+        items = list(metrics.timed_iter("split", metrics.timed_iter("load", slow_source())))
+
+        assert items == [0, 1, 2]
+        assert metrics.stages["load"].items == 3
+        assert metrics.stages["split"].items == 3
+        assert metrics.stages["load"].wall_seconds >= 0.03
+        assert metrics.stages["split"].wall_seconds < metrics.stages["load"].wall_seconds
+
+    def test_record_file_by_extension(self, tmp_path):
+        """ファイル形式ごとに集計されることを確認"""
+        metrics = IngestMetrics()
+        for name in ["a.txt", "b.txt", "c.PDF"]:
+            path = tmp_path / name
+            path.write_bytes(b"x" * 100)
+            metrics.record_file(str(path), documents=2, wall_seconds=0.5, cpu_seconds=0.25)
+        metrics.record_chunk(".txt")
+
+        txt = metrics.file_types[".txt"]
+        assert txt.files == 2
+        assert txt.bytes == 200
+        assert txt.documents == 4
+        assert txt.chunks == 1
+        assert txt.files_per_second == 2.0
+        assert metrics.file_types[".pdf"].files == 1
+
+    def test_report_is_json_lines(self, tmp_path):
+        """レポートがJSON Lines形式で書き出されることを確認"""
+        report_path = tmp_path / "reports" / "run.jsonl"
+        metrics = IngestMetrics(report_path=str(report_path))
+        with metrics.measure("upsert", items=3, batch_size=3):
+            pass
+        metrics.close()
+
+        events = [json.loads(line) for line in report_path.read_text(encoding="utf-8").splitlines()]
+        kinds = [event["event"] for event in events]
+        assert kinds[0] == "stage"
+        assert events[0]["batch_size"] == 3
+        assert kinds.count("stage_summary") == len(STAGES)
+        assert kinds[-1] == "run_summary"
+        assert events[-1]["status"] == "completed"
+
+    def test_report_records_failed_status(self, tmp_path):
+        """失敗した取り込みでも結果を付けて集計が書き出されることを確認"""
+        report_path = tmp_path / "run.jsonl"
+        metrics = IngestMetrics(report_path=str(report_path))
+        metrics.close(status="failed")
+        metrics.close()
+
+        events = [json.loads(line) for line in report_path.read_text(encoding="utf-8").splitlines()]
+        assert [event["status"] for event in events if event["event"] == "run_summary"] == ["failed"]
+
+    def test_stage_rss_is_sampled_per_stage(self):
+        """前のステージで増えたメモリを解放すると、後のステージの最大RSSに残らないことを確認"""
+        metrics = IngestMetrics()
+
+        with metrics.measure("embed"):
+            buffer = b"x" * (128 * 1024 * 1024)
+        del buffer
+        with metrics.measure("upsert"):
+            pass
+
+        assert metrics.stages["upsert"].peak_rss_mb < metrics.stages["embed"].peak_rss_mb - 64
+
+    def test_format_metrics_report(self, tmp_path):
+        """集計表にステージとファイル形式が含まれることを確認"""
+        metrics = IngestMetrics()
+        path = tmp_path / "a.txt"
+        path.write_text("本文", encoding="utf-8")
+        metrics.record_file(str(path), documents=1, wall_seconds=0.1, cpu_seconds=0.1)
+
+        report = format_metrics_report(metrics)
+
+        for name in ["load", "split", "embed", "upsert", ".txt", "合計"]:
+            assert name in report
+
+
+class TestPipelineMetrics:
+    """パイプラインの計測のテスト"""
+
+    def test_pipeline_records_all_stages(self, tmp_path):
+        """各ステージの件数とファイル形式ごとの集計が記録されることを確認"""
+        for i in range(3):
+            (tmp_path / f"doc{i}.txt").write_text(f"これは文書{i}の本文です。" * 40, encoding="utf-8")
+        (tmp_path / "table.csv").write_text("id,body\n1,本文\n2,本文\n", encoding="utf-8")
+
+        manager = MagicMock()
+        manager.embeddings.embed_documents.side_effect = lambda texts: [[0.0] * 3 for _ in texts]
+        metrics = IngestMetrics(report_path=str(tmp_path / "report.jsonl"))
+        pipeline = StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=100, chunk_overlap=10),
+            vector_store_manager=manager,
+            batch_size=10,
+            pipelined=True,
+            metrics=metrics
+        )
+
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(tmp_path)))
+        metrics.close()
+
+        assert metrics.stages["load"].items == stats.documents
+        assert metrics.stages["split"].items == stats.chunks
+        assert metrics.stages["embed"].items == stats.chunks
+        assert metrics.stages["upsert"].items == stats.chunks
+        assert metrics.file_types[".txt"].files == 3
+        assert metrics.file_types[".csv"].documents == 2
+        assert sum(t.chunks for t in metrics.file_types.values()) == stats.chunks
@@ -0,0 +1,64 @@
+"""
+MMRモジュールのテスト
+"""
+
+import numpy as np
+import pytest
+from vector_store.mmr import maximal_marginal_relevance
+
+
+def _naive_mmr(query, candidates, k, lambda_mult):
+    """1件ずつ類似度を計算する素朴な実装（比較用）"""
+    def cosine(a, b):
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    selected = []
+    while len(selected) < min(k, len(candidates)):
+        best, best_score = None, -np.inf
+        for i, candidate in enumerate(candidates):
+            if i in selected:
+                continue
+            if not selected:
+                # 1件目は関連度のみで選ぶ
+                score = cosine(query, candidate)
+            else:
+                redundancy = max(cosine(candidate, candidates[j]) for j in selected)
+                score = lambda_mult * cosine(query, candidate) - (1 - lambda_mult) * redundancy
+            if score > best_score:
+                best, best_score = i, score
+        selected.append(best)
+    return selected
+
+
+class TestMaximalMarginalRelevance:
+    """maximal_marginal_relevance関数のテスト"""
+
+    @pytest.mark.parametrize("lambda_mult", [0.0, 0.3, 0.5, 0.9])
+    def test_matches_naive_implementation(self, lambda_mult):
+        """素朴な実装と同じ候補を同じ順に選ぶことを確認"""
+        rng = np.random.default_rng(0)
+        query = rng.normal(size=16)
+        candidates = rng.normal(size=(30, 16))
+
+        assert maximal_marginal_relevance(query, candidates, 6, lambda_mult) == \
+            _naive_mmr(query, candidates, 6, lambda_mult)
+
+    def test_skips_near_duplicates(self):
+        """ほぼ同じ候補より、関連度が少し低くても異なる候補を選ぶことを確認"""
+        query = [1.0, 0.0, 0.0]
+        candidates = [
+            [1.0, 0.1, 0.0],    # 最も関連度が高い
+            [1.0, 0.11, 0.0],   # 0とほぼ同じ（重なりのある隣接チャンク）
+            [0.8, 0.0, 0.6]     # 関連度は低いが内容が異なる
+        ]
+
+        assert maximal_marginal_relevance(query, candidates, 2, 0.5) == [0, 2]
+        assert maximal_marginal_relevance(query, candidates, 2, 1.0) == [0, 1]
+
+    def test_k_larger_than_candidates(self):
+        """候補数より多いkでも候補をすべて返すことを確認"""
+        assert sorted(maximal_marginal_relevance([1.0, 0.0], [[1.0, 0.0], [0.0, 1.0]], 5, 0.5)) == [0, 1]
+
+    def test_no_candidates(self):
+        """候補がない場合は空のリストを返すことを確認"""
+        assert maximal_marginal_relevance([1.0, 0.0], [], 4, 0.5) == []
@@ -0,0 +1,232 @@
+"""
+NumPyベクターストアモジュールのテスト
+※一時ディレクトリに保存するため、外部サービスは不要です
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from vector_store.factory import create_vector_store_manager
+from vector_store.filters import create_metadata_filter
+from vector_store.numpy_store import NumpyVectorStoreManager
+from vector_store.qdrant_client import QdrantVectorStoreManager
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=32)
+
+
+def _store(path, dtype="float32"):
+    store = NumpyVectorStoreManager(collection_name="test_documents", embeddings=EMBEDDINGS, path=str(path), dtype=dtype)
+    store.vector_size = 32
+    store.initialize()
+    return store
+
+
+@pytest.fixture
+def store(tmp_path):
+    """一時ディレクトリに作成したNumPyベクターストアを返す"""
+    numpy_store = _store(tmp_path)
+    numpy_store.create_collection()
+    return numpy_store
+
+
+def _documents(count=12):
+    return [
+        Document(
+            page_content=f"チャンク{i}",
+            metadata={
+                "file_path": f"/docs/{i % 3}.txt",
+                "file_name": f"{i % 3}.txt",
+                "file_extension": ".txt",
+                "chunk_index": i
+            }
+        )
+        for i in range(count)
+    ]
+
+
+class TestNumpyVectorStoreManager:
+    """NumpyVectorStoreManagerクラスのテスト"""
+
+    def test_methods_require_initialization(self, tmp_path):
+        """初期化前の呼び出しはエラーになることを確認"""
+        numpy_store = NumpyVectorStoreManager(collection_name="test_documents", path=str(tmp_path))
+
+        with pytest.raises(ValueError):
+            numpy_store.create_collection()
+
+    def test_matches_qdrant_results(self, store):
+        """Qdrantと同じ順位・スコアの結果を返すことを確認"""
+        qdrant = QdrantVectorStoreManager(collection_name="test_documents", embeddings=EMBEDDINGS)
+        qdrant.vector_size = 32
+        qdrant._client = QdrantClient(location=":memory:")
+        qdrant.create_collection()
+        qdrant.add_documents(_documents())
+        store.add_documents(_documents())
+
+        expected = qdrant.similarity_search_with_score("チャンク5", k=4, retrieval_mode="dense")
+        actual = store.similarity_search_with_score("チャンク5", k=4)
+
+        assert [doc.page_content for doc, _ in actual] == [doc.page_content for doc, _ in expected]
+        assert [score for _, score in actual] == pytest.approx([score for _, score in expected], abs=1e-5)
+        assert actual[0][0].metadata["_id"] == expected[0][0].metadata["_id"]
+
+    def test_persisted_and_readable_from_another_instance(self, store, tmp_path):
+        """保存した内容を別のインスタンス（別プロセス相当）から読み取り専用で検索できることを確認"""
+        store.add_documents(_documents())
+        store.write_barrier()
+        reader = _store(tmp_path)
+
+        assert reader.get_collection_info()["points_count"] == 12
+        assert isinstance(reader._segments[0].vectors, np.memmap)
+        assert reader.similarity_search("チャンク7", k=1)[0].page_content == "チャンク7"
+
+        # 書き込み側が新しいバージョンを書き出すと、読み取り側は次の検索で切り替える
+        store.delete_by_file_paths(["/docs/1.txt"])
+        assert all(doc.metadata["file_path"] != "/docs/1.txt" for doc in reader.similarity_search("チャンク7", k=12))
+
+    def test_upsert_overwrites_same_id(self, store):
+        """同じIDで保存し直すと上書きされることを確認"""
+        store.retain_seconds = 0
+        store.add_documents(_documents())
+        store.write_barrier()
+        store.add_documents(_documents())
+        store.write_barrier()
+
+        assert store.get_collection_info()["points_count"] == 12
+        # 削除済みの行が多いため1つのセグメントにまとめ直され、参照されないファイルは削除される
+        assert len(store._segments) == 1
+        assert {entry.name for entry in store.path.iterdir()} == {"CURRENT", store._version, store._segments[0].name}
+
+    def test_appends_without_rewriting_existing_segments(self, store):
+        """追加・取得元ファイルの更新で既存のセグメントを書き直さないことを確認"""
+        store.add_documents(_documents())
+        store.write_barrier()
+        first = store._segments[0].name
+        first_stat = (store.path / first / "vectors.npy").stat()
+
+        store.add_documents([Document(page_content=f"追加{i}", metadata={"file_path": "/docs/new.txt"}) for i in range(2)])
+        point_id = store.similarity_search("チャンク0", k=1)[0].metadata["_id"]
+        store.set_source_files({point_id: ["/docs/0.txt", "/docs/other.txt"]})
+
+        assert store._segments[0].name == first
+        assert (store.path / first / "vectors.npy").stat().st_mtime_ns == first_stat.st_mtime_ns
+        assert len(store._segments) == 2  # 末尾の小さいセグメントはまとめられる
+        assert store.get_collection_info()["points_count"] == 14
+        assert store.find_dependent_files(["/docs/0.txt"]) == {"/docs/other.txt"}
+        assert store.similarity_search("チャンク0", k=1)[0].metadata["_id"] == point_id
+
+    def test_reader_survives_compaction(self, store, tmp_path):
+        """書き込み側がセグメントをまとめ直して削除しても、読み込み済みの読み取り側は読み続けられることを確認"""
+        store.add_documents(_documents())
+        store.write_barrier()
+        reader = _store(tmp_path)
+        old_segment = reader._segments[0].name
+
+        store.retain_seconds = 0
+        store.delete_by_file_paths(["/docs/1.txt"])
+
+        assert not (store.path / old_segment).exists()
+        assert next(reader._read_payloads([7]))["page_content"] == "チャンク7"
+        assert len(reader.similarity_search("チャンク7", k=12)) == 8
+
+    def test_id_map_is_updated_incrementally(self, store):
+        """書き出しのたびにポイントIDの対応を作り直さず、変更のあった行の分だけ更新することを確認"""
+        documents = _documents()
+        store.add_documents(documents[:6])
+        store.write_barrier()
+        store._row_of("")
+
+        store.add_documents(documents[3:])
+        store.write_barrier()
+        store.delete_by_file_paths(["/docs/2.txt"])
+        updated = store._id_rows
+
+        store._id_rows = None
+        store._row_of("")
+        assert updated == store._id_rows
+        assert len(updated) == 8
+
+    def test_add_documents_is_buffered(self, store):
+        """add_documentsは呼び出しごとにセグメントを書き出さないことを確認"""
+        documents = _documents()
+        for i in range(0, len(documents), 3):
+            store.add_documents(documents[i:i + 3])
+
+        assert store.pending_writes == 12
+        assert store._segments == []
+        assert store.write_barrier() == 12
+        assert len(store._segments) == 1
+
+    def test_pending_writes_are_flushed(self, store):
+        """溜めた書き込みはwrite_barrierで書き出されることを確認"""
+        documents = _documents()
+        store.upsert_embedded(documents, EMBEDDINGS.embed_documents([doc.page_content for doc in documents]))
+
+        assert store.get_collection_info()["points_count"] == 0
+        assert store.write_barrier() == 12
+
+    def test_search_with_filter(self, store):
+        """メタデータで絞り込んで検索できることを確認"""
+        store.add_documents(_documents())
+
+        results = store.similarity_search("チャンク0", k=10, filter=create_metadata_filter(file_name="2.txt"))
+
+        assert len(results) == 4
+        assert {doc.metadata["file_name"] for doc in results} == {"2.txt"}
+
+    def test_float16_storage(self, tmp_path):
+        """float16で保存しても同じ最上位の結果を返すことを確認"""
+        numpy_store = _store(tmp_path, dtype="float16")
+        numpy_store.create_collection()
+        numpy_store.add_documents(_documents())
+
+        results = numpy_store.similarity_search_with_score("チャンク3", k=1)
+
+        assert numpy_store._segments[0].vectors.dtype == np.float16
+        assert results[0][0].page_content == "チャンク3"
+        assert results[0][1] == pytest.approx(1.0, abs=1e-3)
+
+    def test_source_files_roundtrip(self, store):
+        """取得元ファイルの記録・検索・取り除きができることを確認"""
+        store.add_documents(_documents())
+        point_id = store.similarity_search("チャンク0", k=1)[0].metadata["_id"]
+
+        store.set_source_files({point_id: ["/docs/0.txt", "/docs/other.txt"]})
+        assert store.find_dependent_files(["/docs/0.txt"]) == {"/docs/other.txt"}
+
+        assert store.remove_source_files(["/docs/other.txt"]) == 1
+        assert store.find_dependent_files(["/docs/0.txt"]) == set()
+
+    def test_max_marginal_relevance_search(self, store):
+        """MMR検索で重複した候補の代わりに別のドキュメントを選ぶことを確認"""
+        documents = [
+            Document(page_content="東京タワー", metadata={"file_path": "/docs/tower.txt", "chunk_index": i})
+            for i in range(3)
+        ] + [Document(page_content="富士山", metadata={"file_path": "/docs/fuji.txt", "chunk_index": 0})]
+        store.add_documents(documents)
+
+        results = store.max_marginal_relevance_search_with_score("東京タワー", k=2, fetch_k=4, lambda_mult=0.3)
+
+        assert [doc.metadata["file_path"] for doc, _ in results] == ["/docs/tower.txt", "/docs/fuji.txt"]
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    def test_reindex_is_not_supported(self, store):
+        """無停止での再構築は明示的なエラーになることを確認"""
+        with pytest.raises(ValueError):
+            store.begin_reindex()
+
+
+class TestCreateVectorStoreManager:
+    """create_vector_store_manager関数のテスト"""
+
+    def test_backend_selection(self):
+        """指定したバックエンドのマネージャーを作成することを確認"""
+        assert isinstance(create_vector_store_manager(backend="numpy"), NumpyVectorStoreManager)
+        assert isinstance(create_vector_store_manager(backend="qdrant"), QdrantVectorStoreManager)
+
+    def test_unknown_backend(self):
+        """サポートされていないバックエンドはエラーになることを確認"""
+        with pytest.raises(ValueError):
+            create_vector_store_manager(backend="faiss")
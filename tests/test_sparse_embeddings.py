@@ -0,0 +1,72 @@
+"""
+疎ベクトル埋め込みモジュールのテスト
+※モデルを使わないため、外部サービスは不要です
+"""
+
+import pytest
+from models.sparse_embeddings import JapaneseBM25SparseEmbeddings, char_ngrams, ngram_index
+
+
+def _weights(vector):
+    return dict(zip(vector.indices, vector.values))
+
+
+class TestCharNgrams:
+    """char_ngrams関数のテスト"""
+
+    def test_bigrams_and_trigrams(self):
+        """文字の並びごとに2-gramと3-gramを作ることを確認"""
+        assert char_ngrams("東京タワー") == [
+            "東京", "京タ", "タワ", "ワー",
+            "東京タ", "京タワ", "タワー"
+        ]
+
+    def test_split_on_symbols(self):
+        """空白・記号をまたぐn-gramは作らないことを確認"""
+        grams = char_ngrams("高さ、333m")
+
+        assert "さ、" not in grams
+        assert "さ3" not in grams
+        assert "333m" not in grams and "33m" in grams
+
+    def test_short_run_kept(self):
+        """n文字未満の並びはそのまま1つの語になることを確認"""
+        assert char_ngrams("山 の") == ["山", "の"]
+
+    def test_normalization(self):
+        """全角英数字と大文字が統一されることを確認"""
+        assert char_ngrams("ＲＡＧ") == char_ngrams("rag")
+
+
+class TestJapaneseBM25SparseEmbeddings:
+    """JapaneseBM25SparseEmbeddingsクラスのテスト"""
+
+    def test_query_weights_are_counts(self):
+        """クエリの重みはn-gramの出現回数になることを確認"""
+        embeddings = JapaneseBM25SparseEmbeddings(ngram_sizes=(2,))
+
+        vector = embeddings.embed_query("東京東京")
+
+        weights = _weights(vector)
+        assert weights[ngram_index("東京")] == 2.0
+        assert weights[ngram_index("京東")] == 1.0
+        assert vector.indices == sorted(vector.indices)
+
+    def test_document_weights_saturate(self):
+        """ドキュメントの重みは出現回数に対して飽和することを確認"""
+        embeddings = JapaneseBM25SparseEmbeddings(ngram_sizes=(2,), k1=1.2, b=0.0)
+
+        once, many = (_weights(v) for v in embeddings.embed_documents(["東京", " ".join(["東京"] * 10)]))
+
+        index = ngram_index("東京")
+        assert once[index] == pytest.approx(1.0)
+        assert once[index] < many[index] < 1.2 + 1
+
+    def test_longer_documents_are_penalized(self):
+        """同じ出現回数なら文書が長いほど重みが小さいことを確認"""
+        embeddings = JapaneseBM25SparseEmbeddings(ngram_sizes=(2,), avg_length=10)
+
+        short, long = embeddings.embed_documents(["東京タワー", "東京タワー" + "あいうえおかきくけこ" * 5])
+
+        index = ngram_index("東京")
+        assert _weights(short)[index] > _weights(long)[index]
@@ -0,0 +1,180 @@
+"""
+ストリーミング取り込みパイプラインのテスト
+"""
+
+import pytest
+from unittest.mock import MagicMock
+from loaders.document_loader import DocumentLoaderManager
+from utils.text_splitter import create_text_splitter
+from pipeline.streaming import StreamingIngestPipeline, iter_batches
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    """複数のテキストファイルを含むディレクトリを作成"""
+    for i in range(3):
+        (tmp_path / f"doc{i}.txt").write_text(
+            f"これは文書{i}の本文です。" * 40,
+            encoding="utf-8"
+        )
+    sub_dir = tmp_path / "sub"
+    sub_dir.mkdir()
+    (sub_dir / "nested.txt").write_text("サブディレクトリの文書です。" * 40, encoding="utf-8")
+    return tmp_path
+
+
+class TestIterBatches:
+    """iter_batches関数のテスト"""
+
+    def test_iter_batches_splits_evenly(self):
+        """指定サイズごとに分割されることを確認"""
+        batches = list(iter_batches(range(7), 3))
+
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+    def test_iter_batches_is_lazy(self):
+        """入力を必要な分だけ消費することを確認"""
+        consumed = []
+
+        def source():
+            for i in range(100):
+                consumed.append(i)
+                yield i
+
+        batches = iter_batches(source(), 5)
+        next(batches)
+
+        assert len(consumed) == 5
+
+    def test_iter_batches_invalid_size(self):
+        """不正なバッチサイズのテスト"""
+        with pytest.raises(ValueError):
+            list(iter_batches([1, 2, 3], 0))
+
+
+class TestStreamingIngestPipeline:
+    """StreamingIngestPipelineクラスのテスト"""
+
+    def _create_pipeline(self, manager, batch_size=10, max_chunks_in_flight=1000, pipelined=False):
+        return StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=100, chunk_overlap=10),
+            vector_store_manager=manager,
+            batch_size=batch_size,
+            max_chunks_in_flight=max_chunks_in_flight,
+            pipelined=pipelined
+        )
+
+    def test_run_stores_all_chunks(self, corpus_dir):
+        """全チャンクがベクターストアに送られることを確認"""
+        manager = MagicMock()
+        pipeline = self._create_pipeline(manager)
+
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        stored = sum(len(call.args[0]) for call in manager.upsert_embedded.call_args_list)
+        assert stats.files == 4
+        assert stats.chunks > 0
+        assert stored == stats.chunks
+        assert stats.batches == manager.upsert_embedded.call_count
+
+    def test_batches_respect_in_flight_cap(self, corpus_dir):
+        """バッチサイズが同時保持数の上限を超えないことを確認"""
+        manager = MagicMock()
+        pipeline = self._create_pipeline(manager, batch_size=50, max_chunks_in_flight=4)
+
+        pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        assert pipeline.effective_batch_size == 4
+        for call in manager.upsert_embedded.call_args_list:
+            assert len(call.args[0]) <= 4
+
+    def test_first_batch_stored_before_corpus_is_read(self, corpus_dir):
+        """全ファイルを読み込む前に最初のバッチが保存されることを確認"""
+        opened = []
+        loader = DocumentLoaderManager()
+
+        def tracking_files():
+            for path in loader.iter_files(str(corpus_dir)):
+                opened.append(path)
+                yield path
+
+        opened_at_store = []
+        manager = MagicMock()
+        manager.upsert_embedded.side_effect = lambda batch, vectors: opened_at_store.append(len(opened))
+
+        pipeline = self._create_pipeline(manager, batch_size=2)
+        pipeline.run(tracking_files())
+
+        assert opened_at_store[0] < len(opened)
+
+    def test_failed_file_is_reported(self, corpus_dir):
+        """読み込みに失敗したファイルが記録され、処理が継続することを確認"""
+        broken = corpus_dir / "broken.txt"
+        broken.write_bytes(b"\xff\xfe\x00invalid utf-8 \x80\x81")
+
+        manager = MagicMock()
+        pipeline = self._create_pipeline(manager)
+
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        assert str(broken) in stats.failed_files
+        assert stats.files == 4
+        assert manager.upsert_embedded.called
+
+    def test_metadata_preserved(self, corpus_dir):
+        """チャンクにファイルのメタデータが保持されることを確認"""
+        manager = MagicMock()
+        pipeline = self._create_pipeline(manager)
+
+        pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        for call in manager.upsert_embedded.call_args_list:
+            for doc in call.args[0]:
+                assert doc.metadata["file_extension"] == ".txt"
+                assert "file_name" in doc.metadata
+                assert "file_path" in doc.metadata
+
+    def test_run_with_worker_processes(self, corpus_dir):
+        """ワーカープロセスを使っても全チャンクが保存されることを確認"""
+        serial_manager = MagicMock()
+        serial_stats = self._create_pipeline(serial_manager).run(
+            DocumentLoaderManager().iter_files(str(corpus_dir))
+        )
+
+        manager = MagicMock()
+        pipeline = StreamingIngestPipeline(
+            loader=DocumentLoaderManager(),
+            text_splitter=create_text_splitter(chunk_size=100, chunk_overlap=10),
+            vector_store_manager=manager,
+            batch_size=10,
+            workers=2,
+            pipelined=False
+        )
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        assert stats.files == serial_stats.files
+        assert stats.chunks == serial_stats.chunks
+
+    def test_pipelined_run_embeds_and_upserts_all_chunks(self, corpus_dir):
+        """並行実行でも全チャンクが埋め込まれて保存されることを確認"""
+        manager = MagicMock()
+        manager.embeddings.embed_documents.side_effect = lambda texts: [[0.0] * 3 for _ in texts]
+        pipeline = self._create_pipeline(manager, batch_size=5, max_chunks_in_flight=50, pipelined=True)
+
+        stats = pipeline.run(DocumentLoaderManager().iter_files(str(corpus_dir)))
+
+        stored = [doc for call in manager.upsert_embedded.call_args_list for doc in call.args[0]]
+        assert len(stored) == stats.chunks
+        assert stats.batches == manager.upsert_embedded.call_count
+        assert set(stats.stages) == {"load", "embed", "upsert"}
+        assert stats.stages["upsert"].items == stats.chunks
+        manager.add_documents.assert_not_called()
+
+    def test_pipelined_in_flight_cap(self, corpus_dir):
+        """並行実行時もキューを含めた保持数が上限に収まることを確認"""
+        manager = MagicMock()
+        pipeline = self._create_pipeline(manager, batch_size=100, max_chunks_in_flight=50, pipelined=True)
+
+        batch_size = pipeline.effective_batch_size
+        assert (3 + 2 * pipeline.queue_size) * batch_size <= 50
@@ -136,6 +136,33 @@ class TestJapaneseTextSplitter:
         assert 1 in ids
         assert 2 in ids
 
+    def test_iter_split_documents_matches_split_documents(self):
+        """逐次分割の結果が一括分割と一致することを確認"""
+        splitter = JapaneseTextSplitter(chunk_size=100, chunk_overlap=20)
+        documents = [
+            Document(page_content="これは最初のドキュメントです。" * 10, metadata={"id": 1}),
+            Document(page_content="これは二番目のドキュメントです。" * 10, metadata={"id": 2})
+        ]
+
+        chunks = list(splitter.iter_split_documents(iter(documents)))
+        expected = splitter.split_documents(documents)
+
+        assert [c.page_content for c in chunks] == [c.page_content for c in expected]
+
+    def test_chunk_index_per_source(self):
+        """チャンク番号がソースごとに0から振られることを確認"""
+        splitter = JapaneseTextSplitter(chunk_size=50, chunk_overlap=0)
+        documents = [
+            Document(page_content="これは最初のドキュメントです。" * 10, metadata={"file_path": "/a.txt"}),
+            Document(page_content="これは二番目のドキュメントです。" * 10, metadata={"file_path": "/b.txt"})
+        ]
+
+        split_docs = splitter.split_documents(documents)
+
+        for path in ["/a.txt", "/b.txt"]:
+            indices = [d.metadata["chunk_index"] for d in split_docs if d.metadata["file_path"] == path]
+            assert indices == list(range(len(indices)))
+
     def test_chunk_overlap(self):
         """チャンクオーバーラップのテスト"""
         splitter = JapaneseTextSplitter(chunk_size=50, chunk_overlap=10)
@@ -0,0 +1,684 @@
+"""
+Qdrantベクターストアモジュールのテスト
+※インメモリのQdrantクライアントを使用するため、外部サービスは不要です
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from qdrant_client.models import CollectionStatus
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from qdrant_client import QdrantClient
+from vector_store.qdrant_client import QdrantVectorStoreManager, generate_point_id
+
+
+@pytest.fixture
+def manager():
+    """インメモリのQdrantに接続したマネージャーを返す"""
+    vector_store_manager = QdrantVectorStoreManager(
+        collection_name="test_documents",
+        embeddings=DeterministicFakeEmbedding(size=768)
+    )
+    vector_store_manager._client = QdrantClient(location=":memory:")
+    vector_store_manager.create_collection()
+    return vector_store_manager
+
+
+def _document(text, file_path):
+    return Document(
+        page_content=text,
+        metadata={"file_path": file_path, "file_name": file_path.rsplit("/", 1)[-1]}
+    )
+
+
+class TestQdrantVectorStoreManager:
+    """QdrantVectorStoreManagerクラスのテスト"""
+
+    def test_add_and_search(self, manager):
+        """追加したドキュメントを検索できることを確認"""
+        manager.add_documents([
+            _document("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+            _document("富士山の標高は3776メートルです。", "/docs/fuji.txt")
+        ])
+
+        results = manager.similarity_search_with_score("東京タワーの高さは333メートルです。", k=1)
+
+        assert results[0][0].metadata["file_name"] == "tower.txt"
+
+    def test_delete_by_file_paths(self, manager):
+        """ファイルパス指定でポイントが削除されることを確認"""
+        manager.add_documents([
+            _document("チャンク1", "/docs/a.txt"),
+            _document("チャンク2", "/docs/a.txt"),
+            _document("チャンク3", "/docs/b.txt")
+        ])
+
+        manager.delete_by_file_paths(["/docs/a.txt"])
+
+        assert manager.get_collection_info()["points_count"] == 1
+        remaining = manager.similarity_search("チャンク", k=5)
+        assert [doc.metadata["file_path"] for doc in remaining] == ["/docs/b.txt"]
+
+    def test_methods_require_initialization(self):
+        """初期化前の操作でエラーになることを確認"""
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+
+        with pytest.raises(ValueError):
+            vector_store_manager.create_collection()
+
+        with pytest.raises(ValueError):
+            vector_store_manager.delete_by_file_paths(["/docs/a.txt"])
+
+    def test_initialize_with_grpc(self):
+        """prefer_grpcが有効な場合はgRPCのクライアントを作成することを確認"""
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+        vector_store_manager.prefer_grpc = True
+
+        client = vector_store_manager.initialize()
+
+        assert client.init_options["prefer_grpc"] is True
+        assert client.init_options["grpc_port"] == vector_store_manager.grpc_port
+
+    def test_initialize_with_local_path(self, tmp_path):
+        """pathを設定した場合はファイルに保存するローカルモードで動くことを確認"""
+        vector_store_manager = QdrantVectorStoreManager(
+            collection_name="test_documents",
+            embeddings=DeterministicFakeEmbedding(size=768)
+        )
+        vector_store_manager.path = str(tmp_path / "qdrant")
+        vector_store_manager.initialize()
+        vector_store_manager.create_collection()
+        vector_store_manager.add_documents([_document("本文", "/docs/a.txt")])
+        vector_store_manager.client.close()
+
+        reopened = QdrantVectorStoreManager(collection_name="test_documents")
+        reopened.path = str(tmp_path / "qdrant")
+        reopened.initialize()
+
+        assert reopened.is_local
+        assert reopened.get_collection_info()["points_count"] == 1
+
+    def test_add_documents_is_idempotent(self, manager):
+        """同じドキュメントを再追加してもポイントが増えないことを確認"""
+        documents = [
+            _document("チャンク1", "/docs/a.txt"),
+            _document("チャンク2", "/docs/a.txt")
+        ]
+
+        first_ids = manager.add_documents(documents)
+        second_ids = manager.add_documents(documents)
+
+        assert first_ids == second_ids
+        assert manager.get_collection_info()["points_count"] == 2
+
+    def test_upsert_embedded_is_searchable(self, manager):
+        """埋め込み済みで保存したポイントをLangChain経由で検索できることを確認"""
+        documents = [
+            _document("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+            _document("富士山の標高は3776メートルです。", "/docs/fuji.txt")
+        ]
+        vectors = manager.embeddings.embed_documents([d.page_content for d in documents])
+
+        manager.upsert_embedded(documents, vectors)
+        results = manager.similarity_search("富士山の標高は3776メートルです。", k=1)
+
+        assert results[0].page_content == "富士山の標高は3776メートルです。"
+        assert results[0].metadata["file_name"] == "fuji.txt"
+
+    def test_upload_embedded_is_searchable(self, manager):
+        """一括アップロードしたポイントをLangChain経由で検索できることを確認"""
+        documents = [
+            _document("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+            _document("富士山の標高は3776メートルです。", "/docs/fuji.txt")
+        ]
+        vectors = manager.embeddings.embed_documents([doc.page_content for doc in documents])
+
+        ids = manager.upload_embedded(documents, iter(vectors), batch_size=1)
+
+        assert ids == [generate_point_id(doc) for doc in documents]
+        assert manager.get_collection_info()["points_count"] == 2
+        results = manager.similarity_search("富士山の標高は3776メートルです。", k=1)
+        assert results[0].metadata["file_name"] == "fuji.txt"
+
+    def test_bulk_add_documents_matches_add_documents(self, manager):
+        """一括保存でもadd_documentsと同じIDとペイロードになることを確認"""
+        documents = [_document(f"チャンク{i}", "/docs/a.txt") for i in range(5)]
+
+        bulk_ids = manager.bulk_add_documents(documents, embed_batch_size=2)
+        bulk_payloads = {r.id: r.payload for r in manager.client.retrieve(manager.collection_name, bulk_ids)}
+        manager.create_collection(force=True)
+        manager._vector_store = None
+        ids = manager.add_documents(documents)
+        payloads = {r.id: r.payload for r in manager.client.retrieve(manager.collection_name, ids)}
+
+        assert bulk_ids == ids
+        assert bulk_payloads == payloads
+
+    def test_create_collection_applies_index_settings(self):
+        """HNSW・ディスク配置・セグメント設定がコレクション作成リクエストに反映されることを確認"""
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+        vector_store_manager._client = MagicMock()
+        vector_store_manager._client.get_collections.return_value.collections = []
+
+        vector_store_manager.create_collection(
+            hnsw_m=8,
+            hnsw_ef_construct=64,
+            on_disk_vectors=True,
+            on_disk_payload=False,
+            default_segment_number=2
+        )
+
+        kwargs = vector_store_manager._client.create_collection.call_args.kwargs
+        assert kwargs["hnsw_config"].m == 8
+        assert kwargs["hnsw_config"].ef_construct == 64
+        assert kwargs["vectors_config"].on_disk is True
+        assert kwargs["on_disk_payload"] is False
+        assert kwargs["optimizers_config"].default_segment_number == 2
+        indexed = {call.kwargs["field_name"] for call in vector_store_manager._client.create_payload_index.call_args_list}
+        assert {"metadata.file_extension", "metadata.file_dirs", "metadata.source", "metadata.line_number"} <= indexed
+
+    def test_search_with_hnsw_ef(self, manager):
+        """検索時にhnsw_efを指定しても同じ結果が得られることを確認"""
+        manager.add_documents([
+            _document("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+            _document("富士山の標高は3776メートルです。", "/docs/fuji.txt")
+        ])
+
+        results = manager.similarity_search_with_score("富士山の標高は3776メートルです。", k=1, hnsw_ef=256)
+
+        assert results[0][0].metadata["file_name"] == "fuji.txt"
+        assert manager._search_params(256).hnsw_ef == 256
+        assert manager._search_params() is None
+
+    @pytest.mark.parametrize("quantization", ["scalar", "binary"])
+    def test_create_collection_with_quantization(self, quantization):
+        """量子化したベクトルをRAMに、元のベクトルをディスクに置くことを確認"""
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+        vector_store_manager._client = MagicMock()
+        vector_store_manager._client.get_collections.return_value.collections = []
+
+        vector_store_manager.create_collection(quantization=quantization)
+
+        kwargs = vector_store_manager._client.create_collection.call_args.kwargs
+        quantization_config = getattr(kwargs["quantization_config"], quantization)
+        assert quantization_config.always_ram is True
+        assert kwargs["vectors_config"].on_disk is True
+        assert vector_store_manager._search_params().quantization.rescore is True
+
+    def test_create_collection_invalid_quantization(self, manager):
+        """不正な量子化の種類でエラーになることを確認"""
+        with pytest.raises(ValueError):
+            manager.create_collection(force=True, quantization="pq")
+
+    def test_search_with_oversampling(self, manager):
+        """oversampling・rescoreを指定して検索できることを確認"""
+        manager.add_documents([
+            _document("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+            _document("富士山の標高は3776メートルです。", "/docs/fuji.txt")
+        ])
+
+        results = manager.similarity_search_with_score(
+            "富士山の標高は3776メートルです。", k=1, oversampling=3.0, rescore=True
+        )
+
+        assert results[0][0].metadata["file_name"] == "fuji.txt"
+        assert manager._search_params(oversampling=3.0).quantization.oversampling == 3.0
+
+    def test_upsert_embedded_length_mismatch(self, manager):
+        """ドキュメント数とベクトル数が違う場合にエラーになることを確認"""
+        with pytest.raises(ValueError):
+            manager.upsert_embedded([_document("本文", "/docs/a.txt")], [])
+
+    def test_source_files_roundtrip(self, manager):
+        """取得元ファイルの更新・依存ファイルの検索・取り除きを確認"""
+        representative = _document("共通の本文", "/docs/a.txt")
+        representative.metadata["source_files"] = ["/docs/a.txt"]
+        other = _document("別の本文", "/docs/c.txt")
+        other.metadata["source_files"] = ["/docs/c.txt"]
+        point_id, _ = manager.add_documents([representative, other])
+
+        manager.set_source_files({point_id: ["/docs/a.txt", "/docs/b.txt"]})
+
+        stored = manager.client.retrieve(manager.collection_name, [point_id])[0].payload["metadata"]
+        assert stored["source_files"] == ["/docs/a.txt", "/docs/b.txt"]
+        assert stored["file_name"] == "a.txt"
+        assert manager.find_dependent_files(["/docs/a.txt"]) == {"/docs/b.txt"}
+        assert manager.find_dependent_files(["/docs/c.txt"]) == set()
+
+        assert manager.remove_source_files(["/docs/b.txt"]) == 1
+        stored = manager.client.retrieve(manager.collection_name, [point_id])[0].payload["metadata"]
+        assert stored["source_files"] == ["/docs/a.txt"]
+
+
+class TestGeneratePointId:
+    """generate_point_id関数のテスト"""
+
+    def test_same_document_same_id(self):
+        """同じ内容・ソース・チャンク番号から同じIDが生成されることを確認"""
+        doc1 = Document(page_content="本文", metadata={"file_path": "/docs/a.txt", "chunk_index": 0})
+        doc2 = Document(page_content="本文", metadata={"file_path": "/docs/a.txt", "chunk_index": 0})
+
+        assert generate_point_id(doc1) == generate_point_id(doc2)
+
+    def test_different_inputs_different_ids(self):
+        """ソース・チャンク番号・内容のいずれかが違えば別のIDになることを確認"""
+        base = Document(page_content="本文", metadata={"file_path": "/docs/a.txt", "chunk_index": 0})
+        other_path = Document(page_content="本文", metadata={"file_path": "/docs/b.txt", "chunk_index": 0})
+        other_index = Document(page_content="本文", metadata={"file_path": "/docs/a.txt", "chunk_index": 1})
+        other_content = Document(page_content="別の本文", metadata={"file_path": "/docs/a.txt", "chunk_index": 0})
+
+        ids = {generate_point_id(d) for d in [base, other_path, other_index, other_content]}
+
+        assert len(ids) == 4
+
+    def test_falls_back_to_source(self):
+        """file_pathがない場合はsourceを使うことを確認"""
+        doc1 = Document(page_content="Q&A", metadata={"source": "qa.jsonl", "chunk_index": 0})
+        doc2 = Document(page_content="Q&A", metadata={"source": "other.jsonl", "chunk_index": 0})
+
+        assert generate_point_id(doc1) != generate_point_id(doc2)
+
+
+
+class TestReindex:
+    """エイリアスを使った再構築のテスト"""
+
+    @pytest.fixture
+    def client(self):
+        return QdrantClient(location=":memory:")
+
+    def _manager(self, client):
+        vector_store_manager = QdrantVectorStoreManager(
+            collection_name="docs",
+            embeddings=DeterministicFakeEmbedding(size=768)
+        )
+        vector_store_manager._client = client
+        return vector_store_manager
+
+    def _build(self, client, text):
+        builder = self._manager(client)
+        builder.begin_reindex()
+        builder.create_collection()
+        builder.add_documents([_document(text, "/docs/a.txt")])
+        return builder
+
+    def _contents(self, client):
+        return [doc.page_content for doc in self._manager(client).similarity_search("本文", k=5)]
+
+    def test_alias_switches_after_build(self, client):
+        """構築中は現在のバージョン、切り替え後は新しいバージョンが検索されることを確認"""
+        self._build(client, "旧版の本文").finish_reindex()
+
+        builder = self._build(client, "新版の本文")
+        assert self._contents(client) == ["旧版の本文"]
+
+        builder.finish_reindex()
+        assert self._contents(client) == ["新版の本文"]
+        assert builder.collection_name == "docs"
+        assert self._manager(client).get_collection_info()["collection"] == builder.list_versions()[-1]
+
+    def test_content_version_is_shared_through_qdrant(self, client):
+        """再構築中に更新した内容バージョンを、別のマネージャーがエイリアス名で参照できることを確認"""
+        self._build(client, "旧版の本文").finish_reindex()
+        reader = self._manager(client)
+        before = reader.get_collection_info()["content_version"]
+
+        builder = self._build(client, "新版の本文")
+        version = builder.bump_content_version()
+
+        assert before == ""
+        assert reader.get_collection_info()["content_version"] == version
+        assert reader.get_collection_info()["points_count"] == 1
+        assert builder.list_versions() == reader.list_versions()
+
+    def test_old_versions_are_deleted(self, client):
+        """keep_versionsより古いバージョンが削除されることを確認"""
+        for i in range(3):
+            removed = self._build(client, f"第{i}版の本文").finish_reindex(keep_versions=1)
+
+        versions = self._manager(client).list_versions()
+        assert len(removed) == 1
+        assert len(versions) == 2
+        assert self._manager(client).get_alias_target() == versions[-1]
+
+    def test_migrates_plain_collection(self, client):
+        """エイリアス導入前の同名コレクションが置き換えられることを確認"""
+        plain = self._manager(client)
+        plain.create_collection()
+        plain.add_documents([_document("移行前の本文", "/docs/a.txt")])
+
+        self._build(client, "移行後の本文").finish_reindex()
+
+        assert self._contents(client) == ["移行後の本文"]
+        assert "docs" not in {c.name for c in client.get_collections().collections}
+
+    def test_migration_keeps_plain_collection_if_target_is_missing(self, client):
+        """切り替え先のコレクションが存在しない場合は、同名のコレクションを削除しないことを確認"""
+        plain = self._manager(client)
+        plain.create_collection()
+        plain.add_documents([_document("移行前の本文", "/docs/a.txt")])
+
+        with pytest.raises(Exception):
+            self._manager(client).switch_alias("docs__v00000000000000000")
+
+        assert self._contents(client) == ["移行前の本文"]
+
+    def test_migration_retries_alias_creation(self, client, monkeypatch):
+        """同名のコレクションを削除した後のエイリアスの作成に失敗してもリトライすることを確認"""
+        plain = self._manager(client)
+        plain.create_collection()
+        builder = self._build(client, "移行後の本文")
+        update = client.update_collection_aliases
+        calls = []
+
+        def flaky(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise RuntimeError("一時的なエラー")
+            return update(**kwargs)
+
+        client.update_collection_aliases = flaky
+        monkeypatch.setattr("vector_store.qdrant_client.time.sleep", lambda seconds: None)
+        builder.finish_reindex()
+
+        assert len(calls) == 2
+        assert self._contents(client) == ["移行後の本文"]
+
+    def test_resume_reindex_uses_pending_version(self, client):
+        """切り替え前のバージョンに再開して書き込めることを確認"""
+        self._build(client, "旧版の本文").finish_reindex()
+        pending = self._build(client, "新版の本文").collection_name
+
+        resumed = self._manager(client)
+        assert resumed.resume_reindex() == pending
+        resumed.finish_reindex()
+        assert self._contents(client) == ["新版の本文"]
+        assert self._manager(client).resume_reindex() is None
+
+    def test_force_on_alias_is_rejected(self, client):
+        """エイリアスを強制再作成しようとするとエラーになることを確認"""
+        self._build(client, "本文").finish_reindex()
+
+        with pytest.raises(ValueError):
+            self._manager(client).create_collection(force=True)
+
+
+def _collection_info(status, points, indexed, threshold=20000):
+    """get_collectionの戻り値を模したオブジェクト"""
+    return SimpleNamespace(
+        status=status,
+        points_count=points,
+        indexed_vectors_count=indexed,
+        config=SimpleNamespace(optimizer_config=SimpleNamespace(indexing_threshold=threshold))
+    )
+
+
+class TestBulkLoad:
+    """一括取り込みモードのテスト"""
+
+    @pytest.fixture
+    def remote_manager(self):
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+        vector_store_manager._client = MagicMock()
+        vector_store_manager._client.get_aliases.return_value.aliases = []
+        return vector_store_manager
+
+    def _thresholds(self, manager):
+        return [
+            call.kwargs["optimizers_config"].indexing_threshold
+            for call in manager._client.update_collection.call_args_list
+        ]
+
+    def test_indexing_disabled_and_restored(self, remote_manager):
+        """取り込み中は0にし、終了時に元の値へ戻すことを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(
+            CollectionStatus.GREEN, 10, 10, threshold=10000
+        )
+
+        assert remote_manager.begin_bulk_load() == 10000
+        remote_manager.end_bulk_load(poll_interval=0)
+
+        assert self._thresholds(remote_manager) == [0, 10000]
+
+    def test_interrupted_bulk_load_is_recovered(self, remote_manager):
+        """前回の中断で0のまま残っていても既定値に戻すことを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(
+            CollectionStatus.GREEN, 0, 0, threshold=0
+        )
+
+        remote_manager.begin_bulk_load()
+        remote_manager.end_bulk_load(wait=False)
+
+        assert self._thresholds(remote_manager) == [0, 20000]
+
+    def test_waits_until_optimizers_idle(self, remote_manager):
+        """最適化が終わり2回続けてgreenになるまで待つことを確認"""
+        remote_manager._client.get_collection.side_effect = [
+            _collection_info(CollectionStatus.GREEN, 100000, 0),
+            _collection_info(CollectionStatus.YELLOW, 100000, 40000),
+            _collection_info(CollectionStatus.GREEN, 100000, 90000),
+            _collection_info(CollectionStatus.GREEN, 100000, 90000)
+        ]
+
+        seconds = remote_manager.wait_for_indexing(poll_interval=0)
+
+        assert seconds >= 0
+        assert remote_manager._client.get_collection.call_count == 4
+
+    def test_unindexed_segments_do_not_block(self, remote_manager):
+        """indexing_threshold未満のセグメントが残りindexed_vectors_countが追いつかなくても完了することを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(CollectionStatus.GREEN, 100000, 99000)
+
+        remote_manager.wait_for_indexing(timeout=10, poll_interval=0)
+
+        assert remote_manager._client.get_collection.call_count == 2
+
+    def test_optimizer_error(self, remote_manager):
+        """オプティマイザがエラーを報告した場合は待たずにエラーになることを確認"""
+        info = _collection_info(CollectionStatus.RED, 100000, 0)
+        info.optimizer_status = SimpleNamespace(error="No space left on device")
+        remote_manager._client.get_collection.return_value = info
+
+        with pytest.raises(Exception, match="インデックスの作成に失敗しました"):
+            remote_manager.wait_for_indexing(poll_interval=0)
+
+    def test_wait_timeout(self, remote_manager):
+        """時間内に完了しない場合はTimeoutErrorになることを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(
+            CollectionStatus.YELLOW, 100000, 0
+        )
+
+        with pytest.raises(TimeoutError):
+            remote_manager.wait_for_indexing(timeout=0, poll_interval=0)
+
+    def test_local_mode_does_not_wait(self, manager):
+        """ローカルモードではインデックスの作成を待たないことを確認"""
+        manager.begin_bulk_load()
+        manager.add_documents([_document("本文", "/docs/a.txt")])
+
+        assert manager.is_local
+        assert manager.end_bulk_load() == 0.0
+
+
+
+class TestAsyncWrites:
+    """非同期書き込みのテスト"""
+
+    @pytest.fixture
+    def remote_manager(self):
+        vector_store_manager = QdrantVectorStoreManager(collection_name="test_documents")
+        vector_store_manager._client = MagicMock()
+        vector_store_manager._client.get_aliases.return_value.aliases = []
+        vector_store_manager.async_writes = True
+        vector_store_manager.max_outstanding_writes = 3
+        return vector_store_manager
+
+    def _upsert(self, manager, count):
+        for i in range(count):
+            manager.upsert_embedded([_document(f"チャンク{i}", "/docs/a.txt")], [[0.1] * 768])
+
+    def _waits(self, manager):
+        return [call.kwargs["wait"] for call in manager._client.upsert.call_args_list]
+
+    def test_outstanding_writes_are_bounded(self, remote_manager):
+        """未反映の書き込みが上限に達するごとに反映を待つことを確認"""
+        self._upsert(remote_manager, 7)
+
+        assert self._waits(remote_manager) == [False, False, True, False, False, True, False]
+
+    def test_barrier_flushes_and_counts(self, remote_manager):
+        """バリアで未反映の書き込みを待ち、ポイント数を確認することを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(CollectionStatus.GREEN, 2, 2)
+        remote_manager._client.count.return_value.count = 2
+        remote_manager._client.retrieve.return_value = [SimpleNamespace(id="last")]
+        self._upsert(remote_manager, 2)
+
+        assert remote_manager.write_barrier() == 2
+        assert self._waits(remote_manager) == [False, False, True]
+        assert remote_manager._client.count.call_args.kwargs["exact"] is True
+
+    def test_barrier_detects_missing_points(self, remote_manager):
+        """最後に保存したポイントが存在しない場合はエラーになることを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(CollectionStatus.GREEN, 1, 1)
+        remote_manager._client.count.return_value.count = 1
+        remote_manager._client.retrieve.return_value = []
+        self._upsert(remote_manager, 2)
+
+        with pytest.raises(Exception, match="最後に保存したポイントが見つかりません"):
+            remote_manager.write_barrier()
+
+    def test_barrier_allows_rewritten_ids(self, manager):
+        """リトライなどで同じIDを保存し直してもエラーにならないことを確認"""
+        document = _document("東京タワーの高さは333メートルです。", "/docs/tower.txt")
+        vectors = manager.embeddings.embed_documents([document.page_content])
+        for _ in range(3):
+            manager.upsert_embedded([document], vectors)
+
+        assert manager.write_barrier() == 1
+
+    def test_barrier_detects_red_status(self, remote_manager):
+        """コレクションのステータスが異常な場合はエラーになることを確認"""
+        remote_manager._client.get_collection.return_value = _collection_info(CollectionStatus.RED, 1, 1)
+        self._upsert(remote_manager, 1)
+
+        with pytest.raises(Exception, match="ステータスが異常です"):
+            remote_manager.write_barrier()
+
+    def test_local_mode(self, manager):
+        """ローカルモードでも非同期書き込みの結果を検索できることを確認"""
+        manager.async_writes = True
+        manager.upsert_embedded(
+            [_document("東京タワーの高さは333メートルです。", "/docs/tower.txt")],
+            manager.embeddings.embed_documents(["東京タワーの高さは333メートルです。"])
+        )
+
+        assert manager.write_barrier() == 1
+        assert manager.similarity_search("東京タワー", k=1)[0].metadata["file_name"] == "tower.txt"
+
+
+class TestHybridSearch:
+    """密ベクトルと疎ベクトルのハイブリッド検索のテスト"""
+
+    DOCUMENTS = [
+        ("東京タワーの高さは333メートルです。", "/docs/tower.txt"),
+        ("富士山の標高は3776メートルです。", "/docs/fuji.txt"),
+        ("就業規則第12条に有給休暇の申請手続きを定める。", "/docs/rules.txt")
+    ]
+
+    @pytest.fixture
+    def loaded(self, manager):
+        manager.add_documents([_document(text, path) for text, path in self.DOCUMENTS])
+        return manager
+
+    def test_collection_has_sparse_vectors(self, loaded):
+        """コレクション作成時に疎ベクトルが追加され、保存したポイントが持つことを確認"""
+        point = loaded.client.scroll("test_documents", limit=1, with_vectors=True)[0][0]
+
+        assert loaded.has_sparse_vectors()
+        assert set(point.vector) == {"", "text-sparse"}
+
+    def test_sparse_search_without_embeddings(self, loaded):
+        """埋め込みモデルなしでも疎ベクトルで検索できることを確認（Ollama停止時のフォールバック）"""
+        loaded.embeddings = None
+
+        results = loaded.similarity_search_with_score("有給休暇の申請", k=1, retrieval_mode="sparse")
+
+        assert results[0][0].metadata["file_name"] == "rules.txt"
+        assert results[0][0].metadata["_id"]
+
+    def test_hybrid_search_fuses_rankings(self, loaded):
+        """hybridは密ベクトルと疎ベクトルの順位をRRFで統合することを確認"""
+        results = loaded.similarity_search_with_score("東京タワーの高さは333メートルです。", k=3, retrieval_mode="hybrid")
+
+        # 両方で1位のドキュメントが先頭になる（スコアはRRFの値のため順位のみ確認する）
+        assert results[0][0].metadata["file_name"] == "tower.txt"
+        assert len(results) == 3
+        assert results[0][1] > results[1][1]
+
+    def test_alias_target_is_cached(self, loaded):
+        """検索・保存のたびにエイリアスの参照先を問い合わせないことを確認"""
+        loaded.client.get_aliases = MagicMock(wraps=loaded.client.get_aliases)
+
+        for _ in range(3):
+            loaded.similarity_search("東京タワー", k=1, retrieval_mode="hybrid")
+        loaded.add_documents([_document("大阪城の天守閣は5層8階です。", "/docs/castle.txt")])
+        loaded.write_barrier()
+
+        assert loaded.client.get_aliases.call_count == 0
+
+    def test_hybrid_search_with_filter(self, loaded):
+        """hybridでもメタデータで絞り込めることを確認"""
+        from vector_store.filters import create_metadata_filter
+
+        results = loaded.similarity_search(
+            "東京タワー", k=3, retrieval_mode="hybrid", filter=create_metadata_filter(file_name="fuji.txt")
+        )
+
+        assert [doc.metadata["file_name"] for doc in results] == ["fuji.txt"]
+
+    def test_collection_without_sparse_vectors(self, manager, monkeypatch):
+        """疎ベクトルのないコレクションでは、hybridは密ベクトルのみ、sparseはエラーになることを確認"""
+        from config import config
+
+        monkeypatch.setattr(config.sparse, "enabled", False)
+        manager.create_collection(force=True)
+        manager.add_documents([_document(text, path) for text, path in self.DOCUMENTS])
+
+        results = manager.similarity_search_with_score("東京タワーの高さは333メートルです。", k=1, retrieval_mode="hybrid")
+
+        assert results[0][1] == pytest.approx(1.0, abs=1e-5)
+        with pytest.raises(ValueError):
+            manager.similarity_search("東京タワー", retrieval_mode="sparse")
+
+
+class TestMaxMarginalRelevanceSearch:
+    """QdrantVectorStoreManagerのMMR検索のテスト"""
+
+    @pytest.fixture
+    def loaded(self, manager):
+        # 同じファイルの重なりのあるチャンク（ほぼ同じ本文）と、別のファイルのチャンク
+        manager.add_documents([
+            Document(page_content="東京タワーの高さは333メートルです。", metadata={"file_path": "/docs/tower.txt", "chunk_index": i})
+            for i in range(3)
+        ] + [_document("富士山の標高は3776メートルです。", "/docs/fuji.txt")])
+        return manager
+
+    @pytest.mark.parametrize("retrieval_mode", ["dense", "hybrid"])
+    def test_diverse_results(self, loaded, retrieval_mode):
+        """重複した候補の代わりに別のドキュメントを選ぶことを確認"""
+        query = "東京タワーの高さは333メートルです。"
+
+        plain = loaded.similarity_search_with_score(query, k=2, retrieval_mode=retrieval_mode)
+        diverse = loaded.max_marginal_relevance_search_with_score(
+            query, k=2, fetch_k=4, lambda_mult=0.3, retrieval_mode=retrieval_mode
+        )
+
+        assert [doc.metadata["file_path"] for doc, _ in plain] == ["/docs/tower.txt", "/docs/tower.txt"]
+        assert [doc.metadata["file_path"] for doc, _ in diverse] == ["/docs/tower.txt", "/docs/fuji.txt"]
+        assert diverse[0][0].metadata["_id"]
+
+    def test_sparse_is_not_supported(self, loaded):
+        """疎ベクトルのみの検索ではMMRは使えないことを確認"""
+        with pytest.raises(ValueError):
+            loaded.max_marginal_relevance_search_with_score("東京タワー", retrieval_mode="sparse")